@@ -15,6 +15,7 @@ from routes.feedback import feedback_bp
 from routes.user import user_bp
 from config import Config
 from middleware.business_context import BusinessContextMiddleware
+from middleware.usage import UsageMiddleware
 
 
 def create_app():
@@ -48,6 +49,9 @@ def create_app():
     # Initialize business context middleware
     BusinessContextMiddleware(app)
 
+    # Attribute Gemini token usage to requests, users and routes
+    UsageMiddleware(app)
+
     # Register blueprints
     app.register_blueprint(upload_bp, url_prefix="/api/upload")
     app.register_blueprint(evaluate_bp, url_prefix="/api/evaluate")
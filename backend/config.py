@@ -42,8 +42,163 @@ class Config:
     # Gemini API configuration
     GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
 
+    # Every Gemini call goes through a process-wide guard: adaptive (AIMD)
+    # concurrency limit, per-model requests/minute, retries with jittered
+    # exponential backoff on 429/5xx/timeouts, and a circuit breaker
+    GEMINI_TIMEOUT_SECONDS = float(os.environ.get("GEMINI_TIMEOUT_SECONDS", 120))
+    GEMINI_MAX_CONCURRENCY = int(os.environ.get("GEMINI_MAX_CONCURRENCY", 16))
+    GEMINI_MIN_CONCURRENCY = int(os.environ.get("GEMINI_MIN_CONCURRENCY", 2))
+    GEMINI_DEFAULT_RPM = int(os.environ.get("GEMINI_DEFAULT_RPM", 600))
+    # Per-model overrides, e.g. GEMINI_MODEL_RPM="gemini-2.5-flash=1000,gemini-2.0-flash=2000"
+    GEMINI_MODEL_RPM = {
+        name.strip(): int(rpm)
+        for name, rpm in (
+            item.split("=", 1)
+            for item in os.environ.get("GEMINI_MODEL_RPM", "").split(",")
+            if "=" in item
+        )
+    }
+    GEMINI_MAX_RETRIES = int(os.environ.get("GEMINI_MAX_RETRIES", 4))
+    GEMINI_BACKOFF_BASE_SECONDS = float(
+        os.environ.get("GEMINI_BACKOFF_BASE_SECONDS", 1.0)
+    )
+    GEMINI_BACKOFF_MAX_SECONDS = float(os.environ.get("GEMINI_BACKOFF_MAX_SECONDS", 20))
+    # Consecutive failures that open the circuit, and how long it stays open
+    GEMINI_CIRCUIT_FAILURES = int(os.environ.get("GEMINI_CIRCUIT_FAILURES", 5))
+    GEMINI_CIRCUIT_RESET_SECONDS = int(
+        os.environ.get("GEMINI_CIRCUIT_RESET_SECONDS", 30)
+    )
+
+    # Two-tier cache: in-process LRU in front of a store shared by all workers,
+    # "sqlite" (single node), "redis" (requires the redis package) or "memory"
+    CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "sqlite")
+    # Holds OCR text and analysis results; created owner-only (0600) in the app's
+    # instance folder rather than the world-readable temp directory
+    CACHE_SQLITE_PATH = os.environ.get(
+        "CACHE_SQLITE_PATH",
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "instance", "cache.sqlite3"
+        ),
+    )
+    CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_SHARED_MAX_ENTRIES = int(os.environ.get("CACHE_SHARED_MAX_ENTRIES", 100000))
+    CACHE_LOCAL_MAX_ENTRIES = int(os.environ.get("CACHE_LOCAL_MAX_ENTRIES", 1024))
+    CACHE_LOCAL_TTL_SECONDS = int(os.environ.get("CACHE_LOCAL_TTL_SECONDS", 300))
+    # How long other workers wait for one worker computing the same value
+    CACHE_LEASE_SECONDS = int(os.environ.get("CACHE_LEASE_SECONDS", 30))
+
+    # Cache of Gemini text responses keyed by model, prompt, schema and
+    # generation config; repeated evaluations of the same input are free
+    LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", 3600))
+    # Supabase token verifications are reused for this long (0 disables)
+    AUTH_TOKEN_CACHE_SECONDS = int(os.environ.get("AUTH_TOKEN_CACHE_SECONDS", 60))
+
     # Poppler configuration for PDF processing
     POPPLER_PATH = os.environ.get("POPPLER_PATH")  # Path to Poppler binaries
+    # PDF pages whose embedded text has at least this many characters skip OCR
+    PDF_TEXT_LAYER_MIN_CHARS = int(os.environ.get("PDF_TEXT_LAYER_MIN_CHARS", 40))
+    # Worker processes rasterizing/encoding PDF pages (0 renders in the request
+    # thread); shared across requests, so this caps concurrent page rendering
+    PDF_RENDER_WORKERS = int(
+        os.environ.get("PDF_RENDER_WORKERS", min(os.cpu_count() or 1, 8))
+    )
+    # pdf2image thread_count: poppler subprocesses per render task
+    PDF_POPPLER_THREADS = int(os.environ.get("PDF_POPPLER_THREADS", 1))
+    PDF_PAGES_PER_TASK = int(os.environ.get("PDF_PAGES_PER_TASK", 2))
+    # Skip OCR for blank scans and near-duplicates of earlier pages
+    PDF_SKIP_REDUNDANT_PAGES = (
+        os.environ.get("PDF_SKIP_REDUNDANT_PAGES", "true").lower() == "true"
+    )
+    # Pages with less ink than this fraction of their area count as blank
+    PDF_BLANK_INK_COVERAGE = float(os.environ.get("PDF_BLANK_INK_COVERAGE", 0.0005))
+    # Maximum fraction of differing perceptual-hash bits for a duplicate page
+    PDF_DUPLICATE_HASH_DISTANCE = float(
+        os.environ.get("PDF_DUPLICATE_HASH_DISTANCE", 0.03)
+    )
+    # Progressive mode reads pages in chunks and stops once the required
+    # extraction fields (plus PDF_EARLY_STOP_FIELDS) are found
+    PDF_PROGRESSIVE_MODE = (
+        os.environ.get("PDF_PROGRESSIVE_MODE", "false").lower() == "true"
+    )
+    PDF_PROGRESSIVE_CHUNK_PAGES = int(os.environ.get("PDF_PROGRESSIVE_CHUNK_PAGES", 2))
+    PDF_EARLY_STOP_FIELDS = [
+        field.strip()
+        for field in os.environ.get("PDF_EARLY_STOP_FIELDS", "").split(",")
+        if field.strip()
+    ]
+    # Fields only count as found on chunks whose pages all read at least this well
+    PDF_EARLY_STOP_MIN_CONFIDENCE = float(
+        os.environ.get("PDF_EARLY_STOP_MIN_CONFIDENCE", 0.7)
+    )
+
+    # Local Tesseract OCR tier for printed pages (requires pytesseract)
+    LOCAL_OCR_ENABLED = os.environ.get("LOCAL_OCR_ENABLED", "true").lower() == "true"
+    LOCAL_OCR_LANGUAGES = os.environ.get("LOCAL_OCR_LANGUAGES", "eng")
+    # Printed pages below this mean word confidence are escalated to Gemini
+    LOCAL_OCR_MIN_CONFIDENCE = float(os.environ.get("LOCAL_OCR_MIN_CONFIDENCE", 0.80))
+    TESSERACT_CMD = os.environ.get("TESSERACT_CMD")  # Path to tesseract binary
+
+    # Image encoding for vision OCR requests (JPEG, WEBP, PNG or ORIGINAL)
+    OCR_IMAGE_FORMAT = os.environ.get("OCR_IMAGE_FORMAT", "JPEG")
+    OCR_IMAGE_QUALITY = int(os.environ.get("OCR_IMAGE_QUALITY", 80))
+    OCR_IMAGE_GRAYSCALE = (
+        os.environ.get("OCR_IMAGE_GRAYSCALE", "true").lower() == "true"
+    )
+    OCR_IMAGE_MAX_DIMENSION = int(os.environ.get("OCR_IMAGE_MAX_DIMENSION", 2048))
+    OCR_IMAGE_MIN_DIMENSION = int(os.environ.get("OCR_IMAGE_MIN_DIMENSION", 1024))
+    # Images are downscaled until the median text line is about this many pixels
+    OCR_TARGET_LINE_HEIGHT = int(os.environ.get("OCR_TARGET_LINE_HEIGHT", 28))
+
+    # Pages packed into one Gemini OCR request for PDFs (1 disables batching);
+    # batches also stay under the byte and image-token budgets
+    OCR_BATCH_MAX_PAGES = int(os.environ.get("OCR_BATCH_MAX_PAGES", 4))
+    OCR_BATCH_MAX_BYTES = int(os.environ.get("OCR_BATCH_MAX_BYTES", 16 * 1024 * 1024))
+    OCR_BATCH_MAX_IMAGE_TOKENS = int(
+        os.environ.get("OCR_BATCH_MAX_IMAGE_TOKENS", 8000)
+    )
+
+    # OCR and structured field extraction in one Gemini call for
+    # /image/structured and short PDFs (falls back to two calls on schema errors)
+    OCR_FUSED_EXTRACTION = (
+        os.environ.get("OCR_FUSED_EXTRACTION", "true").lower() == "true"
+    )
+    # Multi-page documents with at least this many pages extract fields from
+    # page windows while OCR continues, then merge them (0 disables)
+    STRUCTURED_MAP_REDUCE_MIN_PAGES = int(
+        os.environ.get("STRUCTURED_MAP_REDUCE_MIN_PAGES", 4)
+    )
+    STRUCTURED_MAP_WINDOW_PAGES = int(os.environ.get("STRUCTURED_MAP_WINDOW_PAGES", 2))
+    STRUCTURED_MAP_WORKERS = int(os.environ.get("STRUCTURED_MAP_WORKERS", 4))
+    # "local" merges by page confidence; "llm" settles conflicting fields with
+    # one small Gemini call
+    STRUCTURED_REDUCE_MODE = os.environ.get("STRUCTURED_REDUCE_MODE", "local")
+
+    # Local quality gate for uploaded photos (blur, exposure, text size, skew)
+    IMAGE_QUALITY_GATE_ENABLED = (
+        os.environ.get("IMAGE_QUALITY_GATE_ENABLED", "true").lower() == "true"
+    )
+    # Apply contrast stretch / deskew to fixable photos instead of rejecting
+    IMAGE_QUALITY_AUTO_ENHANCE = (
+        os.environ.get("IMAGE_QUALITY_AUTO_ENHANCE", "true").lower() == "true"
+    )
+    IMAGE_MIN_SHARPNESS = float(os.environ.get("IMAGE_MIN_SHARPNESS", 200.0))
+    IMAGE_MIN_TEXT_HEIGHT = int(os.environ.get("IMAGE_MIN_TEXT_HEIGHT", 10))
+
+    # Perceptual-hash cache reusing OCR results for re-uploaded images
+    OCR_IMAGE_CACHE_ENABLED = (
+        os.environ.get("OCR_IMAGE_CACHE_ENABLED", "true").lower() == "true"
+    )
+    OCR_IMAGE_CACHE_SIZE = int(os.environ.get("OCR_IMAGE_CACHE_SIZE", 1000))
+    # Maximum Hamming distance (out of 256 bits) for two of one user's images to
+    # share a result
+    OCR_IMAGE_CACHE_MAX_DISTANCE = int(
+        os.environ.get("OCR_IMAGE_CACHE_MAX_DISTANCE", 8)
+    )
+    # Exact-hash copies in the shared cache tier expire after this long
+    OCR_IMAGE_CACHE_TTL_SECONDS = int(
+        os.environ.get("OCR_IMAGE_CACHE_TTL_SECONDS", 86400)
+    )
 
     # Supabase configuration
     SUPABASE_URL = os.environ.get("SUPABASE_URL")
@@ -68,10 +223,104 @@ class Config:
         "pa-IN",  # Punjabi
     ]
 
+    # Transcription engine: "auto" picks by duration/language, or force
+    # "local" / "google_speech" / "gemini"
+    TRANSCRIPTION_ENGINE = os.environ.get("TRANSCRIPTION_ENGINE", "auto")
+    # Audio at least this long goes to Gemini in one request instead of chunked Speech calls
+    GEMINI_AUDIO_MIN_SECONDS = int(os.environ.get("GEMINI_AUDIO_MIN_SECONDS", 60))
+    GEMINI_AUDIO_MODEL = os.environ.get("GEMINI_AUDIO_MODEL", "gemini-2.5-flash")
+
+    # Local CPU speech recognition (Vosk) for short clips, e.g.
+    # LOCAL_ASR_MODELS="en-IN=/models/vosk-en-in,hi-IN=/models/vosk-hi"
+    LOCAL_ASR_MODELS = dict(
+        item.strip().split("=", 1)
+        for item in os.environ.get("LOCAL_ASR_MODELS", "").split(",")
+        if "=" in item
+    )
+    LOCAL_ASR_MAX_SECONDS = int(os.environ.get("LOCAL_ASR_MAX_SECONDS", 30))
+    # Local transcripts below this average word confidence are redone in the cloud
+    LOCAL_ASR_MIN_CONFIDENCE = float(os.environ.get("LOCAL_ASR_MIN_CONFIDENCE", 0.75))
+    # Speech-to-Text chunks of one long recording recognized at once on the async path
+    SPEECH_ASYNC_CHUNK_CONCURRENCY = int(
+        os.environ.get("SPEECH_ASYNC_CHUNK_CONCURRENCY", 4)
+    )
+
     # LLM Configuration (using Vertex AI)
     VERTEX_AI_MODEL = "gemini-1.5-pro"
     VERTEX_AI_LOCATION = "us-central1"
 
+    # Business idea evaluation: "gemini", or "stub" for a deterministic offline
+    # backend (benchmarks); the stub sleeps EVALUATION_STUB_LATENCY_SECONDS per call
+    EVALUATION_BACKEND = os.environ.get("EVALUATION_BACKEND", "gemini")
+    EVALUATION_MODEL = os.environ.get("EVALUATION_MODEL", "gemini-2.5-flash")
+    EVALUATION_STUB_LATENCY_SECONDS = float(
+        os.environ.get("EVALUATION_STUB_LATENCY_SECONDS", 0)
+    )
+
+    # /api/evaluate/batch: evaluations in flight at once, per-item timeout and
+    # overall deadline after which remaining submissions are reported as errors
+    EVALUATION_BATCH_CONCURRENCY = int(
+        os.environ.get("EVALUATION_BATCH_CONCURRENCY", 8)
+    )
+    EVALUATION_ITEM_TIMEOUT_SECONDS = float(
+        os.environ.get("EVALUATION_ITEM_TIMEOUT_SECONDS", 120)
+    )
+    EVALUATION_BATCH_DEADLINE_SECONDS = float(
+        os.environ.get("EVALUATION_BATCH_DEADLINE_SECONDS", 1800)
+    )
+    EVALUATION_BATCH_MAX_SUBMISSIONS = int(
+        os.environ.get("EVALUATION_BATCH_MAX_SUBMISSIONS", 500)
+    )
+
+    # /api/upload/comprehensive: "legacy" runs extraction -> synthesis -> case
+    # (3 LLM calls); "consolidated" (opt-in) builds the business profile from the
+    # raw OCR text and transcript in one call and writes the case from that
+    # profile (2), returning ocr_data as {"raw_text": ...} instead of fields.
+    # COMPREHENSIVE_ANALYSIS_MODEL serves the consolidated profile call;
+    # BUSINESS_SYNTHESIS_MODEL the legacy synthesis and both business case calls
+    COMPREHENSIVE_ANALYSIS_MODE = os.environ.get(
+        "COMPREHENSIVE_ANALYSIS_MODE", "legacy"
+    )
+    COMPREHENSIVE_ANALYSIS_MODEL = os.environ.get(
+        "COMPREHENSIVE_ANALYSIS_MODEL", "gemini-2.5-flash"
+    )
+    BUSINESS_SYNTHESIS_MODEL = os.environ.get(
+        "BUSINESS_SYNTHESIS_MODEL", "gemini-2.0-flash"
+    )
+
+    # Estimated input tokens per business analysis prompt; over budget, the
+    # least important context (transcript first) is shortened before sending
+    PROMPT_INPUT_TOKEN_BUDGET = int(os.environ.get("PROMPT_INPUT_TOKEN_BUDGET", 16000))
+
+    # Token usage accounting: every Gemini call is recorded with its request,
+    # user, route and pipeline stage (GET /api/user/usage and
+    # /api/user/admin/llm-usage), in the MongoDB "llm_usage" collection
+    # ("mongodb") or in process memory ("memory")
+    LLM_USAGE_STORE = os.environ.get("LLM_USAGE_STORE", "mongodb")
+    # USD per million input/output tokens for cost estimates
+    GEMINI_TOKEN_PRICES = {
+        name.strip(): tuple(float(price) for price in prices.split("/", 1))
+        for name, prices in (
+            item.split("=", 1)
+            for item in os.environ.get(
+                "GEMINI_TOKEN_PRICES",
+                "gemini-2.5-flash=0.30/2.50,gemini-2.0-flash=0.10/0.40,"
+                "gemini-1.5-pro=1.25/5.00",
+            ).split(",")
+            if "=" in item
+        )
+    }
+    # Tokens a user may spend per UTC day (0 = unlimited). Once exhausted,
+    # "reject" answers 429; "degrade" skips optional LLM stages on routes that
+    # can do without them (business case generation) and rejects elsewhere
+    USER_DAILY_TOKEN_BUDGET = int(os.environ.get("USER_DAILY_TOKEN_BUDGET", 0))
+    USER_TOKEN_BUDGET_MODE = os.environ.get("USER_TOKEN_BUDGET_MODE", "reject")
+    # Daily tokens of anonymous requests per client IP (0 = unlimited); defaults
+    # to the user budget so anonymous access cannot bypass it
+    ANONYMOUS_DAILY_TOKEN_BUDGET = int(
+        os.environ.get("ANONYMOUS_DAILY_TOKEN_BUDGET", USER_DAILY_TOKEN_BUDGET)
+    )
+
     # Business evaluation parameters - aligned with Indian startup ecosystem
     EVALUATION_CRITERIA = {
         "market_potential": 0.25,  # Size of Indian/global market opportunity
@@ -0,0 +1,239 @@
+"""
+Compare LLM round-trips, tokens and latency of the comprehensive analysis modes
+
+Runs the /api/upload/comprehensive analysis chain on a sample document text and
+transcript in both modes:
+
+    legacy        structured extraction -> profile synthesis -> business case
+    consolidated  profile from raw inputs -> business case from the profile
+
+Offline (default) the Gemini client is a stub that answers from the response
+schemas; input/output tokens are estimated at ~4 characters per token
+(prompt, system instruction and response schema) and latency is modelled per
+call from those counts. With ``--live`` the real Gemini API is called
+(GEMINI_API_KEY) and ``usage_metadata`` and wall time are reported instead.
+
+Usage:
+    python dev_tools/benchmark_comprehensive_analysis.py
+    python dev_tools/benchmark_comprehensive_analysis.py --document notes.txt \\
+        --transcript pitch.txt --live
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flask import Flask
+
+from services.business_analysis_service import (
+    BUSINESS_CASE_SYSTEM_PROMPT,
+    COMPREHENSIVE_PROFILE_SCHEMA,
+    BusinessAnalysisService,
+)
+from services.ocr_service import OCRService
+from utils.gemini_guard import create_gemini_client
+
+SAMPLE_DOCUMENT = """Accelerated Entrepreneurship Development Program
+Name: Priya Sharma  Education: B.Com  Phone: 98XXXXXX12
+Business name: Green Leaf Tiffins
+Main product/service: Home-cooked vegetarian lunch boxes delivered to offices
+in Pune's Hinjewadi IT park, ordered through WhatsApp.
+What is better than others: fresh food cooked the same morning, steel boxes
+collected back daily, monthly plans cheaper than food delivery apps.
+Customers: IT employees, paying guest residents. Competitors: local dabbawalas,
+Swiggy, Zomato, office canteen.
+Loan requirement (first month): Rs 1,20,000 for kitchen equipment, 300 steel
+boxes, a second-hand scooter and the first month of groceries.
+Timeline: trial with 40 customers in month 1, 150 customers by month 6.
+""" * 3
+
+SAMPLE_TRANSCRIPT = """So my name is Priya and I have been cooking for my
+neighbours for about two years. Many of them work in the IT park and they keep
+asking me for lunch because the canteen food is oily. I want to start a tiffin
+service, Green Leaf Tiffins. My sister will help me in the kitchen full-time and
+my husband will do deliveries in the morning before his job. We will charge 2,400
+rupees per month for a plan of 22 lunches, and single meals at 120. I need a loan
+of around one lakh twenty thousand for a bigger stove, a refrigerator, steel
+boxes and a scooter. I already have 25 people who said they will subscribe.
+""" * 2
+
+# Modelled Gemini latency: fixed overhead plus prefill and decode time
+CALL_OVERHEAD_SECONDS = 0.45
+SECONDS_PER_INPUT_TOKEN = 0.00002
+SECONDS_PER_OUTPUT_TOKEN = 0.006
+BUSINESS_CASE_CHARS = 7000
+
+
+def estimate_tokens(*texts):
+    return sum(len(text or "") for text in texts) // 4
+
+
+def sample_value(schema, name=""):
+    """A plausible answer for a response schema"""
+    kind = schema.type.value if schema.type else "STRING"
+    if kind == "OBJECT":
+        return {
+            key: sample_value(field, key) for key, field in schema.properties.items()
+        }
+    if kind == "ARRAY":
+        return [sample_value(schema.items, name) for _ in range(3)]
+    if kind in ("INTEGER", "NUMBER"):
+        return 120000
+    return f"Sample {name.replace('_', ' ')} drawn from the submitted materials"
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+        self.usage_metadata = None
+
+
+class StubModels:
+    def generate_content(self, model, contents, config=None):
+        if config.response_schema is not None:
+            return StubResponse(json.dumps(sample_value(config.response_schema)))
+        if config.system_instruction == BUSINESS_CASE_SYSTEM_PROMPT:
+            return StubResponse("x" * BUSINESS_CASE_CHARS)
+        # Legacy profile synthesis: the profile without the source notes
+        profile = sample_value(COMPREHENSIVE_PROFILE_SCHEMA)
+        profile.pop("source_notes")
+        return StubResponse(json.dumps(profile))
+
+
+class StubClient:
+    def __init__(self):
+        self.models = StubModels()
+
+
+class Recorder:
+    """Times every call and records its input/output tokens"""
+
+    def __init__(self, live):
+        self.live = live
+        self.calls = []
+
+    def record(self, call, input_texts):
+        started = time.perf_counter()
+        response = call()
+        elapsed = time.perf_counter() - started
+        usage = getattr(response, "usage_metadata", None)
+        if self.live and usage is not None:
+            input_tokens = usage.prompt_token_count or 0
+            output_tokens = usage.candidates_token_count or 0
+        else:
+            input_tokens = estimate_tokens(*input_texts)
+            output_tokens = estimate_tokens(response.text)
+            elapsed = (
+                CALL_OVERHEAD_SECONDS
+                + input_tokens * SECONDS_PER_INPUT_TOKEN
+                + output_tokens * SECONDS_PER_OUTPUT_TOKEN
+            )
+        self.calls.append((input_tokens, output_tokens, elapsed))
+        return response
+
+    def client(self, client):
+        recorder = self
+
+        class Models:
+            def generate_content(self, model, contents, config=None):
+                schema = config.response_schema
+                return recorder.record(
+                    lambda: client.models.generate_content(
+                        model=model, contents=contents, config=config
+                    ),
+                    [
+                        contents,
+                        config.system_instruction,
+                        schema.model_dump_json(exclude_none=True) if schema else "",
+                    ],
+                )
+
+        class Client:
+            models = Models()
+
+        return Client()
+
+
+def run_chain(mode, document, transcript, live):
+    recorder = Recorder(live)
+    if live:
+        client = create_gemini_client(os.environ["GEMINI_API_KEY"])
+    else:
+        client = StubClient()
+
+    business_service = BusinessAnalysisService()
+    business_service.gemini_client = recorder.client(client)
+
+    if mode == "consolidated":
+        profile = business_service.analyze_comprehensive(
+            document, transcript, use_cache=False
+        )
+        score = business_service.calculate_comprehensive_business_score(profile)
+        business_service.generate_business_case_from_profile(
+            profile, score, use_cache=False
+        )
+    else:
+        ocr_service = OCRService(
+            gemini_client=recorder.client(client), vision_client=object()
+        )
+        ocr_data = ocr_service.extract_structured_data(document, use_cache=False)
+        profile = business_service.extract_comprehensive_business_info(
+            ocr_data, transcript, use_cache=False
+        )
+        score = business_service.calculate_comprehensive_business_score(profile)
+        business_service.generate_comprehensive_business_case(
+            profile, score, ocr_data, transcript, use_cache=False
+        )
+
+    return {
+        "calls": len(recorder.calls),
+        "input_tokens": sum(call[0] for call in recorder.calls),
+        "output_tokens": sum(call[1] for call in recorder.calls),
+        "latency_s": sum(call[2] for call in recorder.calls),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--document", help="File with the document (OCR) text")
+    parser.add_argument("--transcript", help="File with the audio transcript")
+    parser.add_argument(
+        "--live", action="store_true", help="Call Gemini instead of the stubs"
+    )
+    args = parser.parse_args()
+
+    document = Path(args.document).read_text() if args.document else SAMPLE_DOCUMENT
+    transcript = (
+        Path(args.transcript).read_text() if args.transcript else SAMPLE_TRANSCRIPT
+    )
+
+    app = Flask(__name__)
+    app.config.update(
+        LLM_CACHE_ENABLED=False,
+        GEMINI_API_KEY=None,
+    )
+    with app.app_context():
+        rows = {
+            mode: run_chain(mode, document, transcript, args.live)
+            for mode in ("legacy", "consolidated")
+        }
+
+    print(f"{'mode':>12} {'calls':>6} {'in tok':>8} {'out tok':>8} {'latency':>9}")
+    for mode, row in rows.items():
+        print(
+            f"{mode:>12} {row['calls']:>6} {row['input_tokens']:>8} "
+            f"{row['output_tokens']:>8} {row['latency_s']:>8.2f}s"
+        )
+    legacy, consolidated = rows["legacy"], rows["consolidated"]
+    for key, label in (("input_tokens", "input tokens"), ("latency_s", "latency")):
+        saved = 1 - consolidated[key] / legacy[key] if legacy[key] else 0.0
+        print(f"consolidated saves {saved:.0%} {label}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Benchmark batched multi-page Gemini OCR against one request per page
+
+Synthetic PDF pages are encoded exactly as the OCR pipeline would and sent
+through OCRService's Gemini page path with a stub client. The stub models
+per-request overhead plus time per image tile and per output token, and can
+drop page delimiters at a given rate to exercise the single-page fallback.
+No credentials or network are needed.
+
+Usage:
+    python dev_tools/benchmark_ocr_batching.py --pages 20 --batch-sizes 1 2 4 8
+"""
+
+import argparse
+import io
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from flask import Flask
+from PIL import Image, ImageDraw, ImageFont
+
+from config import Config
+from services.ocr_service import OCRService
+from utils.ocr_batching import PAGE_DELIMITER, estimate_image_tokens
+from utils.ocr_image_encoder import OCRImageSettings, encode_pil_image
+
+# Flash list prices per 1M tokens
+INPUT_PRICE_PER_MILLION = 0.30
+OUTPUT_PRICE_PER_MILLION = 2.50
+OUTPUT_TOKENS_PER_PAGE = 350
+PROMPT_TOKENS = 60
+
+
+class UpstreamClock:
+    """Sleeps for scaled stub latencies and keeps the unscaled total"""
+
+    def __init__(self, time_scale):
+        self.time_scale = time_scale
+        self.simulated = 0.0
+
+    def wait(self, seconds):
+        self.simulated += seconds
+        time.sleep(seconds * self.time_scale)
+
+
+class StubVisionModels:
+    """Gemini stub: fixed overhead, time per image tile and per output token"""
+
+    def __init__(
+        self,
+        clock,
+        drop_rate,
+        base_latency=1.2,
+        per_tile=0.03,
+        per_output_token=0.004,
+    ):
+        self.clock = clock
+        self.drop_rate = drop_rate
+        self.base_latency = base_latency
+        self.per_tile = per_tile
+        self.per_output_token = per_output_token
+        self.rng = random.Random(0)
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        labels = [part for part in contents[1:] if isinstance(part, str)]
+        images = [part for part in contents if not isinstance(part, str)]
+
+        image_tokens = sum(
+            estimate_image_tokens(Image.open(io.BytesIO(image.inline_data.data)).size)
+            for image in images
+        )
+        output_tokens = OUTPUT_TOKENS_PER_PAGE * len(images)
+        self.input_tokens += PROMPT_TOKENS + image_tokens + 10 * len(labels)
+        self.output_tokens += output_tokens
+        self.clock.wait(
+            self.base_latency
+            + self.per_tile * image_tokens / 258
+            + self.per_output_token * output_tokens
+        )
+
+        if not labels:
+            return SimpleNamespace(text="stub page text")
+        sections = []
+        for label in labels:
+            page = re.search(r"\d+", label).group()
+            if self.rng.random() >= self.drop_rate:
+                sections.append(PAGE_DELIMITER.format(page=page))
+            sections.append(f"stub text of page {page}")
+        return SimpleNamespace(text="\n".join(sections))
+
+
+def make_pages(count, settings):
+    font = ImageFont.load_default(size=30)
+    pages = []
+    for number in range(1, count + 1):
+        page = Image.new("RGB", (1654, 2339), "white")  # A4 at 200 DPI
+        draw = ImageDraw.Draw(page)
+        for line in range(35):
+            text = f"page {number} line {line} " * 4
+            draw.text((120, 150 + line * 58), text, fill="black", font=font)
+        data, mime_type, encoding = encode_pil_image(page, settings)
+        pages.append(
+            {
+                "page": number,
+                "path": f"page_{number}.jpg",
+                "data": data,
+                "mime_type": mime_type,
+                "encoding": encoding,
+                "size": encoding["size"],
+            }
+        )
+    return pages
+
+
+def run(pages, batch_size, drop_rate, time_scale):
+    clock = UpstreamClock(time_scale)
+    models = StubVisionModels(clock, drop_rate)
+    service = OCRService(
+        gemini_client=SimpleNamespace(models=models), vision_client=object()
+    )
+    service.batch_max_pages = batch_size
+
+    started = time.perf_counter()
+    results = service._gemini_vision_ocr_pages(pages)
+    # Local processing time as measured, upstream time as modelled (unscaled)
+    elapsed = time.perf_counter() - started + clock.simulated * (1 - time_scale)
+
+    cost = (
+        models.input_tokens * INPUT_PRICE_PER_MILLION
+        + models.output_tokens * OUTPUT_PRICE_PER_MILLION
+    ) / 1_000_000
+    assert len(results) == len(pages)
+    return {
+        "calls": models.calls,
+        "latency_s": elapsed,
+        "input_tokens": models.input_tokens,
+        "cost_usd": cost,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument(
+        "--drop-rate",
+        type=float,
+        default=0.05,
+        help="Probability the stub omits a page delimiter",
+    )
+    parser.add_argument(
+        "--time-scale",
+        type=float,
+        default=0.01,
+        help="Multiply stub latencies by this factor (results are rescaled)",
+    )
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    with app.app_context():
+        pages = make_pages(args.pages, OCRImageSettings.from_config(app.config))
+        page_bytes = sum(len(page["data"]) for page in pages) / len(pages)
+        print(f"{args.pages} pages, {page_bytes:,.0f} B/page")
+        print(f"{'batch':>5} {'calls':>6} {'latency':>9} {'in tokens':>10} {'cost':>9}")
+        for batch_size in args.batch_sizes:
+            row = run(pages, batch_size, args.drop_rate, args.time_scale)
+            print(
+                f"{batch_size:>5} {row['calls']:>6} {row['latency_s']:>8.2f}s "
+                f"{row['input_tokens']:>10,} {row['cost_usd']:>9.5f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Sweep OCR image encoding settings: bytes uploaded vs OCR text similarity
+
+Every image in the corpus is OCR'd once as-is to get reference text, then
+re-encoded with each combination of format, quality, grayscale and target line
+height. For each setting the harness reports mean upload size and mean text
+similarity to the reference, so the smallest payload that keeps accuracy can be
+picked for the OCR_IMAGE_* settings.
+
+Usage:
+    python dev_tools/benchmark_ocr_encoding.py --corpus samples/ --ocr gemini
+    python dev_tools/benchmark_ocr_encoding.py --synthetic 5 --ocr tesseract
+"""
+
+import argparse
+import difflib
+import io
+import itertools
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PIL import Image, ImageDraw, ImageFont
+
+from utils.ocr_image_encoder import OCRImageSettings, encode_image_for_ocr
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp"}
+
+
+def tesseract_ocr(image_bytes, mime_type):
+    import pytesseract
+
+    return pytesseract.image_to_string(Image.open(io.BytesIO(image_bytes)))
+
+
+def make_gemini_ocr():
+    from google import genai as gemini_sdk
+    from google.genai import types
+
+    client = gemini_sdk.Client(api_key=os.environ["GEMINI_API_KEY"])
+    prompt = "Perform accurate OCR on the entire image, including all handwritten and printed text. Return only the raw text."
+
+    def gemini_ocr(image_bytes, mime_type):
+        response = client.models.generate_content(
+            model="gemini-2.5-flash",
+            contents=[prompt, types.Part.from_bytes(data=image_bytes, mime_type=mime_type)],
+        )
+        return response.text or ""
+
+    return gemini_ocr
+
+
+def similarity(reference, text):
+    """Character-level similarity of whitespace-normalized texts, 0-1"""
+    reference = " ".join(reference.split()).lower()
+    text = " ".join(text.split()).lower()
+    if not reference and not text:
+        return 1.0
+    return difflib.SequenceMatcher(None, reference, text, autojunk=False).ratio()
+
+
+def synthetic_corpus(count, work_dir):
+    """Colour phone-style pages with printed text at varying sizes"""
+    words = "business market revenue loan customer shop product price month".split()
+    paths = []
+    for index in range(count):
+        rng = random.Random(index)
+        font_size = rng.choice([24, 32, 48, 64])
+        font = ImageFont.load_default(size=font_size)
+        page = Image.new("RGB", (2480, 3508), (246, 241, 228))
+        draw = ImageDraw.Draw(page)
+        for line in range(int(3000 / (font_size * 1.8))):
+            text = " ".join(rng.choice(words) for _ in range(int(1800 / font_size / 4)))
+            draw.text((150, 200 + line * font_size * 1.8), text, fill=(20, 30, 90), font=font)
+        path = Path(work_dir) / f"synthetic_{index}.png"
+        page.save(path)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--corpus", help="Directory of sample page images")
+    parser.add_argument("--synthetic", type=int, default=0, help="Generate N pages")
+    parser.add_argument(
+        "--ocr",
+        choices=["tesseract", "gemini", "none"],
+        default="tesseract",
+        help="OCR engine used to score each setting (none reports bytes only)",
+    )
+    parser.add_argument("--formats", nargs="+", default=["JPEG", "WEBP", "PNG"])
+    parser.add_argument("--qualities", type=int, nargs="+", default=[50, 65, 80, 90])
+    parser.add_argument("--line-heights", type=int, nargs="+", default=[0, 20, 28, 40])
+    parser.add_argument("--max-dimension", type=int, default=2048)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="ocr_encoding_")
+    paths = []
+    if args.corpus:
+        paths = sorted(
+            path
+            for path in Path(args.corpus).iterdir()
+            if path.suffix.lower() in IMAGE_SUFFIXES
+        )
+    if args.synthetic:
+        paths += synthetic_corpus(args.synthetic, work_dir)
+    if not paths:
+        parser.error("Provide --corpus and/or --synthetic")
+
+    ocr = {
+        "tesseract": tesseract_ocr,
+        "gemini": make_gemini_ocr() if args.ocr == "gemini" else None,
+        "none": None,
+    }[args.ocr]
+
+    references = {}
+    original_bytes = 0
+    for path in paths:
+        data, mime_type, info = encode_image_for_ocr(
+            str(path), OCRImageSettings(format="ORIGINAL")
+        )
+        original_bytes += info["bytes"]
+        references[path] = ocr(data, mime_type) if ocr else ""
+
+    print(f"{len(paths)} image(s), original upload {original_bytes / len(paths):,.0f} B/image")
+    print(f"{'format':>6} {'q':>3} {'gray':>5} {'line':>5} {'bytes/img':>10} {'ratio':>6} {'similarity':>10}")
+
+    rows = []
+    for image_format, grayscale, line_height in itertools.product(
+        args.formats, (True, False), args.line_heights
+    ):
+        qualities = [None] if image_format == "PNG" else args.qualities
+        for quality in qualities:
+            settings = OCRImageSettings(
+                format=image_format,
+                quality=quality or 80,
+                grayscale=grayscale,
+                max_dimension=args.max_dimension,
+                target_line_height=line_height,
+            )
+            total_bytes = 0
+            scores = []
+            for path in paths:
+                data, mime_type, info = encode_image_for_ocr(str(path), settings)
+                total_bytes += info["bytes"]
+                if ocr:
+                    scores.append(similarity(references[path], ocr(data, mime_type)))
+
+            row = (
+                image_format,
+                quality or "-",
+                "yes" if grayscale else "no",
+                line_height or "-",
+                total_bytes / len(paths),
+                total_bytes / original_bytes,
+                sum(scores) / len(scores) if scores else float("nan"),
+            )
+            rows.append(row)
+            print(f"{row[0]:>6} {row[1]:>3} {row[2]:>5} {row[3]:>5} {row[4]:>10,.0f} {row[5]:>6.2f} {row[6]:>10.3f}")
+
+    if ocr:
+        # Smallest payload within one point of the best similarity
+        best = max(row[6] for row in rows)
+        pick = min((row for row in rows if row[6] >= best - 0.01), key=lambda row: row[4])
+        print(
+            f"\nSmallest within 0.01 of best similarity: format={pick[0]} quality={pick[1]} "
+            f"grayscale={pick[2]} line_height={pick[3]} ({pick[4]:,.0f} B/image, {pick[6]:.3f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
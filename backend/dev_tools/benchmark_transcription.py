@@ -0,0 +1,178 @@
+"""
+Benchmark transcription engines with local stubs
+
+Compares end-to-end latency (transcript + structured fields) and cost per minute
+of audio for chunked Speech-to-Text followed by a separate extraction call, a
+single Gemini multimodal request and the local CPU recognizer. Upstream calls are replaced by stubs that
+sleep for a modelled latency, so no credentials or network are needed.
+
+Usage:
+    python dev_tools/benchmark_transcription.py --durations 30 120 600
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pydub import AudioSegment
+
+from services.speech_service import SpeechService
+from services.transcription_engines import LocalASREngine, TranscriptionPolicy
+
+# Flash list price per 1M input tokens for the follow-up extraction call
+EXTRACTION_PRICE_PER_MILLION = 0.30
+
+
+class UpstreamClock:
+    """Sleeps for scaled stub latencies and keeps the unscaled total"""
+
+    def __init__(self, time_scale):
+        self.time_scale = time_scale
+        self.simulated = 0.0
+
+    def wait(self, seconds):
+        self.simulated += seconds
+        time.sleep(seconds * self.time_scale)
+
+
+class StubSpeechClient:
+    """Speech-to-Text stub: fixed overhead plus time proportional to audio length"""
+
+    def __init__(self, clock, base_latency=0.8, per_audio_second=0.12):
+        self.clock = clock
+        self.base_latency = base_latency
+        self.per_audio_second = per_audio_second
+        self.calls = 0
+
+    def recognize(self, config, audio):
+        self.calls += 1
+        # 16-bit mono WAV chunks exported by SpeechService
+        audio_seconds = len(audio.content) / (2 * 16000)
+        self.clock.wait(self.base_latency + self.per_audio_second * audio_seconds)
+        return SimpleNamespace(results=[])
+
+
+class StubGeminiModels:
+    def __init__(self, clock, base_latency=2.0, per_audio_second=0.04):
+        self.clock = clock
+        self.base_latency = base_latency
+        self.per_audio_second = per_audio_second
+        self.calls = 0
+
+    def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        audio_seconds = 0
+        for part in contents if isinstance(contents, list) else [contents]:
+            inline = getattr(part, "inline_data", None)
+            if inline is not None and inline.mime_type.startswith("audio/"):
+                # 32kbps MP3 or 16-bit 16kHz PCM fallback
+                bytes_per_second = 4000 if inline.mime_type == "audio/mp3" else 32000
+                audio_seconds = len(inline.data) / bytes_per_second
+        self.clock.wait(self.base_latency + self.per_audio_second * audio_seconds)
+        payload = {
+            "transcript": "Speaker 1: stub transcript",
+            "structured_data": {
+                "Entrepreneur_Name": "N/A",
+                "Business_Name": "N/A",
+                "Main_Product_Service": "N/A",
+            },
+        }
+        return SimpleNamespace(text=json.dumps(payload))
+
+
+class StubGeminiClient:
+    def __init__(self, clock):
+        self.models = StubGeminiModels(clock)
+
+
+class StubLocalEngine(LocalASREngine):
+    """Local recognizer stub running at a fixed real-time factor on CPU"""
+
+    def __init__(self, clock, real_time_factor=0.25):
+        super().__init__({"en-IN": "stub"})
+        self.clock = clock
+        self.real_time_factor = real_time_factor
+
+    def is_available(self, language_code=None):
+        return True
+
+    def _recognize(self, pcm_bytes, language_code):
+        audio_seconds = len(pcm_bytes) / (2 * self.sample_rate)
+        self.clock.wait(self.real_time_factor * audio_seconds)
+        words = [{"word": "stub", "start": 0.0, "end": 0.5, "conf": 0.9}]
+        return "stub", words
+
+
+def run_engine(engine, audio_path, audio_segment, time_scale):
+    clock = UpstreamClock(time_scale)
+    speech_client = StubSpeechClient(clock)
+    gemini_client = StubGeminiClient(clock)
+    service = SpeechService(
+        client=speech_client,
+        gemini_client=gemini_client,
+        policy=TranscriptionPolicy(engine=engine),
+    )
+    service.engines["local"] = StubLocalEngine(clock)
+
+    started = time.perf_counter()
+    result = service.transcribe_audio(audio_path, "en-IN", extract_structured=True)
+    extraction_cost = 0.0
+    if not result.get("structured_data"):
+        # Legacy path: separate structured extraction over the transcript
+        gemini_client.models.generate_content(
+            model="gemini-2.5-flash", contents=result.get("full_transcript", "")
+        )
+        # ~150 spoken words/min, ~1.3 tokens/word, plus prompt and schema
+        input_tokens = 200 * len(audio_segment) / 60000 + 400
+        extraction_cost = input_tokens * EXTRACTION_PRICE_PER_MILLION / 1_000_000
+    # Local processing time as measured, upstream time as modelled (unscaled)
+    elapsed = time.perf_counter() - started
+    elapsed += clock.simulated * (1 - time_scale)
+
+    minutes = len(audio_segment) / 60000
+    cost = result.get("estimated_cost_usd", 0.0) + extraction_cost
+    return {
+        "engine": result.get("engine", engine),
+        "latency_s": elapsed,
+        "upstream_calls": speech_client.calls + gemini_client.models.calls,
+        "cost_per_min_usd": cost / minutes if minutes else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--durations", type=int, nargs="+", default=[30, 120, 600])
+    parser.add_argument(
+        "--time-scale",
+        type=float,
+        default=0.01,
+        help="Multiply stub latencies by this factor (results are rescaled)",
+    )
+    parser.add_argument("--work-dir", default=".")
+    args = parser.parse_args()
+
+    print(f"{'audio':>7} {'engine':>14} {'latency':>9} {'calls':>6} {'$/min':>9}")
+    for duration in args.durations:
+        audio_segment = AudioSegment.silent(
+            duration=duration * 1000, frame_rate=16000
+        )
+        audio_path = str(Path(args.work_dir) / f"benchmark_{duration}s.wav")
+        audio_segment.export(audio_path, format="wav")
+        try:
+            for engine in ("local", "google_speech", "gemini"):
+                row = run_engine(engine, audio_path, audio_segment, args.time_scale)
+                print(
+                    f"{duration:>6}s {row['engine']:>14} {row['latency_s']:>8.2f}s "
+                    f"{row['upstream_calls']:>6} {row['cost_per_min_usd']:>9.5f}"
+                )
+        finally:
+            Path(audio_path).unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,16 @@
 """
 Authentication middleware for Flask routes
 Handles Supabase token verification and user authorization
+
+Decorated views may be sync or ``async def``; the wrapped view is called
+through ``current_app.ensure_sync``.
 """
 
 import logging
 from functools import wraps
-from flask import request, jsonify, g
+from flask import request, jsonify, g, current_app
 from services.user_service import UserService
+from utils.llm_usage import set_usage_user
 
 logger = logging.getLogger(__name__)
 
@@ -76,8 +80,9 @@ def require_auth(f):
 
         # Store user in Flask's g object for use in the route
         g.current_user = user
+        set_usage_user(user.supabase_user_id)
 
-        return f(*args, **kwargs)
+        return current_app.ensure_sync(f)(*args, **kwargs)
 
     return decorated_function
 
@@ -92,10 +97,12 @@ def optional_auth(f):
         if access_token:
             user = verify_and_get_user(access_token)
             g.current_user = user
+            if user:
+                set_usage_user(user.supabase_user_id)
         else:
             g.current_user = None
 
-        return f(*args, **kwargs)
+        return current_app.ensure_sync(f)(*args, **kwargs)
 
     return decorated_function
 
@@ -130,7 +137,7 @@ def require_admin(f):
                 403,
             )
 
-        return f(*args, **kwargs)
+        return current_app.ensure_sync(f)(*args, **kwargs)
 
     return decorated_function
 
@@ -165,7 +172,7 @@ def require_mentor(f):
                 403,
             )
 
-        return f(*args, **kwargs)
+        return current_app.ensure_sync(f)(*args, **kwargs)
 
     return decorated_function
 
@@ -204,12 +211,12 @@ def require_self_or_admin(user_id_param="user_id"):
 
             # Allow if user is accessing their own data
             if target_user_id == current_user.supabase_user_id:
-                return f(*args, **kwargs)
+                return current_app.ensure_sync(f)(*args, **kwargs)
 
             # Allow if user is admin or mentor
             user_service = UserService()
             if user_service.is_admin(current_user.supabase_user_id):
-                return f(*args, **kwargs)
+                return current_app.ensure_sync(f)(*args, **kwargs)
 
             return (
                 jsonify(
@@ -237,7 +244,7 @@ def rate_limit_by_user(max_requests=100, window_minutes=60):
         def decorated_function(*args, **kwargs):
             # TODO: Implement actual rate limiting logic
             # For now, just pass through
-            return f(*args, **kwargs)
+            return current_app.ensure_sync(f)(*args, **kwargs)
 
         return decorated_function
 
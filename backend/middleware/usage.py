@@ -0,0 +1,141 @@
+"""
+Token usage middleware for Flask routes
+Binds each request's Gemini calls to its request ID, route and user, and
+enforces the optional daily token budgets (per user, and per client IP for
+anonymous requests)
+"""
+
+import logging
+from functools import wraps
+from flask import request, jsonify, g, current_app
+
+from utils.llm_usage import (
+    ANONYMOUS_USER_PREFIX,
+    begin_request_usage,
+    current_request_usage,
+    end_request_usage,
+    get_usage_ledger,
+    seconds_until_next_day,
+    set_usage_user,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class UsageMiddleware:
+    """
+    Collects the Gemini calls of each request and writes them to the usage
+    ledger when the request ends
+    """
+
+    def __init__(self, app=None):
+        self.app = app
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # Open the ledger now: connecting to MongoDB can take seconds, which
+        # would otherwise stall the first request while holding the ledger lock
+        get_usage_ledger(app.config)
+
+        # Registered after BusinessContextMiddleware, which sets g.request_id
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.teardown_request(self.teardown_request)
+
+    def before_request(self):
+        """Start collecting the request's calls"""
+        route = request.url_rule.rule if request.url_rule else request.path
+        begin_request_usage(getattr(g, "request_id", None), route)
+
+    def after_request(self, response):
+        """Report the request's token count for debugging"""
+        usage = current_request_usage()
+        if usage is not None and usage.calls:
+            response.headers["X-LLM-Tokens"] = str(
+                sum(entry["total_tokens"] for entry in usage.calls)
+            )
+        return response
+
+    def teardown_request(self, exception=None):
+        """Write the request's records and stop collecting"""
+        try:
+            usage = current_request_usage()
+            if usage is not None and usage.calls:
+                ledger = get_usage_ledger()
+                if ledger is not None:
+                    ledger.flush()
+        except Exception as e:
+            logger.error(f"Failed to write LLM usage: {str(e)}")
+        finally:
+            end_request_usage()
+
+
+def request_llm_usage():
+    """Token usage of the current request so far, for ``ProcessedDocument``"""
+    usage = current_request_usage()
+    return usage.summary() if usage is not None else {}
+
+
+def budget_degraded():
+    """Whether the current request runs in degraded mode (token budget used up)"""
+    return getattr(g, "token_budget_degraded", False)
+
+
+def anonymous_usage_id():
+    """Usage ledger key of an anonymous client"""
+    return f"{ANONYMOUS_USER_PREFIX}{request.remote_addr or 'unknown'}"
+
+
+def token_budget(degradable=False):
+    """
+    Decorator enforcing USER_DAILY_TOKEN_BUDGET for the authenticated user and
+    ANONYMOUS_DAILY_TOKEN_BUDGET per client IP for anonymous requests, whose
+    calls are then recorded under ``anonymous_usage_id()`` (apply below
+    require_auth / optional_auth).
+    degradable: the view can run without its optional LLM stages, so in
+    "degrade" mode it runs with ``budget_degraded()`` set instead of 429
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            g.token_budget_degraded = False
+            current_user = getattr(g, "current_user", None)
+            if current_user:
+                usage_id = current_user.supabase_user_id
+                limit = current_app.config.get("USER_DAILY_TOKEN_BUDGET", 0)
+            else:
+                usage_id = anonymous_usage_id()
+                limit = current_app.config.get("ANONYMOUS_DAILY_TOKEN_BUDGET", 0)
+                if limit:
+                    set_usage_user(usage_id)
+            ledger = get_usage_ledger()
+
+            if limit and ledger is not None:
+                used = ledger.tokens_used(usage_id)
+                if used >= limit:
+                    mode = current_app.config.get("USER_TOKEN_BUDGET_MODE", "reject")
+                    if mode == "degrade" and degradable:
+                        logger.info(
+                            f"[{getattr(g, 'request_id', None)}] Daily token budget "
+                            f"of {usage_id} used up, degrading"
+                        )
+                        g.token_budget_degraded = True
+                    else:
+                        retry_after = seconds_until_next_day()
+                        response = jsonify(
+                            {
+                                "error": "Daily token budget exhausted",
+                                "message": f"Used {used} of {limit} tokens today",
+                                "retry_after_seconds": retry_after,
+                            }
+                        )
+                        response.headers["Retry-After"] = str(retry_after)
+                        return response, 429
+
+            return current_app.ensure_sync(f)(*args, **kwargs)
+
+        return decorated_function
+
+    return decorator
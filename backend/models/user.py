@@ -41,6 +41,8 @@ class ProcessedDocument:
     file_size: Optional[int] = None
     processing_time: Optional[float] = None
     ocr_metadata: Dict[str, Any] = field(default_factory=dict)
+    word_index: Optional[bytes] = None  # serialized WordTimestampIndex (audio)
+    llm_usage: Dict[str, Any] = field(default_factory=dict)  # Gemini tokens/cost
 
 
 @dataclass
@@ -118,6 +120,8 @@ class User:
                     "file_size": doc.file_size,
                     "processing_time": doc.processing_time,
                     "ocr_metadata": doc.ocr_metadata,
+                    "word_index": doc.word_index,
+                    "llm_usage": doc.llm_usage,
                 }
                 for doc in self.processed_documents
             ],
@@ -162,6 +166,8 @@ class User:
                 file_size=doc_data.get("file_size"),
                 processing_time=doc_data.get("processing_time"),
                 ocr_metadata=doc_data.get("ocr_metadata", {}),
+                word_index=doc_data.get("word_index"),
+                llm_usage=doc_data.get("llm_usage", {}),
             )
             processed_docs.append(doc)
 
@@ -2,14 +2,28 @@
 Evaluation routes for business idea analysis
 """
 
-from flask import Blueprint, request, jsonify
+import json
+from flask import (
+    Blueprint,
+    request,
+    jsonify,
+    current_app,
+    Response,
+    stream_with_context,
+)
+from middleware.auth import optional_auth
+from middleware.usage import token_budget
+from services.batch_evaluation import BatchEvaluator
 from services.llm_service import LLMService
 from services.translation_service import TranslationService
+from utils.llm_usage import bind_request_usage, current_request_usage, llm_stage
 
 evaluate_bp = Blueprint("evaluate", __name__)
 
 
 @evaluate_bp.route("/business-idea", methods=["POST"])
+@optional_auth
+@token_budget()
 def evaluate_business_idea():
     """Evaluate business idea viability"""
     try:
@@ -23,9 +37,13 @@ def evaluate_business_idea():
 
         # Evaluate using LLM service
         llm_service = LLMService()
-        evaluation_result = llm_service.evaluate_business_idea(
-            business_text, preferred_language
-        )
+        with llm_stage("evaluation"):
+            evaluation_result = llm_service.evaluate_business_idea(
+                business_text,
+                preferred_language,
+                industry=data.get("industry"),
+                business_case_id=data.get("submission_id"),
+            )
 
         if "error" in evaluation_result:
             return jsonify(evaluation_result), 500
@@ -53,33 +71,79 @@ def evaluate_business_idea():
 
 
 @evaluate_bp.route("/batch", methods=["POST"])
+@optional_auth
+@token_budget()
 def batch_evaluate():
-    """Batch evaluation for multiple submissions"""
+    """Batch evaluation for multiple submissions
+
+    Submissions are evaluated concurrently and identical texts only once.
+    Results are streamed as NDJSON, one line per submission in completion
+    order, followed by a ``{"summary": ...}`` line. Pass ``"stream": false``
+    to get the legacy single JSON response instead.
+    """
     try:
         data = request.get_json()
 
         if not data or "submissions" not in data:
             return jsonify({"error": "Submissions array required"}), 400
 
-        llm_service = LLMService()
-        results = []
+        submissions = data["submissions"]
+        if not isinstance(submissions, list):
+            return jsonify({"error": "Submissions must be an array"}), 400
+        max_submissions = current_app.config.get(
+            "EVALUATION_BATCH_MAX_SUBMISSIONS", 500
+        )
+        if len(submissions) > max_submissions:
+            return (
+                jsonify({"error": f"At most {max_submissions} submissions per batch"}),
+                400,
+            )
 
-        for submission in data["submissions"]:
-            if "text" not in submission:
-                continue
+        llm_service = LLMService()
+        app = current_app._get_current_object()
+        usage = current_request_usage()
+
+        def evaluate(text, language):
+            # Runs on a worker thread, outside the request's app and usage
+            # contexts, so both are bound here
+            with app.app_context(), bind_request_usage(usage):
+                with llm_stage("evaluation"):
+                    return llm_service.evaluate_business_idea(text, language)
+
+        evaluator = BatchEvaluator(
+            evaluate,
+            max_workers=app.config.get("EVALUATION_BATCH_CONCURRENCY", 8),
+            item_timeout=app.config.get("EVALUATION_ITEM_TIMEOUT_SECONDS", 120),
+            deadline_seconds=app.config.get("EVALUATION_BATCH_DEADLINE_SECONDS", 1800),
+        )
 
-            evaluation = llm_service.evaluate_business_idea(
-                submission["text"], submission.get("language", "en")
+        if not data.get("stream", True):
+            results = []
+            summary = {}
+            for entry in evaluator.run(submissions):
+                if "summary" in entry:
+                    summary = entry["summary"]
+                else:
+                    results.append(entry)
+            results.sort(key=lambda entry: entry["index"])
+            return (
+                jsonify(
+                    {
+                        "batch_results": results,
+                        "total_processed": len(results),
+                        "summary": summary,
+                    }
+                ),
+                200,
             )
 
-            results.append(
-                {
-                    "submission_id": submission.get("submission_id"),
-                    "evaluation": evaluation,
-                }
-            )
+        def generate():
+            for entry in evaluator.run(submissions):
+                yield json.dumps(entry, default=str) + "\n"
 
-        return jsonify({"batch_results": results, "total_processed": len(results)}), 200
+        return Response(
+            stream_with_context(generate()), mimetype="application/x-ndjson"
+        )
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
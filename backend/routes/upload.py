@@ -4,6 +4,7 @@ Upload routes for handling various file types
 
 from flask import Blueprint, request, jsonify, current_app
 from werkzeug.utils import secure_filename
+import asyncio
 import os
 import uuid
 import time
@@ -13,13 +14,83 @@ from services.ocr_service import OCRService
 from services.speech_service import SpeechService
 from services.user_service import UserService
 from services.business_analysis_service import BusinessAnalysisService
-from utils.validators import validate_file_type, validate_file_size
+from utils.validators import validate_file_type, validate_file_size, parse_page_range
+from utils.image_quality import assess_image_quality, enhance_image
 from middleware.auth import require_auth, optional_auth, get_current_user
+from middleware.usage import budget_degraded, request_llm_usage, token_budget
 from models.user import ProcessedDocument
+from utils.llm_usage import llm_stage
 
 upload_bp = Blueprint("upload", __name__)
 
 
+def use_fused_extraction():
+    """Whether OCR and field extraction should share one Gemini call
+    Defaults to OCR_FUSED_EXTRACTION; a ``fused`` form field overrides it"""
+    default = current_app.config.get("OCR_FUSED_EXTRACTION", True)
+    return request.form.get("fused", str(default)).lower() == "true"
+
+
+def use_progressive_pdf():
+    """Whether PDFs are read progressively, stopping once the key fields are found
+    Defaults to PDF_PROGRESSIVE_MODE; a ``progressive`` request parameter overrides it"""
+    default = current_app.config.get("PDF_PROGRESSIVE_MODE", False)
+    return request.values.get("progressive", str(default)).lower() == "true"
+
+
+def check_image_quality(file_path):
+    """
+    Run the local image quality gate before spending an OCR call
+    Returns (quality report, error response or None, path to OCR); fixable
+    images are enhanced into a PNG copy next to the upload, which the caller
+    removes along with the upload
+    """
+    if not current_app.config.get("IMAGE_QUALITY_GATE_ENABLED", True):
+        return None, None, file_path
+    if request.form.get("skip_quality_check", "false").lower() == "true":
+        return None, None, file_path
+
+    thresholds = {
+        "min_sharpness": current_app.config.get("IMAGE_MIN_SHARPNESS", 200.0),
+        "min_text_height": current_app.config.get("IMAGE_MIN_TEXT_HEIGHT", 10),
+    }
+    assessment = assess_image_quality(file_path, thresholds)
+
+    if not assessment["acceptable"]:
+        os.remove(file_path)
+        return (
+            assessment,
+            (
+                jsonify(
+                    {
+                        "error": "Image quality too low for OCR",
+                        "issues": assessment["issues"],
+                        "hints": assessment["hints"],
+                        "metrics": assessment["metrics"],
+                    }
+                ),
+                422,
+            ),
+            file_path,
+        )
+
+    ocr_path = file_path
+    if current_app.config.get("IMAGE_QUALITY_AUTO_ENHANCE", True):
+        enhanced_path = os.path.splitext(file_path)[0] + ".enhanced.png"
+        applied = enhance_image(file_path, assessment, enhanced_path)
+        assessment["applied_enhancements"] = applied
+        if applied:
+            ocr_path = enhanced_path
+    return assessment, None, ocr_path
+
+
+def remove_files(*paths):
+    """Delete whichever of ``paths`` exist"""
+    for path in set(paths):
+        if path and os.path.exists(path):
+            os.remove(path)
+
+
 @upload_bp.route("/text", methods=["POST"])
 def upload_text():
     """Handle direct text input"""
@@ -48,6 +119,8 @@ def upload_text():
 
 
 @upload_bp.route("/image", methods=["POST"])
+@optional_auth
+@token_budget()
 def upload_image():
     """Handle image upload for OCR processing"""
     try:
@@ -66,12 +139,17 @@ def upload_image():
         file_path = os.path.join(current_app.config["UPLOAD_FOLDER"], filename)
         file.save(file_path)
 
+        quality, quality_error, ocr_path = check_image_quality(file_path)
+        if quality_error:
+            return quality_error
+
         # Process with OCR
         ocr_service = OCRService()
-        ocr_result = ocr_service.extract_text_from_image(file_path)
+        with llm_stage("ocr"):
+            ocr_result = ocr_service.extract_text_from_image(ocr_path)
 
-        # Clean up file
-        os.remove(file_path)
+        # Clean up files
+        remove_files(file_path, ocr_path)
 
         if "error" in ocr_result:
             return jsonify(ocr_result), 500
@@ -84,6 +162,7 @@ def upload_image():
                     "submission_id": submission_id,
                     "extracted_text": ocr_result["full_text"],
                     "confidence": ocr_result["confidence"],
+                    "image_quality": quality,
                     "status": "ready_for_evaluation",
                 }
             ),
@@ -96,6 +175,7 @@ def upload_image():
 
 @upload_bp.route("/audio", methods=["POST"])
 @optional_auth
+@token_budget(degradable=True)
 def upload_audio():
     """Handle audio upload for speech-to-text processing with structured data extraction"""
     start_time = time.time()
@@ -129,7 +209,10 @@ def upload_audio():
         # Process with Speech-to-Text
         speech_service = SpeechService()
         language_code = request.form.get("language", "en-IN")
-        transcription_result = speech_service.transcribe_audio(file_path, language_code)
+        with llm_stage("transcription"):
+            transcription_result = speech_service.transcribe_audio(
+                file_path, language_code, extract_structured=True
+            )
 
         # Clean up file
         if os.path.exists(file_path):
@@ -138,11 +221,15 @@ def upload_audio():
         if "error" in transcription_result:
             return jsonify(transcription_result), 500
 
-        # Extract structured data from transcript using OCR service
-        ocr_service = OCRService()
-        structured_data = ocr_service.extract_structured_data(
-            transcription_result["full_transcript"]
-        )
+        # Extract structured data from transcript using OCR service, unless the
+        # transcription engine already returned it in the same request
+        structured_data = transcription_result.get("structured_data")
+        if not structured_data:
+            ocr_service = OCRService()
+            with llm_stage("structured_extraction"):
+                structured_data = ocr_service.extract_structured_data(
+                    transcription_result["full_transcript"]
+                )
 
         # Perform comprehensive business analysis
         business_service = BusinessAnalysisService()
@@ -157,13 +244,17 @@ def upload_audio():
             comprehensive_business_data
         )
 
-        # Generate comprehensive business case
-        business_case = business_service.generate_comprehensive_business_case(
-            comprehensive_business_data,
-            business_score,
-            {},  # No OCR data for audio-only upload
-            transcription_result["full_transcript"],
-        )
+        # Generate comprehensive business case (skipped once the user's daily
+        # token budget is used up)
+        business_case = None
+        if not budget_degraded():
+            with llm_stage("business_case"):
+                business_case = business_service.generate_comprehensive_business_case(
+                    comprehensive_business_data,
+                    business_score,
+                    {},  # No OCR data for audio-only upload
+                    transcription_result["full_transcript"],
+                )
 
         submission_id = str(uuid.uuid4())
         processing_time = time.time() - start_time
@@ -196,7 +287,15 @@ def upload_audio():
                     "duration_seconds": transcription_result.get("duration_seconds", 0),
                     "language_code": language_code,
                     "business_score": business_score,
+                    "transcription_engine": transcription_result.get("engine"),
+                    "speaker_turns": transcription_result.get("speaker_turns", []),
                 },
+                word_index=(
+                    transcription_result["word_index"].to_bytes()
+                    if transcription_result.get("word_index")
+                    else None
+                ),
+                llm_usage=request_llm_usage(),
             )
 
             # Save to user's document history
@@ -205,6 +304,7 @@ def upload_audio():
         response_data = {
             "submission_id": submission_id,
             "transcript": transcription_result["full_transcript"],
+            "speaker_turns": transcription_result.get("speaker_turns", []),
             "structured_data": structured_data,
             # "comprehensive_business_data": comprehensive_business_data,
             # "business_score": business_score,
@@ -219,11 +319,15 @@ def upload_audio():
                 "processing_method", "speech_to_text"
             ),
             "duration_seconds": transcription_result.get("duration_seconds", 0),
+            "transcription_engine": transcription_result.get("engine"),
             "processing_time": f"{processing_time:.2f}s",
             "file_size": file_size,
             "status": "analyzed",
         }
 
+        if budget_degraded():
+            response_data["token_budget_degraded"] = True
+
         # Add user info if authenticated
         if current_user:
             response_data["saved_to_history"] = True
@@ -243,6 +347,7 @@ def upload_audio():
 
 @upload_bp.route("/pdf", methods=["POST"])
 @optional_auth
+@token_budget(degradable=True)
 def upload_pdf():
     """Handle PDF upload for OCR processing and structured data extraction"""
     start_time = time.time()
@@ -266,6 +371,14 @@ def upload_pdf():
         if not validate_file_size(file):
             return jsonify({"error": "File size too large"}), 400
 
+        # Optional page selection, e.g. pages=1-3,5
+        pages = None
+        if request.values.get("pages"):
+            try:
+                pages = parse_page_range(request.values["pages"])
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+
         # Save file temporarily
         filename = secure_filename(file.filename)
         file_path = os.path.join(current_app.config["UPLOAD_FOLDER"], filename)
@@ -276,7 +389,13 @@ def upload_pdf():
 
         # Process with OCR
         ocr_service = OCRService()
-        ocr_result = ocr_service.extract_text_from_pdf(file_path)
+        with llm_stage("ocr"):
+            ocr_result = ocr_service.extract_text_from_pdf(
+                file_path,
+                fused=use_fused_extraction(),
+                pages=pages,
+                progressive=use_progressive_pdf(),
+            )
 
         if "error" in ocr_result:
             # Clean up file before returning error
@@ -284,8 +403,13 @@ def upload_pdf():
                 os.remove(file_path)
             return jsonify(ocr_result), 500
 
-        # Extract structured data from OCR text
-        structured_data = ocr_service.extract_structured_data(ocr_result["full_text"])
+        # Extract structured data from OCR text unless the fused call already did
+        structured_data = ocr_result.get("structured_data")
+        if not structured_data:
+            with llm_stage("structured_extraction"):
+                structured_data = ocr_service.extract_structured_data(
+                    ocr_result["full_text"]
+                )
 
         # Perform comprehensive business analysis
         business_service = BusinessAnalysisService()
@@ -300,13 +424,17 @@ def upload_pdf():
             comprehensive_business_data
         )
 
-        # Generate comprehensive business case
-        business_case = business_service.generate_comprehensive_business_case(
-            comprehensive_business_data,
-            business_score,
-            structured_data,
-            "",  # No transcript for PDF-only upload
-        )
+        # Generate comprehensive business case (skipped once the user's daily
+        # token budget is used up)
+        business_case = None
+        if not budget_degraded():
+            with llm_stage("business_case"):
+                business_case = business_service.generate_comprehensive_business_case(
+                    comprehensive_business_data,
+                    business_score,
+                    structured_data,
+                    "",  # No transcript for PDF-only upload
+                )
 
         # Clean up file
         if os.path.exists(file_path):
@@ -335,7 +463,14 @@ def upload_pdf():
                     "pages_processed": ocr_result.get("pages_processed", 0),
                     "processing_method": "gemini_vision_ocr",
                     "file_type": "pdf",
+                    "pages_ocr": ocr_result.get("pages_ocr", 0),
+                    "pages_skipped": ocr_result.get("pages_skipped", 0),
+                    "pages": ocr_result.get("pages", []),
+                    "fused_fallback_reason": ocr_result.get("fused_fallback_reason"),
+                    "page_count": ocr_result.get("page_count"),
+                    "stopped_after_page": ocr_result.get("stopped_after_page"),
                 },
+                llm_usage=request_llm_usage(),
             )
 
             # Save to user's document history
@@ -349,11 +484,20 @@ def upload_pdf():
             # "business_score": business_score,
             # "business_case": business_case,
             "pages_processed": ocr_result.get("pages_processed", 0),
+            "pages_skipped": ocr_result.get("pages_skipped", 0),
+            "page_count": ocr_result.get("page_count", 0),
+            "pages": ocr_result.get("pages", []),
             "confidence": ocr_result.get("confidence", 0),
             "processing_time": f"{processing_time:.2f}s",
             "file_size": file_size,
             "status": "analyzed",
         }
+        if "stopped_after_page" in ocr_result:
+            response_data["stopped_after_page"] = ocr_result["stopped_after_page"]
+            response_data["pages_not_processed"] = ocr_result["pages_not_processed"]
+
+        if budget_degraded():
+            response_data["token_budget_degraded"] = True
 
         # Add user info if authenticated
         if current_user:
@@ -374,10 +518,12 @@ def upload_pdf():
 
 @upload_bp.route("/image/structured", methods=["POST"])
 @optional_auth
+@token_budget(degradable=True)
 def upload_image_structured():
     """Handle image upload for OCR processing with structured data extraction"""
     start_time = time.time()
     file_path = None
+    ocr_path = None
 
     try:
         if "file" not in request.files:
@@ -395,24 +541,37 @@ def upload_image_structured():
         file_path = os.path.join(current_app.config["UPLOAD_FOLDER"], filename)
         file.save(file_path)
 
+        quality, quality_error, ocr_path = check_image_quality(file_path)
+        if quality_error:
+            return quality_error
+
         # Get file size for storage tracking
         file_size = os.path.getsize(file_path)
 
         # Process with OCR (using Gemini by default)
         ocr_service = OCRService()
         use_gemini = request.form.get("use_gemini", "true").lower() == "true"
-        ocr_result = ocr_service.extract_text_from_image(
-            file_path, use_gemini=use_gemini
-        )
+        with llm_stage("ocr"):
+            if use_gemini and use_fused_extraction():
+                # OCR text and structured fields from one Gemini call
+                ocr_result = ocr_service.extract_structured_from_image(ocr_path)
+            else:
+                ocr_result = ocr_service.extract_text_from_image(
+                    ocr_path, use_gemini=use_gemini
+                )
 
         if "error" in ocr_result:
-            # Clean up file before returning error
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            # Clean up files before returning error
+            remove_files(file_path, ocr_path)
             return jsonify(ocr_result), 500
 
-        # Extract structured data from OCR text
-        structured_data = ocr_service.extract_structured_data(ocr_result["full_text"])
+        # Extract structured data from OCR text unless the fused call already did
+        structured_data = ocr_result.get("structured_data")
+        if not structured_data:
+            with llm_stage("structured_extraction"):
+                structured_data = ocr_service.extract_structured_data(
+                    ocr_result["full_text"]
+                )
 
         # Perform comprehensive business analysis
         business_service = BusinessAnalysisService()
@@ -427,21 +586,26 @@ def upload_image_structured():
             comprehensive_business_data
         )
 
-        # Generate comprehensive business case
-        business_case = business_service.generate_comprehensive_business_case(
-            comprehensive_business_data,
-            business_score,
-            structured_data,
-            "",  # No transcript for image-only upload
-        )
+        # Generate comprehensive business case (skipped once the user's daily
+        # token budget is used up)
+        business_case = None
+        if not budget_degraded():
+            with llm_stage("business_case"):
+                business_case = business_service.generate_comprehensive_business_case(
+                    comprehensive_business_data,
+                    business_score,
+                    structured_data,
+                    "",  # No transcript for image-only upload
+                )
 
-        # Clean up file
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        # Clean up files
+        remove_files(file_path, ocr_path)
 
         submission_id = str(uuid.uuid4())
         processing_time = time.time() - start_time
-        ocr_method = "gemini" if use_gemini else "google_vision"
+        ocr_method = ocr_result.get(
+            "engine", "gemini" if use_gemini else "google_vision"
+        )
 
         # Store document in user's history if authenticated
         current_user = get_current_user()
@@ -463,7 +627,12 @@ def upload_image_structured():
                     "image_processing": True,
                     "ocr_method": ocr_method,
                     "use_gemini": use_gemini,
+                    "text_style": ocr_result.get("text_style"),
+                    "escalation_reason": ocr_result.get("escalation_reason"),
+                    "fused_fallback_reason": ocr_result.get("fused_fallback_reason"),
+                    "image_quality": quality,
                 },
+                llm_usage=request_llm_usage(),
             )
 
             # Save to user's document history
@@ -478,11 +647,15 @@ def upload_image_structured():
             # "business_case": business_case,
             "confidence": ocr_result["confidence"],
             "ocr_method": ocr_method,
+            "image_quality": quality,
             "processing_time": f"{processing_time:.2f}s",
             "file_size": file_size,
             "status": "analyzed",
         }
 
+        if budget_degraded():
+            response_data["token_budget_degraded"] = True
+
         # Add user info if authenticated
         if current_user:
             response_data["saved_to_history"] = True
@@ -493,8 +666,7 @@ def upload_image_structured():
     except Exception as e:
         # Ensure cleanup on any error
         try:
-            if "file_path" in locals() and os.path.exists(file_path):
-                os.remove(file_path)
+            remove_files(file_path, ocr_path)
         except:
             pass
         return jsonify({"error": str(e)}), 500
@@ -502,8 +674,21 @@ def upload_image_structured():
 
 @upload_bp.route("/comprehensive", methods=["POST"])
 @optional_auth
-def upload_comprehensive():
-    """Handle combined document and audio upload for comprehensive business analysis"""
+@token_budget(degradable=True)
+async def upload_comprehensive():
+    """Handle combined document and audio upload for comprehensive business analysis
+
+    The document (OCR + field extraction) and audio (transcription) stages are
+    independent and run concurrently; only the business analysis waits for both.
+
+    ``analysis_mode`` (form field, default ``COMPREHENSIVE_ANALYSIS_MODE``):
+    "legacy" extracts document fields, synthesizes the profile and writes the
+    case from all inputs; "consolidated" sends the raw OCR text and transcript to
+    one profile call and writes the case from that profile. Both return the same
+    keys, but in consolidated mode ``ocr_data`` is ``{"raw_text": ...}`` rather
+    than the extracted fields. Once the user's daily token budget is used up
+    (degrade mode) the analysis is consolidated and no business case is written.
+    """
     start_time = time.time()
     file_paths = []
 
@@ -513,11 +698,22 @@ def upload_comprehensive():
         speech_service = SpeechService()
         business_service = BusinessAnalysisService()
 
-        ocr_data = {}
-        transcript = ""
         language_code = request.form.get("language", "en-IN")
+        analysis_mode = request.form.get(
+            "analysis_mode",
+            current_app.config.get("COMPREHENSIVE_ANALYSIS_MODE", "legacy"),
+        )
+        if analysis_mode not in ("consolidated", "legacy"):
+            return (
+                jsonify({"error": "analysis_mode must be consolidated or legacy"}),
+                400,
+            )
+        if budget_degraded():
+            analysis_mode = "consolidated"
+        doc_path = None
+        audio_path = None
 
-        # Process document if provided
+        # Save document if provided
         if "document" in request.files:
             doc_file = request.files["document"]
             if doc_file.filename != "":
@@ -526,7 +722,6 @@ def upload_comprehensive():
                 ):
                     return jsonify({"error": "Invalid document file type"}), 400
 
-                # Save document temporarily
                 doc_filename = secure_filename(doc_file.filename)
                 doc_path = os.path.join(
                     current_app.config["UPLOAD_FOLDER"], doc_filename
@@ -534,18 +729,7 @@ def upload_comprehensive():
                 doc_file.save(doc_path)
                 file_paths.append(doc_path)
 
-                # Process document based on type
-                if doc_filename.lower().endswith(".pdf"):
-                    ocr_result = ocr_service.extract_text_from_pdf(doc_path)
-                else:
-                    ocr_result = ocr_service.extract_text_from_image(doc_path)
-
-                if "error" not in ocr_result:
-                    ocr_data = ocr_service.extract_structured_data(
-                        ocr_result["full_text"]
-                    )
-
-        # Process audio if provided
+        # Save audio if provided
         if "audio" in request.files:
             audio_file = request.files["audio"]
             if audio_file.filename != "":
@@ -554,7 +738,6 @@ def upload_comprehensive():
                 ):
                     return jsonify({"error": "Invalid audio file type"}), 400
 
-                # Save audio temporarily
                 audio_filename = secure_filename(audio_file.filename)
                 audio_path = os.path.join(
                     current_app.config["UPLOAD_FOLDER"], audio_filename
@@ -562,20 +745,71 @@ def upload_comprehensive():
                 audio_file.save(audio_path)
                 file_paths.append(audio_path)
 
-                # Process audio
-                speech_result = speech_service.transcribe_audio(
+        async def process_document():
+            if doc_path is None:
+                return {}
+            with llm_stage("ocr"):
+                if doc_path.lower().endswith(".pdf"):
+                    ocr_result = await ocr_service.extract_text_from_pdf_async(doc_path)
+                else:
+                    ocr_result = await ocr_service.extract_text_from_image_async(
+                        doc_path
+                    )
+            if "error" in ocr_result:
+                return {}
+            if analysis_mode == "consolidated":
+                # The profile call reads the raw text itself
+                raw_text = ocr_result.get("full_text", "")
+                return {"raw_text": raw_text} if raw_text.strip() else {}
+            with llm_stage("structured_extraction"):
+                return await ocr_service.extract_structured_data_async(
+                    ocr_result["full_text"]
+                )
+
+        async def process_audio():
+            if audio_path is None:
+                return ""
+            with llm_stage("transcription"):
+                speech_result = await speech_service.transcribe_audio_async(
                     audio_path, language_code
                 )
-                if "error" not in speech_result:
-                    transcript = speech_result["full_transcript"]
+            if "error" in speech_result:
+                return ""
+            return speech_result["full_transcript"]
+
+        ocr_data, transcript = await asyncio.gather(
+            process_document(), process_audio()
+        )
 
         # Perform comprehensive business analysis
-        if ocr_data or transcript:
-            comprehensive_business_data = (
-                business_service.extract_comprehensive_business_info(
-                    ocr_data, transcript, language_code
+        if not (ocr_data or transcript):
+            return jsonify({"error": "No valid document or audio data provided"}), 400
+
+        if analysis_mode == "consolidated":
+            with llm_stage("business_profile"):
+                comprehensive_business_data = (
+                    await business_service.analyze_comprehensive_async(
+                        ocr_data.get("raw_text", ""), transcript, language_code
+                    )
                 )
+            business_score = business_service.calculate_comprehensive_business_score(
+                comprehensive_business_data
             )
+            business_case = None
+            if not budget_degraded():
+                with llm_stage("business_case"):
+                    business_case = await (
+                        business_service.generate_business_case_from_profile_async(
+                            comprehensive_business_data, business_score
+                        )
+                    )
+        else:
+            with llm_stage("business_profile"):
+                comprehensive_business_data = (
+                    await business_service.extract_comprehensive_business_info_async(
+                        ocr_data, transcript, language_code
+                    )
+                )
 
             # Calculate business score
             business_score = business_service.calculate_comprehensive_business_score(
@@ -583,11 +817,15 @@ def upload_comprehensive():
             )
 
             # Generate comprehensive business case
-            business_case = business_service.generate_comprehensive_business_case(
-                comprehensive_business_data, business_score, ocr_data, transcript
-            )
-        else:
-            return jsonify({"error": "No valid document or audio data provided"}), 400
+            with llm_stage("business_case"):
+                business_case = (
+                    await business_service.generate_comprehensive_business_case_async(
+                        comprehensive_business_data,
+                        business_score,
+                        ocr_data,
+                        transcript,
+                    )
+                )
 
         # Clean up all temporary files
         for path in file_paths:
@@ -621,7 +859,9 @@ def upload_comprehensive():
                     "has_audio": bool(transcript),
                     "language_code": language_code,
                     "business_score": business_score,
+                    "analysis_mode": analysis_mode,
                 },
+                llm_usage=request_llm_usage(),
             )
 
             user_service.add_processed_document(current_user, processed_doc)
@@ -634,10 +874,14 @@ def upload_comprehensive():
             "ocr_data": ocr_data if ocr_data else None,
             "transcript": transcript if transcript else None,
             "language_code": language_code,
+            "analysis_mode": analysis_mode,
             "processing_time": f"{processing_time:.2f}s",
             "status": "comprehensive_analysis_complete",
         }
 
+        if budget_degraded():
+            response_data["token_budget_degraded"] = True
+
         # Add user info if authenticated
         if current_user:
             response_data["saved_to_history"] = True
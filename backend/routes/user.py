@@ -2,8 +2,10 @@
 User routes for authentication and user data management
 """
 
-from flask import Blueprint, jsonify, request, g
+from flask import Blueprint, jsonify, request, g, current_app
+from datetime import datetime, timedelta, timezone
 from middleware.auth import (
+    extract_token_from_header,
     require_auth,
     optional_auth,
     get_current_user,
@@ -12,12 +14,37 @@ from middleware.auth import (
 )
 from services.user_service import UserService
 from models.user import UserRole
+from utils.word_index import WordTimestampIndex
+from utils.image_cache import get_image_cache
+from services.llm_gateway import get_llm_gateway
+from utils.cache_backend import get_shared_cache
+from utils.gemini_guard import get_gemini_guard
+from utils.llm_usage import GROUP_BY_FIELDS, get_usage_ledger, utc_day
 import logging
 
 user_bp = Blueprint("user", __name__)
 logger = logging.getLogger(__name__)
 
 
+def parse_usage_query(group_by_choices):
+    """
+    Read the ``group_by`` (default day) and ``days`` (default 7, at most 90)
+    query parameters of the usage reports
+    Returns (group_by, first UTC day); raises ValueError on invalid values
+    """
+    group_by = request.args.get("group_by", "day")
+    if group_by not in group_by_choices:
+        raise ValueError(f"group_by must be one of: {', '.join(group_by_choices)}")
+    try:
+        days = int(request.args.get("days", 7))
+    except ValueError:
+        raise ValueError("days must be a number")
+    if not 1 <= days <= 90:
+        raise ValueError("days must be between 1 and 90")
+    since = datetime.now(timezone.utc) - timedelta(days=days - 1)
+    return group_by, utc_day(since)
+
+
 @user_bp.route("/profile", methods=["GET"])
 @require_auth
 def get_user_profile():
@@ -85,6 +112,51 @@ def get_user_stats():
         return jsonify({"error": "Failed to retrieve user statistics"}), 500
 
 
+@user_bp.route("/usage", methods=["GET"])
+@require_auth
+def get_user_usage():
+    """Get current user's Gemini token usage and daily token budget
+    Query: group_by (day, route, stage or model) and days"""
+    try:
+        current_user = get_current_user()
+
+        if not current_user:
+            return jsonify({"error": "User not found"}), 404
+
+        try:
+            group_by, since = parse_usage_query(["day", "route", "stage", "model"])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        ledger = get_usage_ledger()
+        user_id = current_user.supabase_user_id
+        limit = current_app.config.get("USER_DAILY_TOKEN_BUDGET", 0)
+        used = ledger.tokens_used(user_id)
+
+        return (
+            jsonify(
+                {
+                    "group_by": group_by,
+                    "since": since,
+                    "usage": ledger.report(group_by, since, user_id),
+                    "daily_token_budget": {
+                        "limit": limit or None,
+                        "used_today": used,
+                        "remaining": max(limit - used, 0) if limit else None,
+                        "mode": current_app.config.get(
+                            "USER_TOKEN_BUDGET_MODE", "reject"
+                        ),
+                    },
+                }
+            ),
+            200,
+        )
+
+    except Exception as e:
+        logger.error(f"Error getting user usage: {str(e)}")
+        return jsonify({"error": "Failed to retrieve token usage"}), 500
+
+
 @user_bp.route("/documents", methods=["GET"])
 @require_auth
 def get_user_documents():
@@ -121,6 +193,7 @@ def get_user_documents():
                     "processing_time": doc.processing_time,
                     "structured_data": doc.structured_data,
                     "ocr_metadata": doc.ocr_metadata,
+                    "llm_usage_totals": doc.llm_usage.get("totals"),
                 }
             )
 
@@ -175,6 +248,8 @@ def get_document_by_id(document_id):
                     "file_size": document.file_size,
                     "processing_time": document.processing_time,
                     "ocr_metadata": document.ocr_metadata,
+                    "has_word_timestamps": bool(document.word_index),
+                    "llm_usage": document.llm_usage,
                 }
             ),
             200,
@@ -185,6 +260,63 @@ def get_document_by_id(document_id):
         return jsonify({"error": "Failed to retrieve document"}), 500
 
 
+@user_bp.route("/documents/<document_id>/seek", methods=["GET"])
+@require_auth
+def seek_document_audio(document_id):
+    """
+    Map a transcript text span to the audio timestamp it was spoken at
+    Accepts either ?q=<phrase> or ?word=<i>&word_end=<j>: 0-based positions of
+    words in the transcript, counted across the ``speaker_turns`` of the audio
+    upload response (turn ``word_count``s are consecutive)
+    """
+    try:
+        current_user = get_current_user()
+
+        if not current_user:
+            return jsonify({"error": "User not found"}), 404
+
+        document = None
+        for doc in current_user.processed_documents:
+            if doc.id == document_id:
+                document = doc
+                break
+
+        if not document:
+            return jsonify({"error": "Document not found"}), 404
+
+        if not document.word_index:
+            return jsonify({"error": "Document has no word timestamps"}), 404
+
+        word_index = WordTimestampIndex.from_bytes(document.word_index)
+
+        phrase = request.args.get("q")
+        if phrase:
+            result = word_index.find(phrase)
+            if result is None:
+                return jsonify({"error": "Phrase not found in transcript"}), 404
+        else:
+            try:
+                first = int(request.args["word"])
+                last = int(request.args.get("word_end", first))
+                result = word_index.words(first, last)
+            except (KeyError, ValueError):
+                return (
+                    jsonify(
+                        {
+                            "error": "Provide q or word positions word/word_end "
+                            f"within 0-{len(word_index) - 1}"
+                        }
+                    ),
+                    400,
+                )
+
+        return jsonify({"document_id": document_id, **result}), 200
+
+    except Exception as e:
+        logger.error(f"Error seeking document audio: {str(e)}")
+        return jsonify({"error": "Failed to seek document audio"}), 500
+
+
 @user_bp.route("/preferences", methods=["GET", "PUT"])
 @require_auth
 def user_preferences():
@@ -262,6 +394,24 @@ def verify_token():
         return jsonify({"valid": False, "error": "Token verification failed"}), 500
 
 
+@user_bp.route("/logout", methods=["POST"])
+@require_auth
+def logout():
+    """
+    End the Supabase session of the access token and stop accepting the token
+    Clients should call this before (or instead of) signing out with Supabase,
+    so cached verifications of the token are dropped on every worker
+    """
+    try:
+        user_service = UserService()
+        session_ended = user_service.revoke_access_token(extract_token_from_header())
+        return jsonify({"message": "Logged out", "session_ended": session_ended}), 200
+
+    except Exception as e:
+        logger.error(f"Error logging out: {str(e)}")
+        return jsonify({"error": "Logout failed"}), 500
+
+
 @user_bp.route("/admin/users", methods=["GET"])
 @require_auth
 @require_admin
@@ -378,3 +528,60 @@ def get_admin_stats():
     except Exception as e:
         logger.error(f"Error getting admin stats: {str(e)}")
         return jsonify({"error": "Failed to retrieve admin statistics"}), 500
+
+
+@user_bp.route("/admin/cache-stats", methods=["GET"])
+@require_auth
+@require_admin
+def get_cache_stats():
+    """Get cache hit rates and Gemini call guard state for tuning (admin only)"""
+    try:
+        return (
+            jsonify(
+                {
+                    "ocr_image_cache": get_image_cache().stats(),
+                    "llm_cache": get_llm_gateway().stats(),
+                    "shared_cache": get_shared_cache().stats(),
+                    "gemini_guard": get_gemini_guard().stats(),
+                }
+            ),
+            200,
+        )
+
+    except Exception as e:
+        logger.error(f"Error getting cache stats: {str(e)}")
+        return jsonify({"error": "Failed to retrieve cache statistics"}), 500
+
+
+@user_bp.route("/admin/llm-usage", methods=["GET"])
+@require_auth
+@require_admin
+def get_llm_usage():
+    """Get Gemini token usage and cost per day, route, stage, model or user
+    (admin only)
+    Query: group_by, days and optionally user_id (Supabase user ID)"""
+    try:
+        try:
+            group_by, since = parse_usage_query(list(GROUP_BY_FIELDS))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        ledger = get_usage_ledger()
+        return (
+            jsonify(
+                {
+                    "group_by": group_by,
+                    "since": since,
+                    "user_id": request.args.get("user_id"),
+                    "usage": ledger.report(
+                        group_by, since, request.args.get("user_id")
+                    ),
+                    "ledger": ledger.stats(),
+                }
+            ),
+            200,
+        )
+
+    except Exception as e:
+        logger.error(f"Error getting LLM usage: {str(e)}")
+        return jsonify({"error": "Failed to retrieve LLM usage"}), 500
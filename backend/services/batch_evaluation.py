@@ -0,0 +1,152 @@
+"""
+Concurrent batch evaluation of business ideas
+
+Cohort batches are fanned out over a bounded thread pool. Submissions with the
+same (whitespace-normalized) text and language are evaluated once and the
+result is reported for each of them. Results are yielded as they complete, so
+the route can stream them, and every failure, per-item timeout or batch
+deadline miss becomes an error entry for that submission instead of failing
+the batch.
+"""
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from utils.llm_cache import normalize_prompt
+
+
+class BatchEvaluator:
+    def __init__(
+        self, evaluate, max_workers=8, item_timeout=120, deadline_seconds=1800
+    ):
+        """``evaluate(text, language)`` returns an evaluation dict, which may
+        carry an ``error`` key"""
+        self.logger = logging.getLogger(__name__)
+        self.evaluate = evaluate
+        self.max_workers = max(max_workers, 1)
+        self.item_timeout = item_timeout
+        self.deadline_seconds = deadline_seconds
+
+    def run(self, submissions):
+        """Yield one result dict per submission as evaluations finish, then a
+        final ``{"summary": ...}`` dict"""
+        started = time.monotonic()
+        deadline = started + self.deadline_seconds
+        summary = {"total": len(submissions), "succeeded": 0, "failed": 0}
+
+        # Group submissions by normalized text so duplicates share one call
+        groups = {}
+        for index, submission in enumerate(submissions):
+            text = submission.get("text") if isinstance(submission, dict) else None
+            if not isinstance(text, str) or not text.strip():
+                summary["failed"] += 1
+                yield self._entry(
+                    index, submission, error="Business idea text required"
+                )
+                continue
+            key = (normalize_prompt(text), submission.get("language", "en"))
+            groups.setdefault(key, []).append((index, submission))
+        summary["unique_evaluations"] = len(groups)
+        summary["duplicates"] = sum(len(group) - 1 for group in groups.values())
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, max(len(groups), 1)),
+            thread_name_prefix="batch-eval",
+        )
+        pending = {}
+        started_at = {}
+        try:
+            for key, group in groups.items():
+                future = executor.submit(self._evaluate, key, group, started_at)
+                pending[future] = (key, group)
+
+            while pending:
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                # Wake up for the next completion, item timeout or the deadline
+                timeouts = [
+                    started_at[key] + self.item_timeout - now
+                    for key, _ in pending.values()
+                    if key in started_at
+                ]
+                wait_for = min(timeouts + [deadline - now])
+                done, _ = wait(
+                    list(pending),
+                    timeout=max(wait_for, 0),
+                    return_when=FIRST_COMPLETED,
+                )
+
+                for future in done:
+                    key, group = pending.pop(future)
+                    try:
+                        evaluation = future.result()
+                        error = (
+                            evaluation.get("error")
+                            if isinstance(evaluation, dict)
+                            else None
+                        )
+                    except Exception as e:
+                        self.logger.error(f"Batch evaluation failed: {str(e)}")
+                        evaluation, error = None, str(e)
+                    for entry in self._group_entries(group, evaluation, error):
+                        summary["failed" if error else "succeeded"] += 1
+                        yield entry
+
+                now = time.monotonic()
+                for future, (key, group) in list(pending.items()):
+                    timed_out = (
+                        key in started_at
+                        and now - started_at[key] >= self.item_timeout
+                    )
+                    if timed_out:
+                        # The worker thread cannot be interrupted; its result is dropped
+                        del pending[future]
+                        summary["failed"] += len(group)
+                        yield from self._group_entries(
+                            group,
+                            None,
+                            f"Evaluation timed out after {self.item_timeout}s",
+                        )
+
+            for future, (key, group) in pending.items():
+                future.cancel()
+                summary["failed"] += len(group)
+                yield from self._group_entries(
+                    group, None, "Batch deadline exceeded before evaluation finished"
+                )
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        summary["elapsed_seconds"] = round(time.monotonic() - started, 3)
+        yield {"summary": summary}
+
+    def _evaluate(self, key, group, started_at):
+        started_at[key] = time.monotonic()
+        return self.evaluate(group[0][1]["text"], key[1])
+
+    def _group_entries(self, group, evaluation, error):
+        first_index, first_submission = group[0]
+        for index, submission in group:
+            entry = self._entry(index, submission, evaluation=evaluation, error=error)
+            if index != first_index:
+                entry["duplicate_of"] = first_submission.get(
+                    "submission_id", first_index
+                )
+            yield entry
+
+    def _entry(self, index, submission, evaluation=None, error=None):
+        entry = {
+            "index": index,
+            "submission_id": (
+                submission.get("submission_id")
+                if isinstance(submission, dict)
+                else None
+            ),
+        }
+        if error:
+            entry.update(status="error", error=error)
+        else:
+            entry.update(status="ok", evaluation=evaluation)
+        return entry
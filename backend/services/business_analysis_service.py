@@ -5,12 +5,237 @@ Business analysis service for comprehensive business evaluation and scoring
 import json
 import re
 import logging
-from typing import Dict, Any, Optional
+import textwrap
+from typing import Dict, Any, Optional, Tuple
 from flask import current_app
-from google import genai as gemini_sdk
 from google.genai import types
 from google.generativeai.types import GenerationConfig
 import google.generativeai as genai
+from services.llm_gateway import get_llm_gateway
+from utils.gemini_guard import create_gemini_client, create_generative_model
+from utils.prompt_budget import (
+    PromptBudget,
+    PromptSection,
+    compact_json,
+    context_strings,
+)
+
+# Low temperature for field extraction, a little more room for the written case
+EXTRACTION_GENERATION_CONFIG = GenerationConfig(temperature=0.1, top_p=0.8, top_k=40)
+
+_TEXT = types.Schema(type=types.Type.STRING)
+_TEXT_LIST = types.Schema(type=types.Type.ARRAY, items=_TEXT)
+
+
+def _section(**fields):
+    return types.Schema(
+        type=types.Type.OBJECT, properties=fields, required=list(fields)
+    )
+
+
+# The comprehensive business profile, produced in one call from raw inputs
+COMPREHENSIVE_PROFILE_SCHEMA = _section(
+    entrepreneur_profile=_section(
+        name=_TEXT,
+        education=_TEXT,
+        phone=_TEXT,
+        experience=_TEXT,
+        commitment_level=_TEXT,
+        team_size=_TEXT,
+    ),
+    business_concept=_section(
+        business_name=_TEXT, description=_TEXT, industry=_TEXT, business_type=_TEXT
+    ),
+    target_market=_section(
+        primary_customers=_TEXT,
+        market_size=_TEXT,
+        demographics=_TEXT,
+        geographic_scope=_TEXT,
+    ),
+    value_proposition=_section(
+        unique_selling_point=_TEXT, problem_solved=_TEXT, benefits_offered=_TEXT
+    ),
+    revenue_model=_section(
+        pricing_strategy=_TEXT, revenue_streams=_TEXT_LIST, payment_model=_TEXT
+    ),
+    resources_required=_section(
+        startup_costs=_TEXT,
+        loan_requirement=_TEXT,
+        key_resources=_TEXT_LIST,
+        skills_needed=_TEXT_LIST,
+        technology_requirements=_TEXT,
+    ),
+    competition=_section(
+        competitors=_TEXT_LIST, competitive_advantage=_TEXT, market_position=_TEXT
+    ),
+    implementation=_section(
+        timeline=_TEXT,
+        location=_TEXT,
+        key_milestones=_TEXT_LIST,
+        success_metrics=_TEXT_LIST,
+    ),
+    # Lets the business case cover the sources without re-reading them
+    source_notes=_section(
+        document_summary=_TEXT,
+        audio_summary=_TEXT,
+        conflicts=_TEXT_LIST,
+        information_gaps=_TEXT_LIST,
+    ),
+)
+
+COMPREHENSIVE_PROFILE_SYSTEM_PROMPT = (
+    "You are an expert business analyst. Build one comprehensive business profile "
+    "from the raw document text (OCR of handwritten or printed business plans) and "
+    "the audio transcript of the entrepreneur's pitch. Combine both sources; when "
+    "they conflict, keep both values in the field and list the conflict in "
+    "source_notes.conflicts. Use \"Not specified\" for missing text fields and empty "
+    "lists for missing list fields. Only use information that is present in the "
+    "sources. Summarize what each source contributed in source_notes and list the "
+    "missing information in source_notes.information_gaps."
+)
+
+BUSINESS_CASE_OUTLINE = textwrap.dedent(
+    """
+        Create a structured business case document with the following sections:
+        
+        1. EXECUTIVE SUMMARY
+           - Business concept synthesis from all sources
+           - Key value proposition
+           - Target market overview
+           - Funding requirement (from OCR/audio)
+        
+        2. DATA SOURCE ANALYSIS
+           - Information gathered from visual/written materials
+           - Information gathered from audio/verbal explanation
+           - Consistency analysis between sources
+           - Gaps identified in information
+        
+        3. BUSINESS ANALYSIS
+           - Market opportunity assessment
+           - Revenue model evaluation
+           - Competitive landscape
+           - Implementation feasibility
+        
+        4. STRENGTHS & OPPORTUNITIES
+           - Top business strengths identified
+           - Market opportunities
+           - Entrepreneur capabilities
+        
+        5. RISKS & CHALLENGES
+           - Key business risks
+           - Information gaps and inconsistencies
+           - Implementation obstacles
+           - Mitigation strategies needed
+        
+        6. MENTOR EVALUATION FOCUS AREAS
+           - Critical questions for mentor discussion
+           - Areas needing expert guidance
+           - Development priorities
+           - Information verification needed
+        
+        7. RECOMMENDATION
+           - Overall assessment considering all data sources
+           - Next steps suggested
+           - Support needed
+           - Priority actions
+        
+        Format in clear json with appropriate headers and bullet points.
+        Be objective, professional, and highlight both strengths and concerns.
+    """
+).strip()
+
+# Static instructions go in the system instruction so every call shares the
+# same prefix; prompts only carry the per-submission data
+COMPREHENSIVE_INFO_SYSTEM_PROMPT = textwrap.dedent(
+    """
+    You are an expert business analyst. Extract and synthesize comprehensive business information from both image/OCR data and audio transcript data.
+
+    Synthesize all available information and create a comprehensive business profile in JSON format:
+    {
+        "entrepreneur_profile": {
+            "name": "Entrepreneur name from any source",
+            "education": "Educational background",
+            "phone": "Contact information",
+            "experience": "Relevant experience mentioned",
+            "commitment_level": "Full-time/Part-Time/Side-project",
+            "team_size": "Number of people involved"
+        },
+        "business_concept": {
+            "business_name": "Name of the business",
+            "description": "Comprehensive description combining all sources",
+            "industry": "Industry/sector",
+            "business_type": "Product/Service/Platform/etc."
+        },
+        "target_market": {
+            "primary_customers": "Who are the main customers",
+            "market_size": "Estimated market size or description",
+            "demographics": "Target customer demographics",
+            "geographic_scope": "Local/Regional/National/International"
+        },
+        "value_proposition": {
+            "unique_selling_point": "What makes this business unique",
+            "problem_solved": "What problem does this solve",
+            "benefits_offered": "Key benefits to customers"
+        },
+        "revenue_model": {
+            "pricing_strategy": "How will pricing work",
+            "revenue_streams": ["List of revenue sources"],
+            "payment_model": "One-time/Subscription/Commission/etc."
+        },
+        "resources_required": {
+            "startup_costs": "Initial investment needed (from any source)",
+            "loan_requirement": "Specific loan amount mentioned",
+            "key_resources": ["List of critical resources needed"],
+            "skills_needed": ["Required skills or expertise"],
+            "technology_requirements": "Any technology needs"
+        },
+        "competition": {
+            "competitors": ["List of main competitors"],
+            "competitive_advantage": "How to compete/differentiate",
+            "market_position": "Positioning strategy"
+        },
+        "implementation": {
+            "timeline": "Expected timeline to launch",
+            "location": "Business location/area",
+            "key_milestones": ["Major milestones"],
+            "success_metrics": ["How to measure success"]
+        }
+    }
+
+    Instructions:
+    1. Prioritize information from multiple sources - if OCR and audio conflict, note both
+    2. Use "Not specified" for missing information
+    3. Combine and synthesize information from both sources
+    4. Be comprehensive but concise
+    5. If multiple speakers in audio, consider all perspectives
+    """
+).strip()
+
+BUSINESS_CASE_SYSTEM_PROMPT = (
+    "You generate comprehensive mentor-ready business cases for entrepreneurs from "
+    "their business data and assessment score. Fields missing from the data were "
+    "not provided by the entrepreneur.\n\n" + BUSINESS_CASE_OUTLINE
+)
+
+# Generation configs (and their schemas) are built once, not per call
+COMPREHENSIVE_INFO_CONFIG = types.GenerateContentConfig(
+    system_instruction=COMPREHENSIVE_INFO_SYSTEM_PROMPT,
+    temperature=0.1,
+    top_p=0.8,
+    top_k=40,
+)
+BUSINESS_CASE_CONFIG = types.GenerateContentConfig(
+    system_instruction=BUSINESS_CASE_SYSTEM_PROMPT,
+    temperature=0.3,
+    top_p=0.9,
+    top_k=40,
+)
+COMPREHENSIVE_PROFILE_CONFIG = types.GenerateContentConfig(
+    system_instruction=COMPREHENSIVE_PROFILE_SYSTEM_PROMPT,
+    response_mime_type="application/json",
+    response_schema=COMPREHENSIVE_PROFILE_SCHEMA,
+    temperature=0.1,
+)
 
 
 class BusinessAnalysisService:
@@ -18,17 +243,30 @@ class BusinessAnalysisService:
         self.logger = logging.getLogger(__name__)
         self.gemini_client = None
         self.model = None
+        self.analysis_model = "gemini-2.5-flash"
+        self.synthesis_model = "gemini-2.0-flash"
+        self.prompt_budget = PromptBudget()
+        self.llm = get_llm_gateway()
 
         # Initialize Gemini client
         try:
+            self.prompt_budget = PromptBudget(
+                current_app.config.get("PROMPT_INPUT_TOKEN_BUDGET", 16000)
+            )
             gemini_api_key = current_app.config.get("GEMINI_API_KEY")
             if gemini_api_key:
                 # Initialize both clients for different use cases
                 genai.configure(api_key=gemini_api_key)
-                self.model = genai.GenerativeModel("models/gemini-2.0-flash")
+                self.model = create_generative_model("models/gemini-2.0-flash")
 
                 # Also initialize the new SDK client
-                self.gemini_client = gemini_sdk.Client(api_key=gemini_api_key)
+                self.gemini_client = create_gemini_client(gemini_api_key)
+                self.analysis_model = current_app.config.get(
+                    "COMPREHENSIVE_ANALYSIS_MODEL", self.analysis_model
+                )
+                self.synthesis_model = current_app.config.get(
+                    "BUSINESS_SYNTHESIS_MODEL", self.synthesis_model
+                )
                 self.logger.info("Business Analysis service initialized successfully")
             else:
                 self.logger.warning("GEMINI_API_KEY not found in configuration")
@@ -37,65 +275,23 @@ class BusinessAnalysisService:
                 f"Failed to initialize Business Analysis service: {str(e)}"
             )
 
-    def extract_structured_data_from_ocr(self, raw_text: str) -> Dict[str, Any]:
+    def extract_structured_data_from_ocr(
+        self, raw_text: str, use_cache: bool = True
+    ) -> Dict[str, Any]:
         """Extract structured business data from OCR text using Gemini"""
         if self.model is None:
             return {"error": "Gemini client not initialized"}
 
-        prompt = f"""
-        Extract structured business information from this OCR text and format it as JSON:
-        
-        OCR Text: {raw_text}
-        
-        Extract the following information in JSON format:
-        {{
-            "entrepreneur_info": {{
-                "name": "Entrepreneur name",
-                "education": "Educational qualification",
-                "phone": "Phone number",
-                "experience": "Relevant experience"
-            }},
-            "business_concept": {{
-                "business_name": "Name of the business",
-                "description": "Brief description of the business idea",
-                "industry": "Industry/sector",
-                "business_type": "Product/Service/Platform"
-            }},
-            "value_proposition": {{
-                "main_product_service": "Main product or service",
-                "unique_selling_point": "What makes this business unique",
-                "problem_solved": "Problem being solved"
-            }},
-            "financial_info": {{
-                "loan_requirement": "Loan amount needed",
-                "startup_costs": "Initial investment required",
-                "revenue_expectations": "Expected revenue"
-            }},
-            "additional_info": {{
-                "target_customers": "Target customer base",
-                "location": "Business location",
-                "timeline": "Implementation timeline"
-            }}
-        }}
-        
-        Use "Not specified" for missing information. Only extract information that is clearly mentioned.
-        """
-
         try:
-            response = self.model.generate_content(
+            prompt, stats = self._structured_data_prompt(raw_text)
+            response = self.llm.generate_with_model(
+                self.model,
                 prompt,
-                generation_config=GenerationConfig(
-                    temperature=0.1, top_p=0.8, top_k=40
-                ),
+                generation_config=EXTRACTION_GENERATION_CONFIG,
+                use_cache=use_cache,
             )
-
-            # Extract JSON from response
-            json_match = re.search(r"```json\s*(.*?)\s*```", response.text, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group(1))
-            else:
-                # Try to parse the entire response as JSON
-                return json.loads(response.text)
+            self._log_prompt("structured_extraction", stats, response)
+            return self._parse_json_response(response.text)
         except Exception as e:
             self.logger.error(f"Structured extraction failed: {str(e)}")
             return {
@@ -110,95 +306,25 @@ class BusinessAnalysisService:
         ocr_data: Dict[str, Any],
         transcript: str = "",
         language_code: str = "en-IN",
+        use_cache: bool = True,
     ) -> Dict[str, Any]:
         """Extract comprehensive business information from both OCR and audio data"""
-        if self.model is None:
+        if self.gemini_client is None:
             return {"error": "Gemini client not initialized"}
 
-        prompt = f"""
-        You are an expert business analyst. Extract and synthesize comprehensive business information from both image/OCR data and audio transcript data.
-        
-        Language: {language_code}
-        
-        OCR Data from Images:
-        {json.dumps(ocr_data, indent=2)}
-        
-        Audio Transcript:
-        {transcript}
-        
-        Synthesize all available information and create a comprehensive business profile in JSON format:
-        {{
-            "entrepreneur_profile": {{
-                "name": "Entrepreneur name from any source",
-                "education": "Educational background",
-                "phone": "Contact information", 
-                "experience": "Relevant experience mentioned",
-                "commitment_level": "Full-time/Part-Time/Side-project",
-                "team_size": "Number of people involved"
-            }},
-            "business_concept": {{
-                "business_name": "Name of the business",
-                "description": "Comprehensive description combining all sources",
-                "industry": "Industry/sector",
-                "business_type": "Product/Service/Platform/etc."
-            }},
-            "target_market": {{
-                "primary_customers": "Who are the main customers",
-                "market_size": "Estimated market size or description",
-                "demographics": "Target customer demographics",
-                "geographic_scope": "Local/Regional/National/International"
-            }},
-            "value_proposition": {{
-                "unique_selling_point": "What makes this business unique",
-                "problem_solved": "What problem does this solve",
-                "benefits_offered": "Key benefits to customers"
-            }},
-            "revenue_model": {{
-                "pricing_strategy": "How will pricing work",
-                "revenue_streams": ["List of revenue sources"],
-                "payment_model": "One-time/Subscription/Commission/etc."
-            }},
-            "resources_required": {{
-                "startup_costs": "Initial investment needed (from any source)",
-                "loan_requirement": "Specific loan amount mentioned",
-                "key_resources": ["List of critical resources needed"],
-                "skills_needed": ["Required skills or expertise"],
-                "technology_requirements": "Any technology needs"
-            }},
-            "competition": {{
-                "competitors": ["List of main competitors"],
-                "competitive_advantage": "How to compete/differentiate",
-                "market_position": "Positioning strategy"
-            }},
-            "implementation": {{
-                "timeline": "Expected timeline to launch",
-                "location": "Business location/area",
-                "key_milestones": ["Major milestones"],
-                "success_metrics": ["How to measure success"]
-            }}
-        }}
-        
-        Instructions:
-        1. Prioritize information from multiple sources - if OCR and audio conflict, note both
-        2. Use "Not specified" for missing information
-        3. Combine and synthesize information from both sources
-        4. Be comprehensive but concise
-        5. If multiple speakers in audio, consider all perspectives
-        """
-
         try:
-            response = self.model.generate_content(
+            prompt, stats = self._comprehensive_info_prompt(
+                ocr_data, transcript, language_code
+            )
+            response = self.llm.generate_content(
+                self.gemini_client,
+                self.synthesis_model,
                 prompt,
-                generation_config=GenerationConfig(
-                    temperature=0.1, top_p=0.8, top_k=40
-                ),
+                config=COMPREHENSIVE_INFO_CONFIG,
+                use_cache=use_cache,
             )
-
-            json_match = re.search(r"```json\s*(.*?)\s*```", response.text, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group(1))
-            else:
-                return json.loads(response.text)
+            self._log_prompt("comprehensive_info", stats, response)
+            return self._parse_json_response(response.text)
 
         except Exception as e:
             self.logger.error(f"Error extracting comprehensive business info: {str(e)}")
@@ -309,80 +435,88 @@ class BusinessAnalysisService:
         assessment_score: Dict[str, Any],
         ocr_data: Dict[str, Any],
         transcript: str = "",
+        use_cache: bool = True,
     ) -> str:
         """Generate comprehensive business case from all data sources"""
-        if self.model is None:
+        if self.gemini_client is None:
             return "Error: Gemini client not initialized"
 
-        prompt = f"""
-        Generate a comprehensive mentor-ready business case based on all available data sources.
-        
-        Comprehensive Business Data:
-        {json.dumps(business_data, indent=2)}
-        
-        Assessment Score:
-        {json.dumps(assessment_score, indent=2)}
-        
-        Original OCR Data:
-        {json.dumps(ocr_data, indent=2)}
-        
-        Original Audio Transcript:
-        {transcript}
-        
-        Create a structured business case document with the following sections:
-        
-        1. EXECUTIVE SUMMARY
-           - Business concept synthesis from all sources
-           - Key value proposition
-           - Target market overview
-           - Funding requirement (from OCR/audio)
-        
-        2. DATA SOURCE ANALYSIS
-           - Information gathered from visual/written materials
-           - Information gathered from audio/verbal explanation
-           - Consistency analysis between sources
-           - Gaps identified in information
-        
-        3. BUSINESS ANALYSIS
-           - Market opportunity assessment
-           - Revenue model evaluation
-           - Competitive landscape
-           - Implementation feasibility
-        
-        4. STRENGTHS & OPPORTUNITIES
-           - Top business strengths identified
-           - Market opportunities
-           - Entrepreneur capabilities
-        
-        5. RISKS & CHALLENGES
-           - Key business risks
-           - Information gaps and inconsistencies
-           - Implementation obstacles
-           - Mitigation strategies needed
-        
-        6. MENTOR EVALUATION FOCUS AREAS
-           - Critical questions for mentor discussion
-           - Areas needing expert guidance
-           - Development priorities
-           - Information verification needed
-        
-        7. RECOMMENDATION
-           - Overall assessment considering all data sources
-           - Next steps suggested
-           - Support needed
-           - Priority actions
-        
-        Format in clear json with appropriate headers and bullet points.
-        Be objective, professional, and highlight both strengths and concerns.
+        try:
+            prompt, stats = self._business_case_prompt(
+                business_data, assessment_score, ocr_data, transcript
+            )
+            response = self.llm.generate_content(
+                self.gemini_client,
+                self.synthesis_model,
+                prompt,
+                config=BUSINESS_CASE_CONFIG,
+                use_cache=use_cache,
+            )
+            self._log_prompt("business_case", stats, response)
+            return response.text
+        except Exception as e:
+            self.logger.error(f"Error generating comprehensive business case: {str(e)}")
+            return f"Error generating comprehensive business case: {str(e)}"
+
+    def analyze_comprehensive(
+        self,
+        raw_text: str = "",
+        transcript: str = "",
+        language_code: str = "en-IN",
+        use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        """Build the comprehensive business profile straight from the raw OCR text
+        and transcript in one schema-constrained call
+
+        Replaces the structured extraction + ``extract_comprehensive_business_info``
+        pair; follow it with ``generate_business_case_from_profile``.
         """
+        if self.gemini_client is None:
+            return {"error": "Gemini client not initialized"}
 
         try:
-            response = self.model.generate_content(
+            prompt, stats = self._raw_sources_prompt(
+                raw_text, transcript, language_code
+            )
+            response = self.llm.generate_content(
+                self.gemini_client,
+                self.analysis_model,
                 prompt,
-                generation_config=GenerationConfig(
-                    temperature=0.3, top_p=0.9, top_k=40
-                ),
+                config=COMPREHENSIVE_PROFILE_CONFIG,
+                use_cache=use_cache,
             )
+            self._log_prompt("consolidated_profile", stats, response)
+            return json.loads(response.text)
+        except Exception as e:
+            self.logger.error(f"Consolidated business analysis failed: {str(e)}")
+            return {"error": f"Consolidated business analysis failed: {str(e)}"}
+
+    def generate_business_case_from_profile(
+        self,
+        profile: Dict[str, Any],
+        assessment_score: Dict[str, Any],
+        use_cache: bool = True,
+    ) -> str:
+        """Generate the business case from an ``analyze_comprehensive`` profile
+
+        The profile's ``source_notes`` stand in for the original OCR data and
+        transcript, so those are not sent again.
+        """
+        if self.gemini_client is None:
+            return "Error: Gemini client not initialized"
+
+        try:
+            prompt, stats = self._profile_business_case_prompt(
+                profile, assessment_score
+            )
+            response = self.llm.generate_content(
+                self.gemini_client,
+                self.synthesis_model,
+                prompt,
+                config=BUSINESS_CASE_CONFIG,
+                use_cache=use_cache,
+            )
+            self._log_prompt("business_case", stats, response)
             return response.text
         except Exception as e:
             self.logger.error(f"Error generating comprehensive business case: {str(e)}")
@@ -482,3 +616,324 @@ class BusinessAnalysisService:
         }
 
         return comprehensive_data
+
+    async def extract_structured_data_from_ocr_async(
+        self, raw_text: str, use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """Coroutine version of ``extract_structured_data_from_ocr``"""
+        if self.model is None:
+            return {"error": "Gemini client not initialized"}
+
+        try:
+            prompt, stats = self._structured_data_prompt(raw_text)
+            response = await self.llm.agenerate_with_model(
+                self.model,
+                prompt,
+                generation_config=EXTRACTION_GENERATION_CONFIG,
+                use_cache=use_cache,
+            )
+            self._log_prompt("structured_extraction", stats, response)
+            return self._parse_json_response(response.text)
+        except Exception as e:
+            self.logger.error(f"Structured extraction failed: {str(e)}")
+            return {"error": f"Failed to extract structured data: {str(e)}"}
+
+    async def extract_comprehensive_business_info_async(
+        self,
+        ocr_data: Dict[str, Any],
+        transcript: str = "",
+        language_code: str = "en-IN",
+        use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        """Coroutine version of ``extract_comprehensive_business_info``"""
+        if self.gemini_client is None:
+            return {"error": "Gemini client not initialized"}
+
+        try:
+            prompt, stats = self._comprehensive_info_prompt(
+                ocr_data, transcript, language_code
+            )
+            response = await self.llm.agenerate_content(
+                self.gemini_client,
+                self.synthesis_model,
+                prompt,
+                config=COMPREHENSIVE_INFO_CONFIG,
+                use_cache=use_cache,
+            )
+            self._log_prompt("comprehensive_info", stats, response)
+            return self._parse_json_response(response.text)
+        except Exception as e:
+            self.logger.error(f"Error extracting comprehensive business info: {str(e)}")
+            return {"error": f"Error extracting comprehensive business info: {str(e)}"}
+
+    async def generate_comprehensive_business_case_async(
+        self,
+        business_data: Dict[str, Any],
+        assessment_score: Dict[str, Any],
+        ocr_data: Dict[str, Any],
+        transcript: str = "",
+        use_cache: bool = True,
+    ) -> str:
+        """Coroutine version of ``generate_comprehensive_business_case``"""
+        if self.gemini_client is None:
+            return "Error: Gemini client not initialized"
+
+        try:
+            prompt, stats = self._business_case_prompt(
+                business_data, assessment_score, ocr_data, transcript
+            )
+            response = await self.llm.agenerate_content(
+                self.gemini_client,
+                self.synthesis_model,
+                prompt,
+                config=BUSINESS_CASE_CONFIG,
+                use_cache=use_cache,
+            )
+            self._log_prompt("business_case", stats, response)
+            return response.text
+        except Exception as e:
+            self.logger.error(f"Error generating comprehensive business case: {str(e)}")
+            return f"Error generating comprehensive business case: {str(e)}"
+
+    async def analyze_comprehensive_async(
+        self,
+        raw_text: str = "",
+        transcript: str = "",
+        language_code: str = "en-IN",
+        use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        """Coroutine version of ``analyze_comprehensive``"""
+        if self.gemini_client is None:
+            return {"error": "Gemini client not initialized"}
+
+        try:
+            prompt, stats = self._raw_sources_prompt(
+                raw_text, transcript, language_code
+            )
+            response = await self.llm.agenerate_content(
+                self.gemini_client,
+                self.analysis_model,
+                prompt,
+                config=COMPREHENSIVE_PROFILE_CONFIG,
+                use_cache=use_cache,
+            )
+            self._log_prompt("consolidated_profile", stats, response)
+            return json.loads(response.text)
+        except Exception as e:
+            self.logger.error(f"Consolidated business analysis failed: {str(e)}")
+            return {"error": f"Consolidated business analysis failed: {str(e)}"}
+
+    async def generate_business_case_from_profile_async(
+        self,
+        profile: Dict[str, Any],
+        assessment_score: Dict[str, Any],
+        use_cache: bool = True,
+    ) -> str:
+        """Coroutine version of ``generate_business_case_from_profile``"""
+        if self.gemini_client is None:
+            return "Error: Gemini client not initialized"
+
+        try:
+            prompt, stats = self._profile_business_case_prompt(
+                profile, assessment_score
+            )
+            response = await self.llm.agenerate_content(
+                self.gemini_client,
+                self.synthesis_model,
+                prompt,
+                config=BUSINESS_CASE_CONFIG,
+                use_cache=use_cache,
+            )
+            self._log_prompt("business_case", stats, response)
+            return response.text
+        except Exception as e:
+            self.logger.error(f"Error generating comprehensive business case: {str(e)}")
+            return f"Error generating comprehensive business case: {str(e)}"
+
+    def _parse_json_response(self, text: str) -> Dict[str, Any]:
+        """Parse a JSON answer, with or without a ```json fence"""
+        json_match = re.search(r"```json\s*(.*?)\s*```", text, re.DOTALL)
+        if json_match:
+            return json.loads(json_match.group(1))
+        return json.loads(text)
+
+    def _structured_data_prompt(
+        self, raw_text: str
+    ) -> Tuple[str, Dict[str, Any]]:
+        template = """
+        Extract structured business information from this OCR text and format it as JSON:
+        
+        OCR Text: {raw_text}
+        
+        Extract the following information in JSON format:
+        {{
+            "entrepreneur_info": {{
+                "name": "Entrepreneur name",
+                "education": "Educational qualification",
+                "phone": "Phone number",
+                "experience": "Relevant experience"
+            }},
+            "business_concept": {{
+                "business_name": "Name of the business",
+                "description": "Brief description of the business idea",
+                "industry": "Industry/sector",
+                "business_type": "Product/Service/Platform"
+            }},
+            "value_proposition": {{
+                "main_product_service": "Main product or service",
+                "unique_selling_point": "What makes this business unique",
+                "problem_solved": "Problem being solved"
+            }},
+            "financial_info": {{
+                "loan_requirement": "Loan amount needed",
+                "startup_costs": "Initial investment required",
+                "revenue_expectations": "Expected revenue"
+            }},
+            "additional_info": {{
+                "target_customers": "Target customer base",
+                "location": "Business location",
+                "timeline": "Implementation timeline"
+            }}
+        }}
+        
+        Use "Not specified" for missing information. Only extract information that is clearly mentioned.
+        """
+        return self.prompt_budget.render(
+            template, [PromptSection("raw_text", raw_text, min_tokens=1000)]
+        )
+
+    def _comprehensive_info_prompt(
+        self, ocr_data: Dict[str, Any], transcript: str, language_code: str
+    ) -> Tuple[str, Dict[str, Any]]:
+        template = """
+        Language: {language_code}
+
+        OCR Data from Images:
+        {ocr_data}
+
+        Audio Transcript:
+        {transcript}
+        """
+        return self.prompt_budget.render(
+            template,
+            [
+                PromptSection("ocr_data", compact_json(ocr_data)),
+                PromptSection("transcript", transcript, priority=2),
+            ],
+            system_instruction=COMPREHENSIVE_INFO_SYSTEM_PROMPT,
+            language_code=language_code,
+        )
+
+    def _business_case_prompt(
+        self,
+        business_data: Dict[str, Any],
+        assessment_score: Dict[str, Any],
+        ocr_data: Dict[str, Any],
+        transcript: str,
+    ) -> Tuple[str, Dict[str, Any]]:
+        template = """
+        Comprehensive Business Data:
+        {business_data}
+
+        Assessment Score:
+        {assessment_score}
+
+        Original OCR Data (values not already in the business data):
+        {ocr_data}
+
+        Original Audio Transcript:
+        {transcript}
+        """
+        return self.prompt_budget.render(
+            template,
+            [
+                PromptSection("business_data", compact_json(business_data)),
+                PromptSection(
+                    "assessment_score", self._score_context(assessment_score)
+                ),
+                PromptSection(
+                    "ocr_data",
+                    compact_json(ocr_data, seen=context_strings(business_data)),
+                    priority=2,
+                ),
+                PromptSection("transcript", transcript, priority=3),
+            ],
+            system_instruction=BUSINESS_CASE_SYSTEM_PROMPT,
+        )
+
+    def _raw_sources_prompt(
+        self, raw_text: str, transcript: str, language_code: str
+    ) -> Tuple[str, Dict[str, Any]]:
+        template = """
+        Language: {language_code}
+
+        --- DOCUMENT TEXT (OCR) ---
+        {raw_text}
+        --- END OF DOCUMENT TEXT ---
+
+        --- AUDIO TRANSCRIPT ---
+        {transcript}
+        --- END OF AUDIO TRANSCRIPT ---
+        """
+        return self.prompt_budget.render(
+            template,
+            [
+                PromptSection("raw_text", raw_text or "Not provided", min_tokens=1000),
+                PromptSection("transcript", transcript or "Not provided", priority=2),
+            ],
+            system_instruction=COMPREHENSIVE_PROFILE_SYSTEM_PROMPT,
+            language_code=language_code,
+        )
+
+    def _profile_business_case_prompt(
+        self, profile: Dict[str, Any], assessment_score: Dict[str, Any]
+    ) -> Tuple[str, Dict[str, Any]]:
+        template = """
+        The profile was synthesized from a written document and an audio pitch;
+        source_notes summarizes each source, their conflicts and information gaps.
+
+        Comprehensive Business Profile:
+        {profile}
+
+        Assessment Score:
+        {assessment_score}
+        """
+        return self.prompt_budget.render(
+            template,
+            [
+                PromptSection("profile", compact_json(profile), priority=0),
+                PromptSection(
+                    "assessment_score", self._score_context(assessment_score)
+                ),
+            ],
+            system_instruction=BUSINESS_CASE_SYSTEM_PROMPT,
+        )
+
+    def _score_context(self, assessment_score: Dict[str, Any]) -> str:
+        """The score without its derived fields (percentage, score_details)"""
+        return compact_json(
+            {
+                key: assessment_score.get(key)
+                for key in (
+                    "total_score",
+                    "max_score",
+                    "eligibility",
+                    "recommendation",
+                    "breakdown",
+                )
+            }
+        )
+
+    def _log_prompt(self, stage: str, stats: Dict[str, Any], response) -> None:
+        """Log the input tokens sent: Gemini's count when the response has usage
+        metadata (not for cached answers), else the local estimate"""
+        usage = getattr(response, "usage_metadata", None)
+        counted = getattr(usage, "prompt_token_count", None)
+        tokens = counted if counted else f"~{stats['input_tokens']}"
+        message = f"{stage}: {tokens} input tokens (budget {stats['budget']})"
+        if stats["truncated"]:
+            self.logger.warning(
+                f"{message}, truncated: {', '.join(stats['truncated'])}"
+            )
+        else:
+            self.logger.info(message)
@@ -0,0 +1,235 @@
+"""
+Single entry point for Gemini text generation calls
+
+Services call Gemini through the gateway instead of their SDK objects directly
+so that every call site shares one response cache: the two-tier cache from
+``utils.cache_backend``, keyed by the prompt fingerprint from ``utils.llm_cache``.
+Both SDKs in use are supported: ``google.genai`` clients and legacy
+``google.generativeai`` ``GenerativeModel`` objects, each with a coroutine
+variant (``agenerate_content`` / ``agenerate_with_model``) for the async path.
+Cache hits are recorded in the token usage accounting (``utils.llm_usage``) as
+calls without tokens.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from flask import current_app
+
+from utils.cache_backend import get_shared_cache, make_cache_key
+from utils.llm_cache import llm_cache_key
+from utils.llm_usage import record_llm_call
+
+
+@dataclass
+class CachedResponse:
+    """Stand-in for an SDK response served from the cache"""
+
+    text: str
+    cached: bool = True
+    usage_metadata: Optional[Any] = None
+
+
+class LLMGateway:
+    def __init__(self, cache=None, ttl_seconds=3600):
+        self.logger = logging.getLogger(__name__)
+        self.cache = cache
+        self.ttl_seconds = ttl_seconds
+        self._stats_lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.bypasses = 0
+        self.latency_saved = 0.0
+
+    def generate_content(
+        self,
+        client,
+        model,
+        contents,
+        config=None,
+        use_cache=True,
+    ):
+        """``client.models.generate_content`` with response caching
+
+        Pass ``use_cache=False`` to force a fresh call; its response still
+        refreshes the cache.
+        """
+        return self._cached_call(
+            model,
+            contents,
+            config,
+            use_cache,
+            lambda: client.models.generate_content(
+                model=model, contents=contents, config=config
+            ),
+        )
+
+    def generate_with_model(
+        self, model, prompt, generation_config=None, use_cache=True
+    ):
+        """Legacy ``GenerativeModel.generate_content`` with response caching"""
+        return self._cached_call(
+            getattr(model, "model_name", str(model)),
+            prompt,
+            generation_config,
+            use_cache,
+            lambda: model.generate_content(
+                prompt, generation_config=generation_config
+            ),
+        )
+
+    async def agenerate_content(
+        self,
+        client,
+        model,
+        contents,
+        config=None,
+        use_cache=True,
+    ):
+        """``client.aio.models.generate_content`` with response caching"""
+        return await self._cached_call_async(
+            model,
+            contents,
+            config,
+            use_cache,
+            lambda: client.aio.models.generate_content(
+                model=model, contents=contents, config=config
+            ),
+        )
+
+    async def agenerate_with_model(
+        self, model, prompt, generation_config=None, use_cache=True
+    ):
+        """Legacy ``GenerativeModel.generate_content_async`` with response caching"""
+        return await self._cached_call_async(
+            getattr(model, "model_name", str(model)),
+            prompt,
+            generation_config,
+            use_cache,
+            lambda: model.generate_content_async(
+                prompt, generation_config=generation_config
+            ),
+        )
+
+    def _cached_call(self, model_name, contents, config, use_cache, call):
+        if self.cache is None:
+            return call()
+
+        key = make_cache_key("llm", llm_cache_key(model_name, contents, config))
+        if not use_cache:
+            with self._stats_lock:
+                self.bypasses += 1
+            return self._call_and_store(key, call)
+
+        cached = self.cache.get(key)
+        if cached is None:
+            # Concurrent identical requests (any worker) wait for one call
+            with self.cache.single_flight(key):
+                cached = self.cache.get(key)
+                if cached is None:
+                    with self._stats_lock:
+                        self.lookups += 1
+                    return self._call_and_store(key, call)
+
+        self.logger.debug(f"LLM cache hit for {model_name} ({key[-12:]})")
+        with self._stats_lock:
+            self.lookups += 1
+            self.hits += 1
+            self.latency_saved += cached["latency"]
+        record_llm_call(model_name, cache_hit=True)
+        return CachedResponse(text=cached["text"])
+
+    async def _cached_call_async(self, model_name, contents, config, use_cache, call):
+        if self.cache is None:
+            return await call()
+
+        key = make_cache_key("llm", llm_cache_key(model_name, contents, config))
+        # The shared tier may be SQLite or Redis, so lookups leave the event loop.
+        # Identical concurrent misses are not coalesced here: single_flight
+        # holds thread locks that must not be awaited across.
+        cached = await asyncio.to_thread(self.cache.get, key) if use_cache else None
+        with self._stats_lock:
+            if not use_cache:
+                self.bypasses += 1
+            else:
+                self.lookups += 1
+                if cached is not None:
+                    self.hits += 1
+                    self.latency_saved += cached["latency"]
+        if cached is not None:
+            self.logger.debug(f"LLM cache hit for {model_name} ({key[-12:]})")
+            record_llm_call(model_name, cache_hit=True)
+            return CachedResponse(text=cached["text"])
+
+        started = time.perf_counter()
+        response = await call()
+        latency = time.perf_counter() - started
+        text = self._response_text(response)
+        if text:
+            await asyncio.to_thread(
+                self.cache.set,
+                key,
+                {"text": text, "latency": latency},
+                self.ttl_seconds,
+            )
+        return response
+
+    @staticmethod
+    def _response_text(response):
+        # Blocked or empty responses raise on .text; those are never cached
+        try:
+            return response.text
+        except Exception:
+            return None
+
+    def _call_and_store(self, key, call):
+        started = time.perf_counter()
+        response = call()
+        latency = time.perf_counter() - started
+
+        text = self._response_text(response)
+        if text:
+            self.cache.set(key, {"text": text, "latency": latency}, self.ttl_seconds)
+        return response
+
+    def stats(self):
+        if self.cache is None:
+            return {"enabled": False}
+        with self._stats_lock:
+            return {
+                "enabled": True,
+                "ttl_seconds": self.ttl_seconds,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "misses": self.lookups - self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "bypasses": self.bypasses,
+                "latency_saved_seconds": round(self.latency_saved, 3),
+            }
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway():
+    """Return the process-wide gateway, configured from the app on first use"""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            cache = None
+            ttl_seconds = 3600
+            try:
+                ttl_seconds = current_app.config.get("LLM_CACHE_TTL_SECONDS", 3600)
+                if current_app.config.get("LLM_CACHE_ENABLED", True):
+                    cache = get_shared_cache()
+            except Exception as e:
+                logging.getLogger(__name__).error(
+                    f"Failed to configure LLM response cache: {str(e)}"
+                )
+            _gateway = LLMGateway(cache, ttl_seconds)
+        return _gateway
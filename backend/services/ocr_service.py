@@ -3,57 +3,533 @@ OCR service for processing handwritten notes, sketches, and PDFs
 """
 
 from google.cloud import vision
-from google import genai as gemini_sdk
 from google.genai import types
+import asyncio
+import contextvars
 import io
 import logging
 import os
 import tempfile
+import mimetypes
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pdf2image import convert_from_path
 from PIL import Image
 from flask import current_app
 from utils.pdf_processor import PDFProcessor
+from services.llm_gateway import get_llm_gateway
+from utils.page_classifier import classify_text_style, find_duplicate
+from utils.cache_backend import get_shared_cache
+from utils.gemini_guard import create_gemini_client
+from utils.image_cache import file_digest, get_image_cache, normalized_image_hash
+from utils.llm_usage import ANONYMOUS_USER_PREFIX, current_request_usage
+from utils.ocr_image_encoder import OCRImageSettings, encode_image_for_ocr
+from utils.ocr_batching import (
+    PAGE_DELIMITER,
+    build_batch_prompt,
+    parse_batch_response,
+    plan_batches,
+)
+
+# Tesseract is optional; without it every page goes to the remote engines
+try:
+    import pytesseract
+
+    HAS_TESSERACT = True
+except ImportError:
+    HAS_TESSERACT = False
+
+# Structured fields extracted from business plan text (OCR or transcripts)
+EXTRACTION_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    properties={
+        "Entrepreneur_Name": types.Schema(
+            type=types.Type.STRING,
+            description="Extracted Name of the entrepreneur.",
+        ),
+        "Education_Status": types.Schema(
+            type=types.Type.STRING,
+            description="Extracted educational qualification.",
+        ),
+        "Phone_Number": types.Schema(
+            type=types.Type.STRING, description="Extracted phone number."
+        ),
+        "Business_Name": types.Schema(
+            type=types.Type.STRING, description="Name of the business."
+        ),
+        "Main_Product_Service": types.Schema(
+            type=types.Type.STRING,
+            description="Description of the main product or service provided.",
+        ),
+        "Key_USP": types.Schema(
+            type=types.Type.STRING,
+            description="The unique selling proposition or idea that is better than others.",
+        ),
+        "Loan_Requirement_First_Month_INR": types.Schema(
+            type=types.Type.INTEGER,
+            description="The loan requirement for the business setup phase (First Month) in INR.",
+        ),
+    },
+    required=["Entrepreneur_Name", "Business_Name", "Main_Product_Service"],
+)
+
+EXTRACTION_SYSTEM_PROMPT = (
+    "You are an expert financial analyst focused on business plan review. Your task is to extract "
+    "key, structured data points from the provided raw OCR text which was taken from a handwritten "
+    "entrepreneurship development program document. Only return the requested JSON object. "
+    "If a field cannot be found, set its value to 'N/A' (except required fields)."
+)
+
+# Fused mode: OCR text and structured fields from the image in one call
+FUSED_SYSTEM_PROMPT = (
+    "You are an expert financial analyst focused on business plan review. You receive images of a "
+    "handwritten entrepreneurship development program document. First perform accurate OCR of all "
+    "handwritten and printed text, then extract the key structured data points from that text. "
+    "Only return the requested JSON object. If a field cannot be found, set its value to 'N/A' "
+    "(except required fields)."
+)
+
+# Map-reduce mode: settle fields that different page windows disagree on
+REDUCE_SYSTEM_PROMPT = (
+    "You are an expert financial analyst focused on business plan review. Structured fields were "
+    "extracted separately from different pages of one entrepreneurship development program "
+    "document, and some pages disagree. For each field, choose the candidate value best supported "
+    "by the evidence (page confidence, specificity, consistency with the other fields). Only return "
+    "the requested JSON object."
+)
+
+FUSED_IMAGE_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    properties={
+        "raw_text": types.Schema(
+            type=types.Type.STRING,
+            description="Complete raw OCR text of the image, handwritten and printed.",
+        ),
+        "structured_fields": EXTRACTION_SCHEMA,
+    },
+    required=["raw_text", "structured_fields"],
+)
+
+FUSED_PAGES_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    properties={
+        "pages": types.Schema(
+            type=types.Type.ARRAY,
+            description="Raw OCR text of every page image, one entry per page.",
+            items=types.Schema(
+                type=types.Type.OBJECT,
+                properties={
+                    "page": types.Schema(type=types.Type.INTEGER),
+                    "text": types.Schema(type=types.Type.STRING),
+                },
+                required=["page", "text"],
+            ),
+        ),
+        "structured_fields": EXTRACTION_SCHEMA,
+    },
+    required=["pages", "structured_fields"],
+)
+
+# Request configs are built once at import and shared by every call
+STRUCTURED_DATA_CONFIG = types.GenerateContentConfig(
+    system_instruction=EXTRACTION_SYSTEM_PROMPT,
+    response_mime_type="application/json",
+    response_schema=EXTRACTION_SCHEMA,
+)
+REDUCE_CONFIG = types.GenerateContentConfig(
+    system_instruction=REDUCE_SYSTEM_PROMPT,
+    response_mime_type="application/json",
+    response_schema=EXTRACTION_SCHEMA,
+)
+FUSED_IMAGE_CONFIG = types.GenerateContentConfig(
+    system_instruction=FUSED_SYSTEM_PROMPT,
+    response_mime_type="application/json",
+    response_schema=FUSED_IMAGE_SCHEMA,
+)
+FUSED_PAGES_CONFIG = types.GenerateContentConfig(
+    system_instruction=FUSED_SYSTEM_PROMPT,
+    response_mime_type="application/json",
+    response_schema=FUSED_PAGES_SCHEMA,
+)
+
+
+def structured_field_violations(fields):
+    """List the ways model output breaks EXTRACTION_SCHEMA (empty when valid)"""
+    if not isinstance(fields, dict):
+        return ["structured_fields is not an object"]
+
+    violations = [
+        f"missing required field {name}"
+        for name in EXTRACTION_SCHEMA.required
+        if not isinstance(fields.get(name), str) or not fields[name].strip()
+    ]
+    for name, value in fields.items():
+        field_schema = EXTRACTION_SCHEMA.properties.get(name)
+        if field_schema is None:
+            violations.append(f"unexpected field {name}")
+        elif value is None or value == "N/A":
+            continue
+        elif field_schema.type == types.Type.INTEGER and (
+            not isinstance(value, int) or isinstance(value, bool)
+        ):
+            violations.append(f"{name} is not an integer")
+        elif field_schema.type == types.Type.STRING and not isinstance(value, str):
+            violations.append(f"{name} is not a string")
+    return violations
+
+
+# Values the extraction prompt uses for "not found"
+PLACEHOLDER_VALUES = {"", "n/a", "na", "none", "unknown", "not specified"}
+
+
+def is_filled_field(value):
+    """Whether an extracted field holds a real value rather than a placeholder"""
+    if value is None or isinstance(value, bool):
+        return False
+    if isinstance(value, str):
+        return value.strip().lower() not in PLACEHOLDER_VALUES
+    return True
+
+
+def merge_structured_fields(accumulated, fields):
+    """Fill fields of ``accumulated`` that are missing or placeholders from
+    ``fields``; values already found are kept (earlier pages win)"""
+    merged = dict(accumulated)
+    for name, value in fields.items():
+        if name not in merged or (
+            not is_filled_field(merged[name]) and is_filled_field(value)
+        ):
+            merged[name] = value
+    return merged
+
+
+def reduce_field_candidates(candidates):
+    """Reduce step of map-reduce extraction: merge per-window field candidates
+
+    ``candidates`` are ``{"pages", "confidence", "fields"}`` dicts in page
+    order. For every schema field the filled value from the most confidently
+    read window wins, ties going to the earliest window; fields no window found
+    are "N/A". Returns ``(fields, field_pages, conflicts)`` where ``conflicts``
+    lists, per field, the distinct candidate values when windows disagree.
+    """
+    fields, field_pages, conflicts = {}, {}, {}
+    for name in EXTRACTION_SCHEMA.properties:
+        found = [
+            candidate
+            for candidate in candidates
+            if is_filled_field(candidate["fields"].get(name))
+        ]
+        if not found:
+            fields[name] = "N/A"
+            continue
+        best = max(found, key=lambda candidate: candidate["confidence"])
+        fields[name] = best["fields"][name]
+        field_pages[name] = best["pages"]
+
+        values = []
+        for candidate in found:
+            value = candidate["fields"][name]
+            if all(value != seen["value"] for seen in values):
+                values.append(
+                    {
+                        "value": value,
+                        "pages": candidate["pages"],
+                        "confidence": candidate["confidence"],
+                    }
+                )
+        if len(values) > 1:
+            conflicts[name] = values
+    return fields, field_pages, conflicts
+
+
+class FieldExtractionMap:
+    """Map step of map-reduce extraction over a multi-page document
+
+    Pages are grouped into fixed windows of consecutive page numbers. A
+    window's text is sent for extraction on a worker thread as soon as all of
+    its pages have been read, so extraction overlaps OCR of later pages.
+    """
+
+    def __init__(self, extract, page_numbers, window_pages=2, max_workers=4):
+        self.extract = extract
+        window_pages = max(window_pages, 1)
+        self.windows = [
+            page_numbers[start : start + window_pages]
+            for start in range(0, len(page_numbers), window_pages)
+        ]
+        self.window_of = {
+            page: index for index, window in enumerate(self.windows) for page in window
+        }
+        self.page_texts = {}  # page -> (text or None, confidence)
+        self.futures = {}  # window index -> future
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(max_workers, 1), thread_name_prefix="field-map"
+        )
+
+    def add_page(self, page, text, confidence):
+        """Record a page's text; None for pages that were skipped or failed"""
+        index = self.window_of.get(page)
+        if index is None or index in self.futures:
+            return
+        self.page_texts[page] = (text, confidence)
+        if all(number in self.page_texts for number in self.windows[index]):
+            self._submit(index)
+
+    def results(self):
+        """Wait for every window and return their candidates in page order"""
+        try:
+            for index in range(len(self.windows)):
+                if index not in self.futures:
+                    self._submit(index)
+            candidates = []
+            for index in sorted(self.futures):
+                candidate = self.futures[index].result()
+                if candidate and "error" not in candidate["fields"]:
+                    candidates.append(candidate)
+            return candidates
+        finally:
+            self.executor.shutdown(wait=False)
+
+    def _submit(self, index):
+        parts = [
+            (page, *self.page_texts[page])
+            for page in self.windows[index]
+            if page in self.page_texts and self.page_texts[page][0]
+        ]
+        # Copy the context so the window's call is attributed to the request
+        self.futures[index] = self.executor.submit(
+            contextvars.copy_context().run, self._extract_window, parts
+        )
+
+    def _extract_window(self, parts):
+        if not parts:
+            return None
+        fields = self.extract(
+            "\n\n[PAGE BREAK]\n\n".join(text for _, text, _ in parts)
+        )
+        return {
+            "pages": [page for page, _, _ in parts],
+            "confidence": min(confidence or 0.0 for _, _, confidence in parts),
+            "fields": fields if isinstance(fields, dict) else {"error": "no fields"},
+        }
 
 
 class OCRService:
-    def __init__(self):
+    def __init__(self, gemini_client=None, vision_client=None):
+        self.logger = logging.getLogger(__name__)
+
         # Legacy Google Cloud Vision client
-        self.vision_client = vision.ImageAnnotatorClient()
+        self.vision_client = vision_client
+        if self.vision_client is None:
+            try:
+                self.vision_client = vision.ImageAnnotatorClient()
+            except Exception as e:
+                # Gemini and local OCR still work without GCP credentials
+                self.logger.error(f"Failed to initialize Vision client: {str(e)}")
 
         # Gemini client for enhanced OCR
-        self.gemini_client = None
-        self.logger = logging.getLogger(__name__)
+        self.gemini_client = gemini_client
 
         # Initialize Gemini client if API key is available
         try:
             gemini_api_key = current_app.config.get("GEMINI_API_KEY")
-            if gemini_api_key:
+            if self.gemini_client is None and gemini_api_key:
                 os.environ["GEMINI_API_KEY"] = gemini_api_key
-                self.gemini_client = gemini_sdk.Client(api_key=gemini_api_key)
+                self.gemini_client = create_gemini_client(gemini_api_key)
                 self.logger.info("Gemini client initialized successfully")
-            else:
+            elif self.gemini_client is None:
                 self.logger.warning("GEMINI_API_KEY not found in configuration")
         except Exception as e:
             self.logger.error(f"Failed to initialize Gemini client: {str(e)}")
 
+        # Local Tesseract tier for printed pages
+        self.local_ocr_enabled = False
+        self.local_ocr_languages = "eng"
+        self.local_ocr_min_confidence = 0.80
+        try:
+            self.local_ocr_enabled = HAS_TESSERACT and current_app.config.get(
+                "LOCAL_OCR_ENABLED", True
+            )
+            self.local_ocr_languages = current_app.config.get(
+                "LOCAL_OCR_LANGUAGES", self.local_ocr_languages
+            )
+            self.local_ocr_min_confidence = current_app.config.get(
+                "LOCAL_OCR_MIN_CONFIDENCE", self.local_ocr_min_confidence
+            )
+            tesseract_cmd = current_app.config.get("TESSERACT_CMD")
+            if HAS_TESSERACT and tesseract_cmd:
+                pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        except Exception as e:
+            self.logger.error(f"Failed to configure local OCR: {str(e)}")
+
+        # Re-encoding applied to images before vision OCR requests
+        self.image_settings = OCRImageSettings()
+        try:
+            self.image_settings = OCRImageSettings.from_config(current_app.config)
+        except Exception as e:
+            self.logger.error(f"Failed to load OCR image settings: {str(e)}")
+
+        # Multi-page Gemini OCR requests for PDFs (1 sends one page per request)
+        self.batch_max_pages = 4
+        self.batch_max_bytes = 16 * 1024 * 1024
+        self.batch_max_image_tokens = 8000
+        try:
+            self.batch_max_pages = current_app.config.get(
+                "OCR_BATCH_MAX_PAGES", self.batch_max_pages
+            )
+            self.batch_max_bytes = current_app.config.get(
+                "OCR_BATCH_MAX_BYTES", self.batch_max_bytes
+            )
+            self.batch_max_image_tokens = current_app.config.get(
+                "OCR_BATCH_MAX_IMAGE_TOKENS", self.batch_max_image_tokens
+            )
+        except Exception as e:
+            self.logger.error(f"Failed to load OCR batching settings: {str(e)}")
+
+        # Process-wide cache of OCR results keyed by perceptual image hash
+        self.image_cache = None
+        try:
+            if current_app.config.get("OCR_IMAGE_CACHE_ENABLED", True):
+                self.image_cache = get_image_cache(
+                    max_entries=current_app.config.get("OCR_IMAGE_CACHE_SIZE", 1000),
+                    max_distance=current_app.config.get(
+                        "OCR_IMAGE_CACHE_MAX_DISTANCE", 8
+                    ),
+                    shared=get_shared_cache(),
+                    ttl=current_app.config.get("OCR_IMAGE_CACHE_TTL_SECONDS", 86400),
+                )
+        except Exception as e:
+            self.logger.error(f"Failed to initialize OCR image cache: {str(e)}")
+
+    @staticmethod
+    def _image_cache_owner(image_path):
+        """Scope of the image cache lookup: the requesting user, or for anonymous
+        requests the upload's byte hash so only identical files share a result"""
+        usage = current_request_usage()
+        user_id = usage.user_id if usage is not None else None
+        # Anonymous clients behind one IP are still different people
+        if user_id and not user_id.startswith(ANONYMOUS_USER_PREFIX):
+            return f"user:{user_id}"
+        return f"sha256:{file_digest(image_path)}"
+
     def extract_text_from_image(self, image_path, use_gemini=True):
-        """Extract text from handwritten notes or sketches"""
+        """Extract text from handwritten notes or sketches
+
+        Near-identical images (re-photographed or re-compressed) the same user
+        uploaded before are served from the perceptual-hash cache without
+        another OCR call.
+        """
         try:
-            if use_gemini and self.gemini_client:
-                return self._gemini_vision_ocr(image_path)
+            use_gemini = use_gemini and self.gemini_client is not None
+            namespace = "gemini" if use_gemini else "vision"
+
+            image_hash = owner = None
+            if self.image_cache is not None:
+                try:
+                    owner = self._image_cache_owner(image_path)
+                    image_hash = normalized_image_hash(image_path)
+                    cached = self.image_cache.get(image_hash, namespace, owner)
+                    if cached is not None:
+                        self.logger.info(
+                            f"OCR image cache hit (distance {cached['cache_distance']})"
+                        )
+                        return dict(cached, cache_hit=True)
+                except Exception as e:
+                    self.logger.warning(f"OCR image cache lookup failed: {str(e)}")
+
+            if use_gemini:
+                result = self._route_page_ocr(image_path)
             else:
-                return self._google_vision_ocr(image_path)
+                result = self._google_vision_ocr(image_path)
+
+            if image_hash is not None and "error" not in result:
+                self.image_cache.put(image_hash, dict(result), namespace, owner)
+            return result
         except Exception as e:
             self.logger.error(f"OCR processing failed: {str(e)}")
             return {"error": str(e)}
 
-    def extract_text_from_pdf(self, pdf_path):
-        """Extract text from PDF using Gemini Vision OCR"""
+    async def extract_text_from_image_async(self, image_path, use_gemini=True):
+        """Coroutine version of ``extract_text_from_image``
+
+        Hashing, local OCR and re-encoding are CPU work and run in a worker
+        thread; the Gemini request itself is awaited on ``client.aio``.
+        """
         try:
-            if not self.gemini_client:
-                return {"error": "Gemini client not initialized"}
+            use_gemini = use_gemini and self.gemini_client is not None
+            if not use_gemini:
+                return await asyncio.to_thread(
+                    self.extract_text_from_image, image_path, use_gemini=False
+                )
+
+            image_hash = owner = None
+            if self.image_cache is not None:
+                try:
+                    owner = await asyncio.to_thread(
+                        self._image_cache_owner, image_path
+                    )
+                    image_hash = await asyncio.to_thread(
+                        normalized_image_hash, image_path
+                    )
+                    cached = await asyncio.to_thread(
+                        self.image_cache.get, image_hash, "gemini", owner
+                    )
+                    if cached is not None:
+                        self.logger.info(
+                            f"OCR image cache hit (distance {cached['cache_distance']})"
+                        )
+                        return dict(cached, cache_hit=True)
+                except Exception as e:
+                    self.logger.warning(f"OCR image cache lookup failed: {str(e)}")
+
+            local_result, text_style, escalation_reason = await asyncio.to_thread(
+                self._local_page_ocr, image_path
+            )
+            if local_result:
+                result = local_result
+            else:
+                encoded = await asyncio.to_thread(
+                    encode_image_for_ocr, image_path, self.image_settings
+                )
+                result = await self._gemini_vision_ocr_async(encoded)
+                result.update(
+                    engine="gemini",
+                    text_style=text_style,
+                    escalation_reason=escalation_reason,
+                )
+
+            if image_hash is not None and "error" not in result:
+                await asyncio.to_thread(
+                    self.image_cache.put, image_hash, dict(result), "gemini", owner
+                )
+            return result
+        except Exception as e:
+            self.logger.error(f"OCR processing failed: {str(e)}")
+            return {"error": str(e)}
+
+    def extract_text_from_pdf(
+        self, pdf_path, fused=False, pages=None, progressive=False
+    ):
+        """Extract text from PDF, using the embedded text layer where usable and
+        Gemini Vision OCR only for scanned or handwritten pages
 
+        With ``fused``, documents whose OCR pages fit in one request are OCR'd
+        and field-extracted in a single call; the result then carries
+        ``structured_data``. ``pages`` limits processing to those 1-based page
+        numbers.
+
+        With ``progressive``, pages are read in order a few at a time and
+        fields are extracted from each chunk as it arrives. Reading stops once
+        the required fields and PDF_EARLY_STOP_FIELDS have been found on
+        confidently read pages; the result then carries ``structured_data``,
+        ``stopped_after_page`` and ``pages_not_processed``.
+
+        Otherwise, documents with at least STRUCTURED_MAP_REDUCE_MIN_PAGES
+        pages get map-reduce field extraction: fields are extracted from small
+        page windows while later pages are still being OCR'd, then merged into
+        ``structured_data`` (see ``reduce_field_candidates``).
+        """
+        try:
             # Initialize PDF processor
             poppler_path = current_app.config.get("POPPLER_PATH")
             pdf_processor = PDFProcessor(poppler_path=poppler_path)
@@ -64,109 +540,463 @@ class OCRService:
                     "error": "Poppler installation not found or invalid. Please install Poppler and set POPPLER_PATH in configuration."
                 }
 
-            # Convert PDF pages to images
-            pages = pdf_processor.convert_pdf_to_images(pdf_path)
+            # Pre-pass: pages with a usable text layer skip rasterization and OCR
+            min_chars = current_app.config.get("PDF_TEXT_LAYER_MIN_CHARS", 40)
+            text_layers = pdf_processor.extract_text_layer(pdf_path)
+            page_count = len(text_layers) or pdf_processor.get_page_count(pdf_path)
+            selected_pages = [
+                page_number
+                for page_number in (pages or range(1, page_count + 1))
+                if 1 <= page_number <= page_count
+            ]
+            if not selected_pages:
+                return {
+                    "error": f"No requested pages within the document ({page_count} pages)"
+                }
+            ocr_page_numbers = {
+                page_number
+                for page_number in selected_pages
+                if page_number > len(text_layers)
+                or not pdf_processor.has_usable_text_layer(
+                    text_layers[page_number - 1], min_chars
+                )
+            }
 
-            # Extract text from each page
-            full_text_parts = []
-            temp_files = []
+            if (ocr_page_numbers or progressive) and not self.gemini_client:
+                return {"error": "Gemini client not initialized"}
 
-            try:
-                for i, page in enumerate(pages):
-                    # Save page as temporary image with optimization
-                    temp_file_path = pdf_processor.save_image_temporarily(page)
-                    temp_files.append(temp_file_path)
+            chunks = [selected_pages]
+            if progressive:
+                chunk_pages = max(
+                    current_app.config.get("PDF_PROGRESSIVE_CHUNK_PAGES", 2), 1
+                )
+                chunks = [
+                    selected_pages[start : start + chunk_pages]
+                    for start in range(0, len(selected_pages), chunk_pages)
+                ]
+                target_fields = list(EXTRACTION_SCHEMA.required) + [
+                    name
+                    for name in current_app.config.get("PDF_EARLY_STOP_FIELDS", [])
+                    if name in EXTRACTION_SCHEMA.properties
+                    and name not in EXTRACTION_SCHEMA.required
+                ]
+                min_confidence = current_app.config.get(
+                    "PDF_EARLY_STOP_MIN_CONFIDENCE", 0.7
+                )
+
+            field_map = None
+            map_reduce_pages = current_app.config.get(
+                "STRUCTURED_MAP_REDUCE_MIN_PAGES", 4
+            )
+            if (
+                not progressive
+                and self.gemini_client
+                and map_reduce_pages
+                and len(selected_pages) >= map_reduce_pages
+            ):
+                field_map = FieldExtractionMap(
+                    self.extract_structured_data,
+                    selected_pages,
+                    window_pages=current_app.config.get("STRUCTURED_MAP_WINDOW_PAGES", 2),
+                    max_workers=current_app.config.get("STRUCTURED_MAP_WORKERS", 4),
+                )
+                # Fields come from the windows, so OCR needs no fused call
+                fused = False
 
-                    # Perform OCR on the page
-                    page_text = self._gemini_vision_ocr(temp_file_path)
+            # Shared across chunks so duplicates of earlier chunks are skipped too
+            document = {"text_parts": [], "page_details": [], "seen_hashes": {}}
+            structured_data = None
+            fused_fallback_reason = None
+            field_pages = {}  # field -> pages of the chunk its value came from
+            stopped_after_page = None
 
-                    if "error" in page_text:
-                        self.logger.warning(
-                            f"OCR failed for page {i+1}: {page_text['error']}"
-                        )
-                        full_text_parts.append(
-                            f"[Page {i+1} OCR Error: {page_text['error']}]"
+            for chunk_index, chunk in enumerate(chunks):
+                first_detail = len(document["page_details"])
+                chunk_fields, chunk_fallback = self._ocr_pdf_pages(
+                    pdf_processor,
+                    pdf_path,
+                    chunk,
+                    text_layers,
+                    ocr_page_numbers,
+                    document,
+                    fused,
+                    on_page=field_map.add_page if field_map else None,
+                )
+                fused_fallback_reason = fused_fallback_reason or chunk_fallback
+                if not progressive:
+                    structured_data = chunk_fields
+                    break
+
+                # Incremental extraction over the pages just read
+                chunk_details = document["page_details"][first_detail:]
+                read_pages = [
+                    (detail, document["text_parts"][first_detail + offset])
+                    for offset, detail in enumerate(chunk_details)
+                    if detail["confidence"]
+                ]
+                if not read_pages:
+                    continue
+                if chunk_fields is None:
+                    chunk_fields = self.extract_structured_data(
+                        "\n\n[PAGE BREAK]\n\n".join(text for _, text in read_pages)
+                    )
+                if not chunk_fields or "error" in chunk_fields:
+                    continue
+
+                chunk_confidence = min(detail["confidence"] for detail, _ in read_pages)
+                structured_data = merge_structured_fields(
+                    structured_data or {}, chunk_fields
+                )
+                if chunk_confidence >= min_confidence:
+                    for name, value in chunk_fields.items():
+                        if is_filled_field(value) and name not in field_pages:
+                            field_pages[name] = chunk
+
+                if all(name in field_pages for name in target_fields):
+                    if chunk_index < len(chunks) - 1:
+                        stopped_after_page = chunk[-1]
+                        self.logger.info(
+                            f"Progressive PDF extraction stopped after page "
+                            f"{stopped_after_page} of {page_count}"
                         )
-                    else:
-                        full_text_parts.append(page_text["full_text"])
+                    break
 
-                raw_text_combined = "\n\n[PAGE BREAK]\n\n".join(full_text_parts)
+            if field_map:
+                structured_data, field_pages = self._reduce_field_candidates(
+                    field_map.results()
+                )
 
-                return {
-                    "full_text": raw_text_combined,
-                    "pages_processed": len(pages),
-                    "confidence": 0.95,  # Gemini typically has high confidence
-                }
+            full_text_parts = document["text_parts"]
+            page_details = document["page_details"]
+            raw_text_combined = "\n\n[PAGE BREAK]\n\n".join(full_text_parts)
+            page_confidences = [
+                page["confidence"] for page in page_details if page["confidence"]
+            ]
 
-            finally:
-                # Clean up all temporary files
-                for temp_file in temp_files:
-                    pdf_processor.cleanup_temp_file(temp_file)
+            result = {
+                "full_text": raw_text_combined,
+                "pages_processed": len(page_details),
+                "page_count": page_count,
+                "pages_ocr": sum(1 for page in page_details if page["path"] == "ocr"),
+                "pages_skipped": sum(
+                    1 for page in page_details if page["path"].startswith("skipped_")
+                ),
+                "confidence": (
+                    sum(page_confidences) / len(page_confidences)
+                    if page_confidences
+                    else 0.0
+                ),
+                "pages": page_details,
+            }
+            if structured_data is not None:
+                result["structured_data"] = structured_data
+            if fused_fallback_reason:
+                result["fused_fallback_reason"] = fused_fallback_reason
+            if progressive:
+                processed = {page["page"] for page in page_details}
+                result["stopped_after_page"] = stopped_after_page
+                result["pages_not_processed"] = [
+                    page_number
+                    for page_number in selected_pages
+                    if page_number not in processed
+                ]
+            if progressive or field_map:
+                result["field_pages"] = field_pages
+            return result
 
         except Exception as e:
             self.logger.error(f"PDF OCR processing failed: {str(e)}")
             return {"error": str(e)}
 
-    def extract_structured_data(self, raw_text):
-        """Extract structured data from raw OCR text using Gemini"""
+    async def extract_text_from_pdf_async(
+        self, pdf_path, fused=False, pages=None, progressive=False
+    ):
+        """Coroutine version of ``extract_text_from_pdf``
+
+        The PDF pipeline is dominated by rendering and local OCR and already
+        fans Gemini batches out over its own pools, so it runs as a whole in a
+        worker thread rather than on the event loop.
+        """
+        return await asyncio.to_thread(
+            self.extract_text_from_pdf,
+            pdf_path,
+            fused=fused,
+            pages=pages,
+            progressive=progressive,
+        )
+
+    def _ocr_pdf_pages(
+        self,
+        pdf_processor,
+        pdf_path,
+        page_numbers,
+        text_layers,
+        ocr_page_numbers,
+        document,
+        fused,
+        on_page=None,
+    ):
+        """Read ``page_numbers`` in order, appending to ``document``
+
+        Pages in ``ocr_page_numbers`` are rendered and OCR'd; the rest use their
+        text layer. ``document`` holds ``text_parts``, ``page_details`` and the
+        ``seen_hashes`` used for duplicate detection. ``on_page(page, text,
+        confidence)`` is called as soon as each page's text is known (text None
+        for skipped or failed pages). Returns
+        ``(structured_data, fused_fallback_reason)``; ``structured_data`` is
+        only set when the fused call covered these pages.
+        """
+        # Rasterize, analyse and encode only the pages that need OCR, in the
+        # shared render process pool
+        pages = pdf_processor.render_pages_for_ocr(
+            pdf_path,
+            [number for number in page_numbers if number in ocr_page_numbers],
+            self.image_settings,
+            max_workers=current_app.config.get("PDF_RENDER_WORKERS", 0),
+            thread_count=current_app.config.get("PDF_POPPLER_THREADS", 1),
+            pages_per_task=current_app.config.get("PDF_PAGES_PER_TASK", 2),
+            classify_style=self.local_ocr_enabled,
+        )
+
+        # Blank and near-duplicate pages are detected locally and never OCR'd
+        skip_redundant = current_app.config.get("PDF_SKIP_REDUNDANT_PAGES", True)
+        blank_coverage = current_app.config.get("PDF_BLANK_INK_COVERAGE", 0.0005)
+        duplicate_ratio = current_app.config.get("PDF_DUPLICATE_HASH_DISTANCE", 0.03)
+        seen_hashes = document["seen_hashes"]
+
+        # Extract text from each page
+        full_text_parts = document["text_parts"]
+        page_details = document["page_details"]
+        temp_files = []
+        ocr_slots = {}  # page number -> index in full_text_parts/page_details
+        ocr_results = {}
+        gemini_pages = []
+
+        try:
+            for page_number in page_numbers:
+                if page_number not in pages:
+                    full_text_parts.append(text_layers[page_number - 1].strip())
+                    page_details.append(
+                        {
+                            "page": page_number,
+                            "path": "text_layer",
+                            "engine": "pdftotext",
+                            "text_style": "digital",
+                            "confidence": 1.0,
+                            "escalation_reason": None,
+                        }
+                    )
+                    if on_page:
+                        on_page(page_number, full_text_parts[-1], 1.0)
+                    continue
+
+                page = pages[page_number]
+
+                skipped = None
+                if skip_redundant:
+                    analysis = page["analysis"]
+                    duplicate_of = find_duplicate(
+                        analysis["hash"],
+                        seen_hashes,
+                        duplicate_ratio,
+                        analysis["hash_bits"],
+                    )
+                    if analysis["ink_coverage"] < blank_coverage:
+                        skipped = {
+                            "path": "skipped_blank",
+                            "marker": f"[Page {page_number}: blank page skipped]",
+                        }
+                    elif duplicate_of is not None:
+                        skipped = {
+                            "path": "skipped_duplicate",
+                            "duplicate_of": duplicate_of,
+                            "marker": (
+                                f"[Page {page_number}: duplicate of page "
+                                f"{duplicate_of}, skipped]"
+                            ),
+                        }
+                    else:
+                        seen_hashes[page_number] = analysis["hash"]
+
+                if skipped:
+                    full_text_parts.append(skipped.pop("marker"))
+                    page_details.append(
+                        {
+                            "page": page_number,
+                            "engine": None,
+                            "text_style": None,
+                            "confidence": None,
+                            "escalation_reason": None,
+                            **skipped,
+                        }
+                    )
+                    if on_page:
+                        on_page(page_number, None, None)
+                    continue
+
+                # Keep the encoded page on disk for engines that read files
+                suffix = mimetypes.guess_extension(page["mime_type"]) or ".img"
+                with tempfile.NamedTemporaryFile(
+                    delete=False, suffix=suffix
+                ) as tmp_file:
+                    tmp_file.write(page["data"])
+                temp_files.append(tmp_file.name)
+
+                # Tesseract reads the full-resolution render, not the downscaled
+                # encoding made for Gemini
+                local_path = tmp_file.name
+                if page.get("local_ocr_data"):
+                    with tempfile.NamedTemporaryFile(
+                        delete=False, suffix=".png"
+                    ) as local_file:
+                        local_file.write(page["local_ocr_data"])
+                    temp_files.append(local_file.name)
+                    local_path = local_file.name
+
+                # Local tier first for printed pages; the rest go to Gemini
+                local_result, text_style, escalation_reason = self._local_page_ocr(
+                    local_path, text_style=page["text_style"]
+                )
+                ocr_slots[page_number] = len(full_text_parts)
+                full_text_parts.append(None)
+                page_details.append(
+                    {
+                        "page": page_number,
+                        "path": "ocr",
+                        "engine": None,
+                        "text_style": text_style,
+                        "confidence": None,
+                        "escalation_reason": escalation_reason,
+                    }
+                )
+                if local_result:
+                    ocr_results[page_number] = local_result
+                    if on_page:
+                        on_page(
+                            page_number,
+                            local_result["full_text"],
+                            local_result.get("confidence"),
+                        )
+                else:
+                    gemini_pages.append(
+                        {
+                            "page": page_number,
+                            "path": tmp_file.name,
+                            "data": page["data"],
+                            "mime_type": page["mime_type"],
+                            "encoding": page["encoding"],
+                            "size": page["encoding"]["size"],
+                        }
+                    )
+
+            structured_data = None
+            fused_fallback_reason = None
+            if fused and gemini_pages:
+                if len(self._plan_gemini_batches(gemini_pages)) > 1:
+                    fused_fallback_reason = "too many pages for one request"
+                else:
+                    known_text = {
+                        detail["page"]: (
+                            full_text_parts[index]
+                            if detail["path"] == "text_layer"
+                            else ocr_results[detail["page"]]["full_text"]
+                        )
+                        for index, detail in enumerate(page_details)
+                        if detail["page"] in page_numbers
+                        and (
+                            detail["path"] == "text_layer"
+                            or detail["page"] in ocr_results
+                        )
+                    }
+                    page_texts, structured_data, fused_fallback_reason = (
+                        self._gemini_fused_pages(gemini_pages, known_text)
+                    )
+                    for page_number, text in (page_texts or {}).items():
+                        ocr_results[page_number] = {
+                            "full_text": text,
+                            "confidence": 0.95,
+                            "engine": "gemini_fused",
+                        }
+                if fused_fallback_reason:
+                    self.logger.warning(
+                        "Fused PDF extraction fell back to two calls: "
+                        f"{fused_fallback_reason}"
+                    )
+
+            def on_gemini_result(page_number, page_text):
+                if on_page:
+                    on_page(
+                        page_number,
+                        None if "error" in page_text else page_text["full_text"],
+                        page_text.get("confidence"),
+                    )
+
+            ocr_results.update(
+                self._gemini_vision_ocr_pages(
+                    [page for page in gemini_pages if page["page"] not in ocr_results],
+                    on_result=on_gemini_result,
+                )
+            )
+
+            for page_number, slot in ocr_slots.items():
+                page_text = ocr_results[page_number]
+                page_details[slot].update(
+                    engine=page_text.get("engine"),
+                    confidence=page_text.get("confidence"),
+                )
+                if "error" in page_text:
+                    self.logger.warning(
+                        f"OCR failed for page {page_number}: {page_text['error']}"
+                    )
+                    full_text_parts[slot] = (
+                        f"[Page {page_number} OCR Error: {page_text['error']}]"
+                    )
+                else:
+                    full_text_parts[slot] = page_text["full_text"]
+
+            return structured_data, fused_fallback_reason
+
+        finally:
+            # Clean up all temporary files
+            for temp_file in temp_files:
+                pdf_processor.cleanup_temp_file(temp_file)
+
+    def extract_structured_data(self, raw_text, use_cache=True):
+        """Extract structured data from raw OCR text using Gemini
+
+        Identical texts are answered from the shared LLM response cache unless
+        ``use_cache`` is False.
+        """
         try:
             if not self.gemini_client:
                 return {"error": "Gemini client not initialized"}
 
-            # Define the extraction schema for business plans
-            extraction_schema = types.Schema(
-                type=types.Type.OBJECT,
-                properties={
-                    "Entrepreneur_Name": types.Schema(
-                        type=types.Type.STRING,
-                        description="Extracted Name of the entrepreneur.",
-                    ),
-                    "Education_Status": types.Schema(
-                        type=types.Type.STRING,
-                        description="Extracted educational qualification.",
-                    ),
-                    "Phone_Number": types.Schema(
-                        type=types.Type.STRING, description="Extracted phone number."
-                    ),
-                    "Business_Name": types.Schema(
-                        type=types.Type.STRING, description="Name of the business."
-                    ),
-                    "Main_Product_Service": types.Schema(
-                        type=types.Type.STRING,
-                        description="Description of the main product or service provided.",
-                    ),
-                    "Key_USP": types.Schema(
-                        type=types.Type.STRING,
-                        description="The unique selling proposition or idea that is better than others.",
-                    ),
-                    "Loan_Requirement_First_Month_INR": types.Schema(
-                        type=types.Type.INTEGER,
-                        description="The loan requirement for the business setup phase (First Month) in INR.",
-                    ),
-                },
-                required=["Entrepreneur_Name", "Business_Name", "Main_Product_Service"],
+            response = get_llm_gateway().generate_content(
+                self.gemini_client,
+                "gemini-2.5-flash",
+                self._structured_data_prompt(raw_text),
+                config=STRUCTURED_DATA_CONFIG,
+                use_cache=use_cache,
             )
 
-            system_prompt = (
-                "You are an expert financial analyst focused on business plan review. Your task is to extract "
-                "key, structured data points from the provided raw OCR text which was taken from a handwritten "
-                "entrepreneurship development program document. Only return the requested JSON object. "
-                "If a field cannot be found, set its value to 'N/A' (except required fields)."
-            )
+            return json.loads(response.text)
 
-            prompt = (
-                f"Extract the following structured data from the provided raw OCR text:\n\n"
-                f"--- RAW OCR TEXT ---\n{raw_text}\n--- END OF RAW OCR TEXT ---"
-            )
+        except Exception as e:
+            self.logger.error(f"Structured extraction failed: {str(e)}")
+            return {"error": f"Structured extraction failed: {str(e)}"}
 
-            response = self.gemini_client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    system_instruction=system_prompt,
-                    response_mime_type="application/json",
-                    response_schema=extraction_schema,
-                ),
+    async def extract_structured_data_async(self, raw_text, use_cache=True):
+        """Coroutine version of ``extract_structured_data`` (``client.aio``)"""
+        try:
+            if not self.gemini_client:
+                return {"error": "Gemini client not initialized"}
+
+            response = await get_llm_gateway().agenerate_content(
+                self.gemini_client,
+                "gemini-2.5-flash",
+                self._structured_data_prompt(raw_text),
+                config=STRUCTURED_DATA_CONFIG,
+                use_cache=use_cache,
             )
 
             return json.loads(response.text)
@@ -175,36 +1005,431 @@ class OCRService:
             self.logger.error(f"Structured extraction failed: {str(e)}")
             return {"error": f"Structured extraction failed: {str(e)}"}
 
-    def _gemini_vision_ocr(self, image_path):
-        """Uses Gemini 2.5 Flash's multimodal capabilities to perform OCR on the image"""
+    def _structured_data_prompt(self, raw_text):
+        return (
+            f"Extract the following structured data from the provided raw OCR text:\n\n"
+            f"--- RAW OCR TEXT ---\n{raw_text}\n--- END OF RAW OCR TEXT ---"
+        )
+
+    def _reduce_field_candidates(self, candidates):
+        """Merge map-step candidates locally, optionally settling conflicting
+        fields with one small Gemini call (STRUCTURED_REDUCE_MODE=llm)
+
+        Returns ``(structured_fields, field_pages)``.
+        """
+        fields, field_pages, conflicts = reduce_field_candidates(candidates)
+        if not conflicts or current_app.config.get("STRUCTURED_REDUCE_MODE") != "llm":
+            return fields, field_pages
+
+        try:
+            agreed = {
+                name: value for name, value in fields.items() if name not in conflicts
+            }
+            prompt = (
+                "Choose the final value of each field below. Candidates per field:\n"
+                f"{json.dumps(conflicts, ensure_ascii=False)}\n\n"
+                f"Fields already agreed on:\n{json.dumps(agreed, ensure_ascii=False)}"
+            )
+            response = get_llm_gateway().generate_content(
+                self.gemini_client,
+                "gemini-2.5-flash",
+                prompt,
+                config=REDUCE_CONFIG,
+            )
+            reduced = json.loads(response.text)
+            for name, candidates_for_field in conflicts.items():
+                value = reduced.get(name)
+                for candidate in candidates_for_field:
+                    # Only accept one of the candidates, never a new value
+                    if candidate["value"] == value:
+                        fields[name] = value
+                        field_pages[name] = candidate["pages"]
+        except Exception as e:
+            self.logger.warning(f"Reduce call failed, keeping local merge: {str(e)}")
+        return fields, field_pages
+
+    def extract_structured_from_image(self, image_path):
+        """OCR an image and extract structured fields with a single Gemini call
+
+        Printed pages the local tier can read only need the text extraction
+        call. Otherwise the image is sent once with the fused schema; if the
+        response violates the schema this falls back to OCR followed by
+        ``extract_structured_data``. Returns the OCR result with ``structured_data``.
+        """
         try:
             if not self.gemini_client:
                 return {"error": "Gemini client not initialized"}
 
-            # Read and prepare image
-            with open(image_path, "rb") as image_file:
-                image_data = image_file.read()
+            image_hash = owner = None
+            if self.image_cache is not None:
+                try:
+                    owner = self._image_cache_owner(image_path)
+                    image_hash = normalized_image_hash(image_path)
+                    cached = self.image_cache.get(image_hash, "gemini_fused", owner)
+                    if cached is not None:
+                        return dict(cached, cache_hit=True)
+                except Exception as e:
+                    self.logger.warning(f"OCR image cache lookup failed: {str(e)}")
 
-            vision_prompt = "Perform accurate OCR on the entire image, including all handwritten and printed text. Return only the raw text."
+            local_result, text_style, escalation_reason = self._local_page_ocr(
+                image_path
+            )
+            if local_result:
+                local_result["structured_data"] = self.extract_structured_data(
+                    local_result["full_text"]
+                )
+                return local_result
 
-            contents = [
-                vision_prompt,
-                types.Part.from_bytes(data=image_data, mime_type="image/png"),
-            ]
+            encoded = encode_image_for_ocr(image_path, self.image_settings)
+            result, violation = self._gemini_fused_image(encoded)
+            if result is None:
+                self.logger.warning(
+                    f"Fused extraction fell back to two calls: {violation}"
+                )
+                result = self._gemini_vision_ocr(image_path, encoded=encoded)
+                if "error" in result:
+                    return result
+                result.update(
+                    engine="gemini",
+                    structured_data=self.extract_structured_data(result["full_text"]),
+                    fused_fallback_reason=violation,
+                )
+            elif image_hash is not None:
+                self.image_cache.put(
+                    image_hash,
+                    dict(
+                        result,
+                        text_style=text_style,
+                        escalation_reason=escalation_reason,
+                    ),
+                    "gemini_fused",
+                    owner,
+                )
+
+            result.update(text_style=text_style, escalation_reason=escalation_reason)
+            return result
+
+        except Exception as e:
+            self.logger.error(f"Fused image extraction failed: {str(e)}")
+            return {"error": str(e)}
+
+    def _gemini_fused_image(self, encoded):
+        """One Gemini call returning OCR text and structured fields for an image
+
+        Returns ``(result, None)`` or ``(None, reason)`` when the call fails or
+        the response violates the schema.
+        """
+        image_data, mime_type, encoding = encoded
+        try:
+            response = get_llm_gateway().generate_content(
+                self.gemini_client,
+                "gemini-2.5-flash",
+                [
+                    "Transcribe this document image and extract the structured fields.",
+                    types.Part.from_bytes(data=image_data, mime_type=mime_type),
+                ],
+                config=FUSED_IMAGE_CONFIG,
+            )
+            payload = json.loads(response.text)
+        except Exception as e:
+            return None, f"fused call failed: {str(e)}"
+
+        raw_text = payload.get("raw_text") if isinstance(payload, dict) else None
+        if not isinstance(raw_text, str) or not raw_text.strip():
+            return None, "missing raw_text"
+        violations = structured_field_violations(payload.get("structured_fields"))
+        if violations:
+            return None, "; ".join(violations)
+
+        return {
+            "full_text": raw_text,
+            "structured_data": payload["structured_fields"],
+            "confidence": 0.95,
+            "upload_bytes": encoding["bytes"],
+            "engine": "gemini_fused",
+        }, None
+
+    def _gemini_fused_pages(self, pages, known_text):
+        """One Gemini call returning per-page OCR text and document-level fields
+
+        ``pages`` are rendered PDF pages still needing OCR; ``known_text`` maps
+        the numbers of pages already read (text layer or local OCR) to their
+        text so fields on those pages are extracted too. Returns
+        ``(page_texts, structured_fields, None)`` or ``(None, None, reason)``.
+        """
+        page_numbers = [page["page"] for page in pages]
+        contents = [
+            "Transcribe every page image below and extract the structured fields "
+            "from the whole document. Return one entry in `pages` for each of "
+            f"pages {', '.join(str(number) for number in page_numbers)}."
+        ]
+        for number, text in sorted(known_text.items()):
+            contents.append(f"--- PAGE {number} (already transcribed) ---\n{text}")
+        for page in pages:
+            contents.append(PAGE_DELIMITER.format(page=page["page"]))
+            contents.append(
+                types.Part.from_bytes(data=page["data"], mime_type=page["mime_type"])
+            )
+
+        try:
+            response = get_llm_gateway().generate_content(
+                self.gemini_client,
+                "gemini-2.5-flash",
+                contents,
+                config=FUSED_PAGES_CONFIG,
+            )
+            payload = json.loads(response.text)
+        except Exception as e:
+            return None, None, f"fused call failed: {str(e)}"
+
+        entries = payload.get("pages") if isinstance(payload, dict) else None
+        if not isinstance(entries, list):
+            return None, None, "missing pages"
+        page_texts = {}
+        for entry in entries:
+            if not isinstance(entry, dict) or not isinstance(entry.get("text"), str):
+                return None, None, "malformed page entry"
+            if entry.get("page") in page_texts:
+                return None, None, f"page {entry.get('page')} returned twice"
+            page_texts[entry.get("page")] = entry["text"]
+        if set(page_texts) != set(page_numbers):
+            return None, None, "returned pages do not match requested pages"
+
+        violations = structured_field_violations(payload.get("structured_fields"))
+        if violations:
+            return None, None, "; ".join(violations)
+        return page_texts, payload["structured_fields"], None
+
+    def _route_page_ocr(self, image_path, image=None, text_style=None, encoded=None):
+        """Try local Tesseract on printed pages, escalating to Gemini when needed
 
-            response = self.gemini_client.models.generate_content(
-                model="gemini-2.5-flash", contents=contents
+        The returned result carries ``engine`` (which engine served the page),
+        ``text_style`` and, when the local pass was rejected, ``escalation_reason``.
+        ``text_style`` and ``encoded`` may be supplied when already computed by
+        the render pool.
+        """
+        local_result, text_style, escalation_reason = self._local_page_ocr(
+            image_path, image=image, text_style=text_style
+        )
+        if local_result:
+            return local_result
+
+        result = self._gemini_vision_ocr(image_path, encoded=encoded)
+        result.update(
+            engine="gemini",
+            text_style=text_style,
+            escalation_reason=escalation_reason,
+        )
+        return result
+
+    def _local_page_ocr(self, image_path, image=None, text_style=None):
+        """Run the local Tesseract tier on printed pages
+
+        Returns ``(result, text_style, escalation_reason)``; ``result`` is None
+        when the page has to go to Gemini.
+        """
+        if not self.local_ocr_enabled:
+            return None, text_style, None
+
+        if text_style is None:
+            text_style = classify_text_style(image if image is not None else image_path)
+        if text_style != "printed":
+            return None, text_style, f"page classified as {text_style}"
+
+        local_result = self._tesseract_ocr(image_path)
+        if "error" in local_result:
+            return None, text_style, local_result["error"]
+        if local_result["handwriting_suspected"]:
+            return None, text_style, "handwriting detected"
+        if local_result["confidence"] < self.local_ocr_min_confidence:
+            return (
+                None,
+                text_style,
+                f"low confidence ({local_result['confidence']:.2f})",
+            )
+
+        local_result.update(engine="tesseract", text_style=text_style)
+        return local_result, text_style, None
+
+    def _gemini_vision_ocr_pages(self, pages, on_result=None):
+        """OCR PDF pages with Gemini, packing several pages into each request
+
+        Batches are sized by page count, payload bytes and image tokens. Pages
+        missing from a batched response are retried one at a time, and the batch
+        size is halved for the rest of the document. ``on_result(page, result)``
+        is called as each batch completes. Returns {page: result}.
+        """
+        results = {}
+        max_pages = max(self.batch_max_pages, 1)
+        remaining = list(pages)
+
+        while remaining:
+            batch = self._plan_gemini_batches(remaining, max_pages)[0]
+            remaining = remaining[len(batch) :]
+
+            batch_results = (
+                self._gemini_vision_ocr_batch(batch) if len(batch) > 1 else {}
+            )
+            missing = [page for page in batch if page["page"] not in batch_results]
+            if len(batch) > 1 and missing:
+                max_pages = max(max_pages // 2, 1)
+                self.logger.warning(
+                    f"Batched OCR missed page(s) {[page['page'] for page in missing]}, "
+                    f"retrying individually; batch size now {max_pages}"
+                )
+
+            results.update(batch_results)
+            for page in missing:
+                result = self._gemini_vision_ocr(
+                    page["path"],
+                    encoded=(page["data"], page["mime_type"], page["encoding"]),
+                )
+                result.update(engine="gemini", batch_size=1)
+                batch_results[page["page"]] = result
+                results[page["page"]] = result
+
+            if on_result:
+                for page in batch:
+                    on_result(page["page"], batch_results[page["page"]])
+
+        return results
+
+    def _plan_gemini_batches(self, pages, max_pages=None):
+        return plan_batches(
+            pages,
+            max_pages or max(self.batch_max_pages, 1),
+            self.batch_max_bytes,
+            self.batch_max_image_tokens,
+        )
+
+    def _gemini_vision_ocr_batch(self, batch):
+        """OCR several page images in one Gemini request, returning {page: result}"""
+        try:
+            page_numbers = [page["page"] for page in batch]
+            contents = [build_batch_prompt(page_numbers)]
+            for page in batch:
+                contents.append(PAGE_DELIMITER.format(page=page["page"]))
+                contents.append(
+                    types.Part.from_bytes(data=page["data"], mime_type=page["mime_type"])
+                )
+
+            response = get_llm_gateway().generate_content(
+                self.gemini_client, "gemini-2.5-flash", contents
+            )
+            page_texts = parse_batch_response(response.text, page_numbers)
+
+            return {
+                page["page"]: {
+                    "full_text": page_texts[page["page"]],
+                    "confidence": 0.95,
+                    "upload_bytes": len(page["data"]),
+                    "engine": "gemini",
+                    "batch_size": len(batch),
+                }
+                for page in batch
+                if page["page"] in page_texts
+            }
+
+        except Exception as e:
+            self.logger.error(f"Batched Gemini Vision OCR failed: {str(e)}")
+            return {}
+
+    def _tesseract_ocr(self, image_path):
+        """Local Tesseract OCR with the same {"full_text", "confidence"} contract"""
+        try:
+            data = pytesseract.image_to_data(
+                Image.open(image_path),
+                lang=self.local_ocr_languages,
+                output_type=pytesseract.Output.DICT,
+            )
+
+            # Rebuild text line by line; conf is -1 for non-word layout boxes
+            lines = {}
+            confidences = []
+            for i, word in enumerate(data["text"]):
+                confidence = float(data["conf"][i])
+                if confidence < 0 or not word.strip():
+                    continue
+                key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+                lines.setdefault(key, []).append(word)
+                confidences.append(confidence / 100)
+
+            if not confidences:
+                return {"error": "Tesseract found no text"}
+
+            low_confidence_share = sum(1 for c in confidences if c < 0.6) / len(
+                confidences
+            )
+
+            return {
+                "full_text": "\n".join(" ".join(words) for words in lines.values()),
+                "confidence": sum(confidences) / len(confidences),
+                # Tesseract is trained on print; many unsure words suggest handwriting
+                "handwriting_suspected": low_confidence_share > 0.4,
+            }
+
+        except Exception as e:
+            self.logger.error(f"Tesseract OCR failed: {str(e)}")
+            return {"error": f"Tesseract OCR failed: {str(e)}"}
+
+    def _gemini_vision_ocr(self, image_path, encoded=None):
+        """Uses Gemini 2.5 Flash's multimodal capabilities to perform OCR on the image"""
+        try:
+            if not self.gemini_client:
+                return {"error": "Gemini client not initialized"}
+
+            # Grayscale, resize by text density and re-encode to cut upload size
+            image_data, mime_type, encoding = encoded or encode_image_for_ocr(
+                image_path, self.image_settings
+            )
+            self.logger.debug(f"Encoded image for Gemini OCR: {encoding}")
+
+            response = get_llm_gateway().generate_content(
+                self.gemini_client,
+                "gemini-2.5-flash",
+                self._vision_ocr_contents(image_data, mime_type),
             )
 
             return {
                 "full_text": response.text,
                 "confidence": 0.95,  # Gemini typically has high confidence
+                "upload_bytes": encoding["bytes"],
             }
 
         except Exception as e:
             self.logger.error(f"Gemini Vision OCR failed: {str(e)}")
             return {"error": f"Gemini Vision OCR failed: {str(e)}"}
 
+    async def _gemini_vision_ocr_async(self, encoded):
+        """Coroutine version of ``_gemini_vision_ocr`` for an already encoded image"""
+        try:
+            if not self.gemini_client:
+                return {"error": "Gemini client not initialized"}
+
+            image_data, mime_type, encoding = encoded
+            response = await get_llm_gateway().agenerate_content(
+                self.gemini_client,
+                "gemini-2.5-flash",
+                self._vision_ocr_contents(image_data, mime_type),
+            )
+
+            return {
+                "full_text": response.text,
+                "confidence": 0.95,
+                "upload_bytes": encoding["bytes"],
+            }
+
+        except Exception as e:
+            self.logger.error(f"Gemini Vision OCR failed: {str(e)}")
+            return {"error": f"Gemini Vision OCR failed: {str(e)}"}
+
+    def _vision_ocr_contents(self, image_data, mime_type):
+        vision_prompt = "Perform accurate OCR on the entire image, including all handwritten and printed text. Return only the raw text."
+        return [
+            vision_prompt,
+            types.Part.from_bytes(data=image_data, mime_type=mime_type),
+        ]
+
     def _google_vision_ocr(self, image_path):
         """Legacy Google Cloud Vision OCR (fallback)"""
         try:
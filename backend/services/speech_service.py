@@ -3,17 +3,70 @@ Enhanced Speech-to-text service for processing audio files with advanced feature
 """
 
 from google.cloud import speech_v1
+import asyncio
 import io
 import logging
 import tempfile
 import os
+from flask import current_app, has_app_context
 from pydub import AudioSegment
+from utils.word_index import WordTimestampIndex
+from utils.gemini_guard import create_gemini_client
+from services.transcription_engines import (
+    SpeechToTextEngine,
+    GeminiAudioEngine,
+    LocalASREngine,
+    TranscriptionPolicy,
+)
+
+# Long recordings are sent to Speech-to-Text in 50 second chunks
+CHUNK_LENGTH_MS = 50 * 1000
 
 
 class SpeechService:
-    def __init__(self):
-        self.client = speech_v1.SpeechClient()
+    def __init__(
+        self,
+        client=None,
+        gemini_client=None,
+        policy=None,
+        local_asr_models=None,
+        async_client=None,
+    ):
         self.logger = logging.getLogger(__name__)
+        self.client = client
+        self.async_client = async_client
+        self.chunk_concurrency = 4
+        if self.client is None:
+            try:
+                self.client = speech_v1.SpeechClient()
+            except Exception as e:
+                # Local/Gemini engines can still serve audio without GCP credentials
+                self.logger.error(f"Failed to initialize Speech client: {str(e)}")
+        self.policy = policy or TranscriptionPolicy()
+        gemini_model = "gemini-2.5-flash"
+
+        # Engine selection and Gemini audio backend come from app configuration
+        if has_app_context():
+            try:
+                if policy is None:
+                    self.policy = TranscriptionPolicy.from_config(current_app.config)
+                gemini_model = current_app.config.get("GEMINI_AUDIO_MODEL", gemini_model)
+                gemini_api_key = current_app.config.get("GEMINI_API_KEY")
+                if gemini_client is None and gemini_api_key:
+                    gemini_client = create_gemini_client(gemini_api_key)
+                if local_asr_models is None:
+                    local_asr_models = current_app.config.get("LOCAL_ASR_MODELS")
+                self.chunk_concurrency = current_app.config.get(
+                    "SPEECH_ASYNC_CHUNK_CONCURRENCY", self.chunk_concurrency
+                )
+            except Exception as e:
+                self.logger.error(f"Failed to initialize Gemini audio engine: {str(e)}")
+
+        self.engines = {
+            "google_speech": SpeechToTextEngine(self),
+            "gemini": GeminiAudioEngine(gemini_client, model=gemini_model),
+            "local": LocalASREngine(local_asr_models),
+        }
 
     def get_recognition_config(self, language_code, show_info=False):
         """Get advanced speech recognition config with speaker diarization"""
@@ -38,62 +91,79 @@ class SpeechService:
 
         return speech_v1.RecognitionConfig(**config_params)
 
-    def process_diarized_response(self, response):
-        """Process speech recognition response with speaker diarization"""
-        if not response.results:
-            return "No speech detected in audio."
+    def build_speaker_turns(self, response, time_offset=0.0, word_index=None):
+        """Group diarized words into speaker turns in a single pass
+
+        Each turn is a dict with speaker, start, end, text and word_count.
+        ``time_offset`` shifts timestamps so chunked audio keeps absolute times.
+        When a ``WordTimestampIndex`` is given, every word is also appended to it.
+        """
+        turns = []
+        current_speaker = None
+        turn_words = []
+        turn_start = turn_end = 0.0
+
+        def close_turn():
+            turns.append(
+                {
+                    "speaker": current_speaker,
+                    "start": round(turn_start + time_offset, 3),
+                    "end": round(turn_end + time_offset, 3),
+                    "text": " ".join(turn_words).strip(),
+                    "word_count": len(turn_words),
+                }
+            )
 
-        words_info = []
         for result in response.results:
             for word_info in result.alternatives[0].words:
-                words_info.append(
-                    {
-                        "word": word_info.word,
-                        "speaker_tag": word_info.speaker_tag,
-                        "start_time": word_info.start_time.total_seconds(),
-                        "end_time": word_info.end_time.total_seconds(),
-                    }
-                )
+                if word_info.speaker_tag != current_speaker:
+                    if current_speaker is not None:
+                        close_turn()
+                    current_speaker = word_info.speaker_tag
+                    turn_words = []
+                    turn_start = word_info.start_time.total_seconds()
+                turn_words.append(word_info.word)
+                turn_end = word_info.end_time.total_seconds()
+                if word_index is not None:
+                    word_index.append(
+                        word_info.word,
+                        word_info.start_time.total_seconds() + time_offset,
+                        turn_end + time_offset,
+                    )
 
-        if words_info:
-            transcript = ""
-            current_speaker = None
-            speaker_text = ""
+        if current_speaker is not None:
+            close_turn()
 
-            for word_info in words_info:
-                if current_speaker != word_info["speaker_tag"]:
-                    if current_speaker is not None:
-                        transcript += (
-                            f"\nSpeaker {current_speaker}: {speaker_text.strip()}\n"
-                        )
-                    current_speaker = word_info["speaker_tag"]
-                    speaker_text = ""
-                speaker_text += word_info["word"] + " "
-
-            if current_speaker is not None:
-                transcript += f"\nSpeaker {current_speaker}: {speaker_text.strip()}\n"
-            return transcript.strip()
-        else:
-            # Fallback to basic transcript
-            transcript = ""
-            for result in response.results:
-                transcript += result.alternatives[0].transcript + " "
-            return transcript.strip()
+        return turns
 
-    def transcribe_audio_chunks(self, audio_file, language_code, audio_segment):
-        """Process long audio files by splitting into chunks"""
-        chunk_length_ms = 50 * 1000
-        chunks = []
+    def render_transcript(self, response, turns):
+        """Render the legacy "Speaker N: ..." transcript string from speaker turns"""
+        if not response.results:
+            return "No speech detected in audio."
 
-        self.logger.info(
-            f"Processing audio in chunks (duration: {len(audio_segment)/1000:.1f} seconds)..."
-        )
+        if turns:
+            return "\n\n".join(
+                f"Speaker {turn['speaker']}: {turn['text']}" for turn in turns
+            )
+
+        # Fallback to basic transcript
+        return " ".join(
+            result.alternatives[0].transcript for result in response.results
+        ).strip()
+
+    def process_diarized_response(self, response):
+        """Process speech recognition response with speaker diarization"""
+        return self.render_transcript(response, self.build_speaker_turns(response))
 
-        for i in range(0, len(audio_segment), chunk_length_ms):
-            chunk = audio_segment[i : i + chunk_length_ms]
-            chunks.append(chunk)
+    def transcribe_audio_chunks(self, audio_file, language_code, audio_segment):
+        """Process long audio files by splitting into chunks
 
-        full_transcript = ""
+        Returns the legacy chunked transcript string, the speaker turns of all
+        chunks and their word index, with timestamps relative to the start of the
+        whole recording.
+        """
+        chunks = self.split_audio_chunks(audio_segment)
+        responses = []
 
         for i, chunk in enumerate(chunks):
             chunk_file_path = None
@@ -107,14 +177,11 @@ class SpeechService:
 
                 audio = speech_v1.RecognitionAudio(content=content)
                 config = self.get_recognition_config(language_code, show_info=False)
-                response = self.client.recognize(config=config, audio=audio)
-
-                chunk_transcript = self.process_diarized_response(response)
-                full_transcript += f"\n--- Chunk {i+1} ---\n{chunk_transcript}\n"
+                responses.append(self.client.recognize(config=config, audio=audio))
 
             except Exception as e:
                 self.logger.warning(f"Error processing chunk {i+1}: {str(e)}")
-                continue
+                responses.append(None)
             finally:
                 if chunk_file_path and os.path.exists(chunk_file_path):
                     try:
@@ -122,28 +189,205 @@ class SpeechService:
                     except:
                         pass
 
-        return full_transcript.strip()
+        return self.assemble_chunk_responses(responses)
 
-    def transcribe_audio(self, audio_path, language_code="en-IN"):
-        """Enhanced audio transcription with speaker diarization and chunking support"""
+    async def transcribe_audio_chunks_async(
+        self, client, language_code, audio_segment
+    ):
+        """Coroutine version of ``transcribe_audio_chunks``
+
+        Chunks are recognized concurrently (at most ``chunk_concurrency`` at a
+        time) on the async client instead of one after another.
+        """
+        chunks = self.split_audio_chunks(audio_segment)
+        semaphore = asyncio.Semaphore(max(self.chunk_concurrency, 1))
+
+        async def recognize(i, chunk):
+            async with semaphore:
+                try:
+                    content = await asyncio.to_thread(export_wav_bytes, chunk)
+                    audio = speech_v1.RecognitionAudio(content=content)
+                    config = self.get_recognition_config(language_code, show_info=False)
+                    return await client.recognize(config=config, audio=audio)
+                except Exception as e:
+                    self.logger.warning(f"Error processing chunk {i+1}: {str(e)}")
+                    return None
+
+        responses = await asyncio.gather(
+            *(recognize(i, chunk) for i, chunk in enumerate(chunks))
+        )
+        return self.assemble_chunk_responses(responses)
+
+    def split_audio_chunks(self, audio_segment):
+        self.logger.info(
+            f"Processing audio in chunks (duration: {len(audio_segment)/1000:.1f} seconds)..."
+        )
+        return [
+            audio_segment[i : i + CHUNK_LENGTH_MS]
+            for i in range(0, len(audio_segment), CHUNK_LENGTH_MS)
+        ]
+
+    def assemble_chunk_responses(self, responses):
+        """Join per-chunk responses (None for failed chunks) in recording order"""
+        transcript_parts = []
+        speaker_turns = []
+        word_index = WordTimestampIndex()
+
+        for i, response in enumerate(responses):
+            if response is None:
+                continue
+            chunk_turns = self.build_speaker_turns(
+                response,
+                time_offset=i * CHUNK_LENGTH_MS / 1000,
+                word_index=word_index,
+            )
+            chunk_transcript = self.render_transcript(response, chunk_turns)
+            transcript_parts.append(f"--- Chunk {i+1} ---\n{chunk_transcript}")
+            speaker_turns.extend(chunk_turns)
+
+        return "\n\n".join(transcript_parts), speaker_turns, word_index
+
+    def transcribe_audio(
+        self, audio_path, language_code="en-IN", extract_structured=False
+    ):
+        """Transcribe audio with the engine chosen by the transcription policy
+
+        With ``extract_structured`` engines that can (Gemini) also return the
+        business plan fields as ``structured_data`` from the same request.
+        """
         try:
             audio_segment = AudioSegment.from_file(audio_path)
             duration_seconds = len(audio_segment) / 1000
 
+            engine_name = self.select_engine(duration_seconds, language_code)
+            result = self.engines[engine_name].transcribe(
+                audio_path,
+                language_code,
+                audio_segment,
+                extract_structured=extract_structured,
+            )
+
+            if self.policy.needs_escalation(engine_name, result):
+                failed_engine = engine_name
+                engine_name = self.select_escalation_engine(
+                    failed_engine, result, duration_seconds, language_code
+                )
+                try:
+                    escalated = self.engines[engine_name].transcribe(
+                        audio_path,
+                        language_code,
+                        audio_segment,
+                        extract_structured=extract_structured,
+                    )
+                except Exception as e:
+                    escalated = {"error": str(e)}
+                engine_name, result = self.pick_escalated_result(
+                    failed_engine, result, engine_name, escalated
+                )
+
+            return self.finish_result(engine_name, result, duration_seconds)
+
+        except Exception as e:
+            self.logger.error(f"Enhanced speech transcription failed: {str(e)}")
+            return {"error": str(e)}
+
+    async def transcribe_audio_async(
+        self, audio_path, language_code="en-IN", extract_structured=False
+    ):
+        """Coroutine version of ``transcribe_audio`` using each engine's
+        ``transcribe_async``"""
+        try:
+            audio_segment = await asyncio.to_thread(AudioSegment.from_file, audio_path)
+            duration_seconds = len(audio_segment) / 1000
+
+            engine_name = self.select_engine(duration_seconds, language_code)
+            result = await self.engines[engine_name].transcribe_async(
+                audio_path,
+                language_code,
+                audio_segment,
+                extract_structured=extract_structured,
+            )
+
+            if self.policy.needs_escalation(engine_name, result):
+                failed_engine = engine_name
+                engine_name = self.select_escalation_engine(
+                    failed_engine, result, duration_seconds, language_code
+                )
+                try:
+                    escalated = await self.engines[engine_name].transcribe_async(
+                        audio_path,
+                        language_code,
+                        audio_segment,
+                        extract_structured=extract_structured,
+                    )
+                except Exception as e:
+                    escalated = {"error": str(e)}
+                engine_name, result = self.pick_escalated_result(
+                    failed_engine, result, engine_name, escalated
+                )
+
+            return self.finish_result(engine_name, result, duration_seconds)
+
+        except Exception as e:
+            self.logger.error(f"Enhanced speech transcription failed: {str(e)}")
+            return {"error": str(e)}
+
+    def select_engine(self, duration_seconds, language_code):
+        engine_name = self.policy.select(duration_seconds, language_code, self.engines)
+        self.logger.info(
+            f"Transcribing {duration_seconds:.1f}s of {language_code} audio with {engine_name}"
+        )
+        return engine_name
+
+    def select_escalation_engine(
+        self, failed_engine, result, duration_seconds, language_code
+    ):
+        cloud_engines = {
+            name: engine
+            for name, engine in self.engines.items()
+            if name not in ("local", failed_engine)
+        }
+        engine_name = self.policy.select(duration_seconds, language_code, cloud_engines)
+        self.logger.warning(
+            f"{failed_engine} transcription escalated to {engine_name}: "
+            f"{result.get('error', 'low confidence')}"
+        )
+        return engine_name
+
+    def pick_escalated_result(self, failed_engine, result, engine_name, escalated):
+        if "error" in escalated and "error" not in result:
+            # Offline or cloud failure: a low-confidence local transcript beats none
+            return failed_engine, result
+        escalated["escalated_from"] = failed_engine
+        return engine_name, escalated
+
+    def finish_result(self, engine_name, result, duration_seconds):
+        if "error" not in result:
+            result["engine"] = engine_name
+            result["estimated_cost_usd"] = self.engines[engine_name].estimate_cost(
+                duration_seconds
+            )
+        return result
+
+    def transcribe_with_speech_api(self, audio_path, language_code, audio_segment=None):
+        """Enhanced audio transcription with speaker diarization and chunking support"""
+        try:
+            if self.client is None:
+                return {"error": "Speech-to-Text client not initialized"}
+
+            if audio_segment is None:
+                audio_segment = AudioSegment.from_file(audio_path)
+            duration_seconds = len(audio_segment) / 1000
+
             # Use chunking for long audio files
             if duration_seconds > 59:
-                full_transcript = self.transcribe_audio_chunks(
-                    audio_path, language_code, audio_segment
+                return self.chunked_result(
+                    self.transcribe_audio_chunks(
+                        audio_path, language_code, audio_segment
+                    ),
+                    language_code,
+                    duration_seconds,
                 )
-                return {
-                    "transcriptions": [
-                        {"transcript": full_transcript, "confidence": 0.9}
-                    ],
-                    "detected_language": language_code,
-                    "full_transcript": full_transcript,
-                    "duration_seconds": duration_seconds,
-                    "processing_method": "chunked",
-                }
 
             # Process short audio files normally
             with open(audio_path, "rb") as f:
@@ -153,35 +397,105 @@ class SpeechService:
             config = self.get_recognition_config(language_code, show_info=True)
             response = self.client.recognize(config=config, audio=audio)
 
-            transcript = self.process_diarized_response(response)
-
-            # Calculate average confidence
-            avg_confidence = 0.0
-            word_count = 0
-            for result in response.results:
-                for word_info in result.alternatives[0].words:
-                    avg_confidence += (
-                        word_info.confidence
-                        if hasattr(word_info, "confidence")
-                        else 0.9
-                    )
-                    word_count += 1
-
-            if word_count > 0:
-                avg_confidence = avg_confidence / word_count
-            else:
-                avg_confidence = 0.9
-
-            return {
-                "transcriptions": [
-                    {"transcript": transcript, "confidence": avg_confidence}
-                ],
-                "detected_language": language_code,
-                "full_transcript": transcript,
-                "duration_seconds": duration_seconds,
-                "processing_method": "standard",
-            }
+            return self.standard_result(response, language_code, duration_seconds)
 
         except Exception as e:
             self.logger.error(f"Enhanced speech transcription failed: {str(e)}")
             return {"error": str(e)}
+
+    async def transcribe_with_speech_api_async(
+        self, audio_path, language_code, audio_segment=None
+    ):
+        """Coroutine version of ``transcribe_with_speech_api`` on the async gRPC client"""
+        try:
+            if self.client is None:
+                return {"error": "Speech-to-Text client not initialized"}
+
+            # gRPC aio channels belong to the event loop that created them, so
+            # the async client is built (and closed) per call unless injected
+            if self.async_client is not None:
+                return await self._recognize_async(
+                    self.async_client, audio_path, language_code, audio_segment
+                )
+            async with speech_v1.SpeechAsyncClient() as client:
+                return await self._recognize_async(
+                    client, audio_path, language_code, audio_segment
+                )
+
+        except Exception as e:
+            self.logger.error(f"Enhanced speech transcription failed: {str(e)}")
+            return {"error": str(e)}
+
+    async def _recognize_async(self, client, audio_path, language_code, audio_segment):
+        if audio_segment is None:
+            audio_segment = await asyncio.to_thread(AudioSegment.from_file, audio_path)
+        duration_seconds = len(audio_segment) / 1000
+
+        if duration_seconds > 59:
+            return self.chunked_result(
+                await self.transcribe_audio_chunks_async(
+                    client, language_code, audio_segment
+                ),
+                language_code,
+                duration_seconds,
+            )
+
+        content = await asyncio.to_thread(read_file_bytes, audio_path)
+        audio = speech_v1.RecognitionAudio(content=content)
+        config = self.get_recognition_config(language_code, show_info=True)
+        response = await client.recognize(config=config, audio=audio)
+
+        return self.standard_result(response, language_code, duration_seconds)
+
+    def chunked_result(self, chunks, language_code, duration_seconds):
+        full_transcript, speaker_turns, word_index = chunks
+        return {
+            "transcriptions": [{"transcript": full_transcript, "confidence": 0.9}],
+            "detected_language": language_code,
+            "full_transcript": full_transcript,
+            "speaker_turns": speaker_turns,
+            "word_index": word_index,
+            "duration_seconds": duration_seconds,
+            "processing_method": "chunked",
+        }
+
+    def standard_result(self, response, language_code, duration_seconds):
+        word_index = WordTimestampIndex()
+        speaker_turns = self.build_speaker_turns(response, word_index=word_index)
+        transcript = self.render_transcript(response, speaker_turns)
+
+        # Calculate average confidence
+        avg_confidence = 0.0
+        word_count = 0
+        for result in response.results:
+            for word_info in result.alternatives[0].words:
+                avg_confidence += (
+                    word_info.confidence if hasattr(word_info, "confidence") else 0.9
+                )
+                word_count += 1
+
+        if word_count > 0:
+            avg_confidence = avg_confidence / word_count
+        else:
+            avg_confidence = 0.9
+
+        return {
+            "transcriptions": [{"transcript": transcript, "confidence": avg_confidence}],
+            "detected_language": language_code,
+            "full_transcript": transcript,
+            "speaker_turns": speaker_turns,
+            "word_index": word_index,
+            "duration_seconds": duration_seconds,
+            "processing_method": "standard",
+        }
+
+
+def export_wav_bytes(audio_segment):
+    buffer = io.BytesIO()
+    audio_segment.export(buffer, format="wav")
+    return buffer.getvalue()
+
+
+def read_file_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
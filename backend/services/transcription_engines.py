@@ -0,0 +1,488 @@
+"""
+Pluggable transcription engines for SpeechService
+
+Every engine returns the same result shape as ``SpeechService.transcribe_audio``
+(``full_transcript``, ``transcriptions``, ``detected_language`` ...), so routes do
+not care which backend served the audio. ``TranscriptionPolicy`` picks the engine
+for a clip from its duration and language.
+
+``transcribe_async`` is the coroutine entry point used by the async upload
+path; engines without a native async client run ``transcribe`` in a thread.
+"""
+
+import abc
+import asyncio
+import io
+import json
+import logging
+import re
+import threading
+from typing import Dict, Any
+
+from google.genai import types
+
+from services.ocr_service import EXTRACTION_SCHEMA
+from utils.word_index import WordTimestampIndex
+
+# Vosk is optional; the local tier is simply unavailable without it
+try:
+    import vosk
+
+    HAS_VOSK = True
+except ImportError:
+    HAS_VOSK = False
+
+_TRANSCRIPT_PROPERTIES = {
+    "transcript": types.Schema(
+        type=types.Type.STRING,
+        description="Verbatim transcript, one 'Speaker N: ...' line per speaker turn.",
+    ),
+    "detected_language": types.Schema(
+        type=types.Type.STRING,
+        description="BCP-47 code of the spoken language, e.g. hi-IN.",
+    ),
+}
+
+# Gemini audio response schemas and configs, built once at import
+TRANSCRIPT_SCHEMA = types.Schema(
+    type=types.Type.OBJECT, properties=_TRANSCRIPT_PROPERTIES, required=["transcript"]
+)
+TRANSCRIPT_WITH_FIELDS_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    properties=dict(_TRANSCRIPT_PROPERTIES, structured_data=EXTRACTION_SCHEMA),
+    required=["transcript", "structured_data"],
+)
+TRANSCRIPT_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json", response_schema=TRANSCRIPT_SCHEMA
+)
+TRANSCRIPT_WITH_FIELDS_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=TRANSCRIPT_WITH_FIELDS_SCHEMA,
+)
+
+
+class TranscriptionEngine(abc.ABC):
+    """Base class for transcription backends"""
+
+    name = "base"
+    # Approximate list price per minute of audio (USD), used for cost reporting
+    cost_per_minute_usd = 0.0
+
+    def is_available(self, language_code: str = None) -> bool:
+        return True
+
+    @abc.abstractmethod
+    def transcribe(
+        self,
+        audio_path: str,
+        language_code: str,
+        audio_segment=None,
+        extract_structured: bool = False,
+    ) -> Dict[str, Any]:
+        """Transcribe the clip, returning the common result shape"""
+
+    async def transcribe_async(
+        self,
+        audio_path: str,
+        language_code: str,
+        audio_segment=None,
+        extract_structured: bool = False,
+    ) -> Dict[str, Any]:
+        return await asyncio.to_thread(
+            self.transcribe,
+            audio_path,
+            language_code,
+            audio_segment,
+            extract_structured=extract_structured,
+        )
+
+    def estimate_cost(self, duration_seconds: float) -> float:
+        return round(self.cost_per_minute_usd * duration_seconds / 60, 6)
+
+
+class SpeechToTextEngine(TranscriptionEngine):
+    """Google Cloud Speech-to-Text with diarization (chunked for long audio)"""
+
+    name = "google_speech"
+    # $0.024/min standard recognition; long audio is billed per 50s chunk call
+    cost_per_minute_usd = 0.024
+
+    def __init__(self, speech_service):
+        self.speech_service = speech_service
+
+    def is_available(self, language_code=None):
+        return self.speech_service.client is not None
+
+    def transcribe(
+        self, audio_path, language_code, audio_segment=None, extract_structured=False
+    ):
+        # Structured fields are left to OCRService.extract_structured_data
+        return self.speech_service.transcribe_with_speech_api(
+            audio_path, language_code, audio_segment
+        )
+
+    async def transcribe_async(
+        self, audio_path, language_code, audio_segment=None, extract_structured=False
+    ):
+        return await self.speech_service.transcribe_with_speech_api_async(
+            audio_path, language_code, audio_segment
+        )
+
+
+class GeminiAudioEngine(TranscriptionEngine):
+    """Gemini multimodal transcription in a single request
+
+    The compressed audio is sent once and the response carries the transcript
+    and, optionally, the business plan fields, replacing N Speech calls plus a
+    separate structured extraction call.
+    """
+
+    name = "gemini"
+    # Audio input is ~32 tokens/s at $1.00/1M tokens plus transcript output tokens
+    cost_per_minute_usd = 0.0045
+    # Inline request payloads are limited to 20MB; larger audio goes via Files API
+    max_inline_bytes = 19 * 1024 * 1024
+
+    def __init__(self, gemini_client, model="gemini-2.5-flash"):
+        self.gemini_client = gemini_client
+        self.model = model
+        self.logger = logging.getLogger(__name__)
+
+    def is_available(self, language_code=None):
+        return self.gemini_client is not None
+
+    def compress_audio(self, audio_segment):
+        """Downmix to 16kHz mono and encode compactly, returning (bytes, mime_type)"""
+        audio_segment = audio_segment.set_channels(1).set_frame_rate(16000)
+        buffer = io.BytesIO()
+        try:
+            audio_segment.export(buffer, format="mp3", bitrate="32k")
+            return buffer.getvalue(), "audio/mp3"
+        except Exception as e:
+            # No ffmpeg encoder available: fall back to uncompressed PCM
+            self.logger.warning(f"MP3 encoding failed, sending WAV: {str(e)}")
+            buffer = io.BytesIO()
+            audio_segment.export(buffer, format="wav")
+            return buffer.getvalue(), "audio/wav"
+
+    def build_response_schema(self, extract_structured=False):
+        if extract_structured:
+            return TRANSCRIPT_WITH_FIELDS_SCHEMA
+        return TRANSCRIPT_SCHEMA
+
+    def transcribe(
+        self, audio_path, language_code, audio_segment=None, extract_structured=False
+    ):
+        try:
+            if not self.gemini_client:
+                return {"error": "Gemini client not initialized"}
+
+            audio_segment, audio_bytes, mime_type = self._prepare_audio(
+                audio_path, audio_segment
+            )
+            if len(audio_bytes) > self.max_inline_bytes:
+                audio_part = self._upload_audio(audio_bytes, mime_type)
+            else:
+                audio_part = types.Part.from_bytes(data=audio_bytes, mime_type=mime_type)
+
+            response = self.gemini_client.models.generate_content(
+                model=self.model,
+                contents=[self._prompt(language_code, extract_structured), audio_part],
+                config=self._config(extract_structured),
+            )
+            return self._build_result(
+                response, language_code, audio_segment, audio_bytes, extract_structured
+            )
+
+        except Exception as e:
+            self.logger.error(f"Gemini audio transcription failed: {str(e)}")
+            return {"error": f"Gemini audio transcription failed: {str(e)}"}
+
+    async def transcribe_async(
+        self, audio_path, language_code, audio_segment=None, extract_structured=False
+    ):
+        try:
+            if not self.gemini_client:
+                return {"error": "Gemini client not initialized"}
+
+            # Decoding and MP3 encoding are CPU work; the request is awaited
+            audio_segment, audio_bytes, mime_type = await asyncio.to_thread(
+                self._prepare_audio, audio_path, audio_segment
+            )
+            if len(audio_bytes) > self.max_inline_bytes:
+                uploaded = await self.gemini_client.aio.files.upload(
+                    file=io.BytesIO(audio_bytes), config={"mime_type": mime_type}
+                )
+                audio_part = types.Part.from_uri(
+                    file_uri=uploaded.uri, mime_type=mime_type
+                )
+            else:
+                audio_part = types.Part.from_bytes(data=audio_bytes, mime_type=mime_type)
+
+            response = await self.gemini_client.aio.models.generate_content(
+                model=self.model,
+                contents=[self._prompt(language_code, extract_structured), audio_part],
+                config=self._config(extract_structured),
+            )
+            return self._build_result(
+                response, language_code, audio_segment, audio_bytes, extract_structured
+            )
+
+        except Exception as e:
+            self.logger.error(f"Gemini audio transcription failed: {str(e)}")
+            return {"error": f"Gemini audio transcription failed: {str(e)}"}
+
+    def _prepare_audio(self, audio_path, audio_segment=None):
+        if audio_segment is None:
+            from pydub import AudioSegment
+
+            audio_segment = AudioSegment.from_file(audio_path)
+        audio_bytes, mime_type = self.compress_audio(audio_segment)
+        return audio_segment, audio_bytes, mime_type
+
+    def _prompt(self, language_code, extract_structured):
+        prompt = (
+            f"Transcribe this business pitch recording (expected language: {language_code}). "
+            "Separate speakers as 'Speaker 1', 'Speaker 2', ... and keep the original language."
+        )
+        if extract_structured:
+            prompt += (
+                " Also extract the requested business plan fields from what was said; "
+                "if a field is not mentioned, set it to 'N/A' (except required fields)."
+            )
+        return prompt
+
+    def _config(self, extract_structured):
+        if extract_structured:
+            return TRANSCRIPT_WITH_FIELDS_CONFIG
+        return TRANSCRIPT_CONFIG
+
+    def _build_result(
+        self, response, language_code, audio_segment, audio_bytes, extract_structured
+    ):
+        payload = json.loads(response.text)
+        transcript = payload.get("transcript", "").strip()
+
+        result = {
+            "transcriptions": [{"transcript": transcript, "confidence": 0.9}],
+            "detected_language": payload.get("detected_language") or language_code,
+            "full_transcript": transcript,
+            "speaker_turns": self.parse_speaker_turns(transcript),
+            "word_index": None,
+            "duration_seconds": len(audio_segment) / 1000,
+            "processing_method": "gemini_audio",
+            "audio_bytes_sent": len(audio_bytes),
+        }
+        if extract_structured and "structured_data" in payload:
+            result["structured_data"] = payload["structured_data"]
+        return result
+
+    def parse_speaker_turns(self, transcript):
+        """Recover speaker turns (without timestamps) from 'Speaker N:' lines"""
+        turns = []
+        for match in re.finditer(r"^Speaker (\d+):\s*(.+)$", transcript, re.MULTILINE):
+            text = match.group(2).strip()
+            turns.append(
+                {
+                    "speaker": int(match.group(1)),
+                    "start": None,
+                    "end": None,
+                    "text": text,
+                    "word_count": len(text.split()),
+                }
+            )
+        return turns
+
+    def _upload_audio(self, audio_bytes, mime_type):
+        uploaded = self.gemini_client.files.upload(
+            file=io.BytesIO(audio_bytes), config={"mime_type": mime_type}
+        )
+        return types.Part.from_uri(file_uri=uploaded.uri, mime_type=mime_type)
+
+
+class LocalASREngine(TranscriptionEngine):
+    """Offline CPU recognition with Vosk (Kaldi) models for short clips
+
+    Models are configured per language code and loaded once per process. No
+    diarization: the whole clip is reported as a single speaker turn, but word
+    timings still feed the ``WordTimestampIndex``.
+    """
+
+    name = "local"
+    cost_per_minute_usd = 0.0
+    sample_rate = 16000
+
+    _models = {}
+    _models_lock = threading.Lock()
+
+    def __init__(self, model_paths=None):
+        self.model_paths = dict(model_paths or {})
+        self.logger = logging.getLogger(__name__)
+
+    def is_available(self, language_code=None):
+        if not HAS_VOSK or not self.model_paths:
+            return False
+        return language_code is None or language_code in self.model_paths
+
+    def _load_model(self, language_code):
+        path = self.model_paths[language_code]
+        with self._models_lock:
+            if path not in self._models:
+                self.logger.info(f"Loading local ASR model for {language_code}: {path}")
+                self._models[path] = vosk.Model(path)
+            return self._models[path]
+
+    def _recognize(self, pcm_bytes, language_code):
+        """Run recognition over 16-bit mono PCM, returning (text, words)
+
+        ``words`` are dicts with ``word``, ``start``, ``end`` and ``conf`` as
+        produced by Vosk.
+        """
+        recognizer = vosk.KaldiRecognizer(
+            self._load_model(language_code), self.sample_rate
+        )
+        recognizer.SetWords(True)
+
+        texts = []
+        words = []
+        step = self.sample_rate * 2 * 4  # feed 4 seconds at a time
+        for i in range(0, len(pcm_bytes), step):
+            if recognizer.AcceptWaveform(pcm_bytes[i : i + step]):
+                segment = json.loads(recognizer.Result())
+                texts.append(segment.get("text", ""))
+                words.extend(segment.get("result", []))
+        segment = json.loads(recognizer.FinalResult())
+        texts.append(segment.get("text", ""))
+        words.extend(segment.get("result", []))
+
+        return " ".join(text for text in texts if text), words
+
+    def transcribe(
+        self, audio_path, language_code, audio_segment=None, extract_structured=False
+    ):
+        try:
+            if not self.is_available(language_code):
+                return {"error": f"No local ASR model for {language_code}"}
+
+            if audio_segment is None:
+                from pydub import AudioSegment
+
+                audio_segment = AudioSegment.from_file(audio_path)
+
+            pcm = (
+                audio_segment.set_channels(1)
+                .set_frame_rate(self.sample_rate)
+                .set_sample_width(2)
+            )
+            text, words = self._recognize(pcm.raw_data, language_code)
+
+            word_index = WordTimestampIndex()
+            for word in words:
+                word_index.append(word["word"], word["start"], word["end"])
+
+            confidence = (
+                sum(word.get("conf", 0.0) for word in words) / len(words)
+                if words
+                else 0.0
+            )
+            speaker_turns = []
+            if words:
+                speaker_turns.append(
+                    {
+                        "speaker": 1,
+                        "start": round(words[0]["start"], 3),
+                        "end": round(words[-1]["end"], 3),
+                        "text": text,
+                        "word_count": len(words),
+                    }
+                )
+
+            transcript = f"Speaker 1: {text}" if text else "No speech detected in audio."
+            return {
+                "transcriptions": [{"transcript": transcript, "confidence": confidence}],
+                "detected_language": language_code,
+                "full_transcript": transcript,
+                "speaker_turns": speaker_turns,
+                "word_index": word_index,
+                "duration_seconds": len(audio_segment) / 1000,
+                "processing_method": "local_asr",
+            }
+
+        except Exception as e:
+            self.logger.error(f"Local ASR transcription failed: {str(e)}")
+            return {"error": f"Local ASR transcription failed: {str(e)}"}
+
+
+class TranscriptionPolicy:
+    """Pick a transcription engine by clip duration and language
+
+    ``engine`` forces a backend ("local", "google_speech", "gemini"); "auto"
+    keeps short clips on the local CPU model when one exists for the language,
+    prefers Speech-to-Text for short clips in its supported languages and Gemini
+    for long recordings or languages Speech-to-Text is not configured for.
+    Local results below ``local_min_confidence`` are escalated to the cloud.
+    """
+
+    def __init__(
+        self,
+        engine: str = "auto",
+        speech_language_codes=None,
+        gemini_min_seconds: float = 60,
+        local_max_seconds: float = 30,
+        local_min_confidence: float = 0.75,
+    ):
+        self.engine = engine
+        self.speech_language_codes = set(speech_language_codes or [])
+        self.gemini_min_seconds = gemini_min_seconds
+        self.local_max_seconds = local_max_seconds
+        self.local_min_confidence = local_min_confidence
+
+    @classmethod
+    def from_config(cls, config) -> "TranscriptionPolicy":
+        return cls(
+            engine=config.get("TRANSCRIPTION_ENGINE", "auto"),
+            speech_language_codes=config.get("SPEECH_TO_TEXT_LANGUAGE_CODES", []),
+            gemini_min_seconds=config.get("GEMINI_AUDIO_MIN_SECONDS", 60),
+            local_max_seconds=config.get("LOCAL_ASR_MAX_SECONDS", 30),
+            local_min_confidence=config.get("LOCAL_ASR_MIN_CONFIDENCE", 0.75),
+        )
+
+    def select(
+        self,
+        duration_seconds: float,
+        language_code: str,
+        engines: Dict[str, TranscriptionEngine],
+    ) -> str:
+        available = {
+            name
+            for name, engine in engines.items()
+            if engine.is_available(language_code)
+        }
+
+        if self.engine != "auto" and self.engine in available:
+            return self.engine
+
+        if "local" in available and duration_seconds <= self.local_max_seconds:
+            return "local"
+
+        if "gemini" in available:
+            if (
+                self.speech_language_codes
+                and language_code not in self.speech_language_codes
+            ):
+                return "gemini"
+            if duration_seconds >= self.gemini_min_seconds:
+                return "gemini"
+
+        return "google_speech"
+
+    def needs_escalation(self, engine_name: str, result: Dict[str, Any]) -> bool:
+        """Whether a result should be retried on a cloud engine"""
+        if "error" in result:
+            return engine_name != "google_speech"
+        if engine_name == "local":
+            transcriptions = result.get("transcriptions") or [{}]
+            confidence = transcriptions[0].get("confidence", 0.0)
+            return confidence < self.local_min_confidence
+        return False
+
@@ -14,6 +14,10 @@ from supabase import create_client, Client
 from flask import current_app
 
 from models.user import User, UserProfile, UserStatus, UserRole, ProcessedDocument
+from utils.cache_backend import get_shared_cache, make_cache_key
+
+# Revoked tokens stay rejected for Supabase's default access token lifetime
+REVOKED_TOKEN_SECONDS = 3600
 
 
 class UserService:
@@ -72,7 +76,71 @@ class UserService:
     def verify_access_token(self, access_token: str) -> Optional[Dict[str, Any]]:
         """
         Verify Supabase access token and return user data
+
+        Successful verifications are cached for AUTH_TOKEN_CACHE_SECONDS in the
+        shared cache (keyed by a hash of the token), so authenticated requests
+        don't each make a Supabase round trip. The revocation check is not
+        cached: a token passed to ``revoke_access_token`` is rejected at once by
+        every worker sharing the cache.
         """
+        cache_key = None
+        try:
+            if get_shared_cache().get(make_cache_key("auth_revoked", access_token)):
+                return None
+            if current_app.config.get("AUTH_TOKEN_CACHE_SECONDS", 60):
+                cache_key = make_cache_key("auth_token", access_token)
+                cached = get_shared_cache().get(cache_key)
+                if cached:
+                    return cached
+        except Exception as e:
+            self.logger.warning(f"Token cache lookup failed: {str(e)}")
+
+        user_data = self._verify_access_token_with_supabase(access_token)
+        if user_data and cache_key:
+            try:
+                get_shared_cache().set(
+                    cache_key,
+                    user_data,
+                    current_app.config.get("AUTH_TOKEN_CACHE_SECONDS", 60),
+                )
+            except Exception as e:
+                self.logger.warning(f"Failed to cache token verification: {str(e)}")
+        return user_data
+
+    def revoke_access_token(self, access_token: str) -> bool:
+        """
+        Sign the token's session out of Supabase and stop accepting the token
+
+        The cached verification is dropped and a revocation marker is stored in
+        the shared cache, which ``verify_access_token`` checks before any cached
+        result. Returns False if Supabase could not end the session; the token
+        is rejected here either way.
+        """
+        try:
+            cache = get_shared_cache()
+            cache.set(
+                make_cache_key("auth_revoked", access_token),
+                True,
+                REVOKED_TOKEN_SECONDS,
+            )
+            cache.delete(make_cache_key("auth_token", access_token))
+        except Exception as e:
+            self.logger.error(f"Failed to revoke cached token: {str(e)}")
+
+        try:
+            if not self._supabase_client:
+                self.logger.error("Supabase client not initialized")
+                return False
+            self._supabase_client.auth.admin.sign_out(access_token)
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to sign out Supabase session: {str(e)}")
+            return False
+
+    def _verify_access_token_with_supabase(
+        self, access_token: str
+    ) -> Optional[Dict[str, Any]]:
+        """Verify an access token against Supabase"""
         try:
             if not self._supabase_client:
                 self.logger.error("Supabase client not initialized")
@@ -0,0 +1,8 @@
+"""
+Shared pytest setup: run from ``backend/`` with ``python -m pytest tests``
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,128 @@
+"""
+Tests for services.batch_evaluation.BatchEvaluator
+"""
+
+import threading
+import time
+
+from services.batch_evaluation import BatchEvaluator
+
+
+def run(evaluator, submissions):
+    entries = list(evaluator.run(submissions))
+    summary = entries.pop()["summary"]
+    return sorted(entries, key=lambda entry: entry["index"]), summary
+
+
+def test_evaluates_duplicates_once():
+    calls = []
+
+    def evaluate(text, language):
+        calls.append((text, language))
+        return {"score": len(text)}
+
+    entries, summary = run(
+        BatchEvaluator(evaluate),
+        [
+            {"submission_id": "a", "text": "Cold rooms  for farmers"},
+            {"submission_id": "b", "text": " Cold rooms for\nfarmers "},
+            {"submission_id": "c", "text": "Cold rooms for farmers", "language": "hi"},
+        ],
+    )
+
+    assert len(calls) == 2
+    assert [entry["status"] for entry in entries] == ["ok"] * 3
+    assert entries[1]["duplicate_of"] == "a"
+    assert "duplicate_of" not in entries[2]
+    assert summary["unique_evaluations"] == 2
+    assert summary["duplicates"] == 1
+    assert summary["succeeded"] == 3
+
+
+def test_invalid_and_failed_items_do_not_fail_the_batch():
+    def evaluate(text, language):
+        if text == "boom":
+            raise RuntimeError("upstream down")
+        if text == "quota":
+            return {"error": "quota exceeded"}
+        return {"score": 1}
+
+    entries, summary = run(
+        BatchEvaluator(evaluate),
+        [
+            {"text": "fine"},
+            {"text": "  "},
+            "not a dict",
+            {"text": "boom"},
+            {"text": "quota"},
+        ],
+    )
+
+    assert [entry["status"] for entry in entries] == ["ok"] + ["error"] * 4
+    assert entries[1]["error"] == "Business idea text required"
+    assert entries[3]["error"] == "upstream down"
+    assert entries[4]["error"] == "quota exceeded"
+    assert summary["succeeded"] == 1
+    assert summary["failed"] == 4
+
+
+def test_item_timeout_reports_error_and_continues():
+    release = threading.Event()
+
+    def evaluate(text, language):
+        if text == "slow":
+            release.wait(5)
+        return {"score": 1}
+
+    try:
+        entries, summary = run(
+            BatchEvaluator(evaluate, max_workers=2, item_timeout=0.2),
+            [{"text": "slow"}, {"text": "fast"}],
+        )
+    finally:
+        release.set()
+
+    assert entries[0]["error"] == "Evaluation timed out after 0.2s"
+    assert entries[1]["status"] == "ok"
+    assert summary["failed"] == 1
+
+
+def test_deadline_fails_unfinished_items():
+    release = threading.Event()
+
+    def evaluate(text, language):
+        release.wait(5)
+        return {"score": 1}
+
+    started = time.monotonic()
+    try:
+        entries, summary = run(
+            BatchEvaluator(evaluate, max_workers=1, deadline_seconds=0.2),
+            [{"text": "one"}, {"text": "two"}],
+        )
+    finally:
+        release.set()
+
+    assert time.monotonic() - started < 2
+    assert all(entry["status"] == "error" for entry in entries)
+    assert "deadline" in entries[0]["error"]
+    assert summary["failed"] == 2
+
+
+def test_results_stream_in_completion_order():
+    def evaluate(text, language):
+        time.sleep(0.2 if text == "slow" else 0)
+        return {"score": 1}
+
+    evaluator = BatchEvaluator(evaluate, max_workers=2)
+    order = [
+        entry["submission_id"]
+        for entry in evaluator.run(
+            [
+                {"submission_id": "slow", "text": "slow"},
+                {"submission_id": "fast", "text": "fast"},
+            ]
+        )
+        if "summary" not in entry
+    ]
+    assert order == ["fast", "slow"]
@@ -0,0 +1,190 @@
+"""
+Tests for utils.cache_backend tiers, TTL handling and miss coalescing
+"""
+
+import os
+import stat
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from utils import cache_backend
+from utils.cache_backend import (
+    MemoryTier,
+    SQLiteTier,
+    TwoTierCache,
+    deserialize,
+    make_cache_key,
+    serialize,
+)
+
+
+class Clock:
+    """Stands in for ``time.time`` inside cache_backend"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_backend.time, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def shared_tier(request, tmp_path):
+    if request.param == "memory":
+        return MemoryTier()
+    return SQLiteTier(str(tmp_path / "cache.sqlite3"))
+
+
+def test_key_schema():
+    key = make_cache_key("ocr", "a", 1)
+    assert key.startswith("tua:v1:ocr:")
+    assert key == make_cache_key("ocr", "a", 1)
+    assert key != make_cache_key("ocr", "a", 2)
+
+
+def test_serialize_round_trip():
+    value = {"when": datetime(2024, 5, 1, 12, 30), "blob": b"\x00\xff", "n": [1, 2]}
+    assert deserialize(serialize(value)) == value
+
+
+def test_shared_ttl_expires(clock, shared_tier):
+    cache = TwoTierCache(MemoryTier(), shared_tier, local_ttl=300)
+    cache.set("tua:v1:auth:token", {"user": "a"}, ttl=60)
+
+    clock.now += 61
+    assert cache.get("tua:v1:auth:token") is None
+
+
+def test_promotion_keeps_remaining_ttl(clock, shared_tier):
+    writer = TwoTierCache(MemoryTier(), shared_tier, local_ttl=300)
+    reader = TwoTierCache(MemoryTier(), shared_tier, local_ttl=300)
+    writer.set("tua:v1:auth:token", {"user": "a"}, ttl=60)
+
+    clock.now += 50
+    assert reader.get("tua:v1:auth:token") == {"user": "a"}
+
+    # Only the local copy could still answer once the shared row is gone
+    shared_tier.delete("tua:v1:auth:token")
+    clock.now += 11
+    assert reader.get("tua:v1:auth:token") is None
+
+
+def test_promotion_without_expiry_uses_local_ttl(clock, shared_tier):
+    writer = TwoTierCache(MemoryTier(), shared_tier, local_ttl=300)
+    reader = TwoTierCache(MemoryTier(), shared_tier, local_ttl=300)
+    writer.set("tua:v1:llm:prompt", "answer")
+
+    assert reader.get("tua:v1:llm:prompt") == "answer"
+    shared_tier.delete("tua:v1:llm:prompt")
+    clock.now += 299
+    assert reader.get("tua:v1:llm:prompt") == "answer"
+    clock.now += 2
+    assert reader.get("tua:v1:llm:prompt") is None
+
+
+def test_memory_tier_evicts_least_recently_used():
+    tier = MemoryTier(max_entries=2)
+    tier.set("a", b"1")
+    tier.set("b", b"2")
+    tier.get("a")
+    tier.set("c", b"3")
+
+    assert tier.get("b") is None
+    assert tier.get("a") == b"1"
+    assert tier.stats()["evictions"] == 1
+
+
+def test_sqlite_prune_drops_expired_and_oldest(clock, tmp_path):
+    tier = SQLiteTier(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    tier.set("expired", b"0", ttl=10)
+    for index, key in enumerate(("old", "newer", "newest")):
+        clock.now += 1 + index
+        tier.set(key, b"1")
+
+    clock.now += 10
+    tier.prune()
+    assert tier.get("expired") is None
+    assert tier.get("old") is None
+    assert tier.get("newest") == b"1"
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX file modes")
+def test_sqlite_file_is_owner_only(tmp_path):
+    path = tmp_path / "instance" / "cache.sqlite3"
+    SQLiteTier(str(path)).set("key", b"ocr text")
+
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    assert stat.S_IMODE(path.parent.stat().st_mode) == 0o700
+
+
+def test_add_only_sets_absent_keys(shared_tier):
+    assert shared_tier.add("lease", b"1", ttl=30) is True
+    assert shared_tier.add("lease", b"1", ttl=30) is False
+
+
+def test_failing_shared_tier_degrades_to_local():
+    class Broken:
+        name = "broken"
+
+        def __getattr__(self, name):
+            def fail(*args):
+                raise ConnectionError("down")
+
+            return fail
+
+    cache = TwoTierCache(MemoryTier(), Broken())
+    cache.set("tua:v1:x:1", 1)
+
+    assert cache.get("tua:v1:x:1") == 1
+    assert cache.get("tua:v1:x:2") is None
+    assert cache.stats()["shared_errors"] == 2
+
+
+def test_get_or_set_skips_uncacheable_values():
+    cache = TwoTierCache(MemoryTier())
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"error": "quota"}
+
+    cacheable = lambda value: "error" not in value  # noqa: E731
+    cache.get_or_set("tua:v1:x:1", compute, cacheable=cacheable)
+    cache.get_or_set("tua:v1:x:1", compute, cacheable=cacheable)
+    assert len(calls) == 2
+
+
+def test_get_or_set_coalesces_concurrent_misses():
+    cache = TwoTierCache(MemoryTier())
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(cache.get_or_set("tua:v1:x:1", compute))
+        )
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["value"] * 4
+    assert len(calls) == 1
+    assert cache.stats()["coalesced_waits"] >= 1
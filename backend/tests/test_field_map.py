@@ -0,0 +1,201 @@
+"""
+Tests for map-reduce field extraction: FieldExtractionMap windows and
+reduce_field_candidates
+"""
+
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from services import ocr_service
+from services.llm_gateway import LLMGateway
+from services.ocr_service import (
+    EXTRACTION_SCHEMA,
+    FieldExtractionMap,
+    OCRService,
+    reduce_field_candidates,
+)
+
+
+def candidate(pages, confidence, **fields):
+    return {"pages": pages, "confidence": confidence, "fields": fields}
+
+
+# Reduce
+
+
+def test_empty_candidates_leave_every_field_unfound():
+    fields, field_pages, conflicts = reduce_field_candidates([])
+    assert fields == {name: "N/A" for name in EXTRACTION_SCHEMA.properties}
+    assert field_pages == {}
+    assert conflicts == {}
+
+
+def test_placeholders_are_not_candidates():
+    fields, field_pages, conflicts = reduce_field_candidates(
+        [
+            candidate([1, 2], 0.9, Business_Name="N/A"),
+            candidate([3], 0.5, Business_Name="Millet Mart", Key_USP=""),
+        ]
+    )
+    assert fields["Business_Name"] == "Millet Mart"
+    assert field_pages["Business_Name"] == [3]
+    assert fields["Key_USP"] == "N/A"
+    assert conflicts == {}
+
+
+def test_agreeing_windows_are_not_conflicts():
+    fields, field_pages, conflicts = reduce_field_candidates(
+        [
+            candidate([1, 2], 0.8, Business_Name="Millet Mart"),
+            candidate([3, 4], 0.9, Business_Name="Millet Mart"),
+        ]
+    )
+    assert fields["Business_Name"] == "Millet Mart"
+    assert field_pages["Business_Name"] == [3, 4]
+    assert conflicts == {}
+
+
+def test_disagreement_goes_to_the_most_confident_window():
+    fields, field_pages, conflicts = reduce_field_candidates(
+        [
+            candidate([1, 2], 0.6, Loan_Requirement_First_Month_INR=5000),
+            candidate([3, 4], 0.95, Loan_Requirement_First_Month_INR=50000),
+            candidate([5], 0.7, Loan_Requirement_First_Month_INR=5000),
+        ]
+    )
+    assert fields["Loan_Requirement_First_Month_INR"] == 50000
+    assert field_pages["Loan_Requirement_First_Month_INR"] == [3, 4]
+    assert conflicts["Loan_Requirement_First_Month_INR"] == [
+        {"value": 5000, "pages": [1, 2], "confidence": 0.6},
+        {"value": 50000, "pages": [3, 4], "confidence": 0.95},
+    ]
+
+
+def test_confidence_ties_go_to_the_earliest_window():
+    fields, field_pages, _ = reduce_field_candidates(
+        [
+            candidate([1], 0.9, Business_Name="Millet Mart"),
+            candidate([2], 0.9, Business_Name="Millet Mart Pvt Ltd"),
+        ]
+    )
+    assert (fields["Business_Name"], field_pages["Business_Name"]) == (
+        "Millet Mart",
+        [1],
+    )
+
+
+# Map
+
+
+class RecordingExtract:
+    def __init__(self, fail_on=None):
+        self.texts = []
+        self.fail_on = fail_on
+        self.lock = threading.Lock()
+
+    def __call__(self, text):
+        with self.lock:
+            self.texts.append(text)
+        if self.fail_on and self.fail_on in text:
+            return {"error": "extraction failed"}
+        return {"Business_Name": text.split("\n")[0]}
+
+
+def test_windows_are_extracted_as_their_pages_arrive():
+    extract = RecordingExtract()
+    field_map = FieldExtractionMap(extract, [1, 2, 3, 4, 5], window_pages=2)
+    assert field_map.windows == [[1, 2], [3, 4], [5]]
+
+    field_map.add_page(2, "page two", 0.9)
+    assert field_map.futures == {}
+    field_map.add_page(1, "page one", 0.8)
+    field_map.add_page(4, "page four", 0.7)
+    assert list(field_map.futures) == [0]
+
+    field_map.add_page(3, "page three", 0.95)
+    field_map.add_page(5, "page five", 0.9)
+    candidates = field_map.results()
+
+    assert [c["pages"] for c in candidates] == [[1, 2], [3, 4], [5]]
+    assert [c["confidence"] for c in candidates] == [0.8, 0.7, 0.9]
+    assert candidates[0]["fields"] == {"Business_Name": "page one"}
+    assert "page one\n\n[PAGE BREAK]\n\npage two" in extract.texts
+
+
+def test_skipped_pages_and_failed_windows_are_left_out():
+    extract = RecordingExtract(fail_on="garbled")
+    field_map = FieldExtractionMap(extract, [1, 2, 3, 4, 5], window_pages=2)
+    field_map.add_page(1, None, None)  # blank page
+    field_map.add_page(2, "page two", 0.9)
+    field_map.add_page(3, None, None)
+    field_map.add_page(4, None, None)
+    field_map.add_page(5, "garbled", 0.4)
+
+    candidates = field_map.results()
+    assert [c["pages"] for c in candidates] == [[2]]
+    assert len(extract.texts) == 2  # window 3-4 had no text to send
+
+
+def test_windows_without_pages_are_submitted_at_the_end():
+    field_map = FieldExtractionMap(RecordingExtract(), [1, 2, 3], window_pages=2)
+    field_map.add_page(1, "page one", 0.9)
+    candidates = field_map.results()
+    assert [c["pages"] for c in candidates] == [[1]]
+
+
+# LLM reduce mode
+
+
+@pytest.fixture
+def reduce_with_llm(monkeypatch):
+    monkeypatch.setattr(ocr_service, "get_llm_gateway", lambda: LLMGateway())
+    app = Flask(__name__)
+    app.config.update(STRUCTURED_REDUCE_MODE="llm", OCR_IMAGE_CACHE_ENABLED=False)
+
+    def run(answer, candidates):
+        calls = []
+
+        def generate_content(model, contents, config=None):
+            calls.append(contents)
+            return SimpleNamespace(text=json.dumps(answer))
+
+        models = SimpleNamespace(generate_content=generate_content)
+        client = SimpleNamespace(models=models)
+        with app.app_context():
+            service = OCRService(gemini_client=client, vision_client=object())
+            return service._reduce_field_candidates(candidates), calls
+
+    return run
+
+
+CONFLICTING = [
+    candidate([1], 0.9, Business_Name="Millet Mart"),
+    candidate([2], 0.6, Business_Name="Millet Mart Pvt Ltd"),
+]
+
+
+def test_llm_reduce_picks_one_of_the_candidates(reduce_with_llm):
+    (fields, field_pages), calls = reduce_with_llm(
+        {"Business_Name": "Millet Mart Pvt Ltd"}, CONFLICTING
+    )
+    assert fields["Business_Name"] == "Millet Mart Pvt Ltd"
+    assert field_pages["Business_Name"] == [2]
+    assert len(calls) == 1
+
+
+def test_llm_reduce_never_invents_a_value(reduce_with_llm):
+    (fields, field_pages), _ = reduce_with_llm(
+        {"Business_Name": "Mart of Millets"}, CONFLICTING
+    )
+    assert fields["Business_Name"] == "Millet Mart"
+    assert field_pages["Business_Name"] == [1]
+
+
+def test_llm_reduce_is_skipped_without_conflicts(reduce_with_llm):
+    (fields, _), calls = reduce_with_llm({}, CONFLICTING[:1])
+    assert fields["Business_Name"] == "Millet Mart"
+    assert calls == []
@@ -0,0 +1,267 @@
+"""
+Tests for utils.gemini_guard: circuit breaker, token bucket, AIMD limit and
+the retry loop around Gemini calls
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from utils.gemini_guard import (
+    AdaptiveConcurrencyLimit,
+    CircuitBreaker,
+    CircuitOpenError,
+    ConcurrencyTimeoutError,
+    GeminiGuard,
+    TokenBucket,
+    error_status,
+)
+
+
+class UpstreamError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+def make_guard(**overrides):
+    settings = dict(
+        max_concurrency=4,
+        min_concurrency=1,
+        max_retries=2,
+        backoff_base=0.0,
+        backoff_max=0.0,
+        failure_threshold=2,
+        reset_seconds=0,
+        acquire_timeout=0.05,
+    )
+    settings.update(overrides)
+    return GeminiGuard(**settings)
+
+
+def open_circuit(guard, model="gemini-test"):
+    breaker, _ = guard._for_model(model)
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    return breaker
+
+
+# Circuit breaker
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.rejections == 1
+
+
+def test_breaker_admits_one_probe_when_half_open():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+
+    assert breaker.before_call() is True
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.before_call() is False
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=0)
+    for _ in range(3):
+        breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_probe_timing_out_on_slot_does_not_wedge_breaker():
+    guard = make_guard()
+    breaker = open_circuit(guard)
+    guard.concurrency.limit = 1
+    guard.concurrency.acquire()  # hold the only slot
+
+    with pytest.raises(ConcurrencyTimeoutError):
+        guard.call("gemini-test", lambda: "probe")
+    assert breaker.failures == 2  # a local timeout is not an upstream failure
+
+    guard.concurrency.release("success")
+    assert guard.call("gemini-test", lambda: "probe") == "probe"
+    assert breaker.state == "closed"
+
+
+def test_cancelled_async_probe_does_not_wedge_breaker():
+    guard = make_guard()
+    breaker = open_circuit(guard)
+
+    async def scenario():
+        async def hang():
+            await asyncio.sleep(10)
+
+        task = asyncio.create_task(guard.acall("gemini-test", hang))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        async def answer():
+            return "probe"
+
+        return await guard.acall("gemini-test", answer)
+
+    assert asyncio.run(scenario()) == "probe"
+    assert breaker.state == "closed"
+    assert guard.concurrency.in_flight == 0
+
+
+# Retry loop
+
+
+def test_retries_retryable_errors_then_succeeds():
+    guard = make_guard(failure_threshold=5)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise UpstreamError(503)
+        return "ok"
+
+    assert guard.call("gemini-test", flaky) == "ok"
+    assert guard.stats()["retries"] == 2
+
+
+def test_non_retryable_error_is_raised_at_once():
+    guard = make_guard()
+    attempts = []
+
+    def invalid():
+        attempts.append(1)
+        raise UpstreamError(400)
+
+    with pytest.raises(UpstreamError):
+        guard.call("gemini-test", invalid)
+    assert len(attempts) == 1
+    assert guard.stats()["circuits"]["gemini-test"]["state"] == "closed"
+
+
+def bad_request():
+    raise UpstreamError(400)
+
+
+def test_non_retryable_error_leaves_failure_count():
+    guard = make_guard(failure_threshold=3)
+    breaker, _ = guard._for_model("gemini-test")
+    breaker.record_failure()
+
+    with pytest.raises(UpstreamError):
+        guard.call("gemini-test", bad_request)
+    assert breaker.failures == 1
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_non_retryable_probe_releases_slot_without_closing():
+    guard = make_guard()
+    breaker = open_circuit(guard)
+
+    with pytest.raises(UpstreamError):
+        guard.call("gemini-test", bad_request)
+    assert breaker.state == "half_open"
+    assert breaker.failures == 2
+
+    assert guard.call("gemini-test", lambda: "probe") == "probe"
+    assert breaker.state == "closed"
+
+
+def test_throttling_halves_concurrency():
+    guard = make_guard(max_retries=1, failure_threshold=5)
+
+    def throttled():
+        raise UpstreamError(429)
+
+    with pytest.raises(UpstreamError):
+        guard.call("gemini-test", throttled)
+    assert guard.stats()["concurrency_limit"] == 2
+    assert guard.stats()["throttled"] == 2
+
+
+def test_error_status():
+    assert error_status(UpstreamError(429)) == 429
+    assert error_status(TimeoutError()) == 504
+    assert error_status(ValueError()) is None
+
+
+# Token bucket
+
+
+def test_bucket_allows_burst_then_waits():
+    bucket = TokenBucket(rate_per_minute=600, burst=2)
+    assert bucket._take() == 0
+    assert bucket._take() == 0
+    wait = bucket._take()
+    assert 0 < wait <= 0.1
+
+
+def test_bucket_refills_over_time():
+    bucket = TokenBucket(rate_per_minute=6000, burst=1)
+    bucket.acquire()
+    started = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - started < 0.1
+
+
+# AIMD concurrency limit
+
+
+def test_limit_grows_by_one_per_window_of_successes():
+    limit = AdaptiveConcurrencyLimit(initial=2, minimum=1, maximum=8)
+    for _ in range(2):
+        limit.acquire()
+        limit.release("success")
+    assert 2.5 < limit.limit < 3
+    limit.acquire()
+    limit.release("success")
+    assert int(limit.limit) == 3
+
+
+def test_limit_halves_at_most_once_per_interval():
+    limit = AdaptiveConcurrencyLimit(initial=8, minimum=1, maximum=8)
+    for _ in range(3):
+        limit.acquire()
+        limit.release("throttled")
+    assert limit.limit == 4
+    assert limit.decreases == 1
+
+
+def test_limit_respects_bounds():
+    limit = AdaptiveConcurrencyLimit(
+        initial=1, minimum=1, maximum=2, decrease_interval=0
+    )
+    limit.acquire()
+    limit.release("throttled")
+    assert limit.limit == 1
+    for _ in range(10):
+        limit.acquire()
+        limit.release("success")
+    assert limit.limit == 2
+
+
+def test_acquire_times_out_when_full():
+    limit = AdaptiveConcurrencyLimit(initial=1, minimum=1, maximum=1)
+    limit.acquire()
+    with pytest.raises(ConcurrencyTimeoutError):
+        limit.acquire(timeout=0.01)
+    with pytest.raises(ConcurrencyTimeoutError):
+        asyncio.run(limit.acquire_async(timeout=0.01))
@@ -0,0 +1,70 @@
+"""
+Tests for utils.image_cache owner scoping and BK-tree lookups
+"""
+
+from utils.cache_backend import MemoryTier, TwoTierCache
+from utils.image_cache import BKTree, PerceptualImageCache, file_digest
+
+RESULT = {"full_text": "Applicant A's business plan"}
+
+
+def test_near_match_within_owner():
+    cache = PerceptualImageCache(max_distance=8)
+    cache.put(0b1011, RESULT, "gemini", "user:a")
+
+    hit = cache.get(0b1010, "gemini", "user:a")
+    assert hit["full_text"] == RESULT["full_text"]
+    assert hit["cache_distance"] == 1
+
+
+def test_other_owner_never_matches():
+    cache = PerceptualImageCache(max_distance=8)
+    cache.put(0b1011, RESULT, "gemini", "user:a")
+
+    assert cache.get(0b1011, "gemini", "user:b") is None
+    assert cache.get(0b1011, "gemini", None) is None
+
+
+def test_shared_tier_is_scoped_by_owner():
+    shared = TwoTierCache(MemoryTier(), MemoryTier())
+    writer = PerceptualImageCache(shared=shared)
+    writer.put(0b1011, RESULT, "gemini", "user:a")
+
+    reader = PerceptualImageCache(shared=shared)
+    assert reader.get(0b1011, "gemini", "user:b") is None
+    assert reader.get(0b1011, "gemini", "user:a")["full_text"] == RESULT["full_text"]
+
+
+def test_distance_limit():
+    cache = PerceptualImageCache(max_distance=8)
+    cache.put(0, RESULT, "gemini", "user:a")
+
+    assert cache.get((1 << 8) - 1, "gemini", "user:a") is not None
+    assert cache.get((1 << 9) - 1, "gemini", "user:a") is None
+
+
+def test_eviction_drops_empty_owner_trees():
+    cache = PerceptualImageCache(max_entries=2)
+    for owner in ("user:a", "user:b", "user:c"):
+        cache.put(0, RESULT, "gemini", owner)
+
+    assert cache.get(0, "gemini", "user:a") is None
+    assert cache.stats()["owners"] == 2
+
+
+def test_bk_tree_nearest_skips_removed():
+    tree = BKTree()
+    tree.add(0b0000, "a")
+    tree.add(0b0001, "b")
+    tree.remove("b")
+
+    assert tree.nearest(0b0001, 2) == ("a", 1)
+
+
+def test_file_digest_depends_on_bytes(tmp_path):
+    first, second = tmp_path / "a.jpg", tmp_path / "b.jpg"
+    first.write_bytes(b"page one")
+    second.write_bytes(b"page two")
+
+    assert file_digest(first) != file_digest(second)
+    assert file_digest(first) == file_digest(first)
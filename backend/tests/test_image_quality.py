@@ -0,0 +1,99 @@
+"""
+Tests for utils.image_quality on synthetic photos of notes
+"""
+
+import numpy as np
+import pytest
+from PIL import Image, ImageFilter
+
+from utils.image_quality import (
+    DEFAULT_THRESHOLDS,
+    assess_image_quality,
+    enhance_image,
+)
+
+
+def note_photo(lines=2, width=4000, height=3000, paper=235, ink=25, seed=0):
+    """A sharp, well-lit photo of ``lines`` handwritten-size text lines"""
+    rng = np.random.default_rng(seed)
+    pixels = paper + rng.normal(0.0, 3.0, (height, width))
+    for line in range(lines):
+        top = 400 + line * 160
+        for x in range(300, 2300, 60):
+            pixels[top : top + 60, x : x + 8] = ink  # vertical strokes
+            pixels[top + 52 : top + 60, x : x + 40] = ink  # baseline joins
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+
+def save(image, tmp_path, name="photo.jpg"):
+    path = tmp_path / name
+    image.save(path, quality=92)
+    return str(path)
+
+
+def test_sparse_two_line_note_is_accepted(tmp_path):
+    assessment = assess_image_quality(save(note_photo(), tmp_path))
+    assert assessment["metrics"]["ink_coverage"] < 0.01
+    assert assessment["metrics"]["contrast"] > DEFAULT_THRESHOLDS["min_contrast"]
+    assert assessment["acceptable"], assessment["issues"]
+
+
+def test_faint_pencil_note_is_accepted_with_contrast_stretch(tmp_path):
+    path = save(note_photo(ink=190), tmp_path)
+    assessment = assess_image_quality(path)
+    assert assessment["acceptable"], assessment["issues"]
+    assert "contrast_stretch" in assessment["enhancements"]
+
+    enhanced = str(tmp_path / "photo.enhanced.png")
+    assert enhance_image(path, assessment, enhanced) == ["contrast_stretch"]
+    stretched = assess_image_quality(enhanced)
+    assert stretched["metrics"]["contrast"] > assessment["metrics"]["contrast"]
+
+
+def test_enhancement_leaves_the_upload_untouched(tmp_path):
+    path = save(note_photo(ink=190), tmp_path)
+    with open(path, "rb") as f:
+        original = f.read()
+    assessment = assess_image_quality(path)
+
+    enhanced = str(tmp_path / "photo.enhanced.png")
+    enhance_image(path, assessment, enhanced)
+    with open(path, "rb") as f:
+        assert f.read() == original
+    with Image.open(enhanced) as image:
+        assert image.format == "PNG"
+
+
+def test_nothing_is_written_without_enhancements(tmp_path):
+    path = save(note_photo(), tmp_path)
+    enhanced = tmp_path / "photo.enhanced.png"
+    assert enhance_image(path, {"enhancements": []}, str(enhanced)) == []
+    assert not enhanced.exists()
+
+
+def test_unreadably_faint_note_is_rejected(tmp_path):
+    assessment = assess_image_quality(save(note_photo(ink=222), tmp_path))
+    assert "low_contrast" in assessment["issues"]
+
+
+def test_blank_page_has_no_text(tmp_path):
+    assessment = assess_image_quality(save(note_photo(lines=0), tmp_path))
+    assert "no_text" in assessment["issues"]
+    assert assessment["metrics"]["ink_level"] is None
+
+
+def test_blurry_note_is_rejected(tmp_path):
+    blurred = note_photo(lines=6).filter(ImageFilter.GaussianBlur(25))
+    assessment = assess_image_quality(save(blurred, tmp_path))
+    assert "blurry" in assessment["issues"]
+
+
+def test_dark_photo_is_rejected(tmp_path):
+    assessment = assess_image_quality(save(note_photo(paper=40, ink=5), tmp_path))
+    assert "too_dark" in assessment["issues"]
+
+
+@pytest.mark.parametrize("lines", [1, 8])
+def test_text_height_in_original_pixels(tmp_path, lines):
+    assessment = assess_image_quality(save(note_photo(lines=lines), tmp_path))
+    assert assessment["metrics"]["text_height_px"] == pytest.approx(60, rel=0.25)
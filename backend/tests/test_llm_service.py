@@ -0,0 +1,130 @@
+"""
+Tests for LLMService criterion weighting and overall scores (offline backends)
+"""
+
+import pytest
+
+from config import Config
+from services.llm_service import LLMService, StubEvaluationBackend
+
+
+class CannedBackend:
+    name = "canned"
+
+    def __init__(self, scores, industry="other"):
+        self.scores = scores
+        self.industry = industry
+
+    def evaluate(self, business_text, language="en", industry=None):
+        return {
+            "industry": self.industry,
+            "evaluation_scores": [
+                {"criterion": criterion, "score": score}
+                for criterion, score in self.scores
+            ],
+        }
+
+
+# Weights
+
+
+@pytest.mark.parametrize("industry", sorted(Config.INDUSTRY_WEIGHTS))
+def test_industry_weights_are_selected(industry):
+    weights = LLMService(StubEvaluationBackend()).weights_for(industry)
+    assert weights == pytest.approx(Config.INDUSTRY_WEIGHTS[industry])
+
+
+@pytest.mark.parametrize("industry", [None, "other", "agriculture"])
+def test_unknown_industries_use_the_default_criteria(industry):
+    weights = LLMService(StubEvaluationBackend()).weights_for(industry)
+    assert weights == pytest.approx(Config.EVALUATION_CRITERIA)
+
+
+def test_weights_are_normalized():
+    service = LLMService(StubEvaluationBackend())
+    service.industry_weights = {"retail": {"feasibility": 3, "innovation": 1}}
+    service.criteria_weights = {"feasibility": 2, "market_potential": 2}
+
+    assert service.weights_for("retail") == {"feasibility": 0.75, "innovation": 0.25}
+    assert service.weights_for("other") == {
+        "feasibility": 0.5,
+        "market_potential": 0.5,
+    }
+
+
+# Overall score
+
+
+def evaluate(scores, industry="other", weights=None):
+    service = LLMService(CannedBackend(scores, industry))
+    if weights:
+        service.criteria_weights = weights
+    return service.evaluate_business_idea("Cold rooms for farmers")
+
+
+def test_overall_score_is_the_weighted_mean():
+    result = evaluate(
+        [("feasibility", 90), ("innovation", 50)],
+        weights={"feasibility": 3, "innovation": 1},
+    )
+    assert result["overall_score"] == 80.0
+    assert result["weights"] == {"feasibility": 0.75, "innovation": 0.25}
+    assert [s["weighted_score"] for s in result["evaluation_scores"]] == [67.5, 12.5]
+
+
+def test_industry_weights_change_the_overall_score():
+    scores = [
+        (criterion, 100 if criterion == "innovation" else 0)
+        for criterion in Config.EVALUATION_CRITERIA
+    ]
+
+    assert evaluate(scores, "technology")["overall_score"] == 30.0
+    assert evaluate(scores, "fintech")["overall_score"] == 10.0
+    assert evaluate(scores, "other")["overall_score"] == 20.0
+
+
+def test_missing_criterion_is_reported_and_left_out_of_the_mean():
+    result = evaluate(
+        [("feasibility", 90), ("innovation", 50)],
+        weights={"feasibility": 2, "innovation": 1, "scalability": 1},
+    )
+    # 90 * 0.5 + 50 * 0.25 over the 0.75 of weight that was scored
+    assert result["overall_score"] == pytest.approx(76.7)
+    assert result["missing_criteria"] == ["scalability"]
+
+
+def test_scores_are_clamped_and_stray_criteria_ignored():
+    result = evaluate(
+        [
+            ("feasibility", 140),
+            ("feasibility", 10),
+            ("innovation", -5),
+            ("team_capability", 100),
+            ("market_potential", "high"),
+        ],
+        weights={"feasibility": 1, "innovation": 1, "market_potential": 1},
+    )
+    assert [(s["criterion"], s["score"]) for s in result["evaluation_scores"]] == [
+        ("feasibility", 100.0),
+        ("innovation", 0.0),
+    ]
+    assert result["overall_score"] == 50.0
+    assert result["missing_criteria"] == ["market_potential"]
+
+
+def test_no_usable_scores_is_an_error():
+    result = evaluate([("team_capability", 80)])
+    assert result == {"error": "Evaluation returned no criterion scores"}
+
+
+def test_stub_backend_scores_stay_within_range_and_repeat():
+    service = LLMService(StubEvaluationBackend())
+    first = service.evaluate_business_idea("A fintech app for kirana credit")
+    second = service.evaluate_business_idea("A fintech app for kirana credit")
+
+    assert first["industry"] == "fintech"
+    assert first["weights"] == pytest.approx(Config.INDUSTRY_WEIGHTS["fintech"])
+    assert 0 <= first["overall_score"] <= 100
+    assert first["overall_score"] == second["overall_score"]
+    assert first["missing_criteria"] == []
+    assert sum(s["weight"] for s in first["evaluation_scores"]) == pytest.approx(1)
@@ -0,0 +1,160 @@
+"""
+Tests for utils.ocr_batching and the batched Gemini page OCR that uses it
+(canned model responses in place of Gemini)
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from services import ocr_service
+from services.llm_gateway import LLMGateway
+from services.ocr_service import OCRService
+from utils.ocr_batching import (
+    PAGE_DELIMITER,
+    estimate_image_tokens,
+    parse_batch_response,
+    plan_batches,
+)
+
+
+def batch_text(*pages):
+    return "\n".join(
+        f"{PAGE_DELIMITER.format(page=page)}\n{text}" for page, text in pages
+    )
+
+
+# Parsing
+
+
+def test_parses_pages_in_order():
+    text = batch_text((1, "Name: Asha"), (2, "Loan: 50000"))
+    assert parse_batch_response(text, [1, 2]) == {1: "Name: Asha", 2: "Loan: 50000"}
+
+
+def test_pages_returned_out_of_order_keep_their_numbers():
+    text = batch_text((3, "third"), (1, "first"), (2, "second"))
+    assert parse_batch_response(text, [1, 2, 3]) == {
+        1: "first",
+        2: "second",
+        3: "third",
+    }
+
+
+def test_missing_delimiter_leaves_page_out():
+    # Page 2's text runs into page 1 when its delimiter is dropped
+    text = batch_text((1, "first")) + "\nsecond\n" + batch_text((3, "third"))
+    assert parse_batch_response(text, [1, 2, 3]) == {
+        1: "first\nsecond",
+        3: "third",
+    }
+
+
+def test_repeated_and_unrequested_delimiters_are_ignored():
+    text = batch_text((1, "a"), (2, "b"), (1, "c"), (9, "d"))
+    assert parse_batch_response(text, [1, 2]) == {2: "b"}
+    assert parse_batch_response(text, [2]) == {
+        2: "b\n=== PAGE 1 ===\nc\n=== PAGE 9 ===\nd"
+    }
+
+
+def test_delimiter_variants_are_accepted():
+    text = "==PAGE 1==\nfirst\n  ===  PAGE 2  ===  \nsecond"
+    assert parse_batch_response(text, [1, 2]) == {1: "first", 2: "second"}
+
+
+def test_empty_response():
+    assert parse_batch_response("", [1]) == {}
+    assert parse_batch_response(None, [1]) == {}
+
+
+# Planning
+
+
+def page(number, size=(768, 768), data=b"x" * 100):
+    return {"page": number, "size": size, "data": data, "mime_type": "image/webp"}
+
+
+def test_image_tokens_are_counted_per_tile():
+    assert estimate_image_tokens((300, 300)) == 258
+    assert estimate_image_tokens((768, 768)) == 258
+    assert estimate_image_tokens((1000, 1600)) == 258 * 2 * 3
+
+
+def test_batches_respect_page_byte_and_token_limits():
+    pages = [page(n) for n in range(1, 6)]
+    by_count = plan_batches(pages, 2, 10_000, 10_000)
+    by_bytes = plan_batches(pages, 10, 250, 10_000)
+    by_tokens = plan_batches(pages, 10, 10_000, 258 * 3)
+
+    assert [[p["page"] for p in b] for b in by_count] == [[1, 2], [3, 4], [5]]
+    assert [len(b) for b in by_bytes] == [2, 2, 1]
+    assert [len(b) for b in by_tokens] == [3, 2]
+
+
+def test_oversized_page_gets_a_batch_of_its_own():
+    pages = [page(1), page(2, data=b"x" * 1000), page(3)]
+    batches = plan_batches(pages, 4, 500, 10_000)
+    assert [[p["page"] for p in b] for b in batches] == [[1], [2], [3]]
+
+
+# Fallback to single-page OCR
+
+
+@pytest.fixture(autouse=True)
+def uncached_gateway(monkeypatch):
+    # Canned responses repeat for identical requests; keep them out of the cache
+    monkeypatch.setattr(ocr_service, "get_llm_gateway", lambda: LLMGateway())
+
+
+class CannedModels:
+    def __init__(self, batch_response):
+        self.batch_response = batch_response
+        self.batch_sizes = []
+        self.single_calls = 0
+
+    def generate_content(self, model, contents, config=None):
+        if isinstance(contents[0], str) and contents[0].startswith("The following"):
+            self.batch_sizes.append((len(contents) - 1) // 2)
+            return SimpleNamespace(text=self.batch_response)
+        self.single_calls += 1
+        return SimpleNamespace(text=f"single page {self.single_calls}")
+
+
+def make_service(batch_response, max_pages=4):
+    client = SimpleNamespace(models=CannedModels(batch_response))
+    service = OCRService(gemini_client=client, vision_client=object())
+    service.batch_max_pages = max_pages
+    return service
+
+
+def pdf_pages(count):
+    return [
+        dict(page(n), path=f"page_{n}.png", encoding={"bytes": 100})
+        for n in range(1, count + 1)
+    ]
+
+
+def test_dropped_page_falls_back_to_single_page_ocr():
+    service = make_service(batch_text((1, "first"), (3, "third")))
+    seen = []
+    results = service._gemini_vision_ocr_pages(
+        pdf_pages(3), on_result=lambda number, result: seen.append(number)
+    )
+
+    assert results[1]["full_text"] == "first"
+    assert results[1]["batch_size"] == 3
+    assert results[2]["full_text"] == "single page 1"
+    assert results[2]["batch_size"] == 1
+    assert results[3]["full_text"] == "third"
+    assert sorted(seen) == [1, 2, 3]
+    assert service.gemini_client.models.single_calls == 1
+
+
+def test_missing_pages_shrink_later_batches():
+    service = make_service(batch_text((1, "first")), max_pages=4)
+    results = service._gemini_vision_ocr_pages(pdf_pages(6))
+
+    # Pages 2-4 are retried alone and the rest of the document goes in pairs
+    assert service.gemini_client.models.batch_sizes == [4, 2]
+    assert [results[n]["batch_size"] for n in range(1, 7)] == [4, 1, 1, 1, 1, 1]
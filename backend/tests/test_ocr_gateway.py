@@ -0,0 +1,135 @@
+"""
+Tests for OCR vision calls going through the LLM gateway response cache
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from services import ocr_service
+from services.llm_gateway import LLMGateway
+from services.ocr_service import OCRService
+from utils.cache_backend import MemoryTier, TwoTierCache
+
+FIELDS = {
+    "Entrepreneur_Name": "Asha Devi",
+    "Business_Name": "Millet Mart",
+    "Main_Product_Service": "Millet snacks",
+}
+
+
+class CountingModels:
+    def __init__(self, text):
+        self.text = text
+        self.calls = 0
+
+    def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        return SimpleNamespace(text=self.text)
+
+
+class CountingAsyncModels(CountingModels):
+    async def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        return SimpleNamespace(text=self.text)
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    gateway = LLMGateway(TwoTierCache(MemoryTier()))
+    monkeypatch.setattr(ocr_service, "get_llm_gateway", lambda: gateway)
+    return gateway
+
+
+def make_service(text):
+    client = SimpleNamespace(
+        models=CountingModels(text),
+        aio=SimpleNamespace(models=CountingAsyncModels(text)),
+    )
+    return OCRService(gemini_client=client, vision_client=object())
+
+
+def encoded(data=b"page image"):
+    return data, "image/webp", {"bytes": len(data)}
+
+
+def test_identical_image_is_served_from_the_cache(gateway):
+    service = make_service("Millet Mart")
+
+    first = service._gemini_vision_ocr("a.png", encoded=encoded())
+    second = service._gemini_vision_ocr("b.png", encoded=encoded())
+
+    assert first["full_text"] == second["full_text"] == "Millet Mart"
+    assert service.gemini_client.models.calls == 1
+    assert gateway.stats()["hits"] == 1
+
+
+def test_different_image_bytes_miss(gateway):
+    service = make_service("Millet Mart")
+
+    service._gemini_vision_ocr("a.png", encoded=encoded(b"page one"))
+    service._gemini_vision_ocr("b.png", encoded=encoded(b"page two"))
+
+    assert service.gemini_client.models.calls == 2
+    assert gateway.stats()["misses"] == 2
+
+
+def test_bypass_refreshes_the_cached_response(gateway):
+    service = make_service("first read")
+    service._gemini_vision_ocr("a.png", encoded=encoded())
+
+    service.gemini_client.models.text = "second read"
+    contents = service._vision_ocr_contents(b"page image", "image/webp")
+    response = gateway.generate_content(
+        service.gemini_client, "gemini-2.5-flash", contents, use_cache=False
+    )
+    assert response.text == "second read"
+    assert gateway.stats()["bypasses"] == 1
+
+    result = service._gemini_vision_ocr("a.png", encoded=encoded())
+    assert result["full_text"] == "second read"
+    assert service.gemini_client.models.calls == 2
+
+
+def test_disabled_cache_calls_gemini_every_time(monkeypatch):
+    gateway = LLMGateway()
+    monkeypatch.setattr(ocr_service, "get_llm_gateway", lambda: gateway)
+    service = make_service("Millet Mart")
+
+    service._gemini_vision_ocr("a.png", encoded=encoded())
+    service._gemini_vision_ocr("a.png", encoded=encoded())
+    assert service.gemini_client.models.calls == 2
+    assert gateway.stats() == {"enabled": False}
+
+
+def test_fused_and_batched_calls_use_the_cache(gateway):
+    payload = {"raw_text": "text", "structured_fields": FIELDS}
+    service = make_service(json.dumps(payload))
+    assert service._gemini_fused_image(encoded())[1] is None
+    assert service._gemini_fused_image(encoded())[0]["structured_data"] == FIELDS
+
+    pages = [
+        {"page": number, "data": b"page %d" % number, "mime_type": "image/webp"}
+        for number in (1, 2)
+    ]
+    service.gemini_client.models.text = "=== PAGE 1 ===\none\n=== PAGE 2 ===\ntwo"
+    service._gemini_vision_ocr_batch(pages)
+    assert service._gemini_vision_ocr_batch(pages)[2]["full_text"] == "two"
+
+    assert service.gemini_client.models.calls == 2
+    assert gateway.stats()["hits"] == 2
+
+
+def test_async_vision_call_uses_the_cache(gateway):
+    service = make_service("Millet Mart")
+
+    async def read_twice():
+        first = await service._gemini_vision_ocr_async(encoded())
+        second = await service._gemini_vision_ocr_async(encoded())
+        return first, second
+
+    first, second = asyncio.run(read_twice())
+    assert first["full_text"] == second["full_text"] == "Millet Mart"
+    assert service.gemini_client.aio.models.calls == 1
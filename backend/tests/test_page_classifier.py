@@ -0,0 +1,85 @@
+"""
+Tests for utils.page_classifier ink detection on synthetic pages
+"""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from utils.page_classifier import (
+    analyze_page,
+    estimate_line_height,
+    ink_coverage,
+    ink_levels,
+    ink_mask,
+    intensity_histogram,
+)
+
+HEIGHT, WIDTH = 776, 600
+
+
+def paper(level=0.92, noise=0.02, seed=0):
+    rng = np.random.default_rng(seed)
+    page = level + rng.normal(0.0, noise, (HEIGHT, WIDTH))
+    return np.clip(page, 0.0, 1.0).astype(np.float32)
+
+
+def write_lines(page, lines, line_height=8, share=0.8, ink=0.1, top=60, gap=30):
+    """Dark strokes in ``lines`` text lines covering ``share`` of the width"""
+    page = page.copy()
+    for line in range(lines):
+        y = top + line * (line_height + gap)
+        for x in range(20, int(20 + (WIDTH - 40) * share), 12):
+            page[y : y + line_height, x : x + 7] = ink
+    return page
+
+
+def test_blank_page_has_no_ink():
+    assert ink_coverage(paper()) == 0.0
+
+
+def test_flat_page_has_no_ink():
+    page = np.full((HEIGHT, WIDTH), 0.5, dtype=np.float32)
+    assert ink_levels(intensity_histogram(page))[1] is None
+    assert not ink_mask(page).any()
+
+
+@pytest.mark.parametrize("share", [0.1, 0.3, 0.8])
+def test_single_handwritten_line_is_not_blank(share):
+    # One short line covers well under 1% of the page
+    page = write_lines(paper(), lines=1, share=share)
+    expected = float((page < 0.5).mean())
+    assert expected < 0.01
+    assert ink_coverage(page) == pytest.approx(expected, rel=0.05)
+
+
+def test_signature_on_scanned_form_is_not_blank():
+    page = paper(level=0.85, noise=0.03)
+    page[700:706, 380:520] = 0.25  # short signature stroke, ~0.2% of the page
+    assert 0.001 < ink_coverage(page) < 0.003
+
+
+def test_faint_pencil_is_found_against_paper():
+    page = write_lines(paper(), lines=3, ink=0.6)
+    assert ink_coverage(page) > 0.005
+
+
+def test_dust_specks_do_not_count_as_ink():
+    page = paper()
+    page[10, 10] = page[400, 300] = 0.0
+    assert ink_coverage(page) == 0.0
+
+
+def test_dense_page_threshold_between_paper_and_ink():
+    page = write_lines(paper(), lines=15)
+    paper_level, ink_level = ink_levels(intensity_histogram(page))
+    assert paper_level == pytest.approx(0.92, abs=0.02)
+    assert ink_level == pytest.approx(0.1, abs=0.02)
+    assert ink_mask(page).mean() == pytest.approx((page < 0.5).mean(), rel=0.01)
+
+
+def test_sparse_page_line_height_and_analysis():
+    page = write_lines(paper(), lines=1, share=0.3)
+    image = Image.fromarray((page * 255).astype(np.uint8))
+    assert estimate_line_height(image) == pytest.approx(8, abs=1)
+    assert analyze_page(image)["ink_coverage"] > 0.0
@@ -0,0 +1,169 @@
+"""
+Tests for progressive PDF extraction (page OCR and field extraction stubbed)
+and page range parsing
+"""
+
+import pytest
+from flask import Flask
+
+from services import ocr_service
+from services.ocr_service import OCRService
+from utils.validators import parse_page_range
+
+PAGES = {
+    1: "Entrepreneur_Name: Asha Devi\nBusiness_Name: Millet Mart",
+    2: "Main_Product_Service: Millet snacks",
+    3: "Loan_Requirement_First_Month_INR: 50000",
+    4: "Key_USP: Organic",
+}
+
+
+class StubPDFProcessor:
+    def __init__(self, poppler_path=None):
+        pass
+
+    def validate_poppler_installation(self):
+        return True
+
+    def extract_text_layer(self, pdf_path):
+        return [""] * len(PAGES)  # scanned: every page needs OCR
+
+    def has_usable_text_layer(self, text, min_chars):
+        return False
+
+
+class StubOCRService(OCRService):
+    def __init__(self, confidence):
+        super().__init__(gemini_client=object(), vision_client=object())
+        self.confidence = confidence
+        self.read = []
+
+    def _ocr_pdf_pages(
+        self,
+        pdf_processor,
+        pdf_path,
+        page_numbers,
+        text_layers,
+        ocr_page_numbers,
+        document,
+        fused,
+        on_page=None,
+    ):
+        for number in page_numbers:
+            self.read.append(number)
+            document["text_parts"].append(PAGES[number])
+            document["page_details"].append(
+                {
+                    "page": number,
+                    "path": "ocr",
+                    "confidence": self.confidence.get(number, 0.95),
+                }
+            )
+        return None, None
+
+    def extract_structured_data(self, raw_text, use_cache=True):
+        fields = {}
+        for line in raw_text.splitlines():
+            name, _, value = line.partition(": ")
+            if value:
+                fields[name] = value
+        return fields
+
+
+@pytest.fixture
+def extract(monkeypatch):
+    monkeypatch.setattr(ocr_service, "PDFProcessor", StubPDFProcessor)
+    app = Flask(__name__)
+    app.config.update(
+        PDF_PROGRESSIVE_CHUNK_PAGES=1,
+        PDF_EARLY_STOP_MIN_CONFIDENCE=0.7,
+        OCR_IMAGE_CACHE_ENABLED=False,
+    )
+
+    def run(early_stop_fields=(), confidence=None, **kwargs):
+        app.config["PDF_EARLY_STOP_FIELDS"] = list(early_stop_fields)
+        with app.app_context():
+            service = StubOCRService(confidence or {})
+            result = service.extract_text_from_pdf(
+                "plan.pdf", progressive=True, **kwargs
+            )
+        return service, result
+
+    return run
+
+
+def test_stops_once_required_fields_are_found(extract):
+    service, result = extract()
+
+    assert service.read == [1, 2]
+    assert result["stopped_after_page"] == 2
+    assert result["pages_not_processed"] == [3, 4]
+    assert result["structured_data"] == {
+        "Entrepreneur_Name": "Asha Devi",
+        "Business_Name": "Millet Mart",
+        "Main_Product_Service": "Millet snacks",
+    }
+    assert result["field_pages"]["Main_Product_Service"] == [2]
+
+
+def test_early_stop_fields_extend_the_target(extract):
+    service, result = extract(["Loan_Requirement_First_Month_INR"])
+
+    assert service.read == [1, 2, 3]
+    assert result["stopped_after_page"] == 3
+    assert result["structured_data"]["Loan_Requirement_First_Month_INR"] == "50000"
+
+
+def test_fields_from_unconfident_pages_do_not_stop_reading(extract):
+    service, result = extract(confidence={2: 0.5})
+
+    # Page 2's product is used but not trusted, and no later page confirms it
+    assert service.read == [1, 2, 3, 4]
+    assert result["stopped_after_page"] is None
+    assert result["pages_not_processed"] == []
+    assert result["structured_data"]["Main_Product_Service"] == "Millet snacks"
+    assert "Main_Product_Service" not in result["field_pages"]
+
+
+def test_reading_the_last_page_is_not_an_early_stop(extract):
+    service, result = extract(pages=[1, 2])
+
+    assert service.read == [1, 2]
+    assert result["stopped_after_page"] is None
+
+
+def test_pages_outside_the_document_are_rejected(extract):
+    service, result = extract(pages=[7, 9])
+
+    assert result == {"error": "No requested pages within the document (4 pages)"}
+    assert service.read == []
+
+
+# Page ranges
+
+
+@pytest.mark.parametrize(
+    "spec,pages",
+    [
+        ("3", [3]),
+        ("1-3,5", [1, 2, 3, 5]),
+        (" 5 , 1 - 2 ,2", [1, 2, 5]),
+        ("2-2,", [2]),
+    ],
+)
+def test_parse_page_range(spec, pages):
+    assert parse_page_range(spec) == pages
+
+
+@pytest.mark.parametrize(
+    "spec", ["0", "3-1", "a", "1-", "-2", "1;2", "2.5", "1-1001", "", " , "]
+)
+def test_parse_page_range_rejects_bad_ranges(spec):
+    with pytest.raises(ValueError):
+        parse_page_range(spec)
+
+
+def test_parse_page_range_limit():
+    assert parse_page_range("1-10", max_pages=10)[-1] == 10
+    with pytest.raises(ValueError):
+        parse_page_range("11", max_pages=10)
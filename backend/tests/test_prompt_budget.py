@@ -0,0 +1,99 @@
+"""
+Tests for utils.prompt_budget context compaction and budget enforcement
+"""
+
+from utils.prompt_budget import (
+    PromptBudget,
+    PromptSection,
+    compact_json,
+    context_strings,
+    estimate_tokens,
+    prune_context,
+    shorten,
+)
+
+
+def test_estimate_tokens_counts_non_ascii_denser():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("a" * 400) == 101
+    assert estimate_tokens("क" * 400) == 201
+
+
+def test_prune_context_drops_empty_and_placeholders():
+    value = {
+        "name": " Millet Co ",
+        "pricing": "Not specified",
+        "team": [],
+        "market": {"size": "N/A", "segment": None},
+        "channels": ["retail", "", "unknown"],
+        "employees": 0,
+    }
+    assert prune_context(value) == {
+        "name": "Millet Co",
+        "channels": ["retail"],
+        "employees": 0,
+    }
+    assert prune_context({"pricing": "n/a"}) is None
+
+
+def test_compact_json_skips_values_already_seen():
+    profile = {"problem": "Farmers lack storage"}
+    ocr = {"problem": "farmers lack storage", "idea": "Cold rooms"}
+
+    assert compact_json(ocr, seen=context_strings(profile)) == '{"idea":"Cold rooms"}'
+    assert compact_json({}) == "{}"
+
+
+def test_shorten_keeps_head_and_tail():
+    text = "HEAD " + "x" * 8000 + " TAIL"
+    short = shorten(text, 500)
+
+    assert short.startswith("HEAD")
+    assert short.endswith("TAIL")
+    assert "characters omitted" in short
+    assert estimate_tokens(short) <= 520
+    assert shorten("brief", 500) == "brief"
+
+
+def test_render_within_budget_is_untouched():
+    prompt, stats = PromptBudget(1000).render(
+        """
+        Idea: {idea}
+        Language: {language}
+        """,
+        [PromptSection("idea", "Cold rooms for farmers")],
+        language="hi-IN",
+    )
+    assert prompt == "Idea: Cold rooms for farmers\nLanguage: hi-IN"
+    assert stats["truncated"] == []
+    assert stats["budget"] == 1000
+
+
+def test_render_shortens_least_important_first():
+    sections = [
+        PromptSection("profile", "p" * 2000, priority=0),
+        PromptSection("ocr", "o" * 2000, priority=1),
+        PromptSection("transcript", "t" * 20000, priority=2, min_tokens=100),
+    ]
+    prompt, stats = PromptBudget(1500).render(
+        "{profile}\n{ocr}\n{transcript}", sections
+    )
+
+    assert stats["truncated"] == ["transcript"]
+    assert stats["input_tokens"] <= 1500 + 50
+    assert "p" * 2000 in prompt and "o" * 2000 in prompt
+
+
+def test_render_respects_min_tokens_and_counts_system_instruction():
+    sections = [
+        PromptSection("ocr", "o" * 4000, priority=1, min_tokens=300),
+        PromptSection("transcript", "t" * 4000, priority=2, min_tokens=300),
+    ]
+    _, stats = PromptBudget(600).render(
+        "{ocr}\n{transcript}", sections, system_instruction="s" * 800
+    )
+
+    assert stats["truncated"] == ["transcript", "ocr"]
+    # Both sections stop at their floor even though the budget is still exceeded
+    assert stats["input_tokens"] > 600
+    assert stats["input_tokens"] < 201 + 2 * 300 + 60
@@ -0,0 +1,45 @@
+"""
+Tests for utils.raster_pool page rendering (poppler replaced by synthetic pages)
+"""
+
+import io
+
+import pytest
+from PIL import Image
+
+from utils import raster_pool
+from utils.ocr_image_encoder import OCRImageSettings
+
+PAGE_SIZE = (3400, 4400)  # US Letter at 400 dpi
+
+
+@pytest.fixture
+def render(monkeypatch):
+    def fake_convert(pdf_path, first_page, last_page, **kwargs):
+        pages = range(first_page, last_page + 1)
+        return [Image.new("RGB", PAGE_SIZE, "white") for _ in pages]
+
+    def run(text_style, classify_style=True):
+        monkeypatch.setattr(raster_pool, "convert_from_path", fake_convert)
+        monkeypatch.setattr(raster_pool, "classify_text_style", lambda page: text_style)
+        return raster_pool.render_pages_task(
+            "doc.pdf", 1, 2, 400, None, 1, OCRImageSettings(), classify_style
+        )
+
+    return run
+
+
+def test_printed_pages_keep_full_resolution_for_tesseract(render):
+    pages = render("printed")
+
+    assert [page["page"] for page in pages] == [1, 2]
+    for page in pages:
+        assert max(page["encoding"]["size"]) <= OCRImageSettings.max_dimension
+        local = Image.open(io.BytesIO(page["local_ocr_data"]))
+        assert local.size == PAGE_SIZE
+        assert local.mode == "L"
+
+
+def test_pages_for_gemini_skip_the_full_resolution_copy(render):
+    assert all(page["local_ocr_data"] is None for page in render("handwritten"))
+    assert all(page["local_ocr_data"] is None for page in render(None, False))
@@ -0,0 +1,131 @@
+"""
+Tests for SpeechService chunk assembly and speaker turns (canned Speech-to-Text
+responses in place of the API)
+"""
+
+import wave
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from services.speech_service import CHUNK_LENGTH_MS, SpeechService
+from services.transcription_engines import TranscriptionPolicy
+
+CHUNK_SECONDS = CHUNK_LENGTH_MS / 1000
+
+
+def word(text, speaker, start, end):
+    return SimpleNamespace(
+        word=text,
+        speaker_tag=speaker,
+        start_time=timedelta(seconds=start),
+        end_time=timedelta(seconds=end),
+        confidence=0.9,
+    )
+
+
+def response(*words):
+    words = list(words)
+    transcript = " ".join(w.word for w in words)
+    alternative = SimpleNamespace(transcript=transcript, words=words)
+    return SimpleNamespace(results=[SimpleNamespace(alternatives=[alternative])])
+
+
+# Chunk 1 ends mid-sentence with speaker 2; chunk 2 starts with the same voice
+CHUNK_1 = response(
+    word("we", 1, 0.0, 0.3),
+    word("sell", 1, 0.4, 0.8),
+    word("how", 2, 48.0, 48.4),
+    word("much", 2, 48.5, 49.9),
+)
+CHUNK_2 = response(
+    word("per", 1, 0.1, 0.4),
+    word("month", 1, 0.5, 1.0),
+    word("thirty", 2, 2.0, 2.5),
+)
+
+
+@pytest.fixture
+def service():
+    return SpeechService(
+        client=object(), policy=TranscriptionPolicy(engine="google_speech")
+    )
+
+
+def test_speaker_turns_group_consecutive_words(service):
+    turns = service.build_speaker_turns(CHUNK_1, time_offset=10.0)
+
+    assert [(t["speaker"], t["text"], t["word_count"]) for t in turns] == [
+        (1, "we sell", 2),
+        (2, "how much", 2),
+    ]
+    assert (turns[1]["start"], turns[1]["end"]) == (58.0, 59.9)
+
+
+def test_chunks_keep_absolute_times_and_order(service):
+    transcript, turns, index = service.assemble_chunk_responses([CHUNK_1, CHUNK_2])
+
+    # Speaker tags are per request, so turns never merge across a boundary
+    assert [(t["speaker"], t["start"], t["end"]) for t in turns] == [
+        (1, 0.0, 0.8),
+        (2, 48.0, 49.9),
+        (1, CHUNK_SECONDS + 0.1, CHUNK_SECONDS + 1.0),
+        (2, CHUNK_SECONDS + 2.0, CHUNK_SECONDS + 2.5),
+    ]
+    assert transcript == (
+        "--- Chunk 1 ---\nSpeaker 1: we sell\n\nSpeaker 2: how much"
+        "\n\n--- Chunk 2 ---\nSpeaker 1: per month\n\nSpeaker 2: thirty"
+    )
+    assert index.text == "we sell how much per month thirty"
+    assert list(index.starts) == sorted(index.starts)
+    assert index.find("much per")["start_time"] == 48.5
+    assert index.find("much per")["end_time"] == CHUNK_SECONDS + 0.4
+
+
+def test_failed_chunk_is_skipped_without_shifting_later_chunks(service):
+    transcript, turns, index = service.assemble_chunk_responses(
+        [None, CHUNK_2, SimpleNamespace(results=[])]
+    )
+
+    assert transcript == (
+        "--- Chunk 2 ---\nSpeaker 1: per month\n\nSpeaker 2: thirty"
+        "\n\n--- Chunk 3 ---\nNo speech detected in audio."
+    )
+    assert turns[0]["start"] == CHUNK_SECONDS + 0.1
+    assert len(index) == 3
+
+
+class CannedSpeechClient:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = 0
+
+    def recognize(self, config, audio):
+        self.requests += 1
+        return self.responses.pop(0)
+
+
+def write_wav(path, seconds, rate=8000):
+    with wave.open(str(path), "wb") as audio:
+        audio.setnchannels(1)
+        audio.setsampwidth(2)
+        audio.setframerate(rate)
+        audio.writeframes(b"\x00\x00" * int(rate * seconds))
+    return str(path)
+
+
+def test_transcribe_audio_merges_chunks_of_long_recordings(tmp_path):
+    client = CannedSpeechClient([CHUNK_1, CHUNK_2])
+    service = SpeechService(
+        client=client, policy=TranscriptionPolicy(engine="google_speech")
+    )
+    result = service.transcribe_audio(write_wav(tmp_path / "pitch.wav", 70))
+
+    assert client.requests == 2
+    assert result["engine"] == "google_speech"
+    assert result["processing_method"] == "chunked"
+    assert result["duration_seconds"] == 70
+    assert len(result["speaker_turns"]) == 4
+    assert result["speaker_turns"][-1]["end"] == CHUNK_SECONDS + 2.5
+    assert result["full_transcript"].startswith("--- Chunk 1 ---\nSpeaker 1: we sell")
@@ -0,0 +1,153 @@
+"""
+Tests for schema checks and merging of structured fields in services.ocr_service
+"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from services import ocr_service
+from services.llm_gateway import LLMGateway
+from services.ocr_service import (
+    OCRService,
+    is_filled_field,
+    merge_structured_fields,
+    structured_field_violations,
+)
+
+VALID = {
+    "Entrepreneur_Name": "Asha Devi",
+    "Business_Name": "Millet Mart",
+    "Main_Product_Service": "Millet snacks",
+    "Phone_Number": "N/A",
+    "Loan_Requirement_First_Month_INR": 50000,
+}
+
+
+# Schema violations
+
+
+def test_valid_fields_have_no_violations():
+    assert structured_field_violations(VALID) == []
+    assert structured_field_violations(
+        dict(VALID, Loan_Requirement_First_Month_INR=None)
+    ) == []
+
+
+def test_non_object_is_a_violation():
+    assert structured_field_violations(["Asha"]) == [
+        "structured_fields is not an object"
+    ]
+    assert structured_field_violations(None) == ["structured_fields is not an object"]
+
+
+@pytest.mark.parametrize("value", [None, "", "   ", 42])
+def test_required_fields_must_be_non_empty_strings(value):
+    fields = dict(VALID, Business_Name=value)
+    assert "missing required field Business_Name" in structured_field_violations(
+        fields
+    )
+
+
+def test_missing_required_field():
+    fields = {k: v for k, v in VALID.items() if k != "Entrepreneur_Name"}
+    assert structured_field_violations(fields) == [
+        "missing required field Entrepreneur_Name"
+    ]
+
+
+@pytest.mark.parametrize("value", ["50000", 50000.0, True])
+def test_integer_fields_reject_other_types(value):
+    fields = dict(VALID, Loan_Requirement_First_Month_INR=value)
+    assert structured_field_violations(fields) == [
+        "Loan_Requirement_First_Month_INR is not an integer"
+    ]
+
+
+def test_string_fields_reject_other_types_and_unknown_fields_are_flagged():
+    fields = dict(VALID, Phone_Number=9876543210, Shop_Size="10x10")
+    assert structured_field_violations(fields) == [
+        "Phone_Number is not a string",
+        "unexpected field Shop_Size",
+    ]
+
+
+# Merging
+
+
+@pytest.mark.parametrize(
+    "value,filled",
+    [("Asha", True), (0, True), ("N/A", False), (" none ", False), ("", False)],
+)
+def test_is_filled_field(value, filled):
+    assert is_filled_field(value) is filled
+
+
+def test_placeholders_are_not_filled_values():
+    assert not is_filled_field(None)
+    assert not is_filled_field(False)
+    assert not is_filled_field("Not Specified")
+
+
+def test_merge_keeps_values_found_on_earlier_pages():
+    merged = merge_structured_fields(
+        {"Business_Name": "Millet Mart"}, {"Business_Name": "Other Mart"}
+    )
+    assert merged == {"Business_Name": "Millet Mart"}
+
+
+def test_merge_fills_missing_and_placeholder_fields():
+    merged = merge_structured_fields(
+        {"Business_Name": "Millet Mart", "Phone_Number": "N/A"},
+        {"Phone_Number": "98765 43210", "Key_USP": "Organic"},
+    )
+    assert merged == {
+        "Business_Name": "Millet Mart",
+        "Phone_Number": "98765 43210",
+        "Key_USP": "Organic",
+    }
+
+
+def test_merge_never_replaces_with_a_placeholder():
+    accumulated = {"Phone_Number": "unknown"}
+    assert merge_structured_fields(accumulated, {"Phone_Number": "N/A"}) == {
+        "Phone_Number": "unknown"
+    }
+    assert accumulated == {"Phone_Number": "unknown"}
+
+
+# Fused extraction falls back on schema violations
+
+
+@pytest.fixture(autouse=True)
+def uncached_gateway(monkeypatch):
+    # Canned responses repeat for identical requests; keep them out of the cache
+    monkeypatch.setattr(ocr_service, "get_llm_gateway", lambda: LLMGateway())
+
+
+def fused_service(payload):
+    models = SimpleNamespace(
+        generate_content=lambda **kwargs: SimpleNamespace(text=json.dumps(payload))
+    )
+    client = SimpleNamespace(models=models)
+    return OCRService(gemini_client=client, vision_client=object())
+
+
+ENCODED = (b"image", "image/webp", {"bytes": 5})
+
+
+def test_fused_image_accepts_valid_output():
+    service = fused_service({"raw_text": "Millet Mart", "structured_fields": VALID})
+    result, reason = service._gemini_fused_image(ENCODED)
+    assert reason is None
+    assert result["structured_data"] == VALID
+
+
+def test_fused_image_rejects_schema_violations():
+    fields = dict(VALID, Loan_Requirement_First_Month_INR="fifty thousand")
+    service = fused_service({"raw_text": "Millet Mart", "structured_fields": fields})
+    assert service._gemini_fused_image(ENCODED) == (
+        None,
+        "Loan_Requirement_First_Month_INR is not an integer",
+    )
@@ -0,0 +1,120 @@
+"""
+Tests for the Supabase token verification cache and token revocation in
+services.user_service (Supabase and MongoDB stubbed)
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from services import user_service
+from services.user_service import UserService
+from utils.cache_backend import MemoryTier, TwoTierCache
+
+TOKEN = "header.payload.signature"
+USER = {"supabase_user_id": "u-1", "email": "asha@example.com"}
+
+
+class StubAdmin:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.signed_out = []
+
+    def sign_out(self, jwt, scope="global"):
+        if self.fail:
+            raise RuntimeError("Supabase unavailable")
+        self.signed_out.append(jwt)
+
+
+@pytest.fixture
+def workers(monkeypatch):
+    """Two workers, each with its own local tier in front of one shared tier"""
+    shared = MemoryTier()
+    caches = [TwoTierCache(MemoryTier(), shared), TwoTierCache(MemoryTier(), shared)]
+    current = {"cache": caches[0]}
+    monkeypatch.setattr(user_service, "get_shared_cache", lambda: current["cache"])
+    monkeypatch.setattr(UserService, "_init_mongo_connection", lambda self: None)
+    monkeypatch.setattr(UserService, "_init_supabase_connection", lambda self: None)
+    app = Flask(__name__)
+    app.config["AUTH_TOKEN_CACHE_SECONDS"] = 60
+
+    def on(worker, admin=None):
+        current["cache"] = caches[worker]
+        with app.app_context():
+            service = UserService()
+        service.calls = 0
+        service._supabase_client = SimpleNamespace(
+            auth=SimpleNamespace(admin=admin or StubAdmin())
+        )
+
+        def verify_with_supabase(token):
+            service.calls += 1
+            return dict(USER)
+
+        service._verify_access_token_with_supabase = verify_with_supabase
+        return app, service
+
+    return on
+
+
+def verify(app, service, token=TOKEN):
+    with app.app_context():
+        return service.verify_access_token(token)
+
+
+def test_verification_is_cached_across_workers(workers):
+    app, first = workers(0)
+    assert verify(app, first) == USER
+    app, second = workers(1)
+    assert verify(app, second) == USER
+
+    assert (first.calls, second.calls) == (1, 0)
+
+
+def test_revoked_token_is_rejected_by_every_worker(workers):
+    admin = StubAdmin()
+    app, first = workers(0, admin)
+    verify(app, first)
+    app, second = workers(1)
+    verify(app, second)  # now cached in worker 1's local tier too
+
+    app, first = workers(0, admin)
+    with app.app_context():
+        assert first.revoke_access_token(TOKEN) is True
+    assert admin.signed_out == [TOKEN]
+
+    assert verify(app, first) is None
+    app, second = workers(1)
+    assert verify(app, second) is None
+    assert second.calls == 0  # rejected without asking Supabase
+
+
+def test_revocation_holds_when_supabase_sign_out_fails(workers):
+    app, service = workers(0, StubAdmin(fail=True))
+    verify(app, service)
+
+    with app.app_context():
+        assert service.revoke_access_token(TOKEN) is False
+    assert verify(app, service) is None
+
+
+def test_revocation_is_per_token(workers):
+    app, service = workers(0)
+    with app.app_context():
+        service.revoke_access_token(TOKEN)
+
+    assert verify(app, service, "other.token.value") == USER
+
+
+def test_disabled_cache_still_checks_revocation(workers):
+    app, service = workers(0)
+    app.config["AUTH_TOKEN_CACHE_SECONDS"] = 0
+    verify(app, service)
+    verify(app, service)
+    assert service.calls == 2
+
+    with app.app_context():
+        service.revoke_access_token(TOKEN)
+    assert verify(app, service) is None
+    assert service.calls == 2
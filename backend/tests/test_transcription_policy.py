@@ -0,0 +1,167 @@
+"""
+Tests for TranscriptionPolicy engine selection and SpeechService escalation
+(stub engines in place of Vosk, Speech-to-Text and Gemini)
+"""
+
+import asyncio
+import wave
+
+import pytest
+
+from services.speech_service import SpeechService
+from services.transcription_engines import TranscriptionEngine, TranscriptionPolicy
+
+
+class StubEngine(TranscriptionEngine):
+    def __init__(self, name, confidence=0.9, available=True, fail=None):
+        self.name = name
+        self.confidence = confidence
+        self.available = available
+        self.fail = fail
+        self.calls = 0
+
+    def is_available(self, language_code=None):
+        return self.available
+
+    def transcribe(
+        self, audio_path, language_code, audio_segment=None, extract_structured=False
+    ):
+        self.calls += 1
+        if self.fail == "raise":
+            raise ConnectionError("offline")
+        if self.fail == "error":
+            return {"error": f"{self.name} failed"}
+        transcript = f"Speaker 1: from {self.name}"
+        return {
+            "transcriptions": [
+                {"transcript": transcript, "confidence": self.confidence}
+            ],
+            "full_transcript": transcript,
+        }
+
+
+def engines(**overrides):
+    stubs = {name: StubEngine(name) for name in ("local", "google_speech", "gemini")}
+    stubs.update(overrides)
+    return stubs
+
+
+POLICY = TranscriptionPolicy(
+    speech_language_codes=["en-IN", "hi-IN"],
+    gemini_min_seconds=60,
+    local_max_seconds=30,
+    local_min_confidence=0.75,
+)
+
+
+# Selection
+
+
+@pytest.mark.parametrize("seconds", [5, 30])
+def test_short_clips_stay_local(seconds):
+    assert POLICY.select(seconds, "en-IN", engines()) == "local"
+
+
+def test_clip_over_local_limit_leaves_local():
+    assert POLICY.select(31, "en-IN", engines()) == "google_speech"
+
+
+def test_local_is_skipped_without_a_model_for_the_language():
+    stubs = engines(local=StubEngine("local", available=False))
+    assert POLICY.select(5, "en-IN", stubs) == "google_speech"
+
+
+def test_unsupported_language_goes_to_gemini():
+    stubs = engines(local=StubEngine("local", available=False))
+    assert POLICY.select(10, "ta-IN", stubs) == "gemini"
+
+
+@pytest.mark.parametrize("seconds,expected", [(59, "google_speech"), (60, "gemini")])
+def test_long_clips_go_to_gemini(seconds, expected):
+    assert POLICY.select(seconds, "en-IN", engines()) == expected
+
+
+def test_forced_engine_wins_when_available():
+    policy = TranscriptionPolicy(engine="gemini")
+    assert policy.select(5, "en-IN", engines()) == "gemini"
+
+
+# Escalation
+
+
+def local_result(confidence):
+    return {"transcriptions": [{"transcript": "x", "confidence": confidence}]}
+
+
+def test_low_confidence_local_results_escalate():
+    assert POLICY.needs_escalation("local", local_result(0.74))
+    assert not POLICY.needs_escalation("local", local_result(0.75))
+    assert not POLICY.needs_escalation("gemini", local_result(0.1))
+
+
+def test_errors_escalate_except_from_speech_to_text():
+    assert POLICY.needs_escalation("local", {"error": "no model"})
+    assert POLICY.needs_escalation("gemini", {"error": "quota"})
+    assert not POLICY.needs_escalation("google_speech", {"error": "quota"})
+
+
+@pytest.fixture
+def clip(tmp_path):
+    path = tmp_path / "clip.wav"
+    with wave.open(str(path), "wb") as audio:
+        audio.setnchannels(1)
+        audio.setsampwidth(2)
+        audio.setframerate(16000)
+        audio.writeframes(b"\x00\x00" * 16000 * 5)
+    return str(path)
+
+
+def make_service(**overrides):
+    service = SpeechService(client=object(), policy=POLICY)
+    service.engines = engines(**overrides)
+    return service
+
+
+def test_low_confidence_local_transcript_is_replaced(clip):
+    service = make_service(local=StubEngine("local", confidence=0.5))
+    result = service.transcribe_audio(clip)
+
+    assert result["engine"] == "google_speech"
+    assert result["escalated_from"] == "local"
+    assert result["full_transcript"] == "Speaker 1: from google_speech"
+
+
+def test_confident_local_transcript_is_kept(clip):
+    service = make_service()
+    result = service.transcribe_audio(clip)
+
+    assert result["engine"] == "local"
+    assert service.engines["google_speech"].calls == 0
+
+
+@pytest.mark.parametrize("fail", ["raise", "error"])
+def test_cloud_failure_falls_back_to_local_transcript(clip, fail):
+    service = make_service(
+        local=StubEngine("local", confidence=0.5),
+        google_speech=StubEngine("google_speech", fail=fail),
+    )
+    result = service.transcribe_audio(clip)
+    assert result["engine"] == "local"
+    assert "escalated_from" not in result
+
+    result = asyncio.run(service.transcribe_audio_async(clip))
+    assert result["engine"] == "local"
+
+
+def test_pick_escalated_result():
+    service = make_service()
+    low = local_result(0.5)
+
+    assert service.pick_escalated_result("local", low, "gemini", {"error": "x"}) == (
+        "local",
+        low,
+    )
+    engine, result = service.pick_escalated_result(
+        "local", {"error": "no model"}, "gemini", {"error": "quota"}
+    )
+    assert (engine, result["escalated_from"]) == ("gemini", "local")
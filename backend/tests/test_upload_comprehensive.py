@@ -0,0 +1,84 @@
+"""
+Tests for the /api/upload/comprehensive analysis modes (services stubbed)
+"""
+
+import io
+
+import pytest
+from flask import Flask
+
+from routes import upload
+from routes.upload import upload_bp
+
+FIELDS = {"business_name": "Millet Mart", "loan_amount": "50000"}
+
+
+class StubOCRService:
+    async def extract_text_from_image_async(self, path):
+        return {"full_text": "Millet Mart\nLoan: 50000"}
+
+    async def extract_structured_data_async(self, text):
+        return dict(FIELDS)
+
+
+class StubSpeechService:
+    async def transcribe_audio_async(self, path, language_code):
+        return {"full_transcript": "We sell millets."}
+
+
+class StubBusinessAnalysisService:
+    async def extract_comprehensive_business_info_async(self, ocr, transcript, lang):
+        return {"business_name": ocr["business_name"]}
+
+    async def analyze_comprehensive_async(self, raw_text, transcript, lang):
+        return {"business_name": raw_text.splitlines()[0]}
+
+    def calculate_comprehensive_business_score(self, data):
+        return {"percentage": 70}
+
+    async def generate_comprehensive_business_case_async(self, data, score, *inputs):
+        return "legacy case"
+
+    async def generate_business_case_from_profile_async(self, data, score):
+        return "consolidated case"
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(upload, "OCRService", StubOCRService)
+    monkeypatch.setattr(upload, "SpeechService", StubSpeechService)
+    monkeypatch.setattr(
+        upload, "BusinessAnalysisService", StubBusinessAnalysisService
+    )
+    app = Flask(__name__)
+    app.config.update(UPLOAD_FOLDER=str(tmp_path), ANONYMOUS_DAILY_TOKEN_BUDGET=0)
+    app.register_blueprint(upload_bp, url_prefix="/api/upload")
+    return app.test_client()
+
+
+def post(client, **form):
+    form.update(
+        document=(io.BytesIO(b"image"), "card.png"),
+        audio=(io.BytesIO(b"audio"), "pitch.wav"),
+    )
+    response = client.post("/api/upload/comprehensive", data=form)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_legacy_is_the_default_and_returns_extracted_fields(client):
+    body = post(client)
+    assert body["analysis_mode"] == "legacy"
+    assert body["ocr_data"] == FIELDS
+    assert body["business_case"] == "legacy case"
+
+
+def test_both_modes_return_the_same_keys(client):
+    legacy = post(client, analysis_mode="legacy")
+    consolidated = post(client, analysis_mode="consolidated")
+
+    assert legacy.keys() == consolidated.keys()
+    assert consolidated["ocr_data"] == {"raw_text": "Millet Mart\nLoan: 50000"}
+    assert consolidated["comprehensive_business_data"] == {
+        "business_name": "Millet Mart"
+    }
@@ -0,0 +1,101 @@
+"""
+Tests for the daily token budgets enforced by middleware.usage.token_budget
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask, g, jsonify
+
+from middleware.usage import UsageMiddleware, budget_degraded, token_budget
+from utils import llm_usage
+from utils.llm_usage import UsageLedger, current_request_usage, utc_day
+
+
+@pytest.fixture
+def ledger(monkeypatch):
+    ledger = UsageLedger()
+    monkeypatch.setattr(llm_usage, "_ledger", ledger)
+    return ledger
+
+
+@pytest.fixture
+def app(ledger):
+    app = Flask(__name__)
+    app.config.update(
+        USER_DAILY_TOKEN_BUDGET=1000,
+        ANONYMOUS_DAILY_TOKEN_BUDGET=500,
+        USER_TOKEN_BUDGET_MODE="reject",
+    )
+    UsageMiddleware(app)
+
+    def as_user():
+        user_id = app.config.get("TEST_USER")
+        g.current_user = SimpleNamespace(supabase_user_id=user_id) if user_id else None
+
+    @app.route("/analyze")
+    @token_budget()
+    def analyze():
+        return jsonify({"user_id": current_request_usage().user_id})
+
+    @app.route("/business-case")
+    @token_budget(degradable=True)
+    def business_case():
+        return jsonify({"degraded": budget_degraded()})
+
+    app.before_request(as_user)
+    return app
+
+
+def spend(ledger, user_id, tokens):
+    ledger.record({"user_id": user_id, "day": utc_day(), "total_tokens": tokens})
+
+
+def test_user_under_budget_passes(app, ledger):
+    app.config["TEST_USER"] = "user-1"
+    spend(ledger, "user-1", 999)
+    assert app.test_client().get("/analyze").status_code == 200
+
+
+def test_user_over_budget_is_rejected(app, ledger):
+    app.config["TEST_USER"] = "user-1"
+    spend(ledger, "user-1", 1000)
+    response = app.test_client().get("/analyze")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+
+def test_anonymous_requests_are_budgeted_per_ip(app, ledger):
+    client = app.test_client()
+    response = client.get("/analyze", environ_base={"REMOTE_ADDR": "10.0.0.1"})
+    assert response.get_json()["user_id"] == "anonymous:10.0.0.1"
+
+    spend(ledger, "anonymous:10.0.0.1", 500)
+    blocked = client.get("/analyze", environ_base={"REMOTE_ADDR": "10.0.0.1"})
+    other = client.get("/analyze", environ_base={"REMOTE_ADDR": "10.0.0.2"})
+    assert blocked.status_code == 429
+    assert other.status_code == 200
+
+
+def test_anonymous_budget_can_be_disabled(app, ledger):
+    app.config["ANONYMOUS_DAILY_TOKEN_BUDGET"] = 0
+    spend(ledger, "anonymous:127.0.0.1", 10_000)
+    response = app.test_client().get("/analyze")
+    assert response.status_code == 200
+    assert response.get_json()["user_id"] is None
+
+
+def test_degrade_mode_runs_degradable_views(app, ledger):
+    app.config.update(TEST_USER="user-1", USER_TOKEN_BUDGET_MODE="degrade")
+    spend(ledger, "user-1", 1000)
+    client = app.test_client()
+    assert client.get("/business-case").get_json() == {"degraded": True}
+    assert client.get("/analyze").status_code == 429
+
+
+def test_ledger_is_opened_at_startup(monkeypatch):
+    monkeypatch.setattr(llm_usage, "_ledger", None)
+    app = Flask(__name__)
+    app.config["LLM_USAGE_STORE"] = "memory"
+    UsageMiddleware(app)
+    assert llm_usage._ledger is not None
@@ -0,0 +1,106 @@
+"""
+Tests for utils.word_index serialization and lookups
+"""
+
+import struct
+
+import pytest
+
+from utils.word_index import WordTimestampIndex
+
+WORDS = [("we", 0.0, 0.2), ("sell", 0.25, 0.6), ("millets", 0.7, 1.3)]
+
+
+def build(words=WORDS):
+    index = WordTimestampIndex()
+    for word, start, end in words:
+        index.append(word, start, end)
+    return index
+
+
+def test_serialized_layout_is_fixed_little_endian():
+    text = b"we sell millets"
+    expected = (
+        struct.pack("<4sBII", b"UAWI", 1, 3, len(text))
+        + struct.pack("<3f", 0.0, 0.25, 0.7)
+        + struct.pack("<3f", 0.2, 0.6, 1.3)
+        + struct.pack("<3I", 0, 3, 8)
+        + text
+    )
+    assert build().to_bytes() == expected
+
+
+def test_round_trip():
+    restored = WordTimestampIndex.from_bytes(build().to_bytes())
+
+    assert len(restored) == 3
+    assert restored.text == "we sell millets"
+    assert list(restored.offsets) == [0, 3, 8]
+    assert restored.seek(3, 7)["start_time"] == 0.25
+
+
+def test_rejects_foreign_and_truncated_data():
+    data = build().to_bytes()
+    with pytest.raises(ValueError):
+        WordTimestampIndex.from_bytes(b"XXXX" + data[4:])
+    with pytest.raises(ValueError):
+        WordTimestampIndex.from_bytes(data[:-3])
+
+
+def test_seek_maps_character_spans_to_times():
+    index = build()
+
+    assert index.seek(0) == {
+        "start_time": 0.0,
+        "end_time": 0.2,
+        "word_start": 0,
+        "word_end": 0,
+        "text": "we",
+    }
+    span = index.seek(3, 15)
+    assert (span["start_time"], span["end_time"]) == (0.25, 1.3)
+    assert span["text"] == "sell millets"
+
+
+def test_word_at_snaps_spaces_to_preceding_word():
+    index = build()
+    assert index.word_at(2) == 0
+    assert index.word_at(-5) == 0
+    assert index.word_at(100) == 2
+
+
+def test_find_is_case_and_whitespace_insensitive():
+    index = build()
+
+    assert index.find("SELL   Millets")["start_time"] == 0.25
+    assert index.find("rice") is None
+    assert index.find("   ") is None
+    assert WordTimestampIndex().find("we") is None
+
+
+def test_empty_index_cannot_seek():
+    with pytest.raises(ValueError):
+        WordTimestampIndex().seek(0)
+
+
+def test_find_maps_case_folded_matches_back_to_the_original_text():
+    # "İ" lower-cases to two characters and "ß" folds to "ss"
+    index = build([("İstanbul", 0.0, 0.5), ("straße", 0.6, 1.0), ("shop", 1.1, 1.4)])
+
+    match = index.find("straße shop")
+    assert (match["word_start"], match["word_end"]) == (1, 2)
+    assert match["text"] == "straße shop"
+    assert index.find("STRASSE")["start_time"] == 0.6
+    assert index.find("i̇stanbul")["text"] == "İstanbul"
+
+
+def test_words_maps_word_positions_to_times():
+    index = build()
+
+    span = index.words(1, 2)
+    assert (span["start_time"], span["end_time"]) == (0.25, 1.3)
+    assert span["text"] == "sell millets"
+    assert index.words(0)["text"] == "we"
+    for first, last in [(-1, 0), (2, 1), (0, 3)]:
+        with pytest.raises(ValueError):
+            index.words(first, last)
@@ -0,0 +1,563 @@
+"""
+Two-tier cache shared by the services across worker processes
+
+Tier one is a small in-process LRU; tier two is shared and persistent, either a
+SQLite file (single node, any number of workers) or a Redis server. Values are
+JSON-serialized so every process and tier reads the same bytes, and keys follow
+one schema: ``tua:v1:<namespace>:<sha256 of the key parts>``.
+
+Concurrent misses on the same key are coalesced: threads of one process wait on
+a per-key lock, and other processes wait on a short lease stored in the shared
+tier, so an expensive value (an LLM call, an OCR pass) is computed once.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+
+# Redis is optional; without it the shared tier is SQLite
+try:
+    import redis
+
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "tua"
+KEY_VERSION = "v1"  # bump when the layout of cached values changes
+
+
+def make_cache_key(namespace, *parts):
+    """Build a cache key; ``parts`` are any JSON-able values"""
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return f"{KEY_PREFIX}:{KEY_VERSION}:{namespace}:{digest}"
+
+
+def _encode_special(value):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, (bytes, bytearray)):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"{type(value).__name__} is not cacheable")
+
+
+def _decode_special(value):
+    if "__datetime__" in value and len(value) == 1:
+        return datetime.fromisoformat(value["__datetime__"])
+    if "__bytes__" in value and len(value) == 1:
+        return base64.b64decode(value["__bytes__"])
+    return value
+
+
+def serialize(value):
+    return json.dumps(
+        value, default=_encode_special, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+
+
+def deserialize(data):
+    return json.loads(data, object_hook=_decode_special)
+
+
+class MemoryTier:
+    """In-process LRU of serialized values with per-entry expiry"""
+
+    name = "memory"
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (data, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        entry = self.get_with_expiry(key)
+        return entry[0] if entry is not None else None
+
+    def get_with_expiry(self, key):
+        """Return ``(data, expires_at)``, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= time.time():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, data, ttl=None):
+        with self._lock:
+            self._entries[key] = (data, time.time() + ttl if ttl else None)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def add(self, key, data, ttl=None):
+        """Set only if absent (or expired); returns whether it was set"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.time()):
+                return False
+            self._entries[key] = (data, time.time() + ttl if ttl else None)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": self.name,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SQLiteTier:
+    """Persistent store in one SQLite file shared by all local worker processes
+
+    Uses WAL mode so readers never block the writer. Expired rows are removed
+    on read and by a periodic prune, which also evicts the least recently used
+    rows beyond ``max_entries``. Cached values include applicants' documents,
+    so the file is created readable by its owner only.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path, max_entries=100_000, prune_interval=500):
+        self.path = path
+        self.max_entries = max_entries
+        self.prune_interval = prune_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._create_private_file(path)
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+            "expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS cache_entries_accessed "
+            "ON cache_entries (accessed_at)"
+        )
+
+    @staticmethod
+    def _create_private_file(path):
+        """Create the database file (and its folder) owner-only before SQLite
+        opens it; SQLite gives its -wal and -shm files the same mode"""
+        if path == ":memory:":
+            return
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        os.close(os.open(path, os.O_CREAT | os.O_RDWR, 0o600))
+        os.chmod(path, 0o600)
+
+    def _connection(self):
+        # sqlite3 connections cannot be shared between threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        entry = self.get_with_expiry(key)
+        return entry[0] if entry is not None else None
+
+    def get_with_expiry(self, key):
+        """Return ``(data, expires_at)``, or None on a miss"""
+        connection = self._connection()
+        now = time.time()
+        row = connection.execute(
+            "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None and row[1] is not None and row[1] <= now:
+            connection.execute(
+                "DELETE FROM cache_entries WHERE key = ? AND expires_at <= ?",
+                (key, now),
+            )
+            with self._lock:
+                self.expirations += 1
+            row = None
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        connection.execute(
+            "UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key)
+        )
+        return bytes(row[0]), row[1]
+
+    def set(self, key, data, ttl=None):
+        now = time.time()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?)",
+            (key, data, now + ttl if ttl else None, now),
+        )
+        self._count_write()
+
+    def add(self, key, data, ttl=None):
+        now = time.time()
+        connection = self._connection()
+        connection.execute(
+            "DELETE FROM cache_entries WHERE key = ? AND expires_at <= ?", (key, now)
+        )
+        cursor = connection.execute(
+            "INSERT OR IGNORE INTO cache_entries VALUES (?, ?, ?, ?)",
+            (key, data, now + ttl if ttl else None, now),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key):
+        self._connection().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def clear(self):
+        self._connection().execute("DELETE FROM cache_entries")
+
+    def _count_write(self):
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.prune_interval == 0
+        if due:
+            self.prune()
+
+    def prune(self):
+        """Drop expired rows, then least recently used rows over the limit"""
+        connection = self._connection()
+        expired = connection.execute(
+            "DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),)
+        ).rowcount
+        count = connection.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+        evicted = 0
+        if count > self.max_entries:
+            evicted = connection.execute(
+                "DELETE FROM cache_entries WHERE key IN (SELECT key FROM "
+                "cache_entries ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            ).rowcount
+        with self._lock:
+            self.expirations += expired
+            self.evictions += evicted
+
+    def stats(self):
+        entries = self._connection().execute(
+            "SELECT COUNT(*) FROM cache_entries"
+        ).fetchone()[0]
+        with self._lock:
+            return {
+                "backend": self.name,
+                "path": self.path,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class RedisTier:
+    """Shared store on a Redis-protocol server (Redis, Valkey, KeyDB, ...)
+
+    Expiry and eviction are done by the server (configure ``maxmemory`` and an
+    LRU ``maxmemory-policy``); its counters are included in the stats.
+    """
+
+    name = "redis"
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        data = self.client.get(key)
+        self._count(data is not None)
+        return data
+
+    def get_with_expiry(self, key):
+        """Return ``(data, expires_at)``, or None on a miss"""
+        pipeline = self.client.pipeline()
+        pipeline.get(key)
+        pipeline.pttl(key)
+        data, remaining_ms = pipeline.execute()
+        self._count(data is not None)
+        if data is None:
+            return None
+        # PTTL is -1 for keys without expiry
+        expires_at = time.time() + remaining_ms / 1000 if remaining_ms >= 0 else None
+        return data, expires_at
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def set(self, key, data, ttl=None):
+        self.client.set(key, data, ex=int(ttl) if ttl else None)
+
+    def add(self, key, data, ttl=None):
+        return bool(self.client.set(key, data, ex=int(ttl) if ttl else None, nx=True))
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{KEY_PREFIX}:*"):
+            self.client.delete(key)
+
+    def stats(self):
+        info = self.client.info("stats")
+        with self._lock:
+            return {
+                "backend": self.name,
+                "entries": self.client.dbsize(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": info.get("evicted_keys", 0),
+                "expirations": info.get("expired_keys", 0),
+            }
+
+
+class TwoTierCache:
+    """Local LRU in front of an optional shared tier
+
+    Shared-tier failures are logged and treated as misses, so an unavailable
+    Redis or a locked SQLite file degrades to per-process caching.
+    """
+
+    def __init__(self, local, shared=None, local_ttl=300, lease_seconds=30):
+        self.local = local
+        self.shared = shared
+        self.local_ttl = local_ttl
+        self.lease_seconds = lease_seconds
+        self._key_locks = {}  # key -> [lock, users]
+        self._key_locks_guard = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.namespace_stats = {}  # namespace -> {"hits", "misses"}
+        self.coalesced = 0
+        self.lease_waits = 0
+        self.shared_errors = 0
+
+    def get(self, key, default=None):
+        data = self.local.get(key)
+        if data is None and self.shared is not None:
+            entry = self._shared_call("get_with_expiry", key)
+            if entry is not None:
+                data, expires_at = entry
+                self._promote(key, data, expires_at)
+        self._count(key, data is not None)
+        return default if data is None else deserialize(data)
+
+    def _promote(self, key, data, expires_at):
+        """Copy a shared-tier value into the local tier for no longer than the
+        shared copy has left, so short-lived values do not outlive their TTL"""
+        local_ttl = self.local_ttl
+        if expires_at is not None:
+            local_ttl = min(local_ttl, expires_at - time.time())
+        if local_ttl > 0:
+            self.local.set(key, data, local_ttl)
+
+    def set(self, key, value, ttl=None):
+        data = serialize(value)
+        local_ttl = min(ttl, self.local_ttl) if ttl else self.local_ttl
+        self.local.set(key, data, local_ttl)
+        if self.shared is not None:
+            self._shared_call("set", key, data, ttl)
+
+    def delete(self, key):
+        self.local.delete(key)
+        if self.shared is not None:
+            self._shared_call("delete", key)
+
+    @contextmanager
+    def single_flight(self, key):
+        """Hold while computing a missing value so concurrent callers wait
+
+        Threads of this process queue on a per-key lock; other processes are
+        held off by a lease in the shared tier until the value appears or the
+        lease expires. Callers re-check the cache after entering.
+        """
+        with self._key_locks_guard:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        contended = entry[0].locked()
+        entry[0].acquire()
+        lease_key = f"{key}:lease"
+        leased = False
+        try:
+            if contended:
+                with self._stats_lock:
+                    self.coalesced += 1
+            if self.shared is not None:
+                leased = self._shared_call("add", lease_key, b"1", self.lease_seconds)
+                # None means the shared tier failed; don't wait on it then
+                if leased is False:
+                    self._wait_for_value(key)
+            yield
+        finally:
+            if leased:
+                self._shared_call("delete", lease_key)
+            entry[0].release()
+            with self._key_locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._key_locks.pop(key, None)
+
+    def get_or_set(self, key, compute, ttl=None, cacheable=None):
+        """Return the cached value, computing and storing it once on a miss
+
+        Values for which ``cacheable(value)`` is false are returned but not
+        stored (e.g. error results).
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        with self.single_flight(key):
+            value = self.get(key, missing)
+            if value is not missing:
+                return value
+            value = compute()
+            if cacheable is None or cacheable(value):
+                self.set(key, value, ttl)
+            return value
+
+    def _wait_for_value(self, key):
+        with self._stats_lock:
+            self.lease_waits += 1
+        deadline = time.monotonic() + self.lease_seconds
+        delay = 0.05
+        while time.monotonic() < deadline:
+            if self._shared_call("get", key) is not None:
+                return
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+    def _shared_call(self, method, *args):
+        try:
+            return getattr(self.shared, method)(*args)
+        except Exception as e:
+            with self._stats_lock:
+                self.shared_errors += 1
+            logger.warning(f"Shared cache {method} failed: {str(e)}")
+            return None
+
+    def _count(self, key, hit):
+        parts = key.split(":")
+        namespace = parts[2] if len(parts) > 3 else "other"
+        with self._stats_lock:
+            counts = self.namespace_stats.setdefault(namespace, {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += 1
+
+    def stats(self):
+        shared = None
+        if self.shared is not None:
+            try:
+                shared = self.shared.stats()
+            except Exception as e:
+                shared = {"backend": self.shared.name, "error": str(e)}
+        with self._stats_lock:
+            return {
+                "local": self.local.stats(),
+                "shared": shared,
+                "namespaces": {
+                    namespace: dict(
+                        counts,
+                        hit_rate=counts["hits"] / (counts["hits"] + counts["misses"]),
+                    )
+                    for namespace, counts in self.namespace_stats.items()
+                },
+                "coalesced_waits": self.coalesced,
+                "lease_waits": self.lease_waits,
+                "shared_errors": self.shared_errors,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def build_cache(config):
+    """Create a TwoTierCache from CACHE_* settings"""
+    local = MemoryTier(config.get("CACHE_LOCAL_MAX_ENTRIES", 1024))
+    backend = (config.get("CACHE_BACKEND") or "memory").lower()
+
+    shared = None
+    try:
+        if backend == "redis":
+            if not HAS_REDIS:
+                raise RuntimeError("CACHE_BACKEND=redis requires `pip install redis`")
+            shared = RedisTier(config.get("CACHE_REDIS_URL", "redis://localhost:6379/0"))
+        elif backend == "sqlite":
+            shared = SQLiteTier(
+                config.get("CACHE_SQLITE_PATH"),
+                max_entries=config.get("CACHE_SHARED_MAX_ENTRIES", 100_000),
+            )
+    except Exception as e:
+        logger.error(f"Shared cache unavailable, using in-process cache only: {str(e)}")
+
+    return TwoTierCache(
+        local,
+        shared,
+        local_ttl=config.get("CACHE_LOCAL_TTL_SECONDS", 300),
+        lease_seconds=config.get("CACHE_LEASE_SECONDS", 30),
+    )
+
+
+def get_shared_cache(config=None):
+    """Return the process-wide cache, built from ``config`` on first use"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            if config is None:
+                from flask import current_app
+
+                config = current_app.config
+            _cache = build_cache(config)
+            logger.info(
+                "Cache tiers: memory + "
+                f"{_cache.shared.name if _cache.shared else 'none'}"
+            )
+        return _cache
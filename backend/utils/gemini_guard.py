@@ -0,0 +1,493 @@
+"""
+Process-wide protection around Gemini calls
+
+Every Gemini client the services create is wrapped so its requests pass through
+one ``GeminiGuard`` per process:
+
+- a concurrency limit shared by all request threads, adapted AIMD-style: it
+  grows by one slot per ``limit`` successes and halves (at most once a second)
+  when Gemini answers 429;
+- a token bucket per model capping requests per minute;
+- retries with exponential backoff and full jitter on 429, 5xx and timeouts;
+- a circuit breaker per model that fails fast after repeated upstream failures
+  and lets a single probe through once the cool-down has passed.
+
+Successful calls are recorded (tokens, latency, stage) by ``utils.llm_usage``.
+
+``GeminiGuard.acall`` applies the same limits to coroutines (``client.aio``
+and ``generate_content_async``) without blocking the event loop.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+
+from utils.llm_usage import record_llm_call
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling Gemini while a model's circuit is open"""
+
+
+class ConcurrencyTimeoutError(Exception):
+    """Raised when no Gemini call slot frees up in time"""
+
+
+def error_status(error):
+    """HTTP-style status of an SDK error (429, 503, ...), or None"""
+    # google.genai APIError and google.api_core exceptions both expose .code
+    for attribute in ("code", "status_code"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    if isinstance(error, TimeoutError) or "Timeout" in type(error).__name__:
+        return 504
+    if type(error).__name__ == "DeadlineExceeded":
+        return 504
+    return None
+
+
+class TokenBucket:
+    """Blocking token bucket refilled at ``rate_per_minute``"""
+
+    def __init__(self, rate_per_minute, burst=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst or max(1.0, rate_per_minute / 10))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        wait = self._take()
+        while wait:
+            time.sleep(wait)
+            wait = self._take()
+
+    async def acquire_async(self):
+        wait = self._take()
+        while wait:
+            await asyncio.sleep(wait)
+            wait = self._take()
+
+    def _take(self):
+        """Take a token, or return the seconds until one is available"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+
+class AdaptiveConcurrencyLimit:
+    """Semaphore whose size follows additive-increase/multiplicative-decrease"""
+
+    def __init__(self, initial, minimum, maximum, decrease_interval=1.0):
+        self.minimum = max(minimum, 1)
+        self.maximum = max(maximum, self.minimum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.decrease_interval = decrease_interval
+        self.in_flight = 0
+        self.decreases = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self, timeout=None):
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self.in_flight < int(self.limit), timeout
+            ):
+                raise ConcurrencyTimeoutError("Timed out waiting for a Gemini slot")
+            self.in_flight += 1
+
+    async def acquire_async(self, timeout=None, poll_interval=0.02):
+        """Coroutine version of ``acquire``; polls instead of blocking the loop"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._condition:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+            if deadline is not None and time.monotonic() >= deadline:
+                raise ConcurrencyTimeoutError("Timed out waiting for a Gemini slot")
+            await asyncio.sleep(poll_interval)
+
+    def release(self, outcome):
+        """``outcome`` is "success", "throttled" (429) or "error" """
+        with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if outcome == "throttled":
+                if now - self._last_decrease >= self.decrease_interval:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_decrease = now
+                    self.decreases += 1
+            elif outcome == "success":
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class CircuitBreaker:
+    """Closed -> open after ``failure_threshold`` consecutive upstream failures;
+    open -> half-open after ``reset_seconds``, where one probe decides"""
+
+    def __init__(self, failure_threshold=5, reset_seconds=30):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejections = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Admit a call or raise ``CircuitOpenError``; returns whether the call
+        is the half-open probe, which must end with ``end_probe``"""
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_seconds:
+                    self.rejections += 1
+                    raise CircuitOpenError("Gemini is unavailable (circuit open)")
+                self.state = "half_open"
+            if self.state == "half_open":
+                if self._probing:
+                    self.rejections += 1
+                    raise CircuitOpenError("Gemini is unavailable (probe in flight)")
+                self._probing = True
+                return True
+            return False
+
+    def end_probe(self):
+        """Let the next call probe if this one ended without an upstream answer
+        (no call slot in time, cancelled); a recorded outcome already did"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.error(
+                        f"Gemini circuit opened after {self.failures} failure(s)"
+                    )
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class GeminiGuard:
+    def __init__(
+        self,
+        max_concurrency=16,
+        min_concurrency=2,
+        requests_per_minute=None,
+        default_requests_per_minute=600,
+        max_retries=4,
+        backoff_base=1.0,
+        backoff_max=20.0,
+        failure_threshold=5,
+        reset_seconds=30,
+        acquire_timeout=120,
+    ):
+        self.concurrency = AdaptiveConcurrencyLimit(
+            max_concurrency, min_concurrency, max_concurrency
+        )
+        self.requests_per_minute = requests_per_minute or {}
+        self.default_requests_per_minute = default_requests_per_minute
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.acquire_timeout = acquire_timeout
+        self._buckets = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self.counters = {"calls": 0, "retries": 0, "throttled": 0, "failures": 0}
+
+    def call(self, model, fn):
+        """Run ``fn()`` (one Gemini request for ``model``) under the guard"""
+        breaker, bucket = self._for_model(model)
+        self._count("calls")
+        attempt = 0
+        while True:
+            probe = breaker.before_call()
+            try:
+                bucket.acquire()
+                self.concurrency.acquire(self.acquire_timeout)
+                outcome = "error"
+                try:
+                    started = time.perf_counter()
+                    result = fn()
+                    outcome = "success"
+                    breaker.record_success()
+                except Exception as e:
+                    outcome = self._record_error(model, breaker, e, attempt)
+                finally:
+                    self.concurrency.release(outcome)
+            finally:
+                if probe:
+                    breaker.end_probe()
+
+            if outcome == "success":
+                latency = time.perf_counter() - started
+                record_llm_call(model, result, latency, attempts=attempt + 1)
+                return result
+
+            attempt += 1
+            time.sleep(self._backoff(attempt))
+
+    async def acall(self, model, coro_fn):
+        """Await ``coro_fn()`` (one async Gemini request) under the guard"""
+        breaker, bucket = self._for_model(model)
+        self._count("calls")
+        attempt = 0
+        while True:
+            probe = breaker.before_call()
+            try:
+                await bucket.acquire_async()
+                await self.concurrency.acquire_async(self.acquire_timeout)
+                outcome = "error"
+                try:
+                    started = time.perf_counter()
+                    result = await coro_fn()
+                    outcome = "success"
+                    breaker.record_success()
+                except Exception as e:
+                    outcome = self._record_error(model, breaker, e, attempt)
+                finally:
+                    self.concurrency.release(outcome)
+            finally:
+                if probe:
+                    breaker.end_probe()
+
+            if outcome == "success":
+                latency = time.perf_counter() - started
+                record_llm_call(model, result, latency, attempts=attempt + 1)
+                return result
+
+            attempt += 1
+            await asyncio.sleep(self._backoff(attempt))
+
+    def _record_error(self, model, breaker, error, attempt):
+        """Classify a failed attempt: re-raise it, or return its outcome to retry"""
+        status = error_status(error)
+        if status not in RETRYABLE_STATUS:
+            # A bad request says nothing about upstream health: leave the
+            # breaker as it was (the caller releases a half-open probe slot)
+            raise error
+        outcome = "error"
+        if status == 429:
+            outcome = "throttled"
+            self._count("throttled")
+        breaker.record_failure()
+        if attempt >= self.max_retries:
+            self._count("failures")
+            raise error
+        logger.warning(
+            f"Gemini {model} call failed ({status}), retry "
+            f"{attempt + 1}/{self.max_retries}"
+        )
+        return outcome
+
+    def _backoff(self, attempt):
+        # Full jitter keeps retrying workers from synchronizing
+        self._count("retries")
+        return random.uniform(
+            0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        )
+
+    def _for_model(self, model):
+        with self._lock:
+            if model not in self._breakers:
+                self._breakers[model] = CircuitBreaker(
+                    self.failure_threshold, self.reset_seconds
+                )
+                self._buckets[model] = TokenBucket(
+                    self.requests_per_minute.get(
+                        model, self.default_requests_per_minute
+                    )
+                )
+            return self._breakers[model], self._buckets[model]
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self.counters,
+                "concurrency_limit": int(self.concurrency.limit),
+                "in_flight": self.concurrency.in_flight,
+                "concurrency_decreases": self.concurrency.decreases,
+                "circuits": {
+                    model: {
+                        "state": breaker.state,
+                        "failures": breaker.failures,
+                        "rejections": breaker.rejections,
+                    }
+                    for model, breaker in self._breakers.items()
+                },
+            }
+
+
+class _GuardedModels:
+    def __init__(self, models, guard):
+        self._models = models
+        self._guard = guard
+
+    def generate_content(self, *args, **kwargs):
+        model = kwargs.get("model", args[0] if args else "default")
+        return self._guard.call(
+            model, lambda: self._models.generate_content(*args, **kwargs)
+        )
+
+    def __getattr__(self, name):
+        return getattr(self._models, name)
+
+
+class _GuardedAsyncModels(_GuardedModels):
+    async def generate_content(self, *args, **kwargs):
+        model = kwargs.get("model", args[0] if args else "default")
+        return await self._guard.acall(
+            model, lambda: self._models.generate_content(*args, **kwargs)
+        )
+
+
+class _GuardedAsyncClient:
+    def __init__(self, aio, guard):
+        self._aio = aio
+        self.models = _GuardedAsyncModels(aio.models, guard)
+
+    def __getattr__(self, name):
+        return getattr(self._aio, name)
+
+
+class GuardedGeminiClient:
+    """``google.genai`` client whose ``models.generate_content`` is guarded,
+    both sync and on ``client.aio``"""
+
+    def __init__(self, client, guard):
+        self._client = client
+        self._guard = guard
+        self.models = _GuardedModels(client.models, guard)
+        self._aio = None
+
+    @property
+    def aio(self):
+        if self._aio is None:
+            self._aio = _GuardedAsyncClient(self._client.aio, self._guard)
+        return self._aio
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+class GuardedGenerativeModel:
+    """Legacy ``google.generativeai`` model with guarded ``generate_content``"""
+
+    def __init__(self, model, guard, timeout=None):
+        self._model = model
+        self._guard = guard
+        self._timeout = timeout
+
+    @property
+    def model_name(self):
+        return self._model.model_name
+
+    def generate_content(self, *args, **kwargs):
+        if self._timeout and "request_options" not in kwargs:
+            kwargs["request_options"] = {"timeout": self._timeout}
+        return self._guard.call(
+            self.model_name.split("/")[-1],
+            lambda: self._model.generate_content(*args, **kwargs),
+        )
+
+    async def generate_content_async(self, *args, **kwargs):
+        if self._timeout and "request_options" not in kwargs:
+            kwargs["request_options"] = {"timeout": self._timeout}
+        return await self._guard.acall(
+            self.model_name.split("/")[-1],
+            lambda: self._model.generate_content_async(*args, **kwargs),
+        )
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+_guard = None
+_guard_lock = threading.Lock()
+
+
+def get_gemini_guard(config=None):
+    """Return the process-wide guard, built from GEMINI_* settings on first use"""
+    global _guard
+    with _guard_lock:
+        if _guard is None:
+            if config is None:
+                from flask import current_app
+
+                config = current_app.config
+            _guard = GeminiGuard(
+                max_concurrency=config.get("GEMINI_MAX_CONCURRENCY", 16),
+                min_concurrency=config.get("GEMINI_MIN_CONCURRENCY", 2),
+                requests_per_minute=config.get("GEMINI_MODEL_RPM", {}),
+                default_requests_per_minute=config.get("GEMINI_DEFAULT_RPM", 600),
+                max_retries=config.get("GEMINI_MAX_RETRIES", 4),
+                backoff_base=config.get("GEMINI_BACKOFF_BASE_SECONDS", 1.0),
+                backoff_max=config.get("GEMINI_BACKOFF_MAX_SECONDS", 20.0),
+                failure_threshold=config.get("GEMINI_CIRCUIT_FAILURES", 5),
+                reset_seconds=config.get("GEMINI_CIRCUIT_RESET_SECONDS", 30),
+            )
+        return _guard
+
+
+def create_gemini_client(api_key, config=None):
+    """Create a guarded ``google.genai`` client with the configured timeout"""
+    from google import genai as gemini_sdk
+    from google.genai import types
+
+    if config is None:
+        from flask import current_app
+
+        config = current_app.config
+    timeout = config.get("GEMINI_TIMEOUT_SECONDS", 120)
+    client = gemini_sdk.Client(
+        api_key=api_key,
+        http_options=types.HttpOptions(timeout=int(timeout * 1000)),
+    )
+    return GuardedGeminiClient(client, get_gemini_guard(config))
+
+
+def create_generative_model(model_name, config=None):
+    """Create a guarded legacy ``GenerativeModel`` (genai.configure() first)"""
+    import google.generativeai as genai
+
+    if config is None:
+        from flask import current_app
+
+        config = current_app.config
+    return GuardedGenerativeModel(
+        genai.GenerativeModel(model_name),
+        get_gemini_guard(config),
+        timeout=config.get("GEMINI_TIMEOUT_SECONDS", 120),
+    )
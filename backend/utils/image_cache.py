@@ -0,0 +1,259 @@
+"""
+Perceptual-hash cache for OCR results
+
+Re-photographed or re-compressed uploads of the same page never share a byte
+hash, so results are keyed by a difference hash of a normalized thumbnail and
+looked up by Hamming distance in a BK-tree.
+
+Entries are scoped to an owner (the uploading user, or the upload's byte hash
+for anonymous requests) so one user's OCR text is never served for another
+user's image, however close the two hashes are.
+
+Near matches are only found within one process. With a shared cache tier
+(``utils.cache_backend``), results are also stored there by exact hash so other
+workers and restarts reuse them.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from utils.cache_backend import make_cache_key
+from utils.page_classifier import (
+    difference_hash,
+    hamming_distance,
+    ink_mask,
+    to_analysis_array,
+)
+
+logger = logging.getLogger(__name__)
+
+# 16x16 gradient grid = 256-bit hash
+HASH_SIZE = 16
+HASH_BITS = HASH_SIZE * HASH_SIZE
+
+
+def file_digest(path):
+    """SHA-256 of a file's bytes, the cache owner of anonymous uploads"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def normalized_image_hash(image):
+    """Hash an image after removing what differs between two photos of one page
+
+    The page is converted to grayscale, cropped to its ink bounding box (so
+    framing and margins do not matter) and contrast-stretched (so exposure does
+    not matter) before the difference hash is taken.
+    """
+    gray = to_analysis_array(image)
+    mask = ink_mask(gray)
+    if mask.any():
+        rows = np.flatnonzero(mask.any(axis=1))
+        cols = np.flatnonzero(mask.any(axis=0))
+        gray = gray[rows[0] : rows[-1] + 1, cols[0] : cols[-1] + 1]
+
+    thumbnail = ImageOps.autocontrast(
+        Image.fromarray((gray * 255).astype(np.uint8)), cutoff=1
+    )
+    return difference_hash(np.asarray(thumbnail, dtype=np.float32) / 255.0, HASH_SIZE)
+
+
+class BKTree:
+    """Burkhard-Keller tree over integer hashes with Hamming distance
+
+    Removal only tombstones a node; the tree is rebuilt from live entries once
+    tombstones make up half of it.
+    """
+
+    def __init__(self):
+        self.root = None  # [hash, key, alive, {distance: child}]
+        self.size = 0
+        self.tombstones = 0
+        self._nodes = {}
+
+    def add(self, hash_value, key):
+        node = [hash_value, key, True, {}]
+        self._nodes[key] = node
+        self.size += 1
+        if self.root is None:
+            self.root = node
+            return
+
+        current = self.root
+        while True:
+            distance = hamming_distance(hash_value, current[0])
+            child = current[3].get(distance)
+            if child is None:
+                current[3][distance] = node
+                return
+            current = child
+
+    def remove(self, key):
+        node = self._nodes.pop(key, None)
+        if node is None:
+            return
+        node[2] = False
+        self.size -= 1
+        self.tombstones += 1
+        if self.tombstones > self.size:
+            self._rebuild()
+
+    def nearest(self, hash_value, max_distance):
+        """Return ``(key, distance)`` of the closest live entry within range"""
+        best = None
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(hash_value, node[0])
+            if node[2] and distance <= max_distance:
+                if best is None or distance < best[1]:
+                    best = (node[1], distance)
+                    if distance == 0:
+                        break
+            # Triangle inequality: only children in [d - r, d + r] can match
+            for child_distance, child in node[3].items():
+                if abs(child_distance - distance) <= max_distance:
+                    stack.append(child)
+        return best
+
+    def _rebuild(self):
+        live = [(node[0], key) for key, node in self._nodes.items()]
+        self.root = None
+        self.size = 0
+        self.tombstones = 0
+        self._nodes = {}
+        for hash_value, key in live:
+            self.add(hash_value, key)
+
+
+class PerceptualImageCache:
+    """Bounded LRU of OCR results addressed by perceptual image hash
+
+    Results for different OCR modes are kept apart via ``namespace`` so a
+    Cloud Vision result is never served for a Gemini request and vice versa,
+    and results of different owners via ``owner`` so near matches only reuse
+    the same user's earlier uploads.
+    """
+
+    def __init__(self, max_entries=1000, max_distance=8, shared=None, ttl=None):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.shared = shared  # TwoTierCache for exact-hash lookups across workers
+        self.ttl = ttl
+        self._entries = OrderedDict()  # (namespace, owner, hash) -> result
+        self._trees = {}  # (namespace, owner) -> BKTree
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.exact_hits = 0
+        self.shared_hits = 0
+        self.evictions = 0
+        self.hit_distances = [0] * (HASH_BITS + 1)
+
+    def get(self, hash_value, namespace="default", owner=None):
+        with self._lock:
+            self.lookups += 1
+            tree = self._trees.get((namespace, owner))
+            match = tree.nearest(hash_value, self.max_distance) if tree else None
+            if match is not None:
+                key, distance = match
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.exact_hits += distance == 0
+                self.hit_distances[distance] += 1
+                return dict(self._entries[key], cache_distance=distance)
+
+        if self.shared is None:
+            return None
+        result = self.shared.get(self._shared_key(hash_value, namespace, owner))
+        if result is None:
+            return None
+        self.put(hash_value, result, namespace, owner, share=False)
+        with self._lock:
+            self.hits += 1
+            self.exact_hits += 1
+            self.shared_hits += 1
+            self.hit_distances[0] += 1
+        return dict(result, cache_distance=0)
+
+    def put(self, hash_value, result, namespace="default", owner=None, share=True):
+        if share and self.shared is not None:
+            self.shared.set(
+                self._shared_key(hash_value, namespace, owner), result, self.ttl
+            )
+
+        scope = (namespace, owner)
+        key = (namespace, owner, hash_value)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._entries[key] = result
+                return
+
+            self._entries[key] = result
+            self._trees.setdefault(scope, BKTree()).add(hash_value, key)
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                old_scope = old_key[:2]
+                tree = self._trees[old_scope]
+                tree.remove(old_key)
+                if tree.size == 0:
+                    del self._trees[old_scope]
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._trees.clear()
+
+    @staticmethod
+    def _shared_key(hash_value, namespace, owner):
+        return make_cache_key("ocr_image", namespace, owner, format(hash_value, "x"))
+
+    def stats(self):
+        """Hit rates plus the distance histogram of hits for threshold tuning"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "owners": len({scope[1] for scope in self._trees}),
+                "max_entries": self.max_entries,
+                "max_distance": self.max_distance,
+                "hash_bits": HASH_BITS,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "misses": self.lookups - self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "near_hit_rate": (
+                    (self.hits - self.exact_hits) / self.lookups
+                    if self.lookups
+                    else 0.0
+                ),
+                "shared_hits": self.shared_hits,
+                "evictions": self.evictions,
+                "hit_distances": {
+                    distance: count
+                    for distance, count in enumerate(self.hit_distances)
+                    if count
+                },
+            }
+
+
+_image_cache = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache(max_entries=1000, max_distance=8, shared=None, ttl=None):
+    """Return the process-wide OCR image cache, creating it on first use"""
+    global _image_cache
+    with _image_cache_lock:
+        if _image_cache is None:
+            _image_cache = PerceptualImageCache(max_entries, max_distance, shared, ttl)
+        return _image_cache
@@ -0,0 +1,231 @@
+"""
+Local image quality gate run before OCR
+
+Measures blur, exposure, contrast, text size and skew on a downsampled
+grayscale copy with NumPy so unreadable photos can be rejected with a useful
+hint, or fixed up, without spending a remote OCR call.
+"""
+
+import logging
+import numpy as np
+from PIL import Image, ImageOps
+
+from utils.page_classifier import ink_levels
+
+logger = logging.getLogger(__name__)
+
+# Wider than page classification: blur is measured on this copy
+QUALITY_ANALYSIS_WIDTH = 800
+
+# Candidate skew angles in degrees for projection-profile deskew, searched
+# coarse-to-fine; ink pixels are subsampled to keep each projection cheap
+SKEW_ANGLES = np.arange(-10.0, 11.0, 1.0)
+SKEW_REFINE_STEPS = np.array([-0.75, -0.5, -0.25, 0.25, 0.5, 0.75])
+SKEW_MAX_POINTS = 20000
+
+DEFAULT_THRESHOLDS = {
+    "min_sharpness": 200.0,  # Laplacian variance around text, 0-255 scale
+    "min_brightness": 0.25,
+    "max_brightness": 0.97,
+    "min_contrast": 0.25,  # below this a contrast stretch is applied
+    "min_stretchable_contrast": 0.08,  # below this the photo is unusable
+    "min_text_height": 10,  # median text line height in original pixels
+    "min_skew": 1.0,  # degrees; smaller tilts are left alone
+}
+
+HINTS = {
+    "blurry": "The photo is blurry. Hold the phone steady, tap to focus on the page and retake it.",
+    "too_dark": "The photo is too dark. Move to better light or turn on the flash.",
+    "overexposed": "The photo is washed out. Avoid direct light or glare on the page.",
+    "low_contrast": "The writing is too faint. Use a darker pen or better lighting.",
+    "text_too_small": "The text is too small. Move closer so the page fills the frame.",
+    "no_text": "No writing was found. Make sure the page is in the photo.",
+}
+
+
+def _load_analysis_image(image):
+    """Decode a small grayscale copy without decoding or converting full size
+
+    JPEG files are decoded at reduced scale via ``draft``; everything else is
+    box-reduced by an integer factor before the grayscale conversion.
+    """
+    if not isinstance(image, Image.Image):
+        image = Image.open(image)
+    width = image.width
+
+    if image.format == "JPEG":
+        image.draft("L", (QUALITY_ANALYSIS_WIDTH, QUALITY_ANALYSIS_WIDTH))
+    factor = -(-image.width // QUALITY_ANALYSIS_WIDTH)
+    if factor > 1:
+        image = image.reduce(factor)
+    image = ImageOps.exif_transpose(image.convert("L"))
+    return image, width / image.width
+
+
+def _projection_score(ys, xs, angle):
+    radians = np.deg2rad(angle)
+    projected = ys * np.cos(radians) - xs * np.sin(radians)
+    profile = np.bincount((projected - projected.min()).astype(np.int32))
+    return float((profile.astype(np.float64) ** 2).sum()), profile
+
+
+def _estimate_skew(mask):
+    """Return (angle, row profile at that angle) maximizing profile sharpness
+
+    Ink pixel coordinates are projected onto each candidate angle; text lines
+    line up into tall narrow peaks when the angle matches the page tilt.
+    """
+    ys, xs = np.nonzero(mask)
+    if len(ys) > SKEW_MAX_POINTS:
+        step = len(ys) // SKEW_MAX_POINTS + 1
+        ys, xs = ys[::step], xs[::step]
+
+    best = max(
+        (_projection_score(ys, xs, angle) + (float(angle),) for angle in SKEW_ANGLES),
+        key=lambda candidate: candidate[0],
+    )
+    for angle in best[2] + SKEW_REFINE_STEPS:
+        candidate = _projection_score(ys, xs, angle) + (float(angle),)
+        if candidate[0] > best[0]:
+            best = candidate
+    return best[2], best[1]
+
+
+def _median_line_height(profile):
+    """Median height of text-line bands in a row ink profile"""
+    if profile is None or not profile.any():
+        return 0.0
+    text_rows = profile > profile.max() * 0.05
+    edges = np.diff(np.concatenate(([0], text_rows.astype(np.int8), [0])))
+    heights = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+    heights = heights[heights >= 2]
+    return float(np.median(heights)) if len(heights) else 0.0
+
+
+def assess_image_quality(image, thresholds=None):
+    """Measure an image and decide whether it is worth sending to OCR
+
+    Returns metrics, blocking ``issues`` with user-facing ``hints``, and
+    ``enhancements`` (contrast stretch, deskew) that are likely to help.
+    """
+    limits = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+
+    small, scale = _load_analysis_image(image)
+    pixels = np.asarray(small)
+    histogram = np.bincount(pixels.ravel(), minlength=256)
+
+    # Contrast between the paper and the ink, however little of the photo is
+    # written on; faint writing down to the stretchable minimum is still ink
+    paper, ink = ink_levels(histogram, limits["min_stretchable_contrast"])
+    contrast = float(paper - ink) if ink is not None else 0.0
+    brightness = float(histogram @ np.arange(256) / histogram.sum() / 255.0)
+
+    # Contrast stretch (ink to black, paper to white) through a lookup table so
+    # everything stays uint8
+    lut = np.arange(256, dtype=np.float32) / 255.0
+    if ink is not None:
+        lut = np.clip((lut - ink) / contrast, 0.0, 1.0)
+    lut = (lut * 255).astype(np.uint8)
+    stretched = lut[pixels]
+
+    # Same rule as page_classifier.ink_mask, on the stretched histogram
+    stretched_histogram = np.bincount(lut, weights=histogram, minlength=256)
+    stretched_paper, stretched_ink = ink_levels(stretched_histogram)
+    if stretched_ink is None:
+        mask = np.zeros(pixels.shape, dtype=bool)
+    else:
+        mask = stretched < (stretched_paper + stretched_ink) / 2 * 255
+    ink_share = float(mask.mean())
+
+    # Laplacian variance, restricted to rows that contain ink so large empty
+    # margins do not make a sharp page look blurry
+    ink_rows = np.flatnonzero(mask[1:-1].any(axis=1)) + 1
+    if len(ink_rows):
+        levels = stretched.astype(np.int16)
+        laplacian = (
+            levels[ink_rows, :-2]
+            + levels[ink_rows, 2:]
+            + levels[ink_rows - 1, 1:-1]
+            + levels[ink_rows + 1, 1:-1]
+            - 4 * levels[ink_rows, 1:-1]
+        )
+        sharpness = float(laplacian.var())
+    else:
+        sharpness = 0.0
+
+    skew, profile = _estimate_skew(mask) if mask.any() else (0.0, None)
+    text_height = _median_line_height(profile) * scale
+
+    issues = []
+    if brightness < limits["min_brightness"]:
+        issues.append("too_dark")
+    elif contrast < limits["min_stretchable_contrast"]:
+        # Too little signal for a contrast stretch to recover
+        if brightness > limits["max_brightness"]:
+            issues.append("overexposed")
+        else:
+            issues.append("low_contrast")
+    if not mask.any():
+        issues.append("no_text")
+    else:
+        if sharpness < limits["min_sharpness"]:
+            issues.append("blurry")
+        if text_height < limits["min_text_height"]:
+            issues.append("text_too_small")
+
+    enhancements = []
+    if not issues:
+        if contrast < limits["min_contrast"]:
+            enhancements.append("contrast_stretch")
+        if abs(skew) >= limits["min_skew"]:
+            enhancements.append("deskew")
+
+    return {
+        "acceptable": not issues,
+        "issues": issues,
+        "hints": [HINTS[issue] for issue in issues],
+        "enhancements": enhancements,
+        "metrics": {
+            "sharpness": round(sharpness, 1),
+            "brightness": round(brightness, 3),
+            "contrast": round(contrast, 3),
+            "paper_level": round(float(paper), 3),
+            "ink_level": round(float(ink), 3) if ink is not None else None,
+            "ink_coverage": round(ink_share, 4),
+            "text_height_px": round(text_height, 1),
+            "skew_degrees": skew,
+        },
+    }
+
+
+def enhance_image(image_path, assessment, output_path):
+    """Apply the enhancements suggested by :func:`assess_image_quality` and
+    write the result to ``output_path`` as a lossless PNG, leaving the upload
+    untouched; returns the enhancements applied (nothing is written if none)"""
+    enhancements = assessment.get("enhancements", [])
+    if not enhancements:
+        return []
+
+    with Image.open(image_path) as source:
+        image = ImageOps.exif_transpose(source).convert("RGB")
+
+    metrics = assessment["metrics"]
+    if "contrast_stretch" in enhancements and metrics.get("ink_level") is not None:
+        # Map the measured ink level to black and the paper level to white;
+        # percentile cutoffs would clip sparse writing away as outliers
+        ink = metrics["ink_level"] * 255
+        span = max(metrics["paper_level"] * 255 - ink, 1.0)
+        image = image.point(
+            lambda level: int(min(max((level - ink) * 255 / span, 0), 255))
+        )
+    if "deskew" in enhancements:
+        # Rotating by the estimated tilt levels the text lines
+        image = image.rotate(
+            metrics["skew_degrees"],
+            resample=Image.Resampling.BICUBIC,
+            expand=True,
+            fillcolor="white",
+        )
+
+    image.save(output_path, format="PNG")
+    return enhancements
@@ -0,0 +1,62 @@
+"""
+Prompt fingerprints for caching LLM responses
+
+Most Gemini calls in the backend are low-temperature extraction and analysis
+prompts built from the same inputs, so re-running an evaluation on an unchanged
+document repeats identical requests. Responses are cached (see
+``utils.cache_backend``) under a fingerprint of (model, normalized prompt,
+response schema, generation config); whitespace-only differences in prompts map
+to the same key and binary parts are keyed by their SHA-256.
+"""
+
+import dataclasses
+import hashlib
+import json
+import re
+from enum import Enum
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(text):
+    """Collapse whitespace so re-indented prompt templates share a key"""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _canonical(value):
+    """Reduce prompts, SDK config objects and parts to JSON-able data"""
+    if hasattr(value, "model_dump"):  # google.genai pydantic types
+        return _canonical(value.model_dump(exclude_none=True))
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return _canonical(dataclasses.asdict(value))
+    if isinstance(value, dict):
+        return {
+            str(key): _canonical(item)
+            for key, item in sorted(value.items(), key=lambda pair: str(pair[0]))
+            if item is not None
+        }
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, (bytes, bytearray)):
+        return {"sha256": hashlib.sha256(value).hexdigest()}
+    if isinstance(value, str):
+        return normalize_prompt(value)
+    if isinstance(value, Enum):
+        return value.value
+    if value is None or isinstance(value, (int, float, bool)):
+        return value
+    return str(value)
+
+
+def llm_cache_key(model, contents, config=None):
+    """Fingerprint of a request: model, normalized contents and generation config
+
+    ``config`` is a ``GenerateContentConfig`` (including its response schema
+    and system instruction) or a legacy ``GenerationConfig``.
+    """
+    payload = json.dumps(
+        [model, _canonical(contents), _canonical(config)],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
@@ -0,0 +1,407 @@
+"""
+Token usage and cost accounting for Gemini calls
+
+Every Gemini request that succeeds through the ``GeminiGuard`` is recorded with
+its model, token counts from ``usage_metadata`` (prompt, output, cached and
+thinking tokens), latency and estimated cost, and attributed to:
+
+- the HTTP request (``g.request_id``), user and route, bound per request by
+  ``middleware.usage.UsageMiddleware``;
+- the pipeline stage, set around service calls with ``llm_stage("ocr")``.
+
+Attribution lives in context variables, so it follows the request into asyncio
+tasks and ``asyncio.to_thread``; work handed to thread pools has to be submitted
+through ``contextvars.copy_context().run`` or bound with ``bind_request_usage``.
+Responses served from the LLM response cache are recorded as cache hits
+without tokens.
+
+Records are buffered and written to the ``llm_usage`` MongoDB collection in
+bulk at the end of each request; without MongoDB a bounded in-memory log is
+kept instead (per process).
+"""
+
+import atexit
+import contextvars
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from pymongo import MongoClient
+
+logger = logging.getLogger(__name__)
+
+# Cached input tokens are billed at a quarter of the input price
+CACHED_INPUT_PRICE_RATIO = 0.25
+
+# Summed per group in reports
+SUM_FIELDS = (
+    "prompt_tokens",
+    "output_tokens",
+    "cached_tokens",
+    "thinking_tokens",
+    "total_tokens",
+    "latency_seconds",
+    "cost_usd",
+)
+
+GROUP_BY_FIELDS = {
+    "day": "day",
+    "route": "route",
+    "stage": "stage",
+    "model": "model",
+    "user": "user_id",
+}
+
+UNATTRIBUTED = "unattributed"
+# User IDs of anonymous clients under the per-IP token budget
+ANONYMOUS_USER_PREFIX = "anonymous:"
+
+_stage = contextvars.ContextVar("llm_stage", default=None)
+_request_usage = contextvars.ContextVar("llm_request_usage", default=None)
+
+
+@contextmanager
+def llm_stage(name):
+    """Attribute Gemini calls made inside the block to pipeline stage ``name``"""
+    token = _stage.set(name)
+    try:
+        yield
+    finally:
+        _stage.reset(token)
+
+
+def utc_day(moment=None):
+    """``YYYY-MM-DD`` of ``moment`` (default now) in UTC; usage is bucketed by it"""
+    return (moment or datetime.now(timezone.utc)).strftime("%Y-%m-%d")
+
+
+def seconds_until_next_day():
+    """Seconds until the UTC day (and with it the daily token budgets) rolls over"""
+    now = datetime.now(timezone.utc)
+    tomorrow = (now + timedelta(days=1)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    return int((tomorrow - now).total_seconds()) + 1
+
+
+def summarize(entries):
+    """Totals over usage records: call count, cache hits and ``SUM_FIELDS``"""
+    totals = dict.fromkeys(SUM_FIELDS, 0)
+    totals.update(calls=0, cache_hits=0)
+    for entry in entries:
+        totals["calls"] += 1
+        totals["cache_hits"] += 1 if entry.get("cache_hit") else 0
+        for name in SUM_FIELDS:
+            totals[name] += entry.get(name) or 0
+    return _finish_totals(totals)
+
+
+def _finish_totals(totals):
+    upstream_calls = totals["calls"] - totals["cache_hits"]
+    totals["avg_latency_seconds"] = round(
+        totals["latency_seconds"] / upstream_calls if upstream_calls else 0.0, 3
+    )
+    totals["latency_seconds"] = round(totals["latency_seconds"], 3)
+    totals["cost_usd"] = round(totals["cost_usd"], 6)
+    return totals
+
+
+class RequestUsage:
+    """Gemini calls made on behalf of one HTTP request"""
+
+    def __init__(self, request_id=None, route=None, user_id=None):
+        self.request_id = request_id
+        self.route = route
+        self.user_id = user_id
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def add(self, entry):
+        with self._lock:
+            self.calls.append(entry)
+
+    def summary(self):
+        """Per-call records, totals and totals per stage, for storing with the
+        request's ``ProcessedDocument``"""
+        with self._lock:
+            calls = list(self.calls)
+        stages = {}
+        for entry in calls:
+            stages.setdefault(entry["stage"], []).append(entry)
+        return {
+            "request_id": self.request_id,
+            "totals": summarize(calls),
+            "by_stage": {stage: summarize(group) for stage, group in stages.items()},
+            "calls": [
+                {
+                    key: entry[key]
+                    for key in ("stage", "model", "cache_hit", "attempts", *SUM_FIELDS)
+                }
+                for entry in calls
+            ],
+        }
+
+
+def begin_request_usage(request_id=None, route=None):
+    """Start collecting the current request's calls; returns the collector"""
+    usage = RequestUsage(request_id, route)
+    _request_usage.set(usage)
+    return usage
+
+
+def end_request_usage():
+    _request_usage.set(None)
+
+
+def current_request_usage():
+    return _request_usage.get()
+
+
+def set_usage_user(user_id):
+    """Attribute the current request's calls to ``user_id``"""
+    usage = _request_usage.get()
+    if usage is not None:
+        usage.user_id = user_id
+
+
+@contextmanager
+def bind_request_usage(usage):
+    """Attribute calls made inside the block (e.g. on a worker thread) to
+    ``usage``, a collector captured on the request thread"""
+    token = _request_usage.set(usage)
+    try:
+        yield
+    finally:
+        _request_usage.reset(token)
+
+
+def token_counts(usage_metadata):
+    """Token counts of a response's ``usage_metadata`` (either SDK)"""
+
+    def count(name):
+        return int(getattr(usage_metadata, name, None) or 0)
+
+    prompt = count("prompt_token_count")
+    output = count("candidates_token_count")
+    thinking = count("thoughts_token_count")
+    return {
+        "prompt_tokens": prompt,
+        "output_tokens": output,
+        "cached_tokens": count("cached_content_token_count"),
+        "thinking_tokens": thinking,
+        "total_tokens": count("total_token_count") or prompt + output + thinking,
+    }
+
+
+def record_llm_call(model, response=None, latency=0.0, cache_hit=False, attempts=1):
+    """Record one Gemini call (or response cache hit) for the current request,
+    user and stage; never raises"""
+    try:
+        model = str(model).split("/")[-1]
+        usage = _request_usage.get()
+        counts = token_counts(getattr(response, "usage_metadata", None))
+        now = datetime.now(timezone.utc)
+        entry = {
+            "timestamp": now,
+            "day": utc_day(now),
+            "request_id": usage.request_id if usage else None,
+            "user_id": usage.user_id if usage else None,
+            "route": (usage.route if usage else None) or UNATTRIBUTED,
+            "stage": _stage.get() or UNATTRIBUTED,
+            "model": model,
+            "cache_hit": cache_hit,
+            "attempts": attempts,
+            "latency_seconds": round(latency, 3),
+            **counts,
+        }
+
+        ledger = get_usage_ledger()
+        entry["cost_usd"] = ledger.cost(model, counts) if ledger else 0.0
+        if usage is not None:
+            usage.add(entry)
+        if ledger is not None:
+            ledger.record(entry)
+
+        logger.debug(
+            f"[{entry['request_id']}] {entry['stage']} {model}: "
+            f"{counts['prompt_tokens']} in / {counts['output_tokens']} out tokens "
+            f"in {latency:.2f}s{' (cache hit)' if cache_hit else ''}"
+        )
+    except Exception as e:
+        logger.error(f"Failed to record LLM usage: {str(e)}")
+
+
+class UsageLedger:
+    def __init__(self, collection=None, prices=None, max_buffer=50, max_memory=10000):
+        """``collection``: MongoDB collection for records, None keeps them in
+        memory; ``prices``: model -> (input, output) USD per million tokens"""
+        self.collection = collection
+        self.prices = prices or {}
+        self.max_buffer = max_buffer
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._memory = deque(maxlen=max_memory)
+        self.write_failures = 0
+
+    def cost(self, model, counts):
+        """Estimated USD cost of one call from its token counts"""
+        price = self.prices.get(model)
+        if not price:
+            return 0.0
+        input_price, output_price = price
+        uncached = counts["prompt_tokens"] - counts["cached_tokens"]
+        return (
+            uncached * input_price
+            + counts["cached_tokens"] * input_price * CACHED_INPUT_PRICE_RATIO
+            + (counts["output_tokens"] + counts["thinking_tokens"]) * output_price
+        ) / 1_000_000
+
+    def record(self, entry):
+        with self._lock:
+            self._buffer.append(entry)
+            full = len(self._buffer) >= self.max_buffer
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write buffered records; records that fail to write are kept in memory"""
+        with self._lock:
+            entries, self._buffer = self._buffer, []
+        if not entries:
+            return
+        if self.collection is not None:
+            try:
+                # insert_many adds _id to the dicts; request collectors share them
+                self.collection.insert_many(
+                    [dict(entry) for entry in entries], ordered=False
+                )
+                return
+            except Exception as e:
+                logger.error(f"Failed to write {len(entries)} LLM usage records: {e}")
+                self.write_failures += 1
+        with self._lock:
+            self._memory.extend(entries)
+
+    def tokens_used(self, user_id, day=None):
+        """Tokens ``user_id`` has used on ``day`` (default today, UTC)"""
+        day = day or utc_day()
+        self.flush()
+        used = sum(
+            entry["total_tokens"]
+            for entry in self._memory_entries()
+            if entry["user_id"] == user_id and entry["day"] == day
+        )
+        if self.collection is not None:
+            try:
+                rows = self.collection.aggregate(
+                    [
+                        {"$match": {"user_id": user_id, "day": day}},
+                        {"$group": {"_id": None, "tokens": {"$sum": "$total_tokens"}}},
+                    ]
+                )
+                used += sum(row["tokens"] for row in rows)
+            except Exception as e:
+                logger.error(f"Failed to read token usage of {user_id}: {str(e)}")
+        return used
+
+    def report(self, group_by="day", since_day=None, user_id=None):
+        """Usage totals per ``group_by`` (a ``GROUP_BY_FIELDS`` key) for records
+        from ``since_day`` on, optionally for one user; sorted by group"""
+        field = GROUP_BY_FIELDS[group_by]
+        self.flush()
+        groups = {}
+        for entry in self._memory_entries():
+            if since_day and entry["day"] < since_day:
+                continue
+            if user_id and entry["user_id"] != user_id:
+                continue
+            groups.setdefault(entry[field], []).append(entry)
+        rows = {key: summarize(entries) for key, entries in groups.items()}
+
+        if self.collection is not None:
+            match = {}
+            if since_day:
+                match["day"] = {"$gte": since_day}
+            if user_id:
+                match["user_id"] = user_id
+            try:
+                for row in self.collection.aggregate(
+                    [
+                        {"$match": match},
+                        {
+                            "$group": {
+                                "_id": f"${field}",
+                                "calls": {"$sum": 1},
+                                "cache_hits": {"$sum": {"$cond": ["$cache_hit", 1, 0]}},
+                                **{name: {"$sum": f"${name}"} for name in SUM_FIELDS},
+                            }
+                        },
+                    ]
+                ):
+                    key = row.pop("_id")
+                    merged = rows.get(key)
+                    if merged is not None:
+                        for name in ("calls", "cache_hits", *SUM_FIELDS):
+                            row[name] += merged[name]
+                    rows[key] = _finish_totals(row)
+            except Exception as e:
+                logger.error(f"Failed to aggregate LLM usage: {str(e)}")
+
+        return [
+            {group_by: key, **totals}
+            for key, totals in sorted(rows.items(), key=lambda item: str(item[0]))
+        ]
+
+    def _memory_entries(self):
+        with self._lock:
+            return list(self._memory)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "store": "mongodb" if self.collection is not None else "memory",
+                "buffered": len(self._buffer),
+                "in_memory": len(self._memory),
+                "write_failures": self.write_failures,
+            }
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def _open_collection(config):
+    uri = config.get("MONGODB_URI")
+    if config.get("LLM_USAGE_STORE", "mongodb") != "mongodb" or not uri:
+        return None
+    try:
+        client = MongoClient(uri, serverSelectionTimeoutMS=5000)
+        collection = client[config.get("MONGODB_DATABASE")].llm_usage
+        collection.create_index([("day", 1), ("user_id", 1)])
+        collection.create_index("request_id")
+        return collection
+    except Exception as e:
+        logger.error(f"LLM usage falls back to memory, MongoDB unavailable: {e}")
+        return None
+
+
+def get_usage_ledger(config=None):
+    """Return the process-wide usage ledger, or None before it can be configured
+    (no ``config`` and no app context)"""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            if config is None:
+                from flask import current_app, has_app_context
+
+                if not has_app_context():
+                    return None
+                config = current_app.config
+            _ledger = UsageLedger(
+                collection=_open_collection(config),
+                prices=config.get("GEMINI_TOKEN_PRICES", {}),
+            )
+            atexit.register(_ledger.flush)
+        return _ledger
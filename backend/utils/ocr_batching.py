@@ -0,0 +1,87 @@
+"""
+Packing several page images into one vision OCR request
+
+Each page image is preceded by a delimiter line, and the model is asked to
+repeat the delimiters in its output so the response can be split back into
+per-page text. Pages whose delimiter is missing are reported so the caller can
+retry them one at a time.
+"""
+
+import math
+import re
+
+PAGE_DELIMITER = "=== PAGE {page} ==="
+_DELIMITER_PATTERN = re.compile(r"^\s*=+\s*PAGE\s+(\d+)\s*=+\s*$", re.MULTILINE)
+
+# Gemini bills images up to 384px as one tile and larger images per 768px tile
+TOKENS_PER_IMAGE_TILE = 258
+IMAGE_TILE_SIZE = 768
+
+
+def build_batch_prompt(page_numbers):
+    labels = ", ".join(str(page) for page in page_numbers)
+    return (
+        f"The following {len(page_numbers)} images are document pages {labels}, "
+        "each preceded by its page delimiter line. Perform accurate OCR on every "
+        "page, including all handwritten and printed text. For each page, output "
+        "its delimiter line exactly as given on its own line, followed by the raw "
+        "text of that page only. Do not skip, merge or reorder pages."
+    )
+
+
+def parse_batch_response(text, page_numbers):
+    """Split a batched response into {page_number: text}
+
+    Only delimiters for requested pages count; pages that are missing or appear
+    more than once are left out so they can be retried individually.
+    """
+    expected = set(page_numbers)
+    matches = [
+        match
+        for match in _DELIMITER_PATTERN.finditer(text or "")
+        if int(match.group(1)) in expected
+    ]
+
+    seen = [int(match.group(1)) for match in matches]
+    pages = {}
+    for index, match in enumerate(matches):
+        page = int(match.group(1))
+        if seen.count(page) > 1:
+            continue
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(text)
+        pages[page] = text[match.end() : end].strip()
+    return pages
+
+
+def estimate_image_tokens(size):
+    width, height = size
+    if width <= 384 and height <= 384:
+        return TOKENS_PER_IMAGE_TILE
+    tiles = math.ceil(width / IMAGE_TILE_SIZE) * math.ceil(height / IMAGE_TILE_SIZE)
+    return tiles * TOKENS_PER_IMAGE_TILE
+
+
+def plan_batches(pages, max_pages, max_bytes, max_image_tokens):
+    """Greedily group pages, in order, under page, byte and token limits
+
+    ``pages`` are dicts with ``data`` (encoded bytes) and ``size``. A page that
+    exceeds a limit on its own still gets a batch of one.
+    """
+    batches = []
+    current, current_bytes, current_tokens = [], 0, 0
+    for page in pages:
+        page_bytes = len(page["data"])
+        page_tokens = estimate_image_tokens(page["size"])
+        if current and (
+            len(current) >= max_pages
+            or current_bytes + page_bytes > max_bytes
+            or current_tokens + page_tokens > max_image_tokens
+        ):
+            batches.append(current)
+            current, current_bytes, current_tokens = [], 0, 0
+        current.append(page)
+        current_bytes += page_bytes
+        current_tokens += page_tokens
+    if current:
+        batches.append(current)
+    return batches
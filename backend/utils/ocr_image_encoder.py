@@ -0,0 +1,121 @@
+"""
+Byte-size-optimized image encoding for vision OCR requests
+
+Vision models bill and upload by image size, and most of a colour PNG page is
+wasted bytes. Pages are converted to grayscale, scaled so text lines land at a
+target height (dense small print keeps more pixels than large handwriting) and
+re-encoded as JPEG or WebP before being sent.
+"""
+
+import io
+import logging
+import mimetypes
+from dataclasses import dataclass, replace
+
+from PIL import Image, ImageOps
+
+from utils.page_classifier import estimate_line_height
+
+logger = logging.getLogger(__name__)
+
+MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+
+@dataclass
+class OCRImageSettings:
+    """How images are re-encoded before a vision OCR call"""
+
+    format: str = "JPEG"  # JPEG, WEBP, PNG or ORIGINAL (send file bytes as-is)
+    quality: int = 80
+    grayscale: bool = True
+    max_dimension: int = 2048
+    min_dimension: int = 1024
+    # Scale so the median text line is about this tall; 0 disables adaptation
+    target_line_height: int = 28
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            format=config.get("OCR_IMAGE_FORMAT", cls.format)
+            .upper()
+            .replace("JPG", "JPEG"),
+            quality=config.get("OCR_IMAGE_QUALITY", cls.quality),
+            grayscale=config.get("OCR_IMAGE_GRAYSCALE", cls.grayscale),
+            max_dimension=config.get("OCR_IMAGE_MAX_DIMENSION", cls.max_dimension),
+            min_dimension=config.get("OCR_IMAGE_MIN_DIMENSION", cls.min_dimension),
+            target_line_height=config.get(
+                "OCR_TARGET_LINE_HEIGHT", cls.target_line_height
+            ),
+        )
+
+
+def target_long_side(image, settings):
+    """Pick the long-side length for an image from its text line height
+
+    Never upscales, and stays within ``[min_dimension, max_dimension]``.
+    """
+    long_side = max(image.size)
+    target = min(long_side, settings.max_dimension)
+
+    if settings.target_line_height:
+        line_height = estimate_line_height(image)
+        if line_height:
+            scaled = long_side * settings.target_line_height / line_height
+            target = min(target, max(scaled, settings.min_dimension))
+
+    return int(target)
+
+
+def encode_image_for_ocr(image_path, settings=None):
+    """Return ``(image_bytes, mime_type, info)`` ready for a vision request"""
+    settings = settings or OCRImageSettings()
+
+    if settings.format == "ORIGINAL":
+        with open(image_path, "rb") as image_file:
+            data = image_file.read()
+        mime_type = mimetypes.guess_type(image_path)[0] or "image/png"
+        return data, mime_type, {"bytes": len(data), "format": "original"}
+
+    with Image.open(image_path) as source:
+        image = ImageOps.exif_transpose(source)
+        image.load()
+    return encode_pil_image(image, settings)
+
+
+def encode_pil_image(image, settings=None):
+    """Encode an in-memory image; see :func:`encode_image_for_ocr`"""
+    settings = settings or OCRImageSettings()
+    if settings.format == "ORIGINAL":
+        # Nothing to pass through for an in-memory image; keep it lossless
+        settings = replace(settings, format="PNG")
+
+    if settings.grayscale:
+        image = image.convert("L")
+    elif image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    long_side = target_long_side(image, settings)
+    if long_side < max(image.size):
+        ratio = long_side / max(image.size)
+        new_size = tuple(max(int(dim * ratio), 1) for dim in image.size)
+        image = image.resize(new_size, Image.Resampling.LANCZOS)
+
+    buffer = io.BytesIO()
+    if settings.format == "WEBP":
+        image.save(buffer, "WEBP", quality=settings.quality, method=4)
+    elif settings.format == "PNG":
+        image.save(buffer, "PNG", optimize=True)
+    else:
+        image.save(buffer, "JPEG", quality=settings.quality, optimize=True)
+
+    data = buffer.getvalue()
+    return (
+        data,
+        MIME_TYPES.get(settings.format, "image/jpeg"),
+        {
+            "bytes": len(data),
+            "format": settings.format.lower(),
+            "size": list(image.size),
+            "mode": image.mode,
+        },
+    )
@@ -0,0 +1,176 @@
+"""
+Fast page classification on downsampled grayscale rasters
+
+Used before OCR to decide how a page should be processed without a remote call.
+All measurements run with NumPy on a small copy of the page.
+"""
+
+import logging
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Pages are analysed at this width; enough to resolve text lines, cheap to scan
+ANALYSIS_WIDTH = 600
+
+
+def to_analysis_array(image, width=ANALYSIS_WIDTH):
+    """Return a downsampled grayscale float array in [0, 1] (0 = black ink)"""
+    if not isinstance(image, Image.Image):
+        image = Image.open(image)
+    gray = image.convert("L")
+    if gray.width > width:
+        height = max(int(gray.height * width / gray.width), 1)
+        gray = gray.resize((width, height), Image.Resampling.BILINEAR)
+    return np.asarray(gray, dtype=np.float32) / 255.0
+
+
+# Ink is at least this much darker than the paper level (0-1 scale)
+MIN_INK_CONTRAST = 0.15
+# Fewer dark pixels than this share of the page are noise or dust, not ink
+MIN_INK_SHARE = 0.0002
+
+
+def intensity_histogram(gray):
+    """256-bin histogram of a grayscale array in [0, 1]"""
+    levels = np.clip(np.rint(gray * 255), 0, 255).astype(np.uint8)
+    return np.bincount(levels.ravel(), minlength=256)
+
+
+def ink_levels(histogram, min_contrast=MIN_INK_CONTRAST):
+    """Return (paper, ink) levels in [0, 1] from a 256-bin intensity histogram
+
+    Paper is the median level. Ink is the median of the pixels at least
+    ``min_contrast`` darker than the paper, so it is found however little of
+    the page is written on (a signature, a single line). ``ink`` is None when
+    there are (next to) no such pixels: a blank or flat page.
+    """
+    histogram = np.asarray(histogram, dtype=np.float64)
+    cumulative = np.cumsum(histogram)
+    total = cumulative[-1]
+    if not total:
+        return 1.0, None
+    paper_bin = int(np.searchsorted(cumulative, total / 2))
+    dark_limit = int(np.ceil(paper_bin - min_contrast * 255))
+    if dark_limit < 0:
+        return paper_bin / 255.0, None
+    dark = cumulative[dark_limit]
+    if dark <= total * MIN_INK_SHARE:
+        return paper_bin / 255.0, None
+    ink_bin = int(np.searchsorted(cumulative, dark / 2))
+    return paper_bin / 255.0, ink_bin / 255.0
+
+
+def ink_mask(gray):
+    """Binarize with a global threshold halfway between paper and ink levels"""
+    paper, ink = ink_levels(intensity_histogram(gray))
+    if ink is None:
+        # Blank or flat page: nothing stands out from the background
+        return np.zeros(gray.shape, dtype=bool)
+    return gray < (paper + ink) / 2
+
+
+def classify_text_style(image):
+    """Heuristically classify a page as "printed", "handwritten" or "unknown"
+
+    Printed text forms horizontal lines of near-constant height separated by
+    clean white gaps, so the row ink profile splits into regular bands.
+    Handwriting produces irregular band heights and gaps that never fully clear.
+    """
+    try:
+        mask = ink_mask(to_analysis_array(image))
+        if not mask.any():
+            return "unknown"
+
+        row_ink = mask.mean(axis=1)
+        text_rows = row_ink > 0.01
+        if text_rows.sum() < 5:
+            return "unknown"
+
+        # Lengths of consecutive text-row bands
+        edges = np.diff(np.concatenate(([0], text_rows.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        heights = ends - starts
+        heights = heights[heights >= 3]
+        if len(heights) < 3:
+            return "unknown"
+
+        height_variation = heights.std() / heights.mean()
+        # Share of rows between the first and last band that are completely clear
+        inner = slice(starts[0], ends[-1])
+        gap_rows = row_ink[inner][~text_rows[inner]]
+        clean_gaps = (gap_rows == 0).mean() if gap_rows.size else 0.0
+
+        if height_variation < 0.35 and clean_gaps > 0.6:
+            return "printed"
+        return "handwritten"
+
+    except Exception as e:
+        logger.warning(f"Page style classification failed: {str(e)}")
+        return "unknown"
+
+
+def ink_coverage(gray):
+    """Fraction of the page covered by ink"""
+    return float(ink_mask(gray).mean())
+
+
+def difference_hash(gray, hash_size=32):
+    """Perceptual dHash: sign of horizontal gradients on a hash_size grid
+
+    Returns the hash as a Python int of ``hash_size * hash_size`` bits. Robust to
+    re-scanning, small shifts and compression, unlike a byte-level digest.
+    """
+    thumbnail = Image.fromarray((gray * 255).astype(np.uint8)).resize(
+        (hash_size + 1, hash_size), Image.Resampling.BILINEAR
+    )
+    pixels = np.asarray(thumbnail, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(hash_a, hash_b):
+    """Number of differing bits between two perceptual hashes"""
+    return bin(hash_a ^ hash_b).count("1")
+
+
+def analyze_page(image, hash_size=32):
+    """Compute ink coverage and perceptual hash from one downsampled raster"""
+    gray = to_analysis_array(image)
+    return {
+        "ink_coverage": ink_coverage(gray),
+        "hash": difference_hash(gray, hash_size),
+        "hash_bits": hash_size * hash_size,
+    }
+
+
+def find_duplicate(page_hash, seen_hashes, max_distance_ratio=0.03, hash_bits=1024):
+    """Return the page number of a near-identical earlier page, if any
+
+    ``seen_hashes`` maps page numbers to hashes of pages already processed.
+    """
+    max_distance = int(hash_bits * max_distance_ratio)
+    for page_number, seen_hash in seen_hashes.items():
+        if hamming_distance(page_hash, seen_hash) <= max_distance:
+            return page_number
+    return None
+
+
+def estimate_line_height(image):
+    """Median text line height in original-image pixels, or None without text"""
+    if not isinstance(image, Image.Image):
+        image = Image.open(image)
+    gray = to_analysis_array(image)
+    mask = ink_mask(gray)
+    if not mask.any():
+        return None
+
+    text_rows = mask.mean(axis=1) > 0.01
+    edges = np.diff(np.concatenate(([0], text_rows.astype(np.int8), [0])))
+    heights = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+    heights = heights[heights >= 2]
+    if not len(heights):
+        return None
+    return float(np.median(heights)) * image.width / gray.shape[1]
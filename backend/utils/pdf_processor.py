@@ -3,11 +3,14 @@ PDF processing utilities for The Unfair Advantage platform
 """
 
 import os
+import subprocess
 import tempfile
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 from PIL import Image
 import logging
 
+from utils.raster_pool import run_render_tasks
+
 
 class PDFProcessor:
     def __init__(self, poppler_path=None):
@@ -59,6 +62,127 @@ class PDFProcessor:
             self.logger.error(f"Failed to convert PDF to images: {str(e)}")
             raise
 
+    def get_page_count(self, pdf_path):
+        """Return the number of pages using pdfinfo"""
+        info = pdfinfo_from_path(pdf_path, poppler_path=self.poppler_path)
+        return int(info["Pages"])
+
+    def extract_text_layer(self, pdf_path):
+        """Extract the embedded text of every page with pdftotext
+
+        Returns a list with one string per page (empty for pages without a text
+        layer), or an empty list when pdftotext is unavailable.
+        """
+        executable = "pdftotext.exe" if os.name == "nt" else "pdftotext"
+        if self.poppler_path:
+            executable = os.path.join(self.poppler_path, executable)
+
+        try:
+            completed = subprocess.run(
+                [executable, "-layout", "-enc", "UTF-8", pdf_path, "-"],
+                capture_output=True,
+                timeout=60,
+                check=True,
+            )
+        except Exception as e:
+            self.logger.warning(f"Text layer extraction unavailable: {str(e)}")
+            return []
+
+        # pdftotext terminates every page with a form feed
+        pages = completed.stdout.decode("utf-8", errors="replace").split("\f")
+        if pages and not pages[-1].strip():
+            pages = pages[:-1]
+        return pages
+
+    def has_usable_text_layer(self, text, min_chars=40):
+        """Whether a page's embedded text is substantial enough to skip OCR"""
+        stripped = "".join(text.split())
+        if len(stripped) < min_chars:
+            return False
+        # Broken font encodings come out as symbols/replacement characters
+        readable = sum(1 for char in stripped if char.isalnum())
+        return readable / len(stripped) >= 0.5
+
+    def convert_pdf_pages_to_images(self, pdf_path, page_numbers, dpi=200):
+        """Rasterize only the given 1-based pages, returning {page_number: image}"""
+        images = {}
+        page_numbers = sorted(page_numbers)
+
+        # Group consecutive pages so each poppler call covers a contiguous range
+        ranges = []
+        for page_number in page_numbers:
+            if ranges and page_number == ranges[-1][1] + 1:
+                ranges[-1][1] = page_number
+            else:
+                ranges.append([page_number, page_number])
+
+        for first_page, last_page in ranges:
+            pages = convert_from_path(
+                pdf_path,
+                dpi=dpi,
+                first_page=first_page,
+                last_page=last_page,
+                poppler_path=self.poppler_path,
+            )
+            for offset, page in enumerate(pages):
+                images[first_page + offset] = page
+
+        self.logger.info(
+            f"Rasterized {len(images)} page(s) of PDF for OCR in {len(ranges)} range(s)"
+        )
+        return images
+
+    def render_pages_for_ocr(
+        self,
+        pdf_path,
+        page_numbers,
+        encode_settings,
+        dpi=200,
+        max_workers=0,
+        thread_count=1,
+        pages_per_task=2,
+        classify_style=False,
+    ):
+        """Rasterize, analyse and encode pages in the render process pool
+
+        Returns {page_number: rendered page} where each rendered page carries the
+        encoded ``data`` and ``mime_type``, blank/duplicate ``analysis`` and,
+        if requested, the page ``text_style`` plus, for printed pages,
+        ``local_ocr_data`` (full-resolution PNG for Tesseract). Runs inline when
+        ``max_workers`` is 0.
+        """
+        page_numbers = sorted(page_numbers)
+
+        # Contiguous runs split into small tasks so pages spread over workers
+        tasks = []
+        for page_number in page_numbers:
+            task = tasks[-1] if tasks else None
+            if (
+                task
+                and page_number == task[2] + 1
+                and task[2] - task[1] + 1 < pages_per_task
+            ):
+                task[2] = page_number
+            else:
+                tasks.append(
+                    [
+                        pdf_path,
+                        page_number,
+                        page_number,
+                        dpi,
+                        self.poppler_path,
+                        thread_count,
+                        encode_settings,
+                        classify_style,
+                    ]
+                )
+
+        rendered = run_render_tasks([tuple(task) for task in tasks], max_workers)
+        self.logger.info(
+            f"Rendered {len(rendered)} page(s) of PDF for OCR in {len(tasks)} task(s)"
+        )
+        return {page["page"]: page for page in rendered}
+
     def optimize_image_for_ocr(self, image):
         """Optimize image for better OCR results"""
         try:
@@ -0,0 +1,148 @@
+"""
+Token budgeting and compact context serialization for LLM prompts
+
+Business analysis prompts embed profiles, scores, OCR fields and transcripts.
+Context is serialized as compact JSON with empty and placeholder values
+("Not specified", "N/A", empty lists) pruned, optionally dropping values a
+higher-priority section already carries. Prompts are measured before sending;
+when one exceeds its input token budget the least important sections are
+shortened first (keeping their head and tail) until it fits.
+
+Tokens are estimated locally (~4 characters per token for ASCII, ~2 for other
+scripts), which avoids a ``count_tokens`` round-trip per prompt and errs high
+for Indian-language transcripts.
+"""
+
+import json
+import textwrap
+from dataclasses import dataclass
+
+PLACEHOLDERS = {"", "not specified", "n/a", "na", "none", "null", "unknown", "-"}
+
+TRUNCATION_MARKER = "\n[... {omitted} characters omitted ...]\n"
+
+
+def estimate_tokens(text):
+    """Approximate Gemini token count of ``text``"""
+    if not text:
+        return 0
+    non_ascii = sum(1 for char in text if ord(char) > 127)
+    return int((len(text) - non_ascii) / 4 + non_ascii / 2) + 1
+
+
+def prune_context(value, seen=None):
+    """Drop None, empty and placeholder values (recursively)
+
+    With ``seen`` (a set of lower-cased strings), string values already in it
+    are dropped as well, so a section does not repeat what another one says.
+    Returns None when nothing is left.
+    """
+    if isinstance(value, dict):
+        pruned = {}
+        for key, item in value.items():
+            item = prune_context(item, seen)
+            if item is not None:
+                pruned[key] = item
+        return pruned or None
+    if isinstance(value, (list, tuple)):
+        pruned = [
+            item
+            for item in (prune_context(item, seen) for item in value)
+            if item is not None
+        ]
+        return pruned or None
+    if isinstance(value, str):
+        normalized = value.strip()
+        if normalized.lower() in PLACEHOLDERS:
+            return None
+        if seen is not None and normalized.lower() in seen:
+            return None
+        return normalized
+    return value
+
+
+def context_strings(value):
+    """Lower-cased string leaves of ``value``, for ``prune_context(seen=...)``"""
+    if isinstance(value, dict):
+        return set().union(*(context_strings(item) for item in value.values()))
+    if isinstance(value, (list, tuple)):
+        return set().union(*(context_strings(item) for item in value))
+    if isinstance(value, str):
+        return {value.strip().lower()}
+    return set()
+
+
+def compact_json(value, seen=None):
+    """Pruned, whitespace-free JSON for embedding in a prompt"""
+    pruned = prune_context(value, seen)
+    if pruned is None:
+        return "{}"
+    return json.dumps(pruned, ensure_ascii=False, separators=(",", ":"))
+
+
+def shorten(text, max_tokens):
+    """Cut ``text`` to about ``max_tokens``, keeping its head and tail"""
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    keep = max(int(len(text) * max_tokens / tokens) - len(TRUNCATION_MARKER), 0)
+    head = keep * 2 // 3
+    tail = keep - head
+    marker = TRUNCATION_MARKER.format(omitted=len(text) - keep)
+    return text[:head] + marker + (text[-tail:] if tail else "")
+
+
+@dataclass
+class PromptSection:
+    """A variable part of a prompt
+
+    Lower ``priority`` values are more important and are shortened last; no
+    section is cut below ``min_tokens``.
+    """
+
+    name: str
+    text: str
+    priority: int = 1
+    min_tokens: int = 200
+
+
+class PromptBudget:
+    def __init__(self, max_input_tokens=16000):
+        self.max_input_tokens = max_input_tokens
+
+    def render(self, template, sections, system_instruction="", **fixed):
+        """Fill ``{name}`` placeholders of ``template`` with the sections and the
+        ``fixed`` values, shortening sections until the prompt fits the budget
+
+        The ``system_instruction`` sent along with the prompt counts against the
+        budget too. Returns ``(prompt, stats)``; ``stats`` holds the estimated
+        ``input_tokens``, the ``budget`` and the ``truncated`` section names.
+        """
+        template = textwrap.dedent(template).strip()
+        texts = {section.name: section.text or "" for section in sections}
+        reserved = estimate_tokens(system_instruction)
+        fixed_tokens = reserved + estimate_tokens(
+            template.format(**fixed, **dict.fromkeys(texts, ""))
+        )
+        sizes = {name: estimate_tokens(text) for name, text in texts.items()}
+
+        over = fixed_tokens + sum(sizes.values()) - self.max_input_tokens
+        truncated = []
+        for section in sorted(sections, key=lambda section: -section.priority):
+            if over <= 0:
+                break
+            size = sizes[section.name]
+            target = max(size - over, section.min_tokens)
+            if target >= size:
+                continue
+            texts[section.name] = shorten(texts[section.name], target)
+            sizes[section.name] = estimate_tokens(texts[section.name])
+            over -= size - sizes[section.name]
+            truncated.append(section.name)
+
+        prompt = template.format(**fixed, **texts)
+        return prompt, {
+            "input_tokens": reserved + estimate_tokens(prompt),
+            "budget": self.max_input_tokens,
+            "truncated": truncated,
+        }
@@ -0,0 +1,128 @@
+"""
+Process pool for CPU-bound page rendering
+
+Rasterizing with poppler, page analysis, resizing and encoding all run in worker
+processes so concurrent uploads use every core instead of serializing on the
+GIL in request threads. Workers return encoded bytes plus the page measurements
+the OCR stage needs; the request thread only does I/O. Printed pages bound for
+local Tesseract also carry a lossless full-resolution copy, since the encoding
+made for Gemini is downscaled and lossy.
+
+The pool is shared by the whole process, so its size caps page-rendering
+concurrency across requests, and each task drives at most ``thread_count``
+poppler subprocesses.
+"""
+
+import io
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from pdf2image import convert_from_path
+
+from utils.ocr_image_encoder import encode_pil_image
+from utils.page_classifier import analyze_page, classify_text_style
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+
+
+def render_pages_task(
+    pdf_path,
+    first_page,
+    last_page,
+    dpi,
+    poppler_path,
+    thread_count,
+    encode_settings,
+    classify_style,
+):
+    """Rasterize, analyse and encode a contiguous page range (runs in a worker)"""
+    pages = convert_from_path(
+        pdf_path,
+        dpi=dpi,
+        first_page=first_page,
+        last_page=last_page,
+        poppler_path=poppler_path,
+        thread_count=thread_count,
+    )
+
+    rendered = []
+    for offset, page in enumerate(pages):
+        data, mime_type, encoding = encode_pil_image(page, encode_settings)
+        text_style = classify_text_style(page) if classify_style else None
+        rendered.append(
+            {
+                "page": first_page + offset,
+                "data": data,
+                "mime_type": mime_type,
+                "encoding": encoding,
+                "analysis": analyze_page(page),
+                "text_style": text_style,
+                "local_ocr_data": (
+                    full_resolution_png(page) if text_style == "printed" else None
+                ),
+            }
+        )
+        page.close()
+    return rendered
+
+
+def full_resolution_png(page):
+    """Lossless grayscale PNG of the page at render resolution, for Tesseract"""
+    buffer = io.BytesIO()
+    # Fast compression: the bytes only travel from the worker to the request
+    page.convert("L").save(buffer, "PNG", compress_level=1)
+    return buffer.getvalue()
+
+
+def get_raster_pool(max_workers):
+    """Return the process-wide render pool, or None when pooling is disabled"""
+    global _pool, _pool_workers
+    if not max_workers or max_workers < 1:
+        return None
+
+    with _pool_lock:
+        if _pool is None or _pool_workers != max_workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn: safe alongside request threads and the only option on Windows
+            _pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _pool_workers = max_workers
+            logger.info(f"Started page render pool with {max_workers} worker(s)")
+        return _pool
+
+
+def reset_raster_pool():
+    """Drop a broken pool so the next request starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = None
+
+
+def run_render_tasks(tasks, max_workers):
+    """Run ``render_pages_task`` argument tuples, in the pool when available
+
+    Returns the rendered pages of all tasks in task order. Falls back to running
+    inline if the pool is disabled or has broken.
+    """
+    pool = get_raster_pool(max_workers)
+    if pool is not None:
+        try:
+            futures = [pool.submit(render_pages_task, *task) for task in tasks]
+            return [page for future in futures for page in future.result()]
+        except BrokenProcessPool as e:
+            logger.error(f"Page render pool failed, rendering inline: {str(e)}")
+            reset_raster_pool()
+
+    return [page for task in tasks for page in render_pages_task(*task)]
@@ -548,3 +548,36 @@ def validate_file_size(file: FileStorage, max_size_mb: int = 16) -> bool:
     except Exception as e:
         logger.error(f"File size validation failed: {e}")
         return False
+
+
+def parse_page_range(spec: str, max_pages: int = 1000) -> List[int]:
+    """
+    Parse a page selection such as "1-3,5" into sorted page numbers
+
+    Args:
+        spec: Comma-separated 1-based pages and inclusive ranges
+        max_pages: Largest page number accepted
+
+    Returns:
+        Sorted, de-duplicated list of page numbers
+
+    Raises:
+        ValueError: If the selection is malformed or out of range
+    """
+    pages = set()
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        match = re.fullmatch(r"(\d+)\s*(?:-\s*(\d+))?", part)
+        if not match:
+            raise ValueError(f"Invalid page range '{part}'")
+        first = int(match.group(1))
+        last = int(match.group(2) or first)
+        if first < 1 or last < first or last > max_pages:
+            raise ValueError(f"Invalid page range '{part}'")
+        pages.update(range(first, last + 1))
+
+    if not pages:
+        raise ValueError("No pages selected")
+    return sorted(pages)
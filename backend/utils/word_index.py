@@ -0,0 +1,162 @@
+"""
+Compact word-timestamp index for transcribed audio
+
+Stores per-word timings as parallel float32 arrays plus a word-offset table into
+the transcript text, so a text span can be mapped back to an audio timestamp
+with a binary search instead of keeping one dict per word.
+"""
+
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from typing import Dict, Any, Optional
+
+_MAGIC = b"UAWI"
+_VERSION = 1
+# magic, version, word count, text length in bytes
+_HEADER = struct.Struct("<4sBII")
+
+# The stored format is float32 times and uint32 offsets; array typecode sizes
+# are platform-dependent ("I" or "L" may be 4 or 8 bytes), so pick by itemsize
+_FLOAT32 = "f"
+_UINT32 = next((code for code in "IL" if array(code).itemsize == 4), None)
+if _UINT32 is None or array(_FLOAT32).itemsize != 4:
+    raise ImportError("No 4-byte array typecodes for the word index format")
+# start and end time plus text offset
+_WORD_BYTES = 3 * 4
+
+
+class WordTimestampIndex:
+    """Array-backed index of word start/end times and text offsets"""
+
+    def __init__(self):
+        self.starts = array(_FLOAT32)
+        self.ends = array(_FLOAT32)
+        self.offsets = array(_UINT32)  # character offset of each word in ``text``
+        self._parts = []
+        self._length = 0
+        self._text = None
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def append(self, word: str, start_time: float, end_time: float):
+        """Append a word with its start and end time in seconds"""
+        if len(self.offsets):
+            self._parts.append(" ")
+            self._length += 1
+        self.offsets.append(self._length)
+        self.starts.append(start_time)
+        self.ends.append(end_time)
+        self._parts.append(word)
+        self._length += len(word)
+        self._text = None
+
+    @property
+    def text(self) -> str:
+        """Words joined by single spaces; offsets point into this string"""
+        if self._text is None:
+            self._text = "".join(self._parts)
+            self._parts = [self._text]
+        return self._text
+
+    def word_at(self, char_pos: int) -> int:
+        """Return the index of the word containing (or preceding) a character"""
+        if not len(self):
+            raise ValueError("Word index is empty")
+        return max(bisect_right(self.offsets, max(char_pos, 0)) - 1, 0)
+
+    def seek(self, char_start: int, char_end: Optional[int] = None) -> Dict[str, Any]:
+        """Map a character span of ``text`` to the audio time range it was spoken in"""
+        if char_end is None or char_end <= char_start:
+            char_end = char_start + 1
+
+        return self.words(self.word_at(char_start), self.word_at(char_end - 1))
+
+    def words(self, first: int, last: Optional[int] = None) -> Dict[str, Any]:
+        """Audio time range of words ``first`` to ``last`` (0-based, inclusive)
+
+        Words are numbered in transcript order, so positions can be counted
+        from the ``word_count`` of consecutive speaker turns.
+        """
+        if last is None:
+            last = first
+        if not 0 <= first <= last < len(self):
+            raise ValueError(f"Word positions must be within 0-{len(self) - 1}")
+
+        return {
+            "start_time": round(self.starts[first], 3),
+            "end_time": round(self.ends[last], 3),
+            "word_start": first,
+            "word_end": last,
+            "text": self.text[self.offsets[first] : self._word_end_offset(last)],
+        }
+
+    def find(self, phrase: str) -> Optional[Dict[str, Any]]:
+        """Seek to the first case-insensitive occurrence of a phrase"""
+        phrase = " ".join(phrase.split()).casefold()
+        if not phrase or not len(self):
+            return None
+
+        # Case folding can change length ("İ" -> "i̇", "ß" -> "ss"), so fold
+        # per character and keep each folded character's offset in ``text``
+        folded = []
+        origins = []
+        for offset, char in enumerate(self.text):
+            for folded_char in char.casefold():
+                folded.append(folded_char)
+                origins.append(offset)
+
+        start = "".join(folded).find(phrase)
+        if start < 0:
+            return None
+
+        return self.seek(origins[start], origins[start + len(phrase) - 1] + 1)
+
+    def to_bytes(self) -> bytes:
+        """Serialize to a little-endian binary blob for document storage"""
+        text_bytes = self.text.encode("utf-8")
+        arrays = [
+            array(_FLOAT32, self.starts),
+            array(_FLOAT32, self.ends),
+            array(_UINT32, self.offsets),
+        ]
+        if sys.byteorder != "little":
+            for arr in arrays:
+                arr.byteswap()
+
+        return b"".join(
+            [_HEADER.pack(_MAGIC, _VERSION, len(self), len(text_bytes))]
+            + [arr.tobytes() for arr in arrays]
+            + [text_bytes]
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "WordTimestampIndex":
+        """Load an index serialized with :meth:`to_bytes`"""
+        magic, version, count, text_length = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Unsupported word index format")
+        if len(data) != _HEADER.size + count * _WORD_BYTES + text_length:
+            raise ValueError("Truncated or corrupt word index")
+
+        index = cls()
+        position = _HEADER.size
+        for arr in (index.starts, index.ends, index.offsets):
+            size = count * arr.itemsize
+            arr.frombytes(data[position : position + size])
+            position += size
+            if sys.byteorder != "little":
+                arr.byteswap()
+
+        index._text = bytes(data[position : position + text_length]).decode("utf-8")
+        index._parts = [index._text]
+        index._length = len(index._text)
+        return index
+
+    def _word_end_offset(self, i: int) -> int:
+        if i + 1 < len(self):
+            return self.offsets[i + 1] - 1
+        return self._length
+
@@ -0,0 +1,100 @@
+import os
+import time
+import random
+import threading
+
+# Shared limits for every Gemini call the evaluator makes: a cap on concurrent
+# requests, retries with exponential backoff and full jitter on 429/5xx, and a
+# circuit breaker that fails fast after repeated upstream failures.
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", 4))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", 4))
+GEMINI_BACKOFF_BASE_SECONDS = float(os.getenv("GEMINI_BACKOFF_BASE_SECONDS", 1.0))
+GEMINI_BACKOFF_MAX_SECONDS = float(os.getenv("GEMINI_BACKOFF_MAX_SECONDS", 20.0))
+GEMINI_CIRCUIT_FAILURES = int(os.getenv("GEMINI_CIRCUIT_FAILURES", 5))
+GEMINI_CIRCUIT_RESET_SECONDS = float(os.getenv("GEMINI_CIRCUIT_RESET_SECONDS", 30))
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", 120))
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+_slots = threading.BoundedSemaphore(GEMINI_MAX_CONCURRENCY)
+_lock = threading.Lock()
+_circuit = {"failures": 0, "opened_at": None}
+_stats = {"calls": 0, "retries": 0, "failures": 0, "rejections": 0}
+
+
+class CircuitOpenError(Exception):
+    """Gemini failed repeatedly; calls are rejected until the cool-down passes"""
+
+
+def error_status(error):
+    code = getattr(error, "code", None)
+    if isinstance(code, int) and not isinstance(code, bool):
+        return code
+    if isinstance(error, TimeoutError) or type(error).__name__ == "DeadlineExceeded":
+        return 504
+    return None
+
+
+def _check_circuit():
+    with _lock:
+        opened_at = _circuit["opened_at"]
+        if opened_at and time.monotonic() - opened_at < GEMINI_CIRCUIT_RESET_SECONDS:
+            _stats["rejections"] += 1
+            raise CircuitOpenError("Gemini is unavailable, try again shortly")
+
+
+def _record(failed):
+    with _lock:
+        if failed:
+            _circuit["failures"] += 1
+            if _circuit["failures"] >= GEMINI_CIRCUIT_FAILURES:
+                _circuit["opened_at"] = time.monotonic()
+        else:
+            _circuit["failures"] = 0
+            _circuit["opened_at"] = None
+
+
+def guarded_call(fn):
+    """Run fn() (one Gemini request) with the concurrency cap, retries and breaker"""
+    with _lock:
+        _stats["calls"] += 1
+    attempt = 0
+    while True:
+        _check_circuit()
+        with _slots:
+            try:
+                result = fn()
+                _record(failed=False)
+                return result
+            except Exception as e:
+                if error_status(e) not in RETRYABLE_STATUS:
+                    raise
+                _record(failed=True)
+                if attempt >= GEMINI_MAX_RETRIES:
+                    with _lock:
+                        _stats["failures"] += 1
+                    raise
+        delay = random.uniform(0, min(GEMINI_BACKOFF_MAX_SECONDS, GEMINI_BACKOFF_BASE_SECONDS * 2 ** attempt))
+        attempt += 1
+        with _lock:
+            _stats["retries"] += 1
+        time.sleep(delay)
+
+
+class GuardedModel:
+    """GenerativeModel wrapper whose generate_content goes through guarded_call"""
+
+    def __init__(self, model):
+        self._model = model
+
+    def generate_content(self, *args, **kwargs):
+        kwargs.setdefault("request_options", {"timeout": GEMINI_TIMEOUT_SECONDS})
+        return guarded_call(lambda: self._model.generate_content(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+
+def guard_stats():
+    with _lock:
+        return dict(_stats, circuit_open=_circuit["opened_at"] is not None)
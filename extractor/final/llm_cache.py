@@ -0,0 +1,84 @@
+import os
+import re
+import json
+import time
+import hashlib
+import dataclasses
+import threading
+from collections import OrderedDict
+
+# In-memory cache of Gemini responses for the market analysis and stakeholder
+# view prompts. Keyed by model, whitespace-normalized prompt and generation
+# config, so re-running the pipeline on an unchanged business case is free.
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", 256))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", 3600))
+
+_entries = OrderedDict()  # key -> (text, expires_at, latency)
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "bypasses": 0, "evictions": 0, "latency_saved_seconds": 0.0}
+
+
+class CachedResponse:
+    """Minimal stand-in for a Gemini response served from the cache"""
+
+    def __init__(self, text):
+        self.text = text
+        self.cached = True
+
+
+def cache_key(model_name, prompt, generation_config=None):
+    config = dataclasses.asdict(generation_config) if dataclasses.is_dataclass(generation_config) else generation_config
+    payload = json.dumps(
+        [model_name, re.sub(r"\s+", " ", prompt).strip(), config],
+        sort_keys=True,
+        default=str,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cached_generate(model, prompt, generation_config=None, use_cache=True):
+    """model.generate_content(prompt, generation_config=...) with an LRU/TTL cache
+
+    Set use_cache=False to force a fresh call (the cache is still refreshed).
+    """
+    key = cache_key(getattr(model, "model_name", str(model)), prompt, generation_config)
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key) if use_cache else None
+        if entry and entry[1] > now:
+            _entries.move_to_end(key)
+            _stats["hits"] += 1
+            _stats["latency_saved_seconds"] += entry[2]
+            return CachedResponse(entry[0])
+        if entry:
+            del _entries[key]
+        _stats["misses" if use_cache else "bypasses"] += 1
+
+    started = time.perf_counter()
+    response = model.generate_content(prompt, generation_config=generation_config)
+    latency = time.perf_counter() - started
+
+    try:
+        text = response.text
+    except Exception:
+        # Blocked responses have no text and are not cached
+        return response
+    if text:
+        with _lock:
+            _entries[key] = (text, time.monotonic() + LLM_CACHE_TTL_SECONDS, latency)
+            _entries.move_to_end(key)
+            while len(_entries) > LLM_CACHE_SIZE:
+                _entries.popitem(last=False)
+                _stats["evictions"] += 1
+    return response
+
+
+def cache_stats():
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return dict(
+            _stats,
+            entries=len(_entries),
+            hit_rate=_stats["hits"] / lookups if lookups else 0.0,
+        )
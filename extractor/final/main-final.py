@@ -16,6 +16,7 @@ import re
 from pydub import AudioSegment
 import subprocess
 from dotenv import load_dotenv
+from gemini_retry import GuardedModel
 
 # Load environment variables from .env file
 load_dotenv()
@@ -33,7 +34,7 @@ if os.path.exists(credentials_path):
 try:
     if GEMINI_API_KEY:
         genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel('models/gemini-2.0-flash')
+        model = GuardedModel(genai.GenerativeModel('models/gemini-2.0-flash'))
         st.sidebar.success("Gemini API Connected")
     else:
         model = None
@@ -4,6 +4,8 @@ import os
 from dotenv import load_dotenv
 import google.generativeai as genai
 from google.generativeai.types import GenerationConfig
+from llm_cache import cached_generate
+from gemini_retry import GuardedModel
 import re
 
 # Load environment variables
@@ -15,7 +17,7 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 # Configure Gemini API
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('models/gemini-2.0-flash')
+    model = GuardedModel(genai.GenerativeModel('models/gemini-2.0-flash'))
 else:
     model = None
 
@@ -112,7 +114,8 @@ def analyze_market_with_search(business_case_json):
         Base your analysis on the actual search results provided.
         """
         
-        response = model.generate_content(
+        response = cached_generate(
+            model,
             analysis_prompt,
             generation_config=GenerationConfig(
                 temperature=0.2,
@@ -208,7 +211,8 @@ def calculate_enhanced_scores(enhanced_business_case):
         Consider market research data heavily - businesses with strong market validation should score higher.
         """
         
-        response = model.generate_content(
+        response = cached_generate(
+            model,
             scoring_prompt,
             generation_config=GenerationConfig(
                 temperature=0.2,
@@ -4,6 +4,7 @@ import json
 from pathlib import Path
 import google.generativeai as genai
 from google.generativeai.types import GenerationConfig
+from llm_cache import cached_generate
 
 def generate_entrepreneur_view(content, model, user_language='en-IN'):
     """Generate entrepreneur-focused view using Gemini API in user's language"""
@@ -97,7 +98,8 @@ def generate_entrepreneur_view(content, model, user_language='en-IN'):
     """
     
     try:
-        response = model.generate_content(
+        response = cached_generate(
+            model,
             prompt,
             generation_config=GenerationConfig(
                 temperature=0.2,
@@ -164,7 +166,8 @@ def generate_mentor_view(content, model):
     """
     
     try:
-        response = model.generate_content(
+        response = cached_generate(
+            model,
             prompt,
             generation_config=GenerationConfig(
                 temperature=0.3,
@@ -244,7 +247,8 @@ def generate_admin_view(content, model):
     """
     
     try:
-        response = model.generate_content(
+        response = cached_generate(
+            model,
             prompt,
             generation_config=GenerationConfig(
                 temperature=0.2,